@@ -477,13 +477,13 @@ export default function RoomPage() {
     }
   }, [room, isVideoEnabled])
 
-  // Effect to periodically sync participants and their status
+  // Effect to sync participants and their status whenever the room reports a change
   useEffect(() => {
     if (!room || !isConnected) return
 
     const syncParticipants = () => {
       const allParticipants = Array.from(room.remoteParticipants.values())
-      console.log('Periodic sync - participants:', allParticipants.map(p => p.identity))
+      console.log('Participant sync - participants:', allParticipants.map(p => p.identity))
       setParticipants(allParticipants)
       
       // Update participant status
@@ -500,10 +500,20 @@ export default function RoomPage() {
     // Sync immediately
     syncParticipants()
 
-    // Set up periodic sync every 1 second for real-time updates
-    const interval = setInterval(syncParticipants, 1000)
+    // Re-sync only when participant or track state actually changes
+    const syncEvents = [
+      RoomEvent.ParticipantConnected,
+      RoomEvent.ParticipantDisconnected,
+      RoomEvent.TrackPublished,
+      RoomEvent.TrackUnpublished,
+      RoomEvent.TrackMuted,
+      RoomEvent.TrackUnmuted,
+    ]
+    syncEvents.forEach(event => room.on(event, syncParticipants))
 
-    return () => clearInterval(interval)
+    return () => {
+      syncEvents.forEach(event => room.off(event, syncParticipants))
+    }
   }, [room, isConnected])
 
   // Handle transfer initiation
@@ -543,7 +553,8 @@ export default function RoomPage() {
       
       console.log('Sending conversation data for summary:', conversationData)
       
-      const summaryResponse = await fetch(`${API_URL}/api/summary/generate`, {
+      // Stream the summary so it shows up as soon as the first tokens arrive
+      const summaryResponse = await fetch(`${API_URL}/api/summary/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -554,14 +565,51 @@ export default function RoomPage() {
         })
       })
 
-      if (!summaryResponse.ok) {
+      if (!summaryResponse.ok || !summaryResponse.body) {
         throw new Error(`Summary generation failed: ${summaryResponse.status}`)
       }
 
-      const summaryData = await summaryResponse.json()
-      console.log('Call summary generated:', summaryData)
-      setCallSummary(summaryData)
+      setCallSummary({ summary: '', status: 'streaming' })
       setShowTransferModal(true)
+
+      const reader = summaryResponse.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      let streamedSummary = ''
+      let finished = false
+
+      while (!finished) {
+        const { value, done } = await reader.read()
+        if (done) break
+
+        buffer += decoder.decode(value, { stream: true })
+        const events = buffer.split('\n\n')
+        buffer = events.pop() || ''
+
+        for (const rawEvent of events) {
+          const eventType = rawEvent.match(/^event: (.*)$/m)?.[1]
+          const data = JSON.parse(rawEvent.match(/^data: (.*)$/m)?.[1] || '{}')
+
+          if (eventType === 'draft') {
+            // Instant extractive summary, replaced by the first LLM token
+            setCallSummary({ summary: data.summary, status: 'draft' })
+          } else if (eventType === 'token') {
+            streamedSummary += data.text
+            setCallSummary({ summary: streamedSummary, status: 'streaming' })
+          } else if (eventType === 'done') {
+            console.log('Call summary generated:', data)
+            setCallSummary({ summary: data.summary, status: 'success' })
+            finished = true
+          } else if (eventType === 'error') {
+            throw new Error(data.message)
+          }
+        }
+      }
+
+      if (!finished) {
+        throw new Error('Summary stream ended unexpectedly')
+      }
+
       setTransferStatus('Transfer initiated. Please explain the summary to Agent B.')
       
     } catch (error) {
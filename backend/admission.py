@@ -0,0 +1,259 @@
+"""
+Admission Control
+Priority queueing, per-route concurrency limits and load shedding for LLM-backed work
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from metrics import registry
+from rate_limit import TokenBucket
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued; retry_after is a hint in seconds"""
+
+    def __init__(self, route: str, reason: str, retry_after: float):
+        super().__init__(f"{route} request rejected ({reason})")
+        self.route = route
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+def tenant_key(room_name: str, separator: str = "-") -> str:
+    """Tenant of a room when the client doesn't name one: the room-name prefix ("acme" for "acme-call-42")"""
+    if not separator:
+        return room_name
+    return room_name.split(separator, 1)[0]
+
+
+class RoutePolicy:
+    """
+    How one class of LLM-backed work is admitted.
+
+    priority orders waiters for the shared slots (lower goes first),
+    max_concurrency caps how many of them the route may hold at once, and
+    latency_budget is the longest a request may queue before it is shed
+    (None waits indefinitely, 0 never queues).
+    """
+
+    def __init__(self, name: str, priority: int, max_concurrency: int, latency_budget: Optional[float]):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.latency_budget = latency_budget
+        self.in_flight = 0
+        self.queued = 0
+        self.ewma_hold: Optional[float] = None
+
+        labels = {"route": name}
+        self._queue_wait = registry.histogram("admission_queue_wait_seconds", "Time admitted requests waited for an LLM slot", labels)
+        self._queued_gauge = registry.gauge("admission_queued", "Requests waiting for an LLM slot", labels)
+        self._in_flight_gauge = registry.gauge("admission_in_flight", "Admitted requests holding an LLM slot", labels)
+        self._admitted = registry.counter("admission_admitted_total", "Requests admitted to an LLM slot", labels)
+
+    def _rejected(self, reason: str):
+        return registry.counter("admission_rejected_total", "Requests shed by admission control", {"route": self.name, "reason": reason})
+
+    def stats(self) -> Dict:
+        return {
+            "priority": self.priority,
+            "max_concurrency": self.max_concurrency,
+            "latency_budget_seconds": self.latency_budget,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "ewma_hold_seconds": self.ewma_hold,
+            "admitted": int(self._admitted.value),
+            "queue_wait_p95_seconds": self._queue_wait.quantile(0.95),
+            "rejected": {
+                reason: int(self._rejected(reason).value) for reason in ("predicted_wait", "timeout")
+            },
+        }
+
+
+class AdmissionController:
+    """
+    Gatekeeper in front of outbound LLM calls.
+
+    Every route shares slots LLM slots. Waiters are granted a slot in
+    priority order (FIFO within a priority) as soon as one is free and their
+    route is below its own max_concurrency; a waiter held back by its route
+    limit doesn't block other routes behind it.
+
+    Requests are shed rather than left to queue past their route's budget:
+    when the predicted wait (requests queued at the same or higher priority
+    times the EWMA slot hold time, spread over the free-running slots)
+    already exceeds the budget the request is rejected on arrival, otherwise
+    it is rejected once it has waited the whole budget. Callers decide what
+    a rejection means (429, or a degraded answer).
+
+    check_tenant() is the separate per-tenant token bucket, for callers to
+    apply before they start any work.
+    """
+
+    def __init__(self,
+                 slots: int,
+                 routes: List[RoutePolicy],
+                 tenant_rate: float = 0.0,
+                 tenant_burst: Optional[float] = None,
+                 max_tenants: int = 10000,
+                 alpha: float = 0.2):
+        if slots < 1:
+            raise ValueError("slots must be at least 1")
+        self.slots = slots
+        self.routes: Dict[str, RoutePolicy] = {route.name: route for route in routes}
+        self.tenant_rate = tenant_rate
+        self.tenant_burst = tenant_burst
+        self.max_tenants = max_tenants
+        self.alpha = alpha
+        self.in_flight = 0
+        self.ewma_hold: Optional[float] = None
+        self._waiters: List = []
+        self._sequence = itertools.count()
+        self._tenants: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+        self._slots_in_use = registry.gauge("admission_slots_in_use", "Shared LLM slots held by admitted requests")
+        self._tenant_rejected = registry.counter("admission_tenant_rejected_total", "Requests rejected by a per-tenant rate limit")
+
+    def check_tenant(self, tenant: Optional[str]):
+        """
+        Take one token from the tenant's bucket
+
+        Raises:
+            AdmissionRejected: the tenant is over its rate
+        """
+        if not tenant or self.tenant_rate <= 0:
+            return
+        bucket = self._tenants.get(tenant)
+        if bucket is None:
+            # One shared metric label for every tenant, so tenant count can't blow up the registry
+            bucket = self._tenants[tenant] = TokenBucket("tenant", self.tenant_rate, self.tenant_burst)
+            if len(self._tenants) > self.max_tenants:
+                self._tenants.popitem(last=False)
+        else:
+            self._tenants.move_to_end(tenant)
+        if not bucket.try_acquire():
+            self._tenant_rejected.inc()
+            raise AdmissionRejected("tenant", "tenant_rate", (1 - bucket.available()) / self.tenant_rate)
+
+    @asynccontextmanager
+    async def admit(self, route_name: str):
+        """
+        Hold one LLM slot for the duration of the block
+
+        Raises:
+            AdmissionRejected: the request would wait longer than its route's latency budget
+        """
+        route = self.routes[route_name]
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        route.queued += 1
+        route._queued_gauge.set(route.queued)
+        heapq.heappush(self._waiters, (route.priority, next(self._sequence), route, future))
+        self._dispatch()
+
+        if not future.done():
+            predicted = self._predicted_wait(route)
+            if route.latency_budget is not None and predicted > route.latency_budget:
+                self._withdraw(route, future)
+                raise self._reject(route, "predicted_wait", predicted)
+            try:
+                await asyncio.wait_for(asyncio.shield(future), route.latency_budget)
+            except asyncio.TimeoutError:
+                if not future.done():
+                    self._withdraw(route, future)
+                    raise self._reject(route, "timeout", self._predicted_wait(route) or route.latency_budget)
+                # Granted in the same instant the budget ran out: keep the slot
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._finish(route, 0.0)
+                else:
+                    self._withdraw(route, future)
+                raise
+
+        granted = time.monotonic()
+        route._queue_wait.observe(granted - started)
+        try:
+            yield
+        finally:
+            self._finish(route, time.monotonic() - granted)
+
+    def _dispatch(self):
+        """Grant free slots to waiters, best priority first"""
+        held_back = []
+        while self._waiters and self.in_flight < self.slots:
+            entry = heapq.heappop(self._waiters)
+            route, future = entry[2], entry[3]
+            if future.done():
+                # Withdrawn: shed, timed out or the caller went away
+                continue
+            if route.in_flight >= route.max_concurrency:
+                held_back.append(entry)
+                continue
+            route.queued -= 1
+            route._queued_gauge.set(route.queued)
+            self._start(route)
+            future.set_result(None)
+        for entry in held_back:
+            heapq.heappush(self._waiters, entry)
+
+    def _predicted_wait(self, route: RoutePolicy) -> float:
+        """Seconds until a queued request of this route is likely to get a slot; 0 before any hold time is known"""
+        predicted = 0.0
+        if self.ewma_hold is not None:
+            ahead = sum(other.queued for other in self.routes.values() if other.priority <= route.priority)
+            predicted = ahead * self.ewma_hold / self.slots
+        if route.ewma_hold is not None and route.in_flight >= route.max_concurrency:
+            predicted = max(predicted, route.queued * route.ewma_hold / route.max_concurrency)
+        return predicted
+
+    def _withdraw(self, route: RoutePolicy, future: asyncio.Future):
+        future.cancel()
+        route.queued -= 1
+        route._queued_gauge.set(route.queued)
+
+    def _reject(self, route: RoutePolicy, reason: str, retry_after: float) -> AdmissionRejected:
+        route._rejected(reason).inc()
+        return AdmissionRejected(route.name, reason, retry_after)
+
+    def _start(self, route: RoutePolicy):
+        self.in_flight += 1
+        route.in_flight += 1
+        route._admitted.inc()
+        self._slots_in_use.set(self.in_flight)
+        route._in_flight_gauge.set(route.in_flight)
+
+    def _finish(self, route: RoutePolicy, held: float):
+        self.in_flight -= 1
+        route.in_flight -= 1
+        self._slots_in_use.set(self.in_flight)
+        route._in_flight_gauge.set(route.in_flight)
+        if held > 0:
+            self.ewma_hold = held if self.ewma_hold is None else self.alpha * held + (1 - self.alpha) * self.ewma_hold
+            route.ewma_hold = held if route.ewma_hold is None else self.alpha * held + (1 - self.alpha) * route.ewma_hold
+        self._dispatch()
+
+    def stats(self) -> Dict:
+        return {
+            "slots": self.slots,
+            "slots_in_use": self.in_flight,
+            "ewma_hold_seconds": self.ewma_hold,
+            "routes": {name: route.stats() for name, route in self.routes.items()},
+            "tenants": {
+                "rate_per_second": self.tenant_rate or None,
+                "burst": self.tenant_burst,
+                "tracked": len(self._tenants),
+                "rejected": int(self._tenant_rejected.value),
+            },
+        }
@@ -0,0 +1,362 @@
+"""
+Agent Pool
+Indexed Agent B availability: best-agent selection by load or idle time and skills, with reservations
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+AVAILABLE = "available"
+OFFLINE = "offline"
+
+STRATEGIES = ("least_loaded", "longest_idle")
+
+
+class Agent:
+    """A receiving agent: the room transfers are sent to, skill tags and how many calls it can take at once"""
+
+    def __init__(self, agent_id: str, room_name: str, skills: FrozenSet[str], capacity: int):
+        self.agent_id = agent_id
+        self.room_name = room_name
+        self.skills = skills
+        self.capacity = capacity
+        self.status = AVAILABLE
+        self.load = 0
+        # transfer_id -> monotonic expiry of the reservation
+        self.reservations: Dict[str, float] = {}
+        # Last time a call was assigned to or ended for this agent
+        self.since = time.monotonic()
+        self.heap_seq: Optional[int] = None
+
+    @property
+    def busy(self) -> int:
+        return self.load + len(self.reservations)
+
+    def selectable(self) -> bool:
+        return self.status == AVAILABLE and self.busy < self.capacity
+
+    def view(self) -> Dict:
+        return {
+            "agent_id": self.agent_id,
+            "room_name": self.room_name,
+            "skills": sorted(self.skills),
+            "capacity": self.capacity,
+            "status": self.status,
+            "active_calls": self.load,
+            "reserved": len(self.reservations),
+            "idle_seconds": round(time.monotonic() - self.since, 3),
+        }
+
+
+class AgentPool:
+    """
+    Receiving agents indexed for "best available agent" queries.
+
+    Agents with the same skill set share one heap of the agents that can take
+    a call right now, ordered by load (share of capacity in use), then by how
+    long ago they were last assigned or finished a call ("least_loaded"), or
+    the other way round ("longest_idle"). best(skills) compares the tops of
+    the heaps whose skill set covers the required skills, so a query costs
+    O(g + log n) for g distinct skill sets rather than a scan of every agent.
+    Entries are invalidated lazily: every change re-pushes the agent with a
+    new sequence number and older entries are dropped when they surface.
+
+    reserve() takes the best agent out of rotation for a transfer in one
+    synchronous step (no other coroutine can pick the same slot), acquire()
+    additionally waits for one to free up, in arrival order. A reservation
+    becomes an active call with confirm(), goes back with release(), and is
+    released on its own after reservation_ttl_seconds.
+    The pool is per process; in cluster mode it lives on one worker and the
+    others reach it through that worker's API.
+    """
+
+    def __init__(self, strategy: str = "least_loaded", reservation_ttl_seconds: float = 300.0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown agent pool strategy: {strategy}")
+        self.strategy = strategy
+        self.reservation_ttl_seconds = reservation_ttl_seconds
+        self._agents: Dict[str, Agent] = {}
+        self._rooms: Dict[str, str] = {}
+        self._heaps: Dict[FrozenSet[str], List[Tuple]] = {}
+        self._sequence = itertools.count()
+        self._stale = 0
+        self._selectable = 0
+        self._pending = 0
+        self._reserved: Dict[str, str] = {}
+        self._expiries: List[Tuple[float, str]] = []
+        self._waiters: Deque[Tuple[FrozenSet[str], str, asyncio.Future]] = deque()
+
+        self._available = registry.gauge("agent_pool_available", "Agents that can take a transfer now")
+        self._agents_gauge = registry.gauge("agent_pool_agents", "Registered agents")
+        self._reserved_gauge = registry.gauge("agent_pool_reservations", "Agents reserved for a transfer in progress")
+        self._waiting = registry.gauge("agent_pool_waiting", "Transfers waiting for an agent")
+        self._wait = registry.histogram("agent_pool_wait_seconds", "Time a transfer waited for an available agent")
+        self._no_agent = registry.counter("agent_pool_no_agent_total", "Transfers that found no available agent")
+        self._settled = {
+            outcome: registry.counter("agent_pool_reservations_settled_total", "Agent reservations by outcome", {"outcome": outcome})
+            for outcome in ("confirmed", "released", "expired")
+        }
+
+    def _key(self, agent: Agent) -> Tuple[float, float]:
+        load = agent.busy / agent.capacity
+        return (load, agent.since) if self.strategy == "least_loaded" else (agent.since, load)
+
+    def _index(self, agent: Agent):
+        """(Re-)enter the agent in its skill set's heap if it can take a call; any older entry goes stale"""
+        if agent.heap_seq is not None:
+            self._stale += 1
+            self._selectable -= 1
+            agent.heap_seq = None
+        if agent.selectable():
+            self._selectable += 1
+            agent.heap_seq = next(self._sequence)
+            heapq.heappush(self._heaps.setdefault(agent.skills, []), (*self._key(agent), agent.heap_seq, agent.agent_id))
+        if self._stale > 2 * len(self._agents) + 64:
+            self._compact()
+
+    def _compact(self):
+        """Rebuild the heaps from the live entries only"""
+        self._heaps = {}
+        for agent in self._agents.values():
+            if agent.heap_seq is not None:
+                self._heaps.setdefault(agent.skills, []).append((*self._key(agent), agent.heap_seq, agent.agent_id))
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+        self._stale = 0
+
+    def _top(self, heap: List[Tuple]) -> Optional[Tuple]:
+        while heap:
+            entry = heap[0]
+            agent = self._agents.get(entry[-1])
+            if agent is not None and agent.heap_seq == entry[-2]:
+                return entry
+            heapq.heappop(heap)
+            self._stale = max(0, self._stale - 1)
+        return None
+
+    def _refresh_gauges(self):
+        self._agents_gauge.set(len(self._agents))
+        self._available.set(self._selectable)
+        self._reserved_gauge.set(len(self._reserved))
+        self._waiting.set(self._pending)
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, transfer_id = heapq.heappop(self._expiries)
+            agent = self._agents.get(self._reserved.get(transfer_id, ""))
+            if agent is not None and agent.reservations.get(transfer_id) == expires_at:
+                logger.warning("Agent reservation expired", extra={"transfer_id": transfer_id, "agent_id": agent.agent_id})
+                self._settle(transfer_id, "expired")
+
+    def _hold(self, agent: Agent, transfer_id: str):
+        expires_at = time.monotonic() + self.reservation_ttl_seconds
+        agent.reservations[transfer_id] = expires_at
+        agent.since = time.monotonic()
+        self._reserved[transfer_id] = agent.agent_id
+        heapq.heappush(self._expiries, (expires_at, transfer_id))
+        self._index(agent)
+
+    def _settle(self, transfer_id: str, outcome: str) -> Optional[Agent]:
+        agent = self._agents.get(self._reserved.pop(transfer_id, ""))
+        if agent is None or agent.reservations.pop(transfer_id, None) is None:
+            return None
+        if outcome == "confirmed":
+            agent.load += 1
+            agent.since = time.monotonic()
+        self._settled[outcome].inc()
+        self._index(agent)
+        if outcome != "confirmed":
+            self._serve_waiters()
+        return agent
+
+    def _serve_waiters(self):
+        """Hand agents that just became available to waiting transfers, oldest first"""
+        for required, transfer_id, future in list(self._waiters):
+            if future.done():
+                continue
+            agent = self.best(required)
+            if agent is not None:
+                self._hold(agent, transfer_id)
+                self._pending -= 1
+                future.set_result(agent)
+        while self._waiters and self._waiters[0][2].done():
+            self._waiters.popleft()
+        self._refresh_gauges()
+
+    def register(self, agent_id: str, room_name: str, skills: Iterable[str] = (), capacity: int = 1) -> Agent:
+        """Add an agent, or update its room, skills and capacity (active calls and reservations are kept)"""
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        agent = self._agents.get(agent_id)
+        if agent is None:
+            agent = self._agents[agent_id] = Agent(agent_id, room_name, frozenset(skills), capacity)
+        else:
+            self._rooms.pop(agent.room_name, None)
+            agent.room_name, agent.skills, agent.capacity = room_name, frozenset(skills), capacity
+        self._rooms[room_name] = agent_id
+        self._index(agent)
+        self._serve_waiters()
+        return agent
+
+    def remove(self, agent_id: str) -> bool:
+        agent = self._agents.pop(agent_id, None)
+        if agent is None:
+            return False
+        if self._rooms.get(agent.room_name) == agent_id:
+            del self._rooms[agent.room_name]
+        if agent.heap_seq is not None:
+            self._stale += 1
+            self._selectable -= 1
+        for transfer_id in agent.reservations:
+            self._reserved.pop(transfer_id, None)
+        self._refresh_gauges()
+        return True
+
+    def set_status(self, agent_id: str, status: str) -> Optional[Agent]:
+        """Take an agent out of rotation (offline) or put it back (available)"""
+        if status not in (AVAILABLE, OFFLINE):
+            raise ValueError(f"Unknown agent status: {status}")
+        agent = self._agents.get(agent_id)
+        if agent is None:
+            return None
+        agent.status = status
+        self._index(agent)
+        self._serve_waiters()
+        return agent
+
+    def forget_room(self, room_name: str):
+        """The agent's room is gone: stop sending transfers to it until it registers again"""
+        agent_id = self._rooms.get(room_name)
+        if agent_id is not None:
+            self.set_status(agent_id, OFFLINE)
+
+    def get(self, agent_id: str) -> Optional[Agent]:
+        return self._agents.get(agent_id)
+
+    def agent_for_room(self, room_name: str) -> Optional[Agent]:
+        return self._agents.get(self._rooms.get(room_name, ""))
+
+    def best(self, skills: Iterable[str] = ()) -> Optional[Agent]:
+        """The agent reserve() would pick for these skills right now, without reserving it"""
+        required = frozenset(skills)
+        best_entry = None
+        for skill_set, heap in self._heaps.items():
+            if not required <= skill_set:
+                continue
+            entry = self._top(heap)
+            if entry is not None and (best_entry is None or entry < best_entry):
+                best_entry = entry
+        return self._agents[best_entry[-1]] if best_entry is not None else None
+
+    def reserve(self, transfer_id: str, skills: Iterable[str] = ()) -> Optional[Agent]:
+        """Reserve the best available agent with all of the skills for a transfer; None if there is none"""
+        self._expire()
+        agent = self.best(skills)
+        if agent is not None:
+            self._hold(agent, transfer_id)
+        self._refresh_gauges()
+        return agent
+
+    async def acquire(self, transfer_id: str, skills: Iterable[str] = (), timeout: float = 0.0) -> Optional[Agent]:
+        """reserve(), waiting up to timeout seconds (behind earlier waiters) for an agent to become available"""
+        started = time.monotonic()
+        required = frozenset(skills)
+        if not self._pending:
+            agent = self.reserve(transfer_id, required)
+            if agent is not None or timeout <= 0:
+                self._wait.observe(0.0)
+                if agent is None:
+                    self._no_agent.inc()
+                return agent
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((required, transfer_id, future))
+        self._pending += 1
+        self._serve_waiters()
+        deadline = started + timeout
+        try:
+            while not future.done():
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                # Expired reservations only free their agent when someone calls
+                # _expire(), so also wake up at the earliest reservation deadline
+                wake = min(deadline, self._expiries[0][0]) if self._expiries else deadline
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), max(0.0, wake - now))
+                except asyncio.TimeoutError:
+                    self._expire()
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(transfer_id)
+            else:
+                future.cancel()
+                self._pending -= 1
+            self._refresh_gauges()
+            raise
+        if not future.done():
+            future.cancel()
+            self._pending -= 1
+            self._no_agent.inc()
+            self._refresh_gauges()
+            return None
+        self._wait.observe(time.monotonic() - started)
+        return future.result()
+
+    def claim(self, room_name: str, transfer_id: str) -> Optional[Agent]:
+        """Count a transfer sent to an explicitly chosen room against its agent, even past capacity"""
+        self._expire()
+        agent = self.agent_for_room(room_name)
+        if agent is not None:
+            self._hold(agent, transfer_id)
+            self._refresh_gauges()
+        return agent
+
+    def confirm(self, transfer_id: str) -> Optional[Agent]:
+        """The transfer completed: its reservation becomes an active call"""
+        agent = self._settle(transfer_id, "confirmed")
+        self._refresh_gauges()
+        return agent
+
+    def release(self, transfer_id: str) -> Optional[Agent]:
+        """The transfer failed: the agent goes back into rotation"""
+        agent = self._settle(transfer_id, "released")
+        self._refresh_gauges()
+        return agent
+
+    def call_ended(self, agent_id: str) -> Optional[Agent]:
+        agent = self._agents.get(agent_id)
+        if agent is None:
+            return None
+        agent.load = max(0, agent.load - 1)
+        agent.since = time.monotonic()
+        self._index(agent)
+        self._serve_waiters()
+        return agent
+
+    def agents(self) -> List[Dict]:
+        return [agent.view() for agent in sorted(self._agents.values(), key=lambda agent: agent.agent_id)]
+
+    def stats(self) -> Dict:
+        self._expire()
+        self._refresh_gauges()
+        return {
+            "strategy": self.strategy,
+            "agents": len(self._agents),
+            "available": int(self._available.value),
+            "reservations": len(self._reserved),
+            "waiting": int(self._waiting.value),
+            "skill_sets": len(self._heaps),
+            "wait_p95_seconds": self._wait.quantile(0.95),
+            "no_agent": int(self._no_agent.value),
+            "settled": {outcome: int(counter.value) for outcome, counter in self._settled.items()},
+        }
@@ -0,0 +1,167 @@
+"""
+Admission control under an LLM overload
+
+The fake provider is given a fixed capacity (--capacity calls at once,
+--call-seconds each; calls beyond it queue at the "provider"). A burst of
+ad-hoc POST /api/summary/generate requests arrives at --adhoc-rate per
+second, well above that capacity, while --transfers transfers without a
+precomputed summary need one. Every request is for its own room and sends no
+X-Tenant-ID, so nothing is served from the summary cache or rate limited per
+tenant.
+
+Each strategy reports transfer summary latency and how the ad-hoc requests
+were answered (LLM summary, degraded extractive summary, or 429):
+
+    unbounded   no admission control: every request goes straight to the provider
+    admission   the backend's admission controller with --slots shared LLM slots
+
+Then a single tenant (X-Tenant-ID: flood) sends --flood requests at once, to
+show the per-tenant token bucket answering 429 past its burst.
+
+Usage:
+    python backend/benchmarks/admission_bench.py [--adhoc 200] [--adhoc-rate 40] [--transfers 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from fastapi import HTTPException
+
+from stubs import StubLiveKitAPI, import_backend, latency_report
+
+CONVERSATION = [
+    "Caller: I was charged twice for my subscription this month.",
+    "Agent A: I see two payments on the invoice; one of them is a duplicate.",
+    "Caller: Can you refund the duplicate charge to my card?",
+    "Agent A: I'll escalate this to billing and open a ticket for the refund.",
+]
+
+
+def limit_provider_capacity(provider, capacity: int):
+    """Calls beyond capacity wait for a free one, like a provider answering 429s until it catches up"""
+    semaphore = asyncio.Semaphore(capacity)
+    complete = provider.complete
+
+    async def complete_with_capacity(*args, **kwargs):
+        async with semaphore:
+            return await complete(*args, **kwargs)
+
+    provider.complete = complete_with_capacity
+
+
+def unbounded_controller():
+    from admission import AdmissionController, RoutePolicy
+    routes = [RoutePolicy(name, priority, max_concurrency=10 ** 6, latency_budget=None)
+              for name, priority in (("transfer", 0), ("summary", 1), ("test", 2), ("prewarm", 3))]
+    return AdmissionController(slots=10 ** 6, routes=routes)
+
+
+async def run_strategy(name: str, main, args) -> dict:
+    transfer_latency, adhoc_latency = [], []
+    outcomes = {"llm": 0, "degraded": 0, "rejected_429": 0}
+    transfers_degraded = 0
+
+    async def adhoc(i: int):
+        room_name = f"{name}{i}-adhoc"
+        await main.state_store.set_conversation(room_name, CONVERSATION + [f"Caller: reference {name} {i}"])
+        started = time.perf_counter()
+        try:
+            result = await main.generate_summary(main.SummaryRequest(room_name=room_name, conversation_history=[]), x_tenant_id="")
+        except HTTPException as e:
+            assert e.status_code == 429, e
+            outcomes["rejected_429"] += 1
+            return
+        if result["degraded"]:
+            outcomes["degraded"] += 1
+        else:
+            outcomes["llm"] += 1
+            adhoc_latency.append(time.perf_counter() - started)
+
+    async def transfer(i: int):
+        nonlocal transfers_degraded
+        caller_room = f"{name}{i}-transfer"
+        await main.state_store.set_conversation(caller_room, CONVERSATION + [f"Caller: transfer {name} {i}"])
+        started = time.perf_counter()
+        summary = await main._transfer_summary({"caller_room": caller_room})
+        transfer_latency.append(time.perf_counter() - started)
+        transfers_degraded += summary["degraded"]
+
+    tasks = []
+    started = time.perf_counter()
+    transfer_every = max(1, args.adhoc // args.transfers)
+    for i in range(args.adhoc):
+        tasks.append(asyncio.create_task(adhoc(i)))
+        if i % transfer_every == transfer_every // 2 and i // transfer_every < args.transfers:
+            tasks.append(asyncio.create_task(transfer(i // transfer_every)))
+        await asyncio.sleep(1 / args.adhoc_rate)
+    await asyncio.gather(*tasks)
+
+    return {
+        "strategy": name,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+        "transfer_summary": {**latency_report(transfer_latency), "degraded": transfers_degraded},
+        "adhoc_llm_summary": latency_report(adhoc_latency),
+        "adhoc_outcomes": outcomes,
+    }
+
+
+async def tenant_flood(main, requests: int) -> dict:
+    statuses = {"served": 0, "rejected_429": 0}
+
+    async def one(i: int):
+        try:
+            await main.generate_summary(main.SummaryRequest(room_name=f"flood-{i}", conversation_history=CONVERSATION), x_tenant_id="flood")
+            statuses["served"] += 1
+        except HTTPException as e:
+            assert e.status_code == 429, e
+            statuses["rejected_429"] += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return {"tenant": "flood", "requests": requests, "burst": main.admission.tenant_burst, **statuses}
+
+
+async def run(args):
+    os.environ["LLM_FAKE_PROVIDER"] = "1"
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    os.environ["LLM_FAKE_FIRST_TOKEN_SECONDS"] = str(args.call_seconds)
+    os.environ["LLM_FAKE_TOKEN_SECONDS"] = "0"
+    os.environ["SUMMARY_MODE"] = "window"
+    os.environ["SUMMARY_PREWARM_DEBOUNCE_SECONDS"] = "3600"
+    os.environ["ADMISSION_LLM_SLOTS"] = str(args.slots)
+    os.environ.setdefault("ADMISSION_TENANT_RATE_PER_SECOND", "10")
+    main = import_backend()
+    main.livekit_rooms.client = StubLiveKitAPI()
+    limit_provider_capacity(main.fake_provider, args.capacity)
+
+    admission = main.admission
+    results = []
+    for name, controller in (("unbounded", unbounded_controller()), ("admission", admission)):
+        main.admission = controller
+        results.append(await run_strategy(name, main, args))
+    main.admission = admission
+
+    print(json.dumps({
+        "provider_capacity": args.capacity,
+        "call_seconds": args.call_seconds,
+        "adhoc_rate_per_second": args.adhoc_rate,
+        "slots": args.slots,
+        "budgets_s": {name: route.latency_budget for name, route in admission.routes.items()},
+        "results": results,
+        "tenant_flood": await tenant_flood(main, args.flood),
+        "queue_wait_p95_s": {name: route.stats()["queue_wait_p95_seconds"] for name, route in admission.routes.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adhoc", type=int, default=200)
+    parser.add_argument("--adhoc-rate", type=float, default=40)
+    parser.add_argument("--transfers", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=4)
+    parser.add_argument("--call-seconds", type=float, default=0.3)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--flood", type=int, default=60)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,153 @@
+"""
+Agent pool: best-agent selection cost and caller hold time
+
+1. Registers --agents agents (each with one of --skill-sets skill sets drawn
+   from --skills tags) and times one transfer's worth of pool operations,
+   reserve + confirm + call_ended, against a linear scan for the best
+   available agent over every agent (what choosing by looking at the room
+   list amounts to).
+2. Simulates a call center: --calls transfers arrive at --arrival-rate per
+   second for --pool-agents agents that each talk to a caller for about
+   --talk-seconds. Reports how long callers wait for an agent when the
+   transfer queues in the pool (AgentPool.acquire) versus retrying a
+   one-shot reserve after a 503 every --retry-seconds.
+
+Usage:
+    python backend/benchmarks/agent_pool_bench.py [--agents 1000,10000,100000] [--calls 400]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from stubs import BACKEND_DIR, latency_report
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from agent_pool import AgentPool  # noqa: E402
+
+
+def build_pool(agents: int, skills: int, skill_sets: int, seed: int = 11) -> AgentPool:
+    rng = random.Random(seed)
+    tags = [f"skill{i}" for i in range(skills)]
+    profiles = [rng.sample(tags, rng.randint(1, 3)) for _ in range(skill_sets)]
+    pool = AgentPool()
+    for i in range(agents):
+        pool.register(f"agent{i}", f"agent-room-{i}", rng.choice(profiles), capacity=rng.choice((1, 1, 2)))
+    return pool
+
+
+def linear_best(pool: AgentPool, required: frozenset):
+    best, best_key = None, None
+    for agent in pool._agents.values():
+        if agent.selectable() and required <= agent.skills:
+            key = pool._key(agent)
+            if best_key is None or key < best_key:
+                best, best_key = agent, key
+    return best
+
+
+def selection(args, agents: int) -> dict:
+    pool = build_pool(agents, args.skills, args.skill_sets)
+    rng = random.Random(5)
+    queries = [frozenset(rng.sample(sorted({s for a in pool._agents.values() for s in a.skills}), 1)) for _ in range(args.queries)]
+
+    scan = []
+    for required in queries[:max(10, args.queries // 20)]:
+        started = time.perf_counter()
+        linear_best(pool, required)
+        scan.append(time.perf_counter() - started)
+
+    cycle, misses = [], 0
+    for i, required in enumerate(queries):
+        started = time.perf_counter()
+        agent = pool.reserve(f"t{i}", required)
+        if agent is not None:
+            pool.confirm(f"t{i}")
+            pool.call_ended(agent.agent_id)
+        else:
+            misses += 1
+        cycle.append(time.perf_counter() - started)
+        # The pool and the scan must agree on which agent is best
+        if i % 97 == 0:
+            expected = linear_best(pool, required)
+            actual = pool.best(required)
+            assert pool._key(expected) == pool._key(actual) if expected else actual is None
+
+    def us(samples):
+        report = latency_report(samples)
+        return {"p50_us": round(report["p50_ms"] * 1000, 2), "p99_us": round(report["p99_ms"] * 1000, 2)}
+
+    return {
+        "agents": agents,
+        "skill_sets": pool.stats()["skill_sets"],
+        "linear_scan_best": us(scan),
+        "pool_reserve_confirm_end": us(cycle),
+        "no_agent": misses,
+    }
+
+
+async def hold_times(args, strategy: str) -> dict:
+    pool = AgentPool()
+    for i in range(args.pool_agents):
+        pool.register(f"agent{i}", f"agent-room-{i}", ["support"])
+    rng = random.Random(3)
+    waits = []
+
+    async def talk(agent_id: str):
+        await asyncio.sleep(rng.expovariate(1 / args.talk_seconds))
+        pool.call_ended(agent_id)
+
+    async def call(i: int):
+        transfer_id = f"{strategy}-{i}"
+        started = time.perf_counter()
+        if strategy == "queue":
+            agent = await pool.acquire(transfer_id, ["support"], timeout=3600)
+        else:
+            while (agent := pool.reserve(transfer_id, ["support"])) is None:
+                await asyncio.sleep(args.retry_seconds)
+        waits.append(time.perf_counter() - started)
+        pool.confirm(transfer_id)
+        await talk(agent.agent_id)
+
+    tasks = []
+    for i in range(args.calls):
+        tasks.append(asyncio.create_task(call(i)))
+        await asyncio.sleep(rng.expovariate(args.arrival_rate))
+    await asyncio.gather(*tasks)
+    return {"strategy": strategy, "caller_wait": latency_report(waits)}
+
+
+async def run(args):
+    sizes = [selection(args, int(count)) for count in args.agents.split(",")]
+    utilization = args.arrival_rate * args.talk_seconds / args.pool_agents
+    print(json.dumps({
+        "cpu_count": os.cpu_count(),
+        "selection": sizes,
+        "hold_time": {
+            "agents": args.pool_agents,
+            "arrival_rate_per_second": args.arrival_rate,
+            "talk_seconds": args.talk_seconds,
+            "utilization": round(utilization, 2),
+            "results": [await hold_times(args, "queue"), await hold_times(args, "retry")],
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", default="1000,10000,100000")
+    parser.add_argument("--skills", type=int, default=30)
+    parser.add_argument("--skill-sets", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--pool-agents", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--arrival-rate", type=float, default=95)
+    parser.add_argument("--talk-seconds", type=float, default=0.2)
+    parser.add_argument("--retry-seconds", type=float, default=1.0)
+    asyncio.run(run(parser.parse_args()))
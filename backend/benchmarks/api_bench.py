@@ -0,0 +1,267 @@
+"""
+Warm-transfer API benchmark suite
+
+Drives backend/main.py in-process through its ASGI app, against a stub
+LiveKit API and the fake LLM provider (both with configurable latency), and
+reports throughput and p50/p95/p99 latency for:
+
+    rooms_create         concurrent POST /api/rooms/create, one new room each
+    join_burst           concurrent POST /api/rooms/join into a few existing rooms
+    transfer_initiate    POST /api/transfer/initiate until the summary is ready,
+                         plus end-to-end time until each transfer completes
+    summary_generate     concurrent POST /api/summary/generate on distinct histories
+    ws_fanout            --subscribers open /ws/{room_name} connections on one room;
+                         reports time from each join request to delivery on every socket
+
+Results are written as JSON (--output) together with the commit, Python
+version and CPU count, so runs can be compared between commits with
+--compare previous.json.
+
+Usage:
+    python backend/benchmarks/api_bench.py [--scenarios rooms_create,ws_fanout] [--requests 500]
+        [--concurrency 50] [--subscribers 500] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from stubs import BACKEND_DIR, ASGIWebSocket, StubLiveKitAPI, import_backend, latency_report
+
+SCENARIOS = ("rooms_create", "join_burst", "transfer_initiate", "summary_generate", "ws_fanout")
+
+
+def scenario_report(samples, errors: int, elapsed: float) -> dict:
+    return {
+        **latency_report(samples),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+async def timed_requests(count: int, concurrency: int, request):
+    """Run request(i) for i in range(count) with bounded concurrency; returns (samples, errors, elapsed)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request(i)
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return samples, errors, time.perf_counter() - started
+
+
+async def bench_rooms_create(client: httpx.AsyncClient, main, args) -> dict:
+    samples, errors, elapsed = await timed_requests(args.requests, args.concurrency, lambda i: client.post(
+        "/api/rooms/create", json={"room_name": f"create-{i}", "participant_type": "caller"},
+    ))
+    return scenario_report(samples, errors, elapsed)
+
+
+async def bench_join_burst(client: httpx.AsyncClient, main, args) -> dict:
+    rooms = [f"join-{i}" for i in range(args.join_rooms)]
+    for room_name in rooms:
+        await client.post("/api/rooms/create", json={"room_name": room_name, "participant_type": "agent_a"})
+    samples, errors, elapsed = await timed_requests(args.requests, args.concurrency, lambda i: client.post(
+        "/api/rooms/join", params={"room_name": rooms[i % len(rooms)], "participant_type": f"caller_{i}"},
+    ))
+    return scenario_report(samples, errors, elapsed)
+
+
+async def bench_transfer_initiate(client: httpx.AsyncClient, main, args) -> dict:
+    count = args.transfers
+    for i in range(count):
+        await client.post("/api/rooms/create", json={"room_name": f"xfer-a-{i}", "participant_type": "caller"})
+        await client.post("/api/rooms/create", json={"room_name": f"xfer-b-{i}", "participant_type": "agent_b"})
+
+    transfer_ids = []
+
+    async def initiate(i: int):
+        response = await client.post("/api/transfer/initiate", json={
+            "from_room": f"xfer-a-{i}", "to_room": f"xfer-b-{i}", "caller_room": f"xfer-a-{i}",
+        })
+        if response.status_code < 400:
+            transfer_ids.append(response.json()["transfer_id"])
+        return response
+
+    samples, errors, elapsed = await timed_requests(count, args.concurrency, initiate)
+
+    # Let the background stages finish, then read end-to-end times from the records
+    deadline = time.monotonic() + 60
+    while main.transfer_engine.stats()["active"] and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    totals, failed = [], 0
+    for transfer_id in transfer_ids:
+        record = await main.state_store.get_transfer(transfer_id)
+        if record and record["status"] == "completed":
+            totals.append(record["total_seconds"])
+        else:
+            failed += 1
+
+    report = scenario_report(samples, errors, elapsed)
+    report["completed"] = {**latency_report(totals), "failed": failed}
+    return report
+
+
+async def bench_summary_generate(client: httpx.AsyncClient, main, args) -> dict:
+    samples, errors, elapsed = await timed_requests(args.summaries, args.concurrency, lambda i: client.post(
+        "/api/summary/generate",
+        json={"room_name": f"summary-{i}", "conversation_history": [f"Caller: bench message {i}"]},
+    ))
+    return scenario_report(samples, errors, elapsed)
+
+
+async def bench_ws_fanout(client: httpx.AsyncClient, main, args) -> dict:
+    room_name = "fanout"
+    await client.post("/api/rooms/create", json={"room_name": room_name, "participant_type": "agent_a"})
+
+    connect_samples = []
+    sockets = []
+    for _ in range(args.subscribers):
+        started = time.perf_counter()
+        websocket = ASGIWebSocket(main.app, f"/ws/{room_name}")
+        await websocket.connect()
+        await websocket.receive_text()  # initial snapshot
+        connect_samples.append(time.perf_counter() - started)
+        sockets.append(websocket)
+
+    sent_at = {}
+    delivery = []
+    expected = args.subscribers * args.events
+
+    async def consume(websocket: ASGIWebSocket):
+        received = 0
+        while received < args.events:
+            event = json.loads(await websocket.receive_text())
+            if event.get("type") == "participant_joined" and event["participant"] in sent_at:
+                delivery.append(time.perf_counter() - sent_at[event["participant"]])
+                received += 1
+
+    consumers = [asyncio.create_task(consume(websocket)) for websocket in sockets]
+    started = time.perf_counter()
+    for k in range(args.events):
+        participant = f"bench_{k}"
+        sent_at[participant] = time.perf_counter()
+        await client.post("/api/rooms/join", params={"room_name": room_name, "participant_type": participant})
+    done, pending = await asyncio.wait(consumers, timeout=30)
+    elapsed = time.perf_counter() - started
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*(websocket.close() for websocket in sockets))
+
+    report = scenario_report(delivery, expected - len(delivery), elapsed)
+    report["subscribers"] = args.subscribers
+    report["events"] = args.events
+    report["connect"] = latency_report(connect_samples)
+    return report
+
+
+BENCHMARKS = {
+    "rooms_create": bench_rooms_create,
+    "join_burst": bench_join_burst,
+    "transfer_initiate": bench_transfer_initiate,
+    "summary_generate": bench_summary_generate,
+    "ws_fanout": bench_ws_fanout,
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """p95 latency and throughput change per scenario against an earlier results file"""
+    changes = {}
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        change = {}
+        for key in ("p95_ms", "throughput_rps"):
+            before, after = previous.get(key), current.get(key)
+            if before and after is not None:
+                change[key] = {"before": before, "after": after, "change_pct": round((after - before) / before * 100, 1)}
+        changes[name] = change
+    return {"baseline_commit": baseline.get("meta", {}).get("commit"), "scenarios": changes}
+
+
+async def run(args):
+    os.environ["LLM_FAKE_PROVIDER"] = "1"
+    os.environ["LLM_FAKE_FIRST_TOKEN_SECONDS"] = str(args.llm_first_token)
+    os.environ["LLM_FAKE_TOKEN_SECONDS"] = str(args.llm_token)
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    main = import_backend()
+    main.livekit_rooms.client = StubLiveKitAPI(latency=args.livekit_latency)
+
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "scenarios": {},
+    }
+
+    transport = httpx.ASGITransport(app=main.app)
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=120) as client:
+        for name in selected:
+            results["scenarios"][name] = await BENCHMARKS[name](client, main, args)
+    await main.transfer_engine.shutdown()
+
+    if args.compare:
+        with open(args.compare) as f:
+            results["comparison"] = compare(results, json.load(f))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="requests for rooms_create and join_burst")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--join-rooms", type=int, default=10)
+    parser.add_argument("--transfers", type=int, default=100)
+    parser.add_argument("--summaries", type=int, default=100)
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--livekit-latency", type=float, default=0.005)
+    parser.add_argument("--llm-first-token", type=float, default=0.2)
+    parser.add_argument("--llm-token", type=float, default=0.0)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="earlier results file to report p95/throughput changes against")
+    asyncio.run(run(parser.parse_args()))
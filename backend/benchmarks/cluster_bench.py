@@ -0,0 +1,178 @@
+"""
+Throughput scaling with the number of backend workers
+
+Starts the real server (`python backend/main.py`) once per worker count,
+pointed at a local stub LiveKit server with the fake LLM provider, and
+drives it over HTTP from --clients load-generator processes. Each request
+joins a room (POST /api/rooms/create: identity allocation, token signing and
+a state write) or reads it back (GET /api/rooms/{room_name}), spread over
+--rooms rooms. WORKERS=1 is the plain single process; larger counts run the
+room-sticky gateway in front of that many workers.
+
+Reports requests/second, latency and, in cluster mode, how the gateway
+spread requests over workers. Scaling is bounded by the cores available:
+check cpu_count in the output.
+
+Usage:
+    python backend/benchmarks/cluster_bench.py [--workers 1,2,4] [--requests 6000] [--concurrency 64]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from stubs import BACKEND_DIR, StubLiveKitServer, latency_report, serve_in_thread
+
+
+def client_process(url: str, requests: int, concurrency: int, rooms: int, offset: int):
+    """One load generator: returns (latencies, errors, elapsed)"""
+
+    async def run():
+        samples = []
+        errors = 0
+        semaphore = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+
+            async def one(i: int):
+                nonlocal errors
+                room_name = f"bench-room-{(offset + i // 2) % rooms}"
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        if i % 2 == 0:
+                            request = session.post(f"{url}/api/rooms/create", json={"room_name": room_name, "participant_type": "caller"})
+                        else:
+                            request = session.get(f"{url}/api/rooms/{room_name}")
+                        async with request as response:
+                            await response.read()
+                            if response.status != 200:
+                                errors += 1
+                                return
+                    except aiohttp.ClientError:
+                        errors += 1
+                        return
+                    samples.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(requests)))
+            return samples, errors, time.perf_counter() - started
+
+    return asyncio.run(run())
+
+
+def start_server(workers: int, port: int, livekit_url: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "LIVEKIT_URL": livekit_url,
+        "LIVEKIT_API_KEY": "bench-api-key",
+        "LIVEKIT_API_SECRET": "bench-api-secret-bench-api-secret-0000",
+        "LLM_FAKE_PROVIDER": "1",
+        "LOG_LEVEL": "ERROR",
+        "WORKERS": str(workers),
+        # Every request touches a single room, which the gateway keeps on one worker
+        "CLUSTER_ALLOW_MEMORY_STORE": "1",
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "CLUSTER_BASE_PORT": str(port + 100),
+    }
+    return subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "main.py")],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(url: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{url}/") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+async def cluster_split(url: str):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/api/cluster/stats") as response:
+            if response.status != 200:
+                return None
+            stats = await response.json()
+    return [worker["requests"] for worker in stats["workers"]]
+
+
+async def run(args):
+    livekit = StubLiveKitServer(latency=args.latency)
+    serve_in_thread(livekit)
+    pool = multiprocessing.get_context("spawn").Pool(args.clients)
+    results = []
+
+    for workers in [int(count) for count in args.workers.split(",")]:
+        url = f"http://127.0.0.1:{args.port}"
+        server = start_server(workers, args.port, livekit.url)
+        try:
+            await wait_ready(url)
+            # Warm up: create every room once so both request kinds find it
+            pool.starmap(client_process, [(url, 2 * args.rooms, 8, args.rooms, 0)])
+
+            share = args.requests // args.clients
+            started = time.perf_counter()
+            outcomes = pool.starmap(client_process, [
+                (url, share, max(1, args.concurrency // args.clients), args.rooms, c * share)
+                for c in range(args.clients)
+            ])
+            elapsed = time.perf_counter() - started
+
+            samples = [sample for latencies, _, _ in outcomes for sample in latencies]
+            result = {
+                "workers": workers,
+                **latency_report(samples),
+                "errors": sum(errors for _, errors, _ in outcomes),
+                "requests_per_second": round(len(samples) / elapsed, 1),
+            }
+            if workers > 1:
+                result["requests_per_worker"] = await cluster_split(url)
+            results.append(result)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+    pool.close()
+    baseline = results[0]["requests_per_second"] if results else None
+    for result in results:
+        result["speedup"] = round(result["requests_per_second"] / baseline, 2) if baseline else None
+    print(json.dumps({
+        "cpu_count": os.cpu_count(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "rooms": args.rooms,
+        "clients": args.clients,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--requests", type=int, default=6000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.005)
+    asyncio.run(run(parser.parse_args()))
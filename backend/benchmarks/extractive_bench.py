@@ -0,0 +1,125 @@
+"""
+Extractive summary latency on long transcripts
+
+Times ExtractiveSummarizer.summarize on synthetic support calls of
+--lines lengths, ranking only the last max_candidates sentences (the
+default) and, for comparison, every sentence of the call. Then runs the
+POST /api/summary/stream event generator against the fake LLM provider and
+reports how long the client waits for the extractive "draft" event versus
+the first LLM token and the finished summary.
+
+Usage:
+    python backend/benchmarks/extractive_bench.py [--lines 50,500,2000,10000] [--iterations 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from stubs import StubLiveKitAPI, import_backend, latency_report
+
+CALLER = [
+    "I can't log into my account and the app keeps saying invalid credentials.",
+    "I was charged twice for my subscription this month.",
+    "The password reset email never arrives in my inbox.",
+    "My order {n} shows delivered but nothing came.",
+    "I already tried clearing the cache and reinstalling the app.",
+    "Can you refund the duplicate charge to my card ending in {n}?",
+]
+AGENT = [
+    "Let me check the account status and the recent login attempts.",
+    "I see two payments on invoice {n}; one of them is a duplicate.",
+    "I'm resending the reset link and whitelisting our mail server.",
+    "The courier scan for tracking number {n} stopped at the depot.",
+    "I'll escalate this to billing and open ticket {n} for the refund.",
+    "Please confirm the email address on file before I reset the password.",
+]
+
+
+def transcript(lines: int, seed: int = 7):
+    rng = random.Random(seed)
+    history = []
+    for i in range(lines):
+        speaker, pool = ("Caller", CALLER) if i % 2 == 0 else ("Agent A", AGENT)
+        first, second = rng.sample(pool, 2)
+        history.append(f"{speaker}: {first.format(n=rng.randint(1000, 9999))} {second.format(n=rng.randint(1000, 9999))}")
+    return history
+
+
+def time_summaries(summarizer, history, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        summary = summarizer.summarize(history)
+        samples.append(time.perf_counter() - started)
+    assert summary
+    return latency_report(samples)
+
+
+async def stream_latency(main, history, requests: int) -> dict:
+    # The generator behind POST /api/summary/stream, read directly: the in-process
+    # httpx transport buffers whole responses, which would hide the event timing
+    draft, first_token, done = [], [], []
+    for i in range(requests):
+        room_name = f"extractive-bench-{i}"
+        await main.set_conversation(room_name, history)
+        started = time.perf_counter()
+        seen = set()
+        async for event in main._summary_event_stream(room_name):
+            kind = event.split("\n", 1)[0][len("event: "):]
+            if kind not in seen:
+                seen.add(kind)
+                {"draft": draft, "token": first_token, "done": done}.get(kind, []).append(time.perf_counter() - started)
+    return {
+        "time_to_draft": latency_report(draft),
+        "time_to_first_llm_token": latency_report(first_token),
+        "time_to_llm_summary": latency_report(done),
+    }
+
+
+async def run(args):
+    os.environ["LLM_FAKE_PROVIDER"] = "1"
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    os.environ["SUMMARY_PREWARM_DEBOUNCE_SECONDS"] = "3600"
+    # Keep the whole streamed transcript in the room instead of the last 500 lines
+    os.environ["CONVERSATION_MAX_MESSAGES"] = str(max(int(count) for count in args.lines.split(",")))
+    main = import_backend()
+    main.livekit_rooms.client = StubLiveKitAPI()
+
+    from extractive_summary import ExtractiveSummarizer
+    bounded = main.extractive_summarizer
+    unbounded = ExtractiveSummarizer(max_candidates=10 ** 9)
+
+    sizes = []
+    for lines in [int(count) for count in args.lines.split(",")]:
+        history = transcript(lines)
+        sentences = len(unbounded.sentences(history))
+        result = {
+            "lines": lines,
+            "sentences": sentences,
+            "bounded": time_summaries(bounded, history, args.iterations),
+        }
+        if sentences <= args.unbounded_limit:
+            result["all_sentences"] = time_summaries(unbounded, history, max(1, args.iterations // 4))
+        sizes.append(result)
+
+    history = transcript(max(int(count) for count in args.lines.split(",")))
+    print(json.dumps({
+        "max_candidates": bounded.max_candidates,
+        "example": bounded.summarize(transcript(40)),
+        "summarize": sizes,
+        "stream": {"lines": len(history), **await stream_latency(main, history, args.stream_requests)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", default="50,500,2000,10000")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--stream-requests", type=int, default=10)
+    # Ranking every sentence builds an n x n similarity matrix; skip beyond this
+    parser.add_argument("--unbounded-limit", type=int, default=6000)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,102 @@
+"""
+LiveKit server round trips per room join
+
+Starts a local stub LiveKit server (Twirp RoomService over HTTP), points the
+backend's pooled LiveKit client at it and drives /api/rooms/create in-process.
+Reports server round trips per join, TCP connections opened and join latency
+for three strategies:
+
+    lookup    look the room up, then create it if missing (the old two-call path)
+    uncached  CreateRoom on every join (idempotent, one call)
+    cached    CreateRoom only for rooms not in the known-rooms cache
+
+Usage:
+    python backend/benchmarks/livekit_join_bench.py [--joins 500] [--rooms 25] [--latency 0.005]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from stubs import StubLiveKitServer, import_backend, latency_report
+
+
+async def join_burst(client: httpx.AsyncClient, joins: int, rooms: int, concurrency: int, prefix: str):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/rooms/create",
+                json={"room_name": f"{prefix}-{i % rooms}", "participant_type": "caller"},
+            )
+            response.raise_for_status()
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(i) for i in range(joins)))
+    return samples
+
+
+async def run(args):
+    server = StubLiveKitServer(latency=args.latency)
+    os.environ["LIVEKIT_URL"] = await server.start()
+    main = import_backend()
+    livekit_rooms = main.livekit_rooms
+    await livekit_rooms.start()
+    create_room = livekit_rooms._create_room
+    cache_size = livekit_rooms.cache_size
+
+    async def lookup_then_create(room_name, max_participants, metadata):
+        from livekit import api
+
+        existing = await livekit_rooms.client.room.list_rooms(api.ListRoomsRequest(names=[room_name]))
+        if existing.rooms:
+            return existing.rooms[0]
+        return await create_room(room_name, max_participants, metadata)
+
+    strategies = {
+        "lookup": (lookup_then_create, 0),
+        "uncached": (create_room, 0),
+        "cached": (create_room, cache_size),
+    }
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for name, (strategy, size) in strategies.items():
+            livekit_rooms._create_room = strategy
+            livekit_rooms.cache_size = size
+            server.reset_counters()
+            samples = await join_burst(client, args.joins, args.rooms, args.concurrency, name)
+            results[name] = {
+                "round_trips": server.round_trips,
+                "round_trips_per_join": round(server.round_trips / args.joins, 3),
+                "requests": server.requests,
+                "tcp_connections": len(server.connections),
+                "join_latency": latency_report(samples),
+            }
+
+    await livekit_rooms.close()
+    await server.stop()
+    print(json.dumps({
+        "joins": args.joins,
+        "rooms": args.rooms,
+        "server_latency_s": args.latency,
+        "pool_size": livekit_rooms.pool_size,
+        "strategies": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--joins", type=int, default=500)
+    parser.add_argument("--rooms", type=int, default=25)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005)
+    asyncio.run(run(parser.parse_args()))
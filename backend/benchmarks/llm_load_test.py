@@ -0,0 +1,98 @@
+"""
+Room-creation latency while LLM summaries are in flight
+
+Drives the FastAPI app in-process with a fake blocking Gemini model and a stub
+LiveKit server, and reports /api/rooms/create latency with and without a
+burst of concurrent summary requests.
+
+Usage:
+    python backend/benchmarks/llm_load_test.py [--summaries 32] [--llm-latency 1.0] [--inline]
+
+--inline runs the fake model directly on the event loop (the old behaviour)
+for comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from stubs import FakeGenerativeModel, StubLiveKitAPI, import_backend, latency_report
+
+
+async def create_rooms(client: httpx.AsyncClient, count: int, concurrency: int, prefix: str):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/rooms/create",
+                json={"room_name": f"{prefix}-{i % 50}", "participant_type": "caller"},
+            )
+            response.raise_for_status()
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return samples
+
+
+async def request_summaries(client: httpx.AsyncClient, count: int, stagger: float):
+    async def one(i: int):
+        # Spread the summaries over the measurement window
+        await asyncio.sleep(i * stagger)
+        await client.post(
+            "/api/summary/generate",
+            json={"room_name": f"summary-{i}", "conversation_history": [f"Caller: message {i}"]},
+        )
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+
+
+async def run(args):
+    # Any key enables the Gemini provider; the model itself is replaced below
+    os.environ.setdefault("GEMINI_API_KEY", "fake")
+    main = import_backend()
+    main.livekit_rooms.client = StubLiveKitAPI(latency=args.livekit_latency)
+    FakeGenerativeModel.latency = args.llm_latency
+    main.gemini_sdk.get().GenerativeModel = FakeGenerativeModel
+
+    if args.inline:
+        async def inline_generate(prompt: str, **kwargs) -> str:
+            return FakeGenerativeModel().generate_content(prompt).text
+        main.gemini_provider.complete = inline_generate
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        idle = await create_rooms(client, args.rooms, args.concurrency, "idle")
+
+        loaded, _ = await asyncio.gather(
+            create_rooms(client, args.rooms, args.concurrency, "loaded"),
+            request_summaries(client, args.summaries, args.stagger),
+        )
+
+    report = {
+        "mode": "inline" if args.inline else "executor",
+        "llm_latency_s": args.llm_latency,
+        "summaries_in_flight": args.summaries,
+        "room_create_idle": latency_report(idle),
+        "room_create_with_summaries": latency_report(loaded),
+        "llm_executor": main.llm_executor.stats(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--summaries", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--stagger", type=float, default=0.005)
+    parser.add_argument("--livekit-latency", type=float, default=0.005)
+    parser.add_argument("--inline", action="store_true")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,146 @@
+"""
+Backend cold start: import cost per module and time to first request served
+
+1. Imports backend/main.py in a fresh interpreter under `python -X importtime`
+   and reports the cumulative import time of main and of each backend
+   module, the self time summed per third-party package, and what the
+   lazily imported modules (livekit.api, numpy, openai, google.generativeai)
+   cost when they are finally imported.
+2. Starts the real server (`python backend/main.py`) --runs times for each
+   SDK_WARMUP mode (eager, background, lazy), against a local stub LiveKit
+   server and dummy LLM keys, and retries POST /api/rooms/create every few
+   milliseconds from the moment the process is spawned. Reports the median
+   time until the first request was served, plus the server's own
+   milestones from /api/startup/stats.
+
+Usage:
+    python backend/benchmarks/startup_bench.py [--modes eager,background,lazy] [--runs 3]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from stubs import BACKEND_DIR, StubLiveKitServer, serve_in_thread
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+LAZY_MODULES = ("livekit.api", "numpy", "openai", "google.generativeai")
+
+
+def server_env(livekit_url: str, **extra) -> dict:
+    return {
+        **os.environ,
+        "LIVEKIT_URL": livekit_url,
+        "LIVEKIT_API_KEY": "bench-api-key",
+        "LIVEKIT_API_SECRET": "bench-api-secret-bench-api-secret-0000",
+        # Dummy keys so both LLM SDKs are configured (nothing is sent to them)
+        "GEMINI_API_KEY": "bench-gemini-key",
+        "OPENAI_API_KEY": "bench-openai-key",
+        "LOG_LEVEL": "ERROR",
+        **extra,
+    }
+
+
+def import_costs(livekit_url: str, top: int) -> dict:
+    """Parse -X importtime output of `import main` followed by the lazily imported modules"""
+    code = "import main; " + "; ".join(f"import {name}" for name in LAZY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=server_env(livekit_url), capture_output=True, text=True, check=True,
+    )
+    backend_modules = {name[:-3] for name in os.listdir(BACKEND_DIR) if name.endswith(".py")}
+    cumulative, packages = {}, {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = int(match[1]), int(match[2]), match[3], match[4]
+        cumulative[name] = cumulative_us
+        package = name.split(".")[0]
+        if package not in backend_modules:
+            packages[package] = packages.get(package, 0) + self_us
+
+    def ms(us: int) -> float:
+        return round(us / 1000, 1)
+
+    return {
+        "main_ms": ms(cumulative.get("main", 0)),
+        "backend_modules_ms": {
+            name: ms(cumulative[name])
+            for name in sorted(backend_modules & cumulative.keys(), key=lambda name: -cumulative[name])
+            if name != "main"
+        },
+        "packages_self_ms": {name: ms(us) for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+        # Imported after main, so only what main didn't already pull in is counted
+        "lazy_modules_ms": {name: ms(cumulative.get(name, 0)) for name in LAZY_MODULES},
+    }
+
+
+async def first_request(mode: str, port: int, livekit_url: str) -> dict:
+    url = f"http://127.0.0.1:{port}"
+    env = server_env(livekit_url, SDK_WARMUP=mode, HOST="127.0.0.1", PORT=str(port), WORKERS="1")
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "main.py")],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        async with aiohttp.ClientSession() as session:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with {server.returncode} in {mode} mode")
+                try:
+                    async with session.post(f"{url}/api/rooms/create", json={"room_name": "cold-start", "participant_type": "caller"}) as response:
+                        if response.status == 200:
+                            served = time.perf_counter() - started
+                            break
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.005)
+            # Let a background warm-up finish so the report shows every module's import time
+            await asyncio.sleep(2)
+            async with session.get(f"{url}/api/startup/stats") as response:
+                stats = await response.json()
+        return {"first_request_s": served, **stats}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def run(args):
+    livekit = StubLiveKitServer(latency=0.001)
+    serve_in_thread(livekit)
+
+    results = []
+    for mode in args.modes.split(","):
+        runs = [await first_request(mode, args.port, livekit.url) for _ in range(args.runs)]
+        median = sorted(runs, key=lambda run: run["first_request_s"])[len(runs) // 2]
+        results.append({
+            "sdk_warmup": mode,
+            "first_request_served_s": round(statistics.median(run["first_request_s"] for run in runs), 3),
+            "server_milestones_s": median["milestones"],
+            "lazy_import_s": {module["module"]: module["import_seconds"] and round(module["import_seconds"], 3) for module in median["modules"]},
+        })
+
+    print(json.dumps({
+        "cpu_count": os.cpu_count(),
+        "imports": import_costs(livekit.url, args.top),
+        "cold_start": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="eager,background,lazy")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--port", type=int, default=8900)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,350 @@
+"""
+Local stand-ins for LiveKit and LLM providers used by the benchmarks
+Lets the backend run in-process without network access or real credentials
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_backend():
+    """Import backend/main.py with dummy credentials so it can run offline"""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("LIVEKIT_URL", "http://127.0.0.1:7880")
+    os.environ.setdefault("LIVEKIT_API_KEY", "bench-api-key")
+    os.environ.setdefault("LIVEKIT_API_SECRET", "bench-api-secret-bench-api-secret-0000")
+    import main
+    return main
+
+
+def percentile(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def latency_report(samples) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3) if samples else None,
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3) if samples else None,
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3) if samples else None,
+        "max_ms": round(max(samples) * 1000, 3) if samples else None,
+    }
+
+
+class LoopLagMonitor:
+    """Measures how late a 1 ms ticker wakes up, i.e. how long the event loop was blocked"""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples = []
+        self._tick_started = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self._tick_started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - self._tick_started - self.interval)
+
+    def start(self):
+        self._tick_started = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # The loop may have been blocked right up to now without the ticker getting to run
+        self.samples.append(time.perf_counter() - self._tick_started - self.interval)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    @property
+    def max_stall_ms(self) -> float:
+        return round(max(self.samples, default=0) * 1000, 3)
+
+
+def serve_in_thread(server) -> asyncio.AbstractEventLoop:
+    """Run a stub server's start() on its own event loop thread, so blocking clients can't stall it"""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return loop
+
+
+class StubRoomService:
+    """Mimics livekit.api.RoomService with configurable round-trip latency"""
+
+    def __init__(self, latency: float = 0.005):
+        self.latency = latency
+        self.round_trips = 0
+        self.rooms = {}
+
+    async def create_room(self, request):
+        from livekit import api
+
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+        room = self.rooms.get(request.name)
+        if room is None:
+            room = api.Room(
+                name=request.name,
+                max_participants=request.max_participants,
+                metadata=request.metadata,
+                creation_time=int(time.time()),
+            )
+            self.rooms[request.name] = room
+        return room
+
+    async def list_rooms(self, request):
+        from livekit import api
+
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+        names = list(request.names) or list(self.rooms)
+        return api.ListRoomsResponse(rooms=[self.rooms[n] for n in names if n in self.rooms])
+
+    async def move_participant(self, request):
+        from livekit import api
+
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+        return api.MoveParticipantResponse()
+
+
+class StubLiveKitAPI:
+    def __init__(self, latency: float = 0.005):
+        self.room = StubRoomService(latency)
+
+    async def aclose(self):
+        pass
+
+
+class StubLiveKitServer:
+    """
+    Local HTTP server speaking LiveKit's Twirp RoomService protocol
+
+    Handles CreateRoom, ListRooms and MoveParticipant with protobuf bodies, so the real
+    livekit-api client (and its connection pool) can be benchmarked against
+    it. Counts requests per method and distinct TCP connections.
+    """
+
+    def __init__(self, latency: float = 0.005):
+        self.latency = latency
+        self.rooms = {}
+        self.requests = {}
+        self.connections = set()
+        self._runner = None
+        self.url = None
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.requests.values())
+
+    async def _handle(self, request):
+        from aiohttp import web
+        from livekit import api
+
+        method = request.match_info["method"]
+        self.requests[method] = self.requests.get(method, 0) + 1
+        self.connections.add(id(request.transport))
+        body = await request.read()
+        await asyncio.sleep(self.latency)
+
+        if method == "CreateRoom":
+            create = api.CreateRoomRequest.FromString(body)
+            room = self.rooms.get(create.name)
+            if room is None:
+                room = api.Room(
+                    name=create.name,
+                    sid=f"RM_{len(self.rooms)}",
+                    max_participants=create.max_participants,
+                    metadata=create.metadata,
+                    creation_time=int(time.time()),
+                )
+                self.rooms[create.name] = room
+            payload = room.SerializeToString()
+        elif method == "ListRooms":
+            names = list(api.ListRoomsRequest.FromString(body).names) or list(self.rooms)
+            payload = api.ListRoomsResponse(rooms=[self.rooms[n] for n in names if n in self.rooms]).SerializeToString()
+        elif method == "MoveParticipant":
+            api.MoveParticipantRequest.FromString(body)
+            payload = api.MoveParticipantResponse().SerializeToString()
+        else:
+            return web.json_response({"code": "unimplemented", "msg": method}, status=501)
+        return web.Response(body=payload, content_type="application/protobuf")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post("/twirp/livekit.RoomService/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def reset_counters(self):
+        self.requests = {}
+        self.connections = set()
+
+
+class StubTwilioServer:
+    """
+    Local HTTP server mimicking the Twilio REST endpoints used for phone transfers
+
+    Answers Calls.json, Calls/{sid}.json and Messages.json after latency
+    seconds. fail_rate of requests get a 503 (which clients may retry).
+    Counts requests and distinct TCP connections.
+    """
+
+    def __init__(self, latency: float = 0.05, fail_rate: float = 0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.failures = 0
+        self.connections = set()
+        self._runner = None
+        self._sequence = 0
+        self.url = None
+
+    async def _handle(self, request):
+        import random
+
+        from aiohttp import web
+
+        self.requests += 1
+        self.connections.add(id(request.transport))
+        await request.post()
+        await asyncio.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self.failures += 1
+            return web.json_response({"code": 20503, "message": "Service unavailable", "status": 503}, status=503)
+
+        self._sequence += 1
+        resource = request.match_info["resource"]
+        prefix = "SM" if resource.startswith("Messages") else "CA"
+        sid = request.match_info.get("sid") or f"{prefix}{self._sequence:032x}"
+        return web.json_response({
+            "sid": sid,
+            "account_sid": request.match_info["account"],
+            "status": "completed" if request.match_info.get("sid") else "queued",
+        }, status=201)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post("/2010-04-01/Accounts/{account}/{resource:Calls|Messages}.json", self._handle)
+        app.router.add_post("/2010-04-01/Accounts/{account}/{resource:Calls}/{sid}.json", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def reset_counters(self):
+        self.requests = 0
+        self.failures = 0
+        self.connections = set()
+
+
+class ASGIWebSocket:
+    """
+    Minimal WebSocket client that talks to an ASGI app in-process
+
+    Lets benchmarks hold many /ws/{room_name} subscriptions open without a
+    real server or a WebSocket client library.
+    """
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._task = None
+
+    async def connect(self):
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "subprotocols": [],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        self._to_app.put_nowait({"type": "websocket.connect"})
+        self._task = asyncio.create_task(self.app(scope, self._to_app.get, self._from_app.put))
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            raise ConnectionError(f"WebSocket rejected: {message}")
+
+    async def send_text(self, text: str):
+        self._to_app.put_nowait({"type": "websocket.receive", "text": text})
+
+    async def receive_text(self) -> str:
+        message = await self._from_app.get()
+        if message["type"] == "websocket.close":
+            raise ConnectionError("WebSocket closed by the app")
+        return message["text"]
+
+    async def close(self):
+        self._to_app.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            # The endpoint only notices the disconnect at its next heartbeat; don't wait for it
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class FakeGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel whose generate_content blocks like the real SDK"""
+
+    latency = 1.0
+
+    def __init__(self, model_name: str = "fake"):
+        self.model_name = model_name
+
+    def generate_content(self, prompt: str, **kwargs):
+        time.sleep(self.latency)
+        return FakeGeminiResponse(
+            "Caller cannot log in and sees 'Invalid credentials'. Agent A is checking the account and may reset the password."
+        )
@@ -0,0 +1,105 @@
+"""
+Access-token minting throughput
+
+Reports tokens per second and tokens per second per core for:
+
+    sdk       livekit.api.AccessToken built and signed per token (the old path)
+    cached    TokenService.mint with a cached grant template
+    batch     TokenService.mint_batch signing inline
+    pool      TokenService.mint_batch spread over --workers processes
+
+Every token is checked against livekit.api.TokenVerifier before timing.
+
+Usage:
+    python backend/benchmarks/token_bench.py [--tokens 20000] [--batch 500] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from livekit import api  # noqa: E402
+
+from token_service import TokenService  # noqa: E402
+
+API_KEY = "bench-api-key"
+API_SECRET = "bench-api-secret-bench-api-secret-0000"
+
+
+def sdk_token(room_name: str, identity: str, name: str) -> str:
+    token = api.AccessToken(API_KEY, API_SECRET)
+    token.with_identity(identity)
+    token.with_name(name)
+    token.with_grants(api.VideoGrants(room_join=True, room=room_name, can_publish=True, can_subscribe=True))
+    return token.to_jwt()
+
+
+def verify(tokens, room_name: str, participants):
+    verifier = api.TokenVerifier(API_KEY, API_SECRET)
+    for token, (identity, name) in zip(tokens, participants):
+        claims = verifier.verify(token)
+        assert claims.identity == identity and claims.name == name and claims.video.room == room_name
+
+
+def report(name: str, count: int, elapsed: float, cores: int) -> dict:
+    per_second = count / elapsed
+    return {
+        "strategy": name,
+        "tokens": count,
+        "seconds": round(elapsed, 4),
+        "tokens_per_second": round(per_second),
+        "cores": cores,
+        "tokens_per_second_per_core": round(per_second / cores),
+    }
+
+
+async def run(args):
+    room_name = "bench-room"
+    participants = [(f"caller_{i}", f"caller ({i})") for i in range(args.batch)]
+    results = []
+
+    verify([sdk_token(room_name, *p) for p in participants[:10]], room_name, participants[:10])
+    started = time.perf_counter()
+    for i in range(args.tokens):
+        sdk_token(room_name, *participants[i % args.batch])
+    results.append(report("sdk", args.tokens, time.perf_counter() - started, 1))
+
+    inline = TokenService(API_KEY, API_SECRET)
+    verify([inline.mint(room_name, *p) for p in participants[:10]], room_name, participants[:10])
+    started = time.perf_counter()
+    for i in range(args.tokens):
+        inline.mint(room_name, *participants[i % args.batch])
+    results.append(report("cached", args.tokens, time.perf_counter() - started, 1))
+
+    batches = max(1, args.tokens // args.batch)
+    verify(await inline.mint_batch(room_name, participants), room_name, participants)
+    started = time.perf_counter()
+    for _ in range(batches):
+        await inline.mint_batch(room_name, participants)
+    results.append(report("batch", batches * args.batch, time.perf_counter() - started, 1))
+
+    if args.workers > 0:
+        pooled = TokenService(API_KEY, API_SECRET, workers=args.workers, pool_threshold=1)
+        # Warm up the worker processes outside the timed section
+        verify(await pooled.mint_batch(room_name, participants), room_name, participants)
+        started = time.perf_counter()
+        await asyncio.gather(*(pooled.mint_batch(room_name, participants) for _ in range(batches)))
+        results.append(report(f"pool({args.workers})", batches * args.batch, time.perf_counter() - started, args.workers))
+        pooled.shutdown()
+
+    print(json.dumps({"batch_size": args.batch, "cpu_count": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    asyncio.run(run(parser.parse_args()))
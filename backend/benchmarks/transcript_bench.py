@@ -0,0 +1,154 @@
+"""
+Transcript ingestion throughput
+
+--calls concurrent calls each emit --segments-per-call speech-to-text
+segments into their own room. Reports segments/second, store writes,
+summary-refresh notifications and the longest event-loop stall for:
+
+    per_segment  one store append, summary notify and room event per segment
+                 (what a naive ingestion endpoint would do)
+    coalesced    TranscriptIngestor.offer per segment, batched writes per flush
+    http_batch   POST /api/rooms/{room_name}/transcript with --batch segments per request
+                 (--http-concurrency requests in flight). The in-process httpx
+                 client starves the ticker for the whole run, so no loop stall
+                 is reported for it
+    websocket    /ws/{room_name}/transcript, --batch segments per frame; each
+                 call ends with a flush frame, so writes are per call here
+
+Every strategy is checked to have stored every line of every call, in order.
+
+Usage:
+    python backend/benchmarks/transcript_bench.py [--calls 500] [--segments-per-call 40] [--batch 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from stubs import ASGIWebSocket, LoopLagMonitor, StubLiveKitAPI, import_backend
+
+
+def segment(call: int, i: int) -> dict:
+    speaker = "Caller" if i % 2 == 0 else "Agent A"
+    return {"speaker": speaker, "text": f"call {call} segment {i}: I still can't log into my account", "is_final": True}
+
+
+async def run_strategy(name: str, main, args, produce) -> dict:
+    prefix = f"transcript-{name}"
+    notifications = 0
+    notify = main.summary_prewarmer.notify_changed
+
+    def counting_notify(room_name: str):
+        nonlocal notifications
+        notifications += 1
+        notify(room_name)
+
+    main.summary_prewarmer.notify_changed = counting_notify
+    flushes_before = main.transcript_ingestor.stats()["flushes"]
+    monitor = LoopLagMonitor()
+    monitor.start()
+    started = time.perf_counter()
+    writes = await produce(prefix)
+    await main.transcript_ingestor.flush()
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+    main.summary_prewarmer.notify_changed = notify
+
+    for call in range(args.calls):
+        stored = await main.state_store.get_conversation(f"{prefix}-{call}")
+        expected = [f"{s['speaker']}: {s['text']}" for s in (segment(call, i) for i in range(args.segments_per_call))]
+        assert stored == expected, f"{name}: call {call} stored {len(stored)} lines"
+
+    segments = args.calls * args.segments_per_call
+    return {
+        "strategy": name,
+        "segments": segments,
+        "segments_per_second": round(segments / elapsed, 1),
+        "store_writes": writes if writes is not None else main.transcript_ingestor.stats()["flushes"] - flushes_before,
+        "summary_notifications": notifications,
+        "max_loop_stall_ms": None if name == "http_batch" else monitor.max_stall_ms,
+    }
+
+
+async def run(args):
+    os.environ["LLM_FAKE_PROVIDER"] = "1"
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    # Keep background summary refreshes out of the measurement
+    os.environ["SUMMARY_PREWARM_DEBOUNCE_SECONDS"] = "3600"
+    os.environ["CONVERSATION_MAX_MESSAGES"] = str(max(500, args.segments_per_call))
+    main = import_backend()
+    main.livekit_rooms.client = StubLiveKitAPI()
+    results = []
+
+    async def per_segment(prefix: str):
+        async def call(c: int):
+            room_name = f"{prefix}-{c}"
+            for i in range(args.segments_per_call):
+                s = segment(c, i)
+                line = f"{s['speaker']}: {s['text']}"
+                await main.state_store.append_conversation(room_name, [line])
+                main.summary_prewarmer.notify_changed(room_name)
+                main.room_events.publish(room_name, {"type": "transcript", "lines": [line]})
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(call(c) for c in range(args.calls)))
+        return args.calls * args.segments_per_call
+
+    async def coalesced(prefix: str):
+        async def call(c: int):
+            for i in range(args.segments_per_call):
+                lines, _ = main.transcript_lines([segment(c, i)])
+                main.transcript_ingestor.offer(f"{prefix}-{c}", lines)
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(call(c) for c in range(args.calls)))
+
+    async def http_batch(prefix: str):
+        semaphore = asyncio.Semaphore(args.http_concurrency)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            async def call(c: int):
+                for start in range(0, args.segments_per_call, args.batch):
+                    batch = [segment(c, i) for i in range(start, min(start + args.batch, args.segments_per_call))]
+                    async with semaphore:
+                        response = await client.post(f"/api/rooms/{prefix}-{c}/transcript", json={"segments": batch})
+                    response.raise_for_status()
+
+            await asyncio.gather(*(call(c) for c in range(args.calls)))
+
+    async def websocket(prefix: str):
+        async def call(c: int):
+            ws = ASGIWebSocket(main.app, f"/ws/{prefix}-{c}/transcript")
+            await ws.connect()
+            for start in range(0, args.segments_per_call, args.batch):
+                batch = [segment(c, i) for i in range(start, min(start + args.batch, args.segments_per_call))]
+                await ws.send_text(json.dumps({"segments": batch}))
+            await ws.send_text(json.dumps({"type": "flush"}))
+            reply = json.loads(await ws.receive_text())
+            assert reply["type"] == "flushed", reply
+            await ws.close()
+
+        await asyncio.gather(*(call(c) for c in range(args.calls)))
+
+    for name, produce in [("per_segment", per_segment), ("coalesced", coalesced), ("http_batch", http_batch), ("websocket", websocket)]:
+        results.append(await run_strategy(name, main, args, produce))
+
+    print(json.dumps({
+        "calls": args.calls,
+        "segments_per_call": args.segments_per_call,
+        "batch": args.batch,
+        "linger_seconds": main.transcript_ingestor.linger_seconds,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--segments-per-call", type=int, default=40)
+    parser.add_argument("--batch", type=int, default=10)
+    parser.add_argument("--http-concurrency", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,129 @@
+"""
+Twilio dial-out latency against a local mock Twilio API
+
+Places --transfers phone transfers (two outbound legs each), --concurrency at
+a time, and reports per-transfer dial latency, throughput, the longest
+event-loop stall seen while dialing and how many TCP connections the mock
+server saw, for:
+
+    sdk        the old path: blocking twilio.rest.Client, legs dialed one after the other
+    async      TwilioIntegration over the pooled async client, legs dialed concurrently
+    async+503  the async path while --fail-rate of mock requests answer 503 (retried with jitter)
+
+Usage:
+    python backend/benchmarks/twilio_bench.py [--transfers 200] [--concurrency 20] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from stubs import BACKEND_DIR, LoopLagMonitor, StubTwilioServer, latency_report, serve_in_thread
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+ACCOUNT_SID = "AC" + "0" * 32
+AUTH_TOKEN = "bench-auth-token"
+FROM_NUMBER = "+15550000000"
+
+
+async def run_strategy(name: str, server: StubTwilioServer, args, dial) -> dict:
+    server.reset_counters()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            ok = await dial(i)
+            if ok:
+                samples.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.transfers)))
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+
+    return {
+        "strategy": name,
+        **latency_report(samples),
+        "errors": errors,
+        "transfers_per_second": round(len(samples) / elapsed, 1),
+        "max_loop_stall_ms": monitor.max_stall_ms,
+        "mock_requests": server.requests,
+        "mock_503s": server.failures,
+        "tcp_connections": len(server.connections),
+    }
+
+
+async def run(args):
+    from twilio.rest import Client
+
+    server = StubTwilioServer(latency=args.latency)
+    # Own loop, so the blocking SDK path can't stall the mock server too
+    server_loop = serve_in_thread(server)
+    url = server.url
+    results = []
+
+    client = Client(ACCOUNT_SID, AUTH_TOKEN)
+    client.api.base_url = url
+
+    async def sdk_dial(i: int) -> bool:
+        # What the original async def did: two blocking creates on the event loop
+        try:
+            for to in (f"+1555100{i:04d}", f"+1555200{i:04d}"):
+                client.calls.create(to=to, from_=FROM_NUMBER, url="https://example.com/twiml", method="POST")
+            return True
+        except Exception:
+            return False
+
+    results.append(await run_strategy("sdk", server, args, sdk_dial))
+
+    os.environ.update({
+        "TWILIO_ACCOUNT_SID": ACCOUNT_SID,
+        "TWILIO_AUTH_TOKEN": AUTH_TOKEN,
+        "TWILIO_PHONE_NUMBER": FROM_NUMBER,
+        "TWILIO_API_BASE_URL": url,
+        "TWILIO_MAX_ATTEMPTS": str(args.max_attempts),
+    })
+    from twilio_integration import TwilioIntegration
+
+    integration = TwilioIntegration()
+
+    async def async_dial(i: int) -> bool:
+        result = await integration.initiate_phone_transfer(f"+1555100{i:04d}", f"+1555200{i:04d}", "Caller cannot log in.")
+        return result is not None
+
+    results.append(await run_strategy("async", server, args, async_dial))
+    server.fail_rate = args.fail_rate
+    results.append(await run_strategy("async+503", server, args, async_dial))
+
+    await integration.close()
+    asyncio.run_coroutine_threadsafe(server.stop(), server_loop).result()
+    print(json.dumps({
+        "transfers": args.transfers,
+        "concurrency": args.concurrency,
+        "mock_latency_seconds": args.latency,
+        "fail_rate": args.fail_rate,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transfers", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--fail-rate", type=float, default=0.2)
+    parser.add_argument("--max-attempts", type=int, default=4)
+    asyncio.run(run(parser.parse_args()))
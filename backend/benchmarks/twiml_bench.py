@@ -0,0 +1,99 @@
+"""
+Conference TwiML rendering cost
+
+Reports microseconds per document for:
+
+    builder    TwilioIntegration.generate_conference_twiml (VoiceResponse tree + serialize)
+    template   the precompiled template, rendered every time (cache misses)
+    cached     TwiMLCache.conference for a conference it has already answered
+    webhook    POST /api/twilio/conference/{conference_name} through the ASGI app (cached path)
+
+Template output is checked byte-for-byte against the builder first,
+including summaries that need escaping.
+
+Usage:
+    python backend/benchmarks/twiml_bench.py [--iterations 20000] [--conferences 100]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+from stubs import BACKEND_DIR
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from fastapi import FastAPI  # noqa: E402
+
+from twilio_integration import TwilioIntegration, add_twilio_routes  # noqa: E402
+from twiml_templates import TwiMLCache  # noqa: E402
+
+SUMMARY = (
+    "Caller cannot log in and keeps getting an 'Invalid credentials' error. "
+    "Agent A is checking the account status & may reset the password <urgent>."
+)
+
+
+def per_op(name: str, count: int, elapsed: float) -> dict:
+    return {"strategy": name, "operations": count, "us_per_op": round(elapsed / count * 1e6, 3)}
+
+
+def verify(integration: TwilioIntegration):
+    cache = integration.twiml
+    for conference_name, summary in [("warm-transfer-1", SUMMARY), ("a&b<c>", "\"quoted\" 'single' ]]> é 日本")]:
+        assert cache.conference(conference_name, summary).decode() == integration.generate_conference_twiml(conference_name, summary)
+        assert cache.caller(conference_name).decode() == integration.generate_caller_twiml(conference_name)
+
+
+async def run(args):
+    integration = TwilioIntegration()
+    verify(integration)
+    names = [f"warm-transfer-{i}" for i in range(args.conferences)]
+    results = []
+
+    started = time.perf_counter()
+    for i in range(args.iterations):
+        integration.generate_conference_twiml(names[i % len(names)], SUMMARY)
+    results.append(per_op("builder", args.iterations, time.perf_counter() - started))
+
+    template = integration.twiml.conference_template
+    started = time.perf_counter()
+    for i in range(args.iterations):
+        template.render(conference_name=names[i % len(names)], call_summary=SUMMARY).encode("utf-8")
+    results.append(per_op("template", args.iterations, time.perf_counter() - started))
+
+    cache = TwiMLCache(integration.twiml.conference_template, integration.twiml.caller_template)
+    for name in names:
+        cache.conference(name, SUMMARY)
+    started = time.perf_counter()
+    for i in range(args.iterations):
+        cache.conference(names[i % len(names)], SUMMARY)
+    results.append(per_op("cached", args.iterations, time.perf_counter() - started))
+
+    app = FastAPI()
+    add_twilio_routes(app)
+    requests = min(args.iterations, args.webhook_requests)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name in names:
+            await client.post(f"/api/twilio/conference/{name}", params={"call_summary": SUMMARY})
+        started = time.perf_counter()
+        for i in range(requests):
+            response = await client.post(f"/api/twilio/conference/{names[i % len(names)]}", params={"call_summary": SUMMARY})
+            assert response.status_code == 200
+        results.append(per_op("webhook", requests, time.perf_counter() - started))
+
+    print(json.dumps({"conferences": args.conferences, "cpu_count": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--conferences", type=int, default=100)
+    parser.add_argument("--webhook-requests", type=int, default=2000)
+    asyncio.run(run(parser.parse_args()))
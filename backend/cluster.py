@@ -0,0 +1,549 @@
+"""
+Cluster Mode
+Multi-process deployment: room-sticky gateway, consistent-hash ring and cross-worker event relay
+"""
+
+import asyncio
+import bisect
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import aiohttp
+from yarl import URL
+
+from metrics import PROMETHEUS_CONTENT_TYPE, registry
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-cluster-secret"
+
+# Routing keys: requests about one room go to the worker that owns it
+BODY_ROUTES = {
+    "/api/rooms/create": "room_name",
+    "/api/tokens/batch": "room_name",
+    "/api/summary/generate": "room_name",
+    "/api/summary/stream": "room_name",
+    # The transfer runs next to the caller's room, where its summary is prewarmed
+    "/api/transfer/initiate": "caller_room",
+}
+QUERY_ROUTES = {
+    "/api/rooms/join": "room_name",
+}
+PATH_ROUTES = [
+    re.compile(r"^/ws/(?P<room>[^/]+)(?:/transcript)?$"),
+    re.compile(r"^/api/rooms/(?P<room>[^/]+)(?:/leave|/transcript)?$"),
+]
+# Transfer IDs minted in cluster mode end in "@w{worker index}"
+TRANSFER_ROUTE = re.compile(r"^/api/transfer/[^/]+@w(?P<worker>\d+)(?:/briefed)?$")
+# The receiving-agent pool lives on one worker, the owner of this key on the ring
+AGENT_POOL_KEY = "agent-pool"
+AGENTS_ROUTE = re.compile(r"^/api/agents(?:/.*)?$")
+
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade", "host", "content-length",
+}
+
+
+class HashRing:
+    """
+    Consistent hashing of keys onto node indexes
+
+    Each node is placed on the ring at `replicas` points; a key belongs to the
+    first node point at or after its hash. Growing from n to n+1 nodes moves
+    only about 1/(n+1) of the keys.
+    """
+
+    def __init__(self, nodes: int, replicas: int = 64):
+        if nodes < 1:
+            raise ValueError("HashRing needs at least one node")
+        self.nodes = nodes
+        self.replicas = replicas
+        points = sorted(
+            (self._hash(f"worker-{node}#{replica}"), node)
+            for node in range(nodes)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def owner(self, key: str) -> int:
+        if self.nodes == 1:
+            return 0
+        index = bisect.bisect_left(self._hashes, self._hash(key))
+        return self._owners[index % len(self._owners)]
+
+
+def routing_room(path: str, query_string: bytes, body: bytes) -> Optional[str]:
+    """Room a request is about, if the route has one"""
+    field = QUERY_ROUTES.get(path)
+    if field is not None:
+        values = parse_qs(query_string.decode("latin-1")).get(field)
+        return values[0] if values else None
+
+    field = BODY_ROUTES.get(path)
+    if field is not None:
+        try:
+            value = json.loads(body).get(field)
+        except (ValueError, AttributeError):
+            return None
+        return value if isinstance(value, str) else None
+
+    for pattern in PATH_ROUTES:
+        match = pattern.match(path)
+        if match:
+            return match.group("room")
+    return None
+
+
+class PeerUnavailable(Exception):
+    """A call to another worker failed or timed out"""
+
+
+class ClusterMember:
+    """
+    A worker's view of the cluster
+
+    Knows which worker owns each room (same ring as the gateway) and relays
+    room events published here for rooms owned elsewhere. Relayed events are
+    queued per peer and posted in batches by one task per peer, so publishing
+    never waits on the network and events to a peer stay in order. Up to
+    max_pending events are held per peer; beyond that new events are dropped.
+    call() is the request/response counterpart for state only one worker
+    holds, such as the agent pool.
+    """
+
+    def __init__(self,
+                 index: int,
+                 peers: List[str],
+                 secret: str,
+                 timeout_seconds: float = 5.0,
+                 max_pending: int = 10000):
+        self.index = index
+        self.peers = peers
+        self.secret = secret
+        self.timeout_seconds = timeout_seconds
+        self.max_pending = max_pending
+        self.ring = HashRing(len(peers))
+        self._pending: Dict[int, List[List[str]]] = {}
+        self._flushing: Dict[int, asyncio.Task] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self._relayed = registry.counter("cluster_events_relayed_total", "Room events relayed to the owning worker")
+        self._dropped = registry.counter("cluster_events_dropped_total", "Room events that could not be relayed")
+
+    def owner(self, room_name: str) -> int:
+        return self.ring.owner(room_name)
+
+    def owns(self, room_name: str) -> bool:
+        return self.ring.owner(room_name) == self.index
+
+    def tag(self, identifier: str) -> str:
+        """Suffix an ID with this worker's index so the gateway can route follow-up requests here"""
+        return f"{identifier}@w{self.index}"
+
+    def authorized(self, secret: str) -> bool:
+        return hmac.compare_digest(secret.encode("utf-8"), self.secret.encode("utf-8"))
+
+    def forward(self, room_name: str, payload: str):
+        """Queue a serialized event for the worker that owns room_name"""
+        owner = self.owner(room_name)
+        pending = self._pending.setdefault(owner, [])
+        if len(pending) >= self.max_pending:
+            self._dropped.inc()
+            return
+        pending.append([room_name, payload])
+        if owner not in self._flushing:
+            self._flushing[owner] = asyncio.create_task(self._flush(owner))
+
+    def _client(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout_seconds))
+        return self._session
+
+    async def call(self, worker: int, path: str, payload: Dict, timeout_seconds: Optional[float] = None) -> Dict:
+        """POST payload to another worker's internal endpoint and return its JSON answer"""
+        try:
+            async with self._client().post(
+                f"{self.peers[worker]}{path}",
+                json=payload,
+                headers={SECRET_HEADER: self.secret},
+                timeout=aiohttp.ClientTimeout(total=timeout_seconds or self.timeout_seconds),
+            ) as response:
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise PeerUnavailable(f"worker {worker} {path}: {e!r}") from e
+
+    async def _flush(self, owner: int):
+        try:
+            while self._pending.get(owner):
+                batch = self._pending.pop(owner)
+                try:
+                    async with self._client().post(
+                        f"{self.peers[owner]}/api/cluster/events",
+                        json={"events": batch},
+                        headers={SECRET_HEADER: self.secret},
+                    ) as response:
+                        response.raise_for_status()
+                    self._relayed.inc(len(batch))
+                except Exception as e:
+                    self._dropped.inc(len(batch))
+                    logger.warning("Event relay failed", extra={"worker": owner, "events": len(batch), "error": str(e)})
+        finally:
+            del self._flushing[owner]
+
+    async def close(self):
+        if self._flushing:
+            await asyncio.gather(*self._flushing.values(), return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict:
+        return {
+            "worker": self.index,
+            "workers": len(self.peers),
+            "relayed": int(self._relayed.value),
+            "dropped": int(self._dropped.value),
+            "pending": sum(len(pending) for pending in self._pending.values()),
+        }
+
+
+def create_cluster_member() -> Optional[ClusterMember]:
+    """This worker's ClusterMember when started by run_cluster, else None"""
+    peers = [peer for peer in os.getenv("CLUSTER_PEERS", "").split(",") if peer]
+    if len(peers) < 2:
+        return None
+    return ClusterMember(
+        index=int(os.environ["CLUSTER_WORKER_INDEX"]),
+        peers=peers,
+        secret=os.environ["CLUSTER_SECRET"],
+    )
+
+
+class ClusterGateway:
+    """
+    ASGI front end that proxies every request to one worker
+
+    Requests about a room (path, query or JSON body, see the route tables
+    above) go to the room's owner on the hash ring, including /ws/{room_name},
+    so each room's state, identity IDs, summary locks and WebSocket
+    subscribers live in one process. Follow-ups on a transfer go to the worker
+    that ran it, and /api/agents* to the worker holding the agent pool.
+    Everything else is spread round-robin; `?worker=N` pins such
+    a request to worker N (e.g. /metrics?worker=N). Responses are streamed
+    back as they arrive, so SSE summaries stream through the gateway.
+    """
+
+    def __init__(self, peers: List[str], pool_size: int = 100, connect_timeout_seconds: float = 5.0):
+        self.peers = peers
+        self.ring = HashRing(len(peers))
+        self.pool_size = pool_size
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self._next = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ws_session: Optional[aiohttp.ClientSession] = None
+
+        self._requests = [
+            registry.counter("cluster_gateway_requests_total", "Requests proxied to a worker", {"worker": str(i)})
+            for i in range(len(peers))
+        ]
+        self._errors = registry.counter("cluster_gateway_errors_total", "Requests that could not reach their worker")
+
+    async def start(self):
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.connect_timeout_seconds)
+        # HTTP keeps a bounded keep-alive pool per worker; WebSockets hold a connection each
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=0, limit_per_host=self.pool_size),
+            timeout=timeout,
+            auto_decompress=False,
+        )
+        self._ws_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0), timeout=timeout)
+
+    async def close(self):
+        for session in (self._session, self._ws_session):
+            if session is not None:
+                await session.close()
+
+    def pick_worker(self, path: str, query_string: bytes, body: bytes) -> int:
+        if AGENTS_ROUTE.match(path):
+            return self.ring.owner(AGENT_POOL_KEY)
+        room_name = routing_room(path, query_string, body)
+        if room_name is not None:
+            return self.ring.owner(room_name)
+        match = TRANSFER_ROUTE.match(path)
+        if match and int(match.group("worker")) < len(self.peers):
+            return int(match.group("worker"))
+        pinned = parse_qs(query_string.decode("latin-1")).get("worker")
+        if pinned and pinned[0].isdigit() and int(pinned[0]) < len(self.peers):
+            return int(pinned[0])
+        self._next = (self._next + 1) % len(self.peers)
+        return self._next
+
+    @staticmethod
+    def _upstream_headers(scope) -> List[Tuple[str, str]]:
+        headers = []
+        for name, value in scope["headers"]:
+            name = name.decode("latin-1").lower()
+            if name in HOP_BY_HOP_HEADERS or name.startswith("sec-websocket-"):
+                continue
+            headers.append((name, value.decode("latin-1")))
+        client = scope.get("client")
+        if client:
+            headers.append(("x-forwarded-for", client[0]))
+        return headers
+
+    def _upstream_url(self, worker: int, scope) -> URL:
+        path = scope.get("raw_path") or scope["path"].encode("utf-8")
+        target = path.decode("latin-1")
+        if scope.get("query_string"):
+            target += "?" + scope["query_string"].decode("latin-1")
+        return URL(self.peers[worker] + target, encoded=True)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _respond(self, send, status: int, body: bytes, content_type: bytes = b"application/json"):
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _http(self, scope, receive, send):
+        path = scope["path"]
+        if path == "/api/cluster/stats":
+            await self._respond(send, 200, json.dumps(self.stats()).encode("utf-8"))
+            return
+        if path.startswith("/api/cluster/"):
+            # Worker-to-worker only
+            await self._respond(send, 404, b'{"detail":"Not Found"}')
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        if path == "/metrics" and b"worker=" not in scope.get("query_string", b""):
+            await self._respond(send, 200, registry.render_prometheus().encode("utf-8"), PROMETHEUS_CONTENT_TYPE.encode("latin-1"))
+            return
+
+        worker = self.pick_worker(path, scope.get("query_string", b""), body)
+        self._requests[worker].inc()
+        started = False
+        try:
+            async with self._session.request(
+                scope["method"],
+                self._upstream_url(worker, scope),
+                headers=self._upstream_headers(scope),
+                data=body,
+                allow_redirects=False,
+            ) as response:
+                headers = [
+                    (name.lower(), value) for name, value in response.raw_headers
+                    if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS or name.lower() == b"content-length"
+                ]
+                await send({"type": "http.response.start", "status": response.status, "headers": headers})
+                started = True
+                async for chunk in response.content.iter_any():
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b""})
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._errors.inc()
+            logger.warning("Worker unreachable", extra={"worker": worker, "path": path, "started": started, "error": str(e)})
+            if started:
+                # Too late for a 502: abort so the client sees a broken response
+                # rather than a truncated body that looks complete
+                raise
+            await self._respond(send, 502, b'{"detail":"Worker unavailable"}')
+
+    async def _websocket(self, scope, receive, send):
+        await receive()  # websocket.connect
+        worker = self.pick_worker(scope["path"], scope.get("query_string", b""), b"")
+        self._requests[worker].inc()
+        try:
+            upstream = await self._ws_session.ws_connect(
+                self._upstream_url(worker, scope),
+                headers=self._upstream_headers(scope),
+                protocols=scope.get("subprotocols") or (),
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._errors.inc()
+            logger.warning("Worker unreachable", extra={"worker": worker, "path": scope["path"], "error": str(e)})
+            await send({"type": "websocket.close", "code": 1011})
+            return
+
+        await send({"type": "websocket.accept", "subprotocol": upstream.protocol})
+
+        async def client_to_worker():
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("text") is not None:
+                    await upstream.send_str(message["text"])
+                elif message.get("bytes") is not None:
+                    await upstream.send_bytes(message["bytes"])
+
+        async def worker_to_client():
+            async for message in upstream:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    await send({"type": "websocket.send", "text": message.data})
+                elif message.type == aiohttp.WSMsgType.BINARY:
+                    await send({"type": "websocket.send", "bytes": message.data})
+                else:
+                    break
+            await send({"type": "websocket.close", "code": upstream.close_code or 1000})
+
+        tasks = [asyncio.create_task(client_to_worker()), asyncio.create_task(worker_to_client())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await upstream.close()
+
+    def stats(self) -> Dict:
+        return {
+            "gateway_pid": os.getpid(),
+            "workers": [
+                {"worker": i, "url": peer, "requests": int(self._requests[i].value)}
+                for i, peer in enumerate(self.peers)
+            ],
+            "errors": int(self._errors.value),
+        }
+
+
+def create_gateway() -> ClusterGateway:
+    """uvicorn factory for the gateway processes started by run_cluster"""
+    return ClusterGateway(
+        [peer for peer in os.environ["CLUSTER_PEERS"].split(",") if peer],
+        pool_size=int(os.getenv("CLUSTER_GATEWAY_POOL_SIZE", "100")),
+    )
+
+
+def _wait_for_port(port: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def run_cluster(app: str, workers: int, host: str, port: int, base_port: int, gateways: int):
+    """
+    Run `workers` uvicorn processes of app on 127.0.0.1:base_port+i behind
+    `gateways` gateway processes listening on host:port, restarting any
+    process that exits until interrupted
+
+    Raises ValueError without starting anything unless STATE_STORE=redis:
+    with per-worker in-memory stores room listings only cover one worker's
+    rooms and transfers need all three rooms on the same worker.
+    CLUSTER_ALLOW_MEMORY_STORE=1 runs anyway (local tests of the routing).
+    """
+    if os.getenv("STATE_STORE", "memory") != "redis":
+        if os.getenv("CLUSTER_ALLOW_MEMORY_STORE", "0") != "1":
+            raise ValueError(
+                "WORKERS > 1 requires STATE_STORE=redis; set CLUSTER_ALLOW_MEMORY_STORE=1 to run with "
+                "per-worker in-memory stores anyway"
+            )
+        logger.warning(
+            "Cluster running with the in-memory state store: room listings only cover one worker's rooms "
+            "and transfers need all three rooms on the same worker"
+        )
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    peers = [f"http://127.0.0.1:{base_port + i}" for i in range(workers)]
+    env = {
+        **os.environ,
+        "CLUSTER_PEERS": ",".join(peers),
+        "CLUSTER_SECRET": os.getenv("CLUSTER_SECRET") or secrets.token_hex(16),
+    }
+    identity_base = int(os.getenv("IDENTITY_WORKER_ID", "0"))
+
+    def start_worker(i: int) -> subprocess.Popen:
+        worker_env = {**env, "CLUSTER_WORKER_INDEX": str(i), "IDENTITY_WORKER_ID": str((identity_base + i) & 0x3FF)}
+        return subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(base_port + i)],
+            cwd=backend_dir,
+            env=worker_env,
+        )
+
+    def start_gateway() -> subprocess.Popen:
+        return subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "cluster:create_gateway", "--factory",
+             "--host", host, "--port", str(port), "--workers", str(gateways), "--no-access-log"],
+            cwd=backend_dir,
+            env=env,
+        )
+
+    processes: Dict[str, Tuple[subprocess.Popen, Callable[[], subprocess.Popen]]] = {}
+    for i in range(workers):
+        processes[f"worker-{i}"] = (start_worker(i), lambda i=i: start_worker(i))
+    for i in range(workers):
+        if not _wait_for_port(base_port + i, timeout=60):
+            logger.warning("Worker did not start listening", extra={"worker": i, "port": base_port + i})
+    processes["gateway"] = (start_gateway(), start_gateway)
+    logger.info("Cluster started", extra={"workers": workers, "gateways": gateways, "host": host, "port": port})
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while not stopping:
+            for name, (process, restart) in list(processes.items()):
+                if process.poll() is not None and not stopping:
+                    logger.warning("Cluster process exited, restarting", extra={"process": name, "exit_code": process.returncode})
+                    processes[name] = (restart(), restart)
+            time.sleep(0.5)
+    finally:
+        for process, _ in processes.values():
+            if process.poll() is None:
+                process.terminate()
+        for process, _ in processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
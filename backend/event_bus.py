@@ -0,0 +1,113 @@
+"""
+Room Event Bus
+In-process pub/sub that pushes room state changes to WebSocket subscribers
+"""
+
+import asyncio
+import json
+from typing import Dict, Optional, Set
+
+from metrics import registry
+
+# Marker put on a lagging subscriber's queue: it must re-fetch a full snapshot
+RESYNC = object()
+
+
+class Subscription:
+    """One subscriber's bounded queue of pre-serialized events"""
+
+    def __init__(self, room_name: str, max_queue: int):
+        self.room_name = room_name
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.resyncs = 0
+
+    async def get(self, timeout: Optional[float] = None):
+        """Next serialized event, RESYNC, or None if nothing arrived within timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RoomEventBus:
+    """
+    Fan-out of room events to subscribers of that room.
+
+    Events are serialized once per publish and put on each subscriber's
+    bounded queue without awaiting, so a slow consumer never delays the
+    route that published. When a subscriber's queue is full its pending
+    diffs are discarded and replaced by a single RESYNC marker; the consumer
+    then sends a fresh snapshot instead of replaying stale diffs.
+
+    In cluster mode, relay is the worker's ClusterMember: events for rooms
+    owned by another worker are handed to it instead of local subscribers,
+    and arrive there through deliver().
+    """
+
+    def __init__(self, max_queue: int = 100, relay=None):
+        self.max_queue = max_queue
+        self.relay = relay
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+        self._connections = registry.gauge("ws_connections", "Open room event subscriptions")
+        self._published = registry.counter("room_events_published_total", "Room events published")
+        self._delivered = registry.counter("room_events_delivered_total", "Room events queued for subscribers")
+        self._resyncs = registry.counter("room_events_resyncs_total", "Slow subscribers forced to resync")
+
+    def subscribe(self, room_name: str) -> Subscription:
+        subscription = Subscription(room_name, self.max_queue)
+        self._subscribers.setdefault(room_name, set()).add(subscription)
+        self._connections.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.room_name)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.room_name]
+        self._connections.dec()
+
+    def subscriber_count(self, room_name: Optional[str] = None) -> int:
+        if room_name is not None:
+            return len(self._subscribers.get(room_name, ()))
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, room_name: str, event: Dict) -> int:
+        """Queue an event for every subscriber of room_name; returns how many received it"""
+        self._published.inc()
+        if self.relay is not None and not self.relay.owns(room_name):
+            self.relay.forward(room_name, json.dumps({"room_name": room_name, **event}))
+            return 0
+        if room_name not in self._subscribers:
+            return 0
+        return self.deliver(room_name, json.dumps({"room_name": room_name, **event}))
+
+    def deliver(self, room_name: str, payload: str) -> int:
+        """Queue an already serialized event (e.g. relayed from another worker) for local subscribers"""
+        subscribers = self._subscribers.get(room_name)
+        if not subscribers:
+            return 0
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self._force_resync(subscription)
+        self._delivered.inc(len(subscribers))
+        return len(subscribers)
+
+    def _force_resync(self, subscription: Subscription):
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(RESYNC)
+        subscription.resyncs += 1
+        self._resyncs.inc()
+
+    def stats(self) -> Dict:
+        return {
+            "rooms_with_subscribers": len(self._subscribers),
+            "subscribers": self.subscriber_count(),
+            "published": int(self._published.value),
+            "resyncs": int(self._resyncs.value),
+        }
@@ -0,0 +1,176 @@
+"""
+Extractive Summary
+Offline call summaries from TF-IDF TextRank sentence scoring, no LLM involved
+"""
+
+import re
+import time
+from typing import TYPE_CHECKING, List, Tuple
+
+from metrics import registry
+from startup import LazyModule
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# NumPy is imported the first time a summary is extracted (or by the startup warm-up)
+numpy_module = LazyModule("numpy")
+
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+# Bare numbers (order IDs, card digits) are left out of the vectors: unique to
+# every sentence, they would make near-identical sentences look unrelated
+TOKEN = re.compile(r"[a-z][a-z0-9']*")
+
+# Words that carry no topic; without them small talk doesn't look central
+STOPWORDS = frozenset("""
+a about am an and any are as at be been but by can could did do does doing for from had has have
+having he her here him his how i i'd i'll i'm i've if in into is it it's its just let let's me
+my no not now of off on or our ours please so sure than thank thanks that that's the their them
+then there these they this those to too up us very was we we're were what when where which while
+who why will with would yes yeah you you're your yours okay ok hello hi hey well right oh um uh
+help happy glad need want like know get got see sorry understand great absolutely certainly one moment
+""".split())
+
+
+class ExtractiveSummarizer:
+    """
+    Picks the most central sentences of a conversation.
+
+    Every "Speaker: text" line is split into sentences, which are embedded
+    as L2-normalized TF-IDF vectors; TextRank (PageRank over the cosine
+    similarity graph, by power iteration) scores how much each sentence
+    shares with the rest of the call. Scores are weighted by how many
+    distinct content words a sentence has and get a mild recency boost,
+    since the receiving agent cares most about the current status, and the
+    top max_sentences are returned in conversation order with their speaker,
+    skipping sentences whose cosine similarity to one already picked exceeds
+    redundancy.
+    The caller's best sentence is always included, because the customer's
+    need is the one thing the summary must not lose to agent talk.
+
+    Only the last max_candidates sentences are ranked, which bounds the
+    similarity matrix (and the cost) on very long calls.
+    """
+
+    PREFIX = "Call Summary (auto-extracted): "
+
+    def __init__(self,
+                 max_sentences: int = 3,
+                 max_candidates: int = 400,
+                 damping: float = 0.85,
+                 iterations: int = 50,
+                 recency_weight: float = 0.5,
+                 max_chars: int = 600,
+                 redundancy: float = 0.7,
+                 caller_speakers: Tuple[str, ...] = ("caller", "customer")):
+        self.max_sentences = max_sentences
+        self.max_candidates = max_candidates
+        self.damping = damping
+        self.iterations = iterations
+        self.recency_weight = recency_weight
+        self.max_chars = max_chars
+        self.redundancy = redundancy
+        self.caller_speakers = caller_speakers
+
+        self._duration = registry.histogram(
+            "extractive_summary_duration_seconds", "Time to build one extractive summary",
+            buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+        )
+
+    def sentences(self, conversation_history: List[str]) -> List[Tuple[str, str]]:
+        """(speaker, sentence) pairs of the last max_candidates sentences"""
+        pairs = []
+        # Walk back from the end so long calls only split the lines they need
+        for line in reversed(conversation_history):
+            speaker, separator, text = line.partition(": ")
+            if not separator:
+                speaker, text = "", line
+            sentences = [sentence for sentence in SENTENCE_BREAK.split(text.strip()) if sentence]
+            pairs.extend((speaker, sentence) for sentence in reversed(sentences))
+            if len(pairs) >= self.max_candidates:
+                break
+        pairs.reverse()
+        return pairs[-self.max_candidates:]
+
+    def rank(self, sentences: List[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """TextRank score of each sentence (recency boost included) and the unit TF-IDF vectors"""
+        np = numpy_module.get()
+        n = len(sentences)
+        vocabulary = {}
+        rows, columns = [], []
+        for index, sentence in enumerate(sentences):
+            for token in TOKEN.findall(sentence.lower()):
+                if token not in STOPWORDS:
+                    rows.append(index)
+                    columns.append(vocabulary.setdefault(token, len(vocabulary)))
+        if not vocabulary:
+            return np.zeros(n), np.zeros((n, 1), dtype=np.float32)
+
+        # Term counts as a dense sentence x term matrix
+        v = len(vocabulary)
+        flat = np.asarray(rows, dtype=np.int64) * v + np.asarray(columns, dtype=np.int64)
+        tf = np.bincount(flat, minlength=n * v).reshape(n, v).astype(np.float32)
+
+        document_frequency = np.count_nonzero(tf, axis=0)
+        tfidf = tf * (np.log((1 + n) / (1 + document_frequency)) + 1).astype(np.float32)
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        tfidf /= np.where(norms == 0, 1, norms)
+
+        similarity = tfidf @ tfidf.T
+        np.fill_diagonal(similarity, 0)
+        out_weight = similarity.sum(axis=1, keepdims=True)
+        # Row-stochastic transitions; sentences sharing nothing teleport uniformly
+        transitions = np.where(out_weight > 0, similarity / np.where(out_weight == 0, 1, out_weight), 1.0 / n)
+
+        scores = np.full(n, 1.0 / n, dtype=np.float32)
+        for _ in range(self.iterations):
+            updated = (1 - self.damping) / n + self.damping * (transitions.T @ scores)
+            converged = np.abs(updated - scores).sum() < 1e-6
+            scores = updated
+            if converged:
+                break
+
+        # Favor sentences that say something specific over short central ones;
+        # sentences with no content words (greetings, "ok") score zero
+        content_terms = np.count_nonzero(tf, axis=1)
+        return scores * np.log1p(content_terms) * (1 + self.recency_weight * np.linspace(0, 1, n)), tfidf
+
+    def summarize(self, conversation_history: List[str]) -> str:
+        """Summary text, or "" if the conversation has nothing to extract"""
+        started = time.perf_counter()
+        np = numpy_module.get()
+        pairs = self.sentences(conversation_history)
+        if not pairs:
+            return ""
+        scores, vectors = self.rank([sentence for _, sentence in pairs])
+        if not scores.any():
+            return ""
+
+        def redundant(index: int, picked: List[int]) -> bool:
+            return bool(picked) and float((vectors[picked] @ vectors[index]).max()) > self.redundancy
+
+        # Best first, skipping sentences that mostly repeat one already picked
+        chosen = []
+        for index in np.argsort(-scores, kind="stable")[:self.max_sentences * 20]:
+            if scores[index] <= 0 or len(chosen) == self.max_sentences:
+                break
+            if not redundant(index, chosen):
+                chosen.append(int(index))
+        if not any(pairs[index][0].lower() in self.caller_speakers for index in chosen):
+            callers = [index for index, (speaker, _) in enumerate(pairs)
+                       if speaker.lower() in self.caller_speakers and scores[index] > 0 and not redundant(index, chosen[:-1])]
+            if callers:
+                chosen[-1] = max(callers, key=lambda index: scores[index])
+
+        parts = []
+        for index in sorted(chosen):
+            speaker, sentence = pairs[index]
+            if sentence[-1] not in ".!?":
+                sentence += "."
+            parts.append(f"{speaker}: {sentence}" if speaker else sentence)
+        summary = self.PREFIX + " ".join(parts)
+        if len(summary) > self.max_chars:
+            summary = summary[:self.max_chars - 3].rstrip() + "..."
+
+        self._duration.observe(time.perf_counter() - started)
+        return summary
@@ -0,0 +1,188 @@
+"""
+Participant Identity Allocation
+O(1) per-room identity IDs, plus a snowflake mode that is unique across rooms and workers
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+def _suffix_id(identity: str) -> Optional[int]:
+    """Numeric ID at the end of an identity like "agent_a_1234", if any"""
+    _, _, suffix = identity.rpartition("_")
+    return int(suffix) if suffix.isdigit() else None
+
+
+class IdentityAllocator:
+    """Hands out participant identities of the form "{participant_type}_{id}" """
+
+    def knows(self, room_name: str) -> bool:
+        """False if the room's existing participants must be passed to seed() first"""
+        return True
+
+    def seed(self, room_name: str, identities: Iterable[str]):
+        pass
+
+    def allocate(self, room_name: str, participant_type: str) -> Tuple[str, str]:
+        """Returns (identity, display name)"""
+        raise NotImplementedError
+
+    def release(self, room_name: str, identity: str):
+        pass
+
+    def forget(self, room_name: str):
+        pass
+
+    def stats(self) -> Dict:
+        return {}
+
+
+class RoomIdentityAllocator(IdentityAllocator):
+    """
+    4-digit IDs unique within a room, tracked in a per-room set.
+
+    "random" mode keeps the original random-looking IDs: a few random draws
+    are tried (almost always the first succeeds, since rooms hold far fewer
+    than 9000 participants), then it falls back to the sequential cursor.
+    "sequential" mode walks a per-room cursor. Both allocate and release in
+    O(1) without scanning the participant list. IDs are only unique per
+    room and per worker; use SnowflakeIdentityAllocator across workers.
+    """
+
+    def __init__(self, mode: str = "random", low: int = 1000, high: int = 9999, random_attempts: int = 8):
+        if mode not in ("random", "sequential"):
+            raise ValueError(f"Unknown identity mode: {mode}")
+        self.mode = mode
+        self.low = low
+        self.high = high
+        self.random_attempts = random_attempts
+        self._used: Dict[str, Set[int]] = {}
+        self._cursor: Dict[str, int] = {}
+
+    def knows(self, room_name: str) -> bool:
+        return room_name in self._used
+
+    def seed(self, room_name: str, identities: Iterable[str]):
+        used = self._used.setdefault(room_name, set())
+        for identity in identities:
+            unique_id = _suffix_id(identity)
+            if unique_id is not None:
+                used.add(unique_id)
+
+    def _next_sequential(self, room_name: str, used: Set[int]) -> int:
+        span = self.high - self.low + 1
+        if len(used) >= span:
+            raise RuntimeError(f"No free participant IDs left in room {room_name}")
+        cursor = self._cursor.get(room_name, self.low)
+        while cursor in used:
+            cursor = self.low if cursor >= self.high else cursor + 1
+        self._cursor[room_name] = self.low if cursor >= self.high else cursor + 1
+        return cursor
+
+    def allocate(self, room_name: str, participant_type: str) -> Tuple[str, str]:
+        used = self._used.setdefault(room_name, set())
+        unique_id = None
+        if self.mode == "random":
+            for _ in range(self.random_attempts):
+                candidate = random.randint(self.low, self.high)
+                if candidate not in used:
+                    unique_id = candidate
+                    break
+        if unique_id is None:
+            unique_id = self._next_sequential(room_name, used)
+        used.add(unique_id)
+        return f"{participant_type}_{unique_id}", f"{participant_type} ({unique_id})"
+
+    def release(self, room_name: str, identity: str):
+        unique_id = _suffix_id(identity)
+        used = self._used.get(room_name)
+        if used is not None and unique_id is not None:
+            used.discard(unique_id)
+
+    def forget(self, room_name: str):
+        self._used.pop(room_name, None)
+        self._cursor.pop(room_name, None)
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "rooms": len(self._used),
+            "ids_in_use": sum(len(used) for used in self._used.values()),
+        }
+
+
+class SnowflakeIdentityAllocator(IdentityAllocator):
+    """
+    Snowflake-style IDs: 41 bits of milliseconds since epoch_ms, 10 bits of
+    worker ID and a 12-bit per-millisecond sequence.
+
+    IDs are unique across rooms, workers and restarts as long as every
+    worker has a distinct worker_id, so no per-room state is kept at all.
+    They are rendered in base 36 to keep identities short.
+    """
+
+    EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+
+    def __init__(self, worker_id: int, epoch_ms: int = EPOCH_MS):
+        if not 0 <= worker_id < (1 << self.WORKER_BITS):
+            raise ValueError(f"worker_id must be in [0, {1 << self.WORKER_BITS})")
+        self.worker_id = worker_id
+        self.epoch_ms = epoch_ms
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.issued = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            if now_ms < self._last_ms:
+                # Clock moved backwards: keep issuing from the last timestamp
+                now_ms = self._last_ms
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & ((1 << self.SEQUENCE_BITS) - 1)
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond: wait for the next one
+                    while now_ms <= self._last_ms:
+                        time.sleep(0.0001)
+                        now_ms = int(time.time() * 1000)
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            self.issued += 1
+            return (
+                ((now_ms - self.epoch_ms) << (self.WORKER_BITS + self.SEQUENCE_BITS))
+                | (self.worker_id << self.SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    @staticmethod
+    def _base36(value: int) -> str:
+        digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+        encoded = ""
+        while value:
+            value, remainder = divmod(value, 36)
+            encoded = digits[remainder] + encoded
+        return encoded or "0"
+
+    def allocate(self, room_name: str, participant_type: str) -> Tuple[str, str]:
+        unique_id = self._base36(self.next_id())
+        return f"{participant_type}_{unique_id}", f"{participant_type} ({unique_id})"
+
+    def stats(self) -> Dict:
+        return {"mode": "snowflake", "worker_id": self.worker_id, "issued": self.issued}
+
+
+def create_identity_allocator() -> IdentityAllocator:
+    """Build the allocator selected by IDENTITY_MODE ("random", "sequential" or "snowflake")"""
+    mode = os.getenv("IDENTITY_MODE", "random")
+    if mode == "snowflake":
+        # Must differ per worker process/node; the pid default is only safe on one host
+        worker_id = int(os.getenv("IDENTITY_WORKER_ID", str(os.getpid() & 0x3FF)))
+        return SnowflakeIdentityAllocator(worker_id)
+    return RoomIdentityAllocator(mode)
@@ -0,0 +1,174 @@
+"""
+State Lifecycle
+TTL-based eviction of rooms, call contexts and transfers so memory stays bounded
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from metrics import registry
+from state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+def _age_seconds(timestamp: Optional[str], now: float) -> Optional[float]:
+    """Seconds since an ISO timestamp written by the routes (local time)"""
+    if not timestamp:
+        return None
+    try:
+        return now - datetime.fromisoformat(timestamp).timestamp()
+    except ValueError:
+        return None
+
+
+class LifecycleManager:
+    """
+    Periodic reaper for state the demo used to keep forever.
+
+    Every reap_interval_seconds it deletes:
+      - inactive rooms idle for longer than room_inactive_ttl
+      - any room older than room_max_age (clients that never called leave)
+      - transfers older than transfer_ttl
+      - call contexts (conversation, summary, checkpoint) not written for
+        context_ttl whose room no longer exists
+
+    Each evicted room name is passed to the on_room_evicted callbacks so
+    in-process companions (summary locks, pre-warmed summaries) are dropped
+    too; on_reap callbacks run once per pass (e.g. purging expired cache
+    entries). A TTL of 0 disables that rule. After every pass live object
+    counts and approximate bytes are exported as gauges.
+    """
+
+    def __init__(self,
+                 store: StateStore,
+                 room_inactive_ttl: float = 900.0,
+                 room_max_age: float = 86400.0,
+                 transfer_ttl: float = 3600.0,
+                 context_ttl: float = 3600.0,
+                 reap_interval_seconds: float = 60.0,
+                 on_room_evicted: Optional[List[Callable[[str], None]]] = None,
+                 on_reap: Optional[List[Callable[[], object]]] = None):
+        self.store = store
+        self.room_inactive_ttl = room_inactive_ttl
+        self.room_max_age = room_max_age
+        self.transfer_ttl = transfer_ttl
+        self.context_ttl = context_ttl
+        self.reap_interval_seconds = reap_interval_seconds
+        self.on_room_evicted = list(on_room_evicted or [])
+        self.on_reap = list(on_reap or [])
+        self._task: Optional[asyncio.Task] = None
+        self.last_usage: Dict = {}
+
+        self._evicted = {
+            kind: registry.counter("state_evictions_total", "State entries removed by the lifecycle reaper", {"kind": kind})
+            for kind in ("room", "context", "transfer")
+        }
+        self._reap_duration = registry.histogram("state_reap_duration_seconds", "Duration of a lifecycle reaper pass")
+        self._live = {
+            kind: registry.gauge("state_live_objects", "Objects currently held by the state store", {"kind": kind})
+            for kind in ("rooms", "conversations", "conversation_messages", "transfers")
+        }
+        self._bytes = registry.gauge("state_approx_bytes", "Approximate bytes held by the state store")
+
+    def start(self):
+        if self._task is None and self.reap_interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reap_interval_seconds)
+            try:
+                await self.reap()
+            except Exception as e:
+                logger.exception("State reaper pass failed", extra={"error": str(e)})
+
+    async def evict_room(self, room_name: str):
+        await self.store.delete_room(room_name)
+        for callback in self.on_room_evicted:
+            callback(room_name)
+        self._evicted["room"].inc()
+
+    async def reap(self) -> Dict[str, int]:
+        """Run one eviction pass; returns how many entries of each kind were removed"""
+        started = time.perf_counter()
+        now = time.time()
+        removed = {"rooms": 0, "contexts": 0, "transfers": 0}
+
+        rooms = await self.store.list_rooms()
+        for room_name, room in rooms.items():
+            idle = _age_seconds(room.get("updated_at") or room.get("created_at"), now)
+            age = _age_seconds(room.get("created_at"), now)
+            expired_inactive = (
+                self.room_inactive_ttl and room.get("status") == "inactive"
+                and idle is not None and idle > self.room_inactive_ttl
+            )
+            expired_age = self.room_max_age and age is not None and age > self.room_max_age
+            if expired_inactive or expired_age:
+                await self.evict_room(room_name)
+                removed["rooms"] += 1
+
+        if self.context_ttl:
+            # Conversations posted for rooms that were never created (or already evicted)
+            for room_name in await self.store.stale_contexts(now - self.context_ttl):
+                # Live rooms keep their context; evicted ones already dropped it
+                if await self.store.room_exists(room_name):
+                    continue
+                await self.store.delete_context(room_name)
+                for callback in self.on_room_evicted:
+                    callback(room_name)
+                self._evicted["context"].inc()
+                removed["contexts"] += 1
+
+        if self.transfer_ttl:
+            for transfer_id, record in (await self.store.list_transfers()).items():
+                age = _age_seconds(record.get("created_at"), now)
+                if age is not None and age > self.transfer_ttl:
+                    await self.store.delete_transfer(transfer_id)
+                    self._evicted["transfer"].inc()
+                    removed["transfers"] += 1
+
+        for callback in self.on_reap:
+            callback()
+        await self.refresh_usage()
+        self._reap_duration.observe(time.perf_counter() - started)
+        if any(removed.values()):
+            logger.info("State reaper removed entries", extra=removed)
+        return removed
+
+    async def refresh_usage(self) -> Dict:
+        usage = await self.store.usage()
+        for kind, gauge in self._live.items():
+            if usage.get(kind) is not None:
+                gauge.set(usage[kind])
+        if usage.get("approx_bytes") is not None:
+            self._bytes.set(usage["approx_bytes"])
+        self.last_usage = usage
+        return usage
+
+    async def refresh_counts(self):
+        """Update the live-object gauges from the store's cheap counts (no byte estimate)"""
+        for kind, count in (await self.store.counts()).items():
+            gauge = self._live.get(kind)
+            if gauge is not None:
+                gauge.set(count)
+
+    def stats(self) -> Dict:
+        return {
+            "room_inactive_ttl_seconds": self.room_inactive_ttl,
+            "room_max_age_seconds": self.room_max_age,
+            "transfer_ttl_seconds": self.transfer_ttl,
+            "context_ttl_seconds": self.context_ttl,
+            "reap_interval_seconds": self.reap_interval_seconds,
+            "evicted": {kind: int(counter.value) for kind, counter in self._evicted.items()},
+            "usage": self.last_usage,
+        }
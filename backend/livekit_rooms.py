@@ -0,0 +1,203 @@
+"""
+LiveKit Room Client
+Long-lived LiveKit API client with a pooled HTTP session and a known-rooms cache
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import aiohttp
+
+from metrics import registry
+from startup import livekit_api
+
+if TYPE_CHECKING:
+    from livekit import api
+
+
+class LiveKitRooms:
+    """
+    Owns the process's LiveKitAPI client.
+
+    The client and its aiohttp session are created once (at app startup, or
+    lazily on first use) with a keep-alive connection pool, and closed on
+    shutdown. The LiveKit SDK itself is imported off the event loop the
+    first time it is needed. Rooms this process has created or seen recently are cached, so
+    a repeated create for the same room returns without a server round trip;
+    concurrent creates for one room share a single CreateRoom call.
+    CreateRoom is idempotent on the LiveKit server, so no separate lookup is
+    needed before it. Cache entries expire after cache_ttl_seconds because
+    the server closes empty rooms on its own.
+    """
+
+    def __init__(self,
+                 url: str,
+                 api_key: str,
+                 api_secret: str,
+                 pool_size: int = 20,
+                 keepalive_seconds: float = 30.0,
+                 timeout_seconds: float = 10.0,
+                 cache_size: int = 1024,
+                 cache_ttl_seconds: float = 300.0):
+        self.url = url
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.pool_size = pool_size
+        self.keepalive_seconds = keepalive_seconds
+        self.timeout_seconds = timeout_seconds
+        self.cache_size = cache_size
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.client = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._known_rooms: "OrderedDict[str, Tuple[float, api.Room]]" = OrderedDict()
+        self._creating: Dict[str, asyncio.Task] = {}
+
+        self._cache_hits = registry.counter("livekit_room_cache_hits_total", "Room creates answered from the known-rooms cache")
+        self._cache_misses = registry.counter("livekit_room_cache_misses_total", "Room creates that went to the LiveKit server")
+
+    def _call_metrics(self, method: str):
+        labels = {"method": method}
+        return (
+            registry.histogram("livekit_api_duration_seconds", "LiveKit server API call latency", labels),
+            registry.counter("livekit_api_errors_total", "LiveKit server API calls that raised", labels),
+        )
+
+    async def start(self):
+        """Create the pooled session and API client if they don't exist yet"""
+        if self.client is not None:
+            return
+        api = await livekit_api.load()
+        if self.client is not None:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            keepalive_timeout=self.keepalive_seconds,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+        )
+        self.client = api.LiveKitAPI(
+            url=self.url,
+            api_key=self.api_key,
+            api_secret=self.api_secret,
+            session=self._session,
+        )
+
+    async def close(self):
+        creating = list(self._creating.values())
+        for task in creating:
+            task.cancel()
+        await asyncio.gather(*creating, return_exceptions=True)
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self._session is not None:
+            # LiveKitAPI leaves caller-provided sessions open
+            await self._session.close()
+            self._session = None
+
+    def _cached(self, room_name: str) -> Optional["api.Room"]:
+        entry = self._known_rooms.get(room_name)
+        if entry is None:
+            return None
+        expires_at, room_info = entry
+        if expires_at < time.monotonic():
+            del self._known_rooms[room_name]
+            return None
+        self._known_rooms.move_to_end(room_name)
+        return room_info
+
+    def remember(self, room_info: "api.Room"):
+        if self.cache_size <= 0:
+            return
+        self._known_rooms[room_info.name] = (time.monotonic() + self.cache_ttl_seconds, room_info)
+        self._known_rooms.move_to_end(room_info.name)
+        while len(self._known_rooms) > self.cache_size:
+            self._known_rooms.popitem(last=False)
+
+    def forget(self, room_name: str):
+        self._known_rooms.pop(room_name, None)
+
+    async def ensure_room(self, room_name: str, max_participants: int = 10, metadata: str = "") -> "api.Room":
+        """Return the room, creating it on the server unless it is already known"""
+        room_info = self._cached(room_name)
+        if room_info is not None:
+            self._cache_hits.inc()
+            return room_info
+
+        pending = self._creating.get(room_name)
+        if pending is not None:
+            self._cache_hits.inc()
+            return await asyncio.shield(pending)
+
+        self._cache_misses.inc()
+        # Its own task, so a cancelled first caller doesn't cancel the others waiting on it
+        task = asyncio.create_task(self._create_and_remember(room_name, max_participants, metadata))
+        self._creating[room_name] = task
+        task.add_done_callback(lambda done: self._created(room_name, done))
+        return await asyncio.shield(task)
+
+    async def _create_and_remember(self, room_name: str, max_participants: int, metadata: str) -> "api.Room":
+        room_info = await self._create_room(room_name, max_participants, metadata)
+        self.remember(room_info)
+        return room_info
+
+    def _created(self, room_name: str, task: asyncio.Task):
+        if self._creating.get(room_name) is task:
+            del self._creating[room_name]
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody waited for doesn't log a warning
+            task.exception()
+
+    async def _create_room(self, room_name: str, max_participants: int, metadata: str) -> "api.Room":
+        await self.start()
+        api = await livekit_api.load()
+        duration, errors = self._call_metrics("create_room")
+        started = time.perf_counter()
+        try:
+            return await self.client.room.create_room(
+                api.CreateRoomRequest(
+                    name=room_name,
+                    max_participants=max_participants,
+                    metadata=metadata,
+                )
+            )
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started)
+
+    async def move_participant(self, room_name: str, identity: str, destination_room: str):
+        """Move a connected participant to another room without reconnecting them"""
+        await self.start()
+        api = await livekit_api.load()
+        duration, errors = self._call_metrics("move_participant")
+        started = time.perf_counter()
+        try:
+            await self.client.room.move_participant(
+                api.MoveParticipantRequest(
+                    room=room_name,
+                    identity=identity,
+                    destination_room=destination_room,
+                )
+            )
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started)
+
+    def stats(self) -> Dict:
+        return {
+            "connected": self.client is not None,
+            "pool_size": self.pool_size,
+            "keepalive_seconds": self.keepalive_seconds,
+            "known_rooms": len(self._known_rooms),
+            "cache_hits": int(self._cache_hits.value),
+            "cache_misses": int(self._cache_misses.value),
+        }
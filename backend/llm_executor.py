@@ -0,0 +1,232 @@
+"""
+Async LLM Execution Layer
+Runs provider calls off the event loop with bounded concurrency and per-call timeouts
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+from metrics import registry
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a provider call exceeds its timeout"""
+
+
+class LLMExecutor:
+    """
+    Bounded execution layer for LLM provider calls.
+
+    Blocking SDK calls (e.g. Gemini's generate_content) run on a dedicated
+    thread pool; native async clients run on the event loop. Both paths share
+    one concurrency limit, so a burst of summaries can never occupy more than
+    max_concurrency slots, and callers beyond that wait in a queue whose depth
+    is exported as a metric.
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 15.0):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self._queue_depth = registry.gauge(
+            "llm_executor_queue_depth", "LLM calls waiting for an execution slot"
+        )
+        self._in_flight = registry.gauge(
+            "llm_executor_in_flight", "LLM calls currently executing"
+        )
+        self._max_queue_depth = registry.gauge(
+            "llm_executor_max_queue_depth", "Highest observed LLM queue depth"
+        )
+        self._queue_wait = registry.histogram(
+            "llm_executor_queue_wait_seconds", "Time spent waiting for an LLM execution slot"
+        )
+
+    def _provider_metrics(self, provider: str):
+        labels = {"provider": provider}
+        return (
+            registry.histogram("llm_call_duration_seconds", "LLM call latency", labels),
+            registry.counter("llm_calls_total", "LLM calls started", labels),
+            registry.counter("llm_call_timeouts_total", "LLM calls that timed out", labels),
+            registry.counter("llm_call_errors_total", "LLM calls that raised", labels),
+        )
+
+    async def _acquire(self):
+        self._queue_depth.inc()
+        if self._queue_depth.value > self._max_queue_depth.value:
+            self._max_queue_depth.set(self._queue_depth.value)
+        started = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._queue_depth.dec()
+        self._queue_wait.observe(time.perf_counter() - started)
+        self._in_flight.inc()
+
+    def _release(self):
+        self._in_flight.dec()
+        self._semaphore.release()
+
+    async def run_sync(self,
+                       fn: Callable[..., Any],
+                       *args,
+                       provider: str = "unknown",
+                       timeout: Optional[float] = None,
+                       **kwargs) -> Any:
+        """
+        Run a blocking provider call on the LLM thread pool
+
+        The execution slot is held until the worker thread actually finishes,
+        so timed-out calls still count against the concurrency limit instead of
+        piling up unbounded background threads.
+        """
+        duration, calls, timeouts, errors = self._provider_metrics(provider)
+        await self._acquire()
+        calls.inc()
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            timeouts.inc()
+            raise LLMTimeoutError(f"{provider} call timed out after {timeout or self.timeout}s")
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started)
+
+    async def run(self,
+                  coro_factory: Callable[[], Awaitable[Any]],
+                  provider: str = "unknown",
+                  timeout: Optional[float] = None) -> Any:
+        """Run a native async provider call under the shared concurrency limit"""
+        duration, calls, timeouts, errors = self._provider_metrics(provider)
+        await self._acquire()
+        calls.inc()
+
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(coro_factory(), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            timeouts.inc()
+            raise LLMTimeoutError(f"{provider} call timed out after {timeout or self.timeout}s")
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started)
+            self._release()
+
+    async def stream_sync(self,
+                          iterable_factory: Callable[[], Iterable[Any]],
+                          provider: str = "unknown",
+                          timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """
+        Iterate a blocking stream (e.g. Gemini with stream=True) on the LLM thread pool
+
+        Items are handed to the event loop as soon as the worker thread produces
+        them. The timeout bounds the whole stream; if the consumer stops early
+        the worker thread stops at the next item.
+        """
+        duration, calls, timeouts, errors = self._provider_metrics(provider)
+        await self._acquire()
+        calls.inc()
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+        done = object()
+
+        def pump():
+            try:
+                for item in iterable_factory():
+                    if stopped.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+        started = time.perf_counter()
+        deadline = started + (timeout or self.timeout)
+        try:
+            future = self._pool.submit(pump)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+
+        try:
+            while True:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item, error = await asyncio.wait_for(queue.get(), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    timeouts.inc()
+                    raise LLMTimeoutError(f"{provider} stream timed out after {timeout or self.timeout}s")
+                if item is done:
+                    if error is not None:
+                        errors.inc()
+                        raise error
+                    return
+                yield item
+        finally:
+            stopped.set()
+            duration.observe(time.perf_counter() - started)
+
+    async def stream(self,
+                     stream_factory: Callable[[], Awaitable[AsyncIterator[Any]]],
+                     provider: str = "unknown",
+                     timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """Iterate a native async stream (e.g. OpenAI with stream=True) under the concurrency limit"""
+        duration, calls, timeouts, errors = self._provider_metrics(provider)
+        await self._acquire()
+        calls.inc()
+
+        started = time.perf_counter()
+        deadline = started + (timeout or self.timeout)
+        try:
+            iterator = (await asyncio.wait_for(stream_factory(), timeout or self.timeout)).__aiter__()
+            while True:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), max(remaining, 0))
+                except StopAsyncIteration:
+                    return
+                yield item
+        except asyncio.TimeoutError:
+            timeouts.inc()
+            raise LLMTimeoutError(f"{provider} stream timed out after {timeout or self.timeout}s")
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started)
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "in_flight": int(self._in_flight.value),
+            "queue_depth": int(self._queue_depth.value),
+            "max_queue_depth": int(self._max_queue_depth.value),
+            "queue_wait_p95_seconds": self._queue_wait.quantile(0.95),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
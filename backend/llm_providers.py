@@ -0,0 +1,154 @@
+"""
+LLM Providers
+Gemini, OpenAI and a local fake provider behind one complete/stream interface
+"""
+
+import asyncio
+from typing import AsyncIterator, Optional
+
+from llm_executor import LLMExecutor
+from startup import LazyModule
+
+
+class LLMProvider:
+    """Base interface: one-shot completion and token streaming"""
+
+    name = "unknown"
+
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 150) -> str:
+        raise NotImplementedError
+
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 150) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield  # pragma: no cover - makes this an async generator
+
+
+class GeminiProvider(LLMProvider):
+    """
+    google-generativeai; the SDK is blocking so calls run on the executor's thread pool
+
+    genai is the lazily imported, configured SDK module; the first call
+    imports it on the worker thread unless startup warm-up already did.
+    """
+
+    name = "gemini"
+
+    def __init__(self, executor: LLMExecutor, genai: LazyModule, model: str):
+        self.executor = executor
+        self.genai = genai
+        self.model = model
+
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 150) -> str:
+        def _generate():
+            model = self.genai.get().GenerativeModel(self.model)
+            return model.generate_content(prompt).text.strip()
+
+        return await self.executor.run_sync(_generate, provider=self.name)
+
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 150) -> AsyncIterator[str]:
+        def _chunks():
+            model = self.genai.get().GenerativeModel(self.model)
+            for chunk in model.generate_content(prompt, stream=True):
+                if chunk.text:
+                    yield chunk.text
+
+        async for text in self.executor.stream_sync(_chunks, provider=self.name):
+            yield text
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    OpenAI chat completions through the native async client
+
+    client is the lazily imported SDK set up to return an AsyncOpenAI
+    client; the first call loads it off the event loop.
+    """
+
+    name = "openai"
+
+    def __init__(self, executor: LLMExecutor, client: LazyModule, model: str):
+        self.executor = executor
+        self.client = client
+        self.model = model
+
+    def _messages(self, prompt: str, system_prompt: Optional[str]):
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 150) -> str:
+        client = await self.client.load()
+        response = await self.executor.run(
+            lambda: client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt, system_prompt),
+                max_tokens=max_tokens,
+                temperature=0.7
+            ),
+            provider=self.name
+        )
+        return response.choices[0].message.content.strip()
+
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 150) -> AsyncIterator[str]:
+        client = await self.client.load()
+        chunks = self.executor.stream(
+            lambda: client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt, system_prompt),
+                max_tokens=max_tokens,
+                temperature=0.7,
+                stream=True
+            ),
+            provider=self.name
+        )
+        async for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class FakeStreamingProvider(LLMProvider):
+    """
+    Offline provider for local development, tests and benchmarks.
+
+    Returns a canned summary after first_token_latency, then streams it word
+    by word with token_latency between words.
+    """
+
+    name = "fake"
+
+    DEFAULT_TEXT = (
+        "Caller cannot log in and keeps getting an 'Invalid credentials' error. "
+        "Agent A is checking the account status and may reset the password. "
+        "Agent B should confirm identity and complete the reset."
+    )
+
+    def __init__(self,
+                 first_token_latency: float = 0.3,
+                 token_latency: float = 0.02,
+                 text: Optional[str] = None,
+                 fail: bool = False):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.text = text or self.DEFAULT_TEXT
+        self.fail = fail
+        self.calls = 0
+
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 150) -> str:
+        self.calls += 1
+        words = self.text.split(" ")
+        await asyncio.sleep(self.first_token_latency + self.token_latency * (len(words) - 1))
+        if self.fail:
+            raise RuntimeError("fake provider failure")
+        return self.text
+
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 150) -> AsyncIterator[str]:
+        self.calls += 1
+        await asyncio.sleep(self.first_token_latency)
+        if self.fail:
+            raise RuntimeError("fake provider failure")
+        for index, word in enumerate(self.text.split(" ")):
+            if index:
+                await asyncio.sleep(self.token_latency)
+            yield word if index == 0 else " " + word
@@ -5,24 +5,92 @@ Handles room management, transfer logic, and LLM integration
 
 import os
 import asyncio
+import base64
 import json
-from typing import Dict, List, Optional
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Dict, List, Optional, Set
 from datetime import datetime
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from livekit import api
 # from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli
 # from livekit.agents.voice_assistant import VoiceAssistant
 # from livekit.plugins import openai
-import openai as openai_client
-import google.generativeai as genai
 from dotenv import load_dotenv
+from agent_pool import AVAILABLE, OFFLINE, AgentPool
+from admission import AdmissionController, AdmissionRejected, RoutePolicy, tenant_key
+from cluster import AGENT_POOL_KEY, PeerUnavailable, create_cluster_member, run_cluster
+from event_bus import RESYNC, RoomEventBus
+from extractive_summary import ExtractiveSummarizer, numpy_module
+from identity_allocator import create_identity_allocator
+from lifecycle import LifecycleManager
+from livekit_rooms import LiveKitRooms
+from llm_executor import LLMExecutor
+from llm_providers import FakeStreamingProvider, GeminiProvider, OpenAIProvider
+from provider_router import AllProvidersFailed, ProviderRouter
+from metrics import PROMETHEUS_CONTENT_TYPE, registry
+from observability import RequestMetricsMiddleware, configure_logging, stop_logging
+from startup import FirstRequestMiddleware, LazyModule, StartupTimer, livekit_api, warm_up
+from state_store import create_state_store
+from rate_limit import TokenBucket
+from summary_batch import BatchSummarizer
+from summary_cache import SummaryCache, summary_fingerprint
+from summary_prewarmer import SummaryPrewarmer
+from token_service import TokenService
+from transcript_ingest import TranscriptIngestor, transcript_lines
+from transfer_engine import COMPLETED, FAILED, INITIATED, TransferEngine, TransferStageError
+from twilio_integration import add_twilio_routes
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="LiveKit Warm Transfer API")
+# Structured logging: records are queued and written to stdout by a background thread
+configure_logging(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_FORMAT", "json"))
+logger = logging.getLogger("warm_transfer")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_task = None
+    if SDK_WARMUP == "eager":
+        # Everything loaded before the first request is accepted (slowest cold start)
+        await warm_up(_warmup_modules())
+        await livekit_rooms.start()
+    elif SDK_WARMUP == "background":
+        # Accept traffic right away; requests that need an SDK still loading wait for it
+        warmup_task = asyncio.create_task(warm_up(_warmup_modules(), SDK_WARMUP_DELAY_SECONDS))
+    lifecycle.start()
+    startup_timer.mark("ready")
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    # Stop the reaper, write buffered transcript lines, stop running transfers and pending summary refreshes, then release LLM worker threads,
+    # LiveKit connections and the store
+    await lifecycle.shutdown()
+    await transcript_ingestor.shutdown()
+    await transfer_engine.shutdown()
+    await summary_prewarmer.shutdown()
+    llm_executor.shutdown()
+    token_service.shutdown()
+    await livekit_rooms.close()
+    await twilio_integration.close()
+    if cluster_member is not None:
+        # Let pool updates bound for another worker go out first
+        await asyncio.gather(*_agent_pool_updates, return_exceptions=True)
+        await cluster_member.close()
+    await state_store.close()
+    stop_logging()
+
+app = FastAPI(title="LiveKit Warm Transfer API", lifespan=lifespan)
+
+# Per-route latency histograms (http_request_duration_seconds)
+app.add_middleware(RequestMetricsMiddleware)
+
+# Cold-start milestones (seconds since process start): imported, ready, first_request
+startup_timer = StartupTimer()
+app.add_middleware(FirstRequestMiddleware, timer=startup_timer)
 
 # CORS middleware - Allow mobile, local network, and production access
 app.add_middleware(
@@ -62,25 +130,484 @@ if not LIVEKIT_API_KEY:
 if not LIVEKIT_API_SECRET:
     raise ValueError("LIVEKIT_API_SECRET environment variable is required")
 if not GEMINI_API_KEY:
-    print("WARNING: GEMINI_API_KEY not found, Gemini API will not work")
+    logger.warning("GEMINI_API_KEY not found, Gemini API will not work")
 if not OPENAI_API_KEY:
-    print("WARNING: OPENAI_API_KEY not found, OpenAI API will not work")
+    logger.warning("OPENAI_API_KEY not found, OpenAI API will not work")
+
+# LiveKit API client: one pooled keep-alive session for the process lifetime, plus
+# a cache of rooms known to exist so repeated creates skip the server
+livekit_rooms = LiveKitRooms(
+    url=LIVEKIT_URL,
+    api_key=LIVEKIT_API_KEY,
+    api_secret=LIVEKIT_API_SECRET,
+    pool_size=int(os.getenv("LIVEKIT_POOL_SIZE", "20")),
+    keepalive_seconds=float(os.getenv("LIVEKIT_KEEPALIVE_SECONDS", "30")),
+    timeout_seconds=float(os.getenv("LIVEKIT_TIMEOUT_SECONDS", "10")),
+    cache_size=int(os.getenv("LIVEKIT_ROOM_CACHE_SIZE", "1024")),
+    cache_ttl_seconds=float(os.getenv("LIVEKIT_ROOM_CACHE_TTL_SECONDS", "300")),
+)
+
+# Access tokens: cached grant templates, batches optionally signed on a process pool
+token_service = TokenService(
+    LIVEKIT_API_KEY,
+    LIVEKIT_API_SECRET,
+    template_ttl_seconds=float(os.getenv("TOKEN_TEMPLATE_TTL_SECONDS", "60")),
+    workers=int(os.getenv("TOKEN_WORKERS", "0")),
+    pool_threshold=int(os.getenv("TOKEN_POOL_THRESHOLD", "256")),
+)
+TOKEN_BATCH_MAX = int(os.getenv("TOKEN_BATCH_MAX", "500"))
+
+# Participant identities: per-room 4-digit IDs, or snowflake IDs unique across workers
+identity_allocator = create_identity_allocator()
+
+# Provider SDKs are imported on first use (or by the startup warm-up), not at import time:
+# openai and google.generativeai alone take most of a second to import
+def _setup_openai(openai_module):
+    """Native async client, never blocks the event loop"""
+    return openai_module.AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+def _setup_gemini(genai_module):
+    genai_module.configure(api_key=GEMINI_API_KEY)
+    return genai_module
+
+openai_sdk = LazyModule("openai", _setup_openai)
+gemini_sdk = LazyModule("google.generativeai", _setup_gemini)
+
+# "background" loads the lazily imported modules on a worker thread once the server accepts
+# traffic, "eager" loads them before it does, "lazy" only when a request first needs one
+SDK_WARMUP = os.getenv("SDK_WARMUP", "background")
+SDK_WARMUP_DELAY_SECONDS = float(os.getenv("SDK_WARMUP_DELAY_SECONDS", "0"))
+
+# LLM execution layer: bounded concurrency and per-call timeouts for provider calls
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "15"))
+llm_executor = LLMExecutor(max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT_SECONDS)
+
+GEMINI_MODEL = "gemini-1.5-flash"
+OPENAI_MODEL = "gpt-3.5-turbo"
+gemini_provider = GeminiProvider(llm_executor, gemini_sdk, GEMINI_MODEL)
+openai_provider = OpenAIProvider(llm_executor, openai_sdk, OPENAI_MODEL)
+
+# Local fake provider for offline development and tests (LLM_FAKE_PROVIDER=1)
+LLM_FAKE_PROVIDER = os.getenv("LLM_FAKE_PROVIDER", "0") == "1"
+fake_provider = FakeStreamingProvider(
+    first_token_latency=float(os.getenv("LLM_FAKE_FIRST_TOKEN_SECONDS", "0.3")),
+    token_latency=float(os.getenv("LLM_FAKE_TOKEN_SECONDS", "0.02")),
+)
+
+def _configured_providers():
+    if LLM_FAKE_PROVIDER:
+        return [fake_provider]
+    providers = []
+    if GEMINI_API_KEY:
+        providers.append(gemini_provider)
+    if OPENAI_API_KEY:
+        providers.append(openai_provider)
+    return providers
+
+def _warmup_modules() -> List[LazyModule]:
+    """LiveKit first (every room request needs it), then NumPy for summary drafts and the configured LLM SDKs"""
+    modules = [livekit_api, numpy_module]
+    if not LLM_FAKE_PROVIDER:
+        if GEMINI_API_KEY:
+            modules.append(gemini_sdk)
+        if OPENAI_API_KEY:
+            modules.append(openai_sdk)
+    return modules
+
+# Provider router: Gemini first by default, reordered by observed latency/errors,
+# with hedged requests and per-provider circuit breakers
+llm_router = ProviderRouter(
+    _configured_providers(),
+    hedging=os.getenv("LLM_HEDGING", "1") == "1",
+    default_hedge_delay=float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "2")),
+    failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURES", "5")),
+    cooldown_seconds=float(os.getenv("LLM_CIRCUIT_COOLDOWN_SECONDS", "30")),
+)
+
+# Per-provider quotas for interactive summaries (LLM_RATE_PER_SECOND, 0 = unlimited): a provider
+# over its rate is skipped for the next one instead of making the request queue
+def _provider_quotas() -> Dict[str, TokenBucket]:
+    quotas = {}
+    for provider in llm_router.providers:
+        rate = float(os.getenv(f"LLM_RATE_{provider.name.upper()}", os.getenv("LLM_RATE_PER_SECOND", "0")))
+        if rate > 0:
+            quotas[provider.name] = TokenBucket(f"llm_{provider.name}", rate=rate, burst=float(os.getenv("LLM_RATE_BURST", "10")))
+    return quotas
+
+llm_quotas = _provider_quotas()
+
+# Admission control for LLM-backed work: the routes share ADMISSION_LLM_SLOTS slots, transfer
+# summaries go ahead of ad-hoc ones and background refreshes come last. A request that would
+# queue past its route's budget is shed (429, or an extractive summary where one will do)
+ADMISSION_LLM_SLOTS = int(os.getenv("ADMISSION_LLM_SLOTS", str(LLM_MAX_CONCURRENCY)))
+admission = AdmissionController(
+    slots=ADMISSION_LLM_SLOTS,
+    routes=[
+        # Summaries of transfers with no precomputed one: a caller is on hold
+        RoutePolicy(
+            "transfer", priority=0,
+            max_concurrency=int(os.getenv("ADMISSION_TRANSFER_CONCURRENCY", str(ADMISSION_LLM_SLOTS))),
+            latency_budget=float(os.getenv("ADMISSION_TRANSFER_BUDGET_SECONDS", "5")),
+        ),
+        # /api/summary/generate and /api/summary/stream
+        RoutePolicy(
+            "summary", priority=1,
+            max_concurrency=int(os.getenv("ADMISSION_SUMMARY_CONCURRENCY", str(max(1, ADMISSION_LLM_SLOTS // 2)))),
+            latency_budget=float(os.getenv("ADMISSION_SUMMARY_BUDGET_SECONDS", "2")),
+        ),
+        # /api/test-* connectivity checks; never queue by default
+        RoutePolicy(
+            "test", priority=2,
+            max_concurrency=int(os.getenv("ADMISSION_TEST_CONCURRENCY", "1")),
+            latency_budget=float(os.getenv("ADMISSION_TEST_BUDGET_SECONDS", "0")),
+        ),
+        # Background summary refreshes wait for whatever is left
+        RoutePolicy(
+            "prewarm", priority=3,
+            max_concurrency=int(os.getenv("ADMISSION_PREWARM_CONCURRENCY", str(max(1, ADMISSION_LLM_SLOTS // 2)))),
+            latency_budget=None,
+        ),
+        # /api/summary/batch provider requests: bulk jobs go last and wait rather than fail
+        RoutePolicy(
+            "batch", priority=4,
+            max_concurrency=int(os.getenv("ADMISSION_BATCH_CONCURRENCY", str(max(1, ADMISSION_LLM_SLOTS // 2)))),
+            latency_budget=None,
+        ),
+    ],
+    tenant_rate=float(os.getenv("ADMISSION_TENANT_RATE_PER_SECOND", "0")),
+    tenant_burst=float(os.getenv("ADMISSION_TENANT_BURST", "20")),
+)
+# Tenants come from X-Tenant-ID, set by an authenticating proxy. Room names are client-chosen,
+# so keying on their prefix (e.g. "-") is opt-in, for deployments that control room naming
+ADMISSION_TENANT_SEPARATOR = os.getenv("ADMISSION_TENANT_SEPARATOR", "")
+
+def _tenant(room_name: str, x_tenant_id: str = "") -> str:
+    """Tenant a request is rate limited as; "" (not limited) without a header or opted-in prefix"""
+    if x_tenant_id or not ADMISSION_TENANT_SEPARATOR:
+        return x_tenant_id
+    return tenant_key(room_name, ADMISSION_TENANT_SEPARATOR)
+
+SUMMARY_SYSTEM_PROMPT = "You are an AI assistant that creates concise call summaries for warm transfers between customer service agents."
+
+# Used when a room has no conversation yet
+SAMPLE_CONVERSATION = [
+    "Caller: Hello, I need help with my account",
+    "Agent A: Hi! I'd be happy to help you with your account. What specific issue are you experiencing?",
+    "Caller: I can't log into my account and I'm getting an error message",
+    "Agent A: I understand you're having trouble logging in. Let me help you troubleshoot this issue.",
+    "Caller: The error says 'Invalid credentials' but I'm sure my password is correct",
+    "Agent A: That's frustrating. Let me check your account status and help you reset your password if needed."
+]
+
+# Number of trailing messages the summary prompt is built from
+SUMMARY_WINDOW = 10
+
+# "incremental" folds new messages into a running summary; "window" re-summarizes the last SUMMARY_WINDOW
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "incremental")
+# Upper bound on new messages sent per incremental update
+SUMMARY_DELTA_MAX_MESSAGES = int(os.getenv("SUMMARY_DELTA_MAX_MESSAGES", "20"))
+# Upper bound on serial provider calls one summary request makes to catch a room up
+SUMMARY_MAX_FOLDS_PER_REQUEST = max(1, int(os.getenv("SUMMARY_MAX_FOLDS_PER_REQUEST", "2")))
+summary_skipped_messages = registry.counter(
+    "summary_catchup_skipped_messages_total", "Backlog messages left out of a running summary to bound catch-up"
+)
+
+# Offline extractive summaries (TF-IDF TextRank): the fallback when every provider fails,
+# and the instant "draft" event of /api/summary/stream while the LLM is still working
+extractive_summarizer = ExtractiveSummarizer(
+    max_sentences=int(os.getenv("SUMMARY_EXTRACTIVE_SENTENCES", "3")),
+    max_candidates=int(os.getenv("SUMMARY_EXTRACTIVE_MAX_CANDIDATES", "400")),
+)
+SUMMARY_DRAFTS = os.getenv("SUMMARY_DRAFTS", "1") == "1"
+
+# Summary cache: repeated transfers on an unchanged conversation reuse the last summary
+summary_cache = SummaryCache(
+    max_entries=int(os.getenv("SUMMARY_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "300")),
+)
+
+# Bulk summaries (QA/supervisor jobs): bounded concurrency, short conversations packed
+# into one prompt, and per-provider token buckets so batches can't starve live transfers
+SUMMARY_BATCH_MAX = int(os.getenv("SUMMARY_BATCH_MAX", "1000"))
+summary_batcher = BatchSummarizer(
+    llm_router,
+    summary_cache,
+    SUMMARY_SYSTEM_PROMPT,
+    build_prompt=lambda window: _build_summary_prompt(window),
+    fallback=lambda window: _fallback_summary(window),
+    window=SUMMARY_WINDOW,
+    concurrency=int(os.getenv("SUMMARY_BATCH_CONCURRENCY", "4")),
+    pack_size=int(os.getenv("SUMMARY_BATCH_PACK_SIZE", "5")),
+    pack_max_chars=int(os.getenv("SUMMARY_BATCH_PACK_MAX_CHARS", "1500")),
+    limiters={
+        provider.name: TokenBucket(
+            f"llm_batch_{provider.name}",
+            rate=float(os.getenv(f"SUMMARY_BATCH_RATE_{provider.name.upper()}", os.getenv("SUMMARY_BATCH_RATE_PER_SECOND", "2"))),
+            burst=float(os.getenv("SUMMARY_BATCH_BURST", "4")),
+        )
+        for provider in llm_router.providers
+    },
+    admission=admission,
+)
+
+# Rooms, conversations (call contexts), summaries, rolling-summary checkpoints and
+# transfers live in the state store: in-process by default, Redis with STATE_STORE=redis
+state_store = create_state_store(
+    max_conversation_messages=int(os.getenv("CONVERSATION_MAX_MESSAGES", "500")),
+)
+summary_locks: Dict[str, asyncio.Lock] = {}
+
+# Background summary refresh: transfers read the precomputed summary instead of waiting on the LLM
+summary_prewarmer = SummaryPrewarmer(
+    refresh=lambda room_name: _prewarm_summary(room_name),
+    debounce_seconds=float(os.getenv("SUMMARY_PREWARM_DEBOUNCE_SECONDS", "2")),
+    max_delay_seconds=float(os.getenv("SUMMARY_PREWARM_MAX_DELAY_SECONDS", "10")),
+)
+
+async def set_conversation(room_name: str, conversation_history: List[str]):
+    """Replace a room's conversation and schedule a summary refresh if it changed"""
+    if await state_store.get_conversation(room_name) == conversation_history:
+        return
+    await state_store.set_conversation(room_name, conversation_history)
+    summary_prewarmer.notify_changed(room_name)
+
+def _forget_room(room_name: str):
+    """Drop in-process companions of a room evicted from the store"""
+    lock = summary_locks.get(room_name)
+    if lock is not None and not lock.locked():
+        del summary_locks[room_name]
+    summary_prewarmer.forget(room_name)
+
+# Multi-worker mode (WORKERS > 1): each room is owned by one worker, and events published here
+# for a room owned by another worker are relayed to it. None when running as a single process
+cluster_member = create_cluster_member()
+
+# Receiving agents: transfers without a to_room go to the best available agent (least loaded or
+# longest idle, with the requested skills), which stays reserved until the transfer finishes
+agent_pool = AgentPool(
+    strategy=os.getenv("AGENT_POOL_STRATEGY", "least_loaded"),
+    reservation_ttl_seconds=float(os.getenv("AGENT_RESERVATION_TTL_SECONDS", "300")),
+)
+# How long a transfer waits for an agent to free up before answering 503
+AGENT_WAIT_SECONDS = float(os.getenv("AGENT_WAIT_SECONDS", "0"))
+# In cluster mode the pool lives on one worker (the ring owner of AGENT_POOL_KEY): the gateway sends
+# /api/agents* there, and the other workers reach it through /api/cluster/agent-pool
+AGENT_POOL_REMOTE = cluster_member is not None and not cluster_member.owns(AGENT_POOL_KEY)
+_agent_pool_updates: Set[asyncio.Task] = set()
+
+def _update_agent_pool(op: str, transfer_id: str = "", room_name: str = ""):
+    """Apply a reservation settlement, a caller leaving an agent's room or a room eviction to this worker's pool"""
+    if op == "confirm":
+        return agent_pool.confirm(transfer_id)
+    if op == "release":
+        return agent_pool.release(transfer_id)
+    if op == "caller_left":
+        agent = agent_pool.agent_for_room(room_name)
+        # The transferred caller hung up: Agent B can take the next transfer
+        return agent_pool.call_ended(agent.agent_id) if agent is not None else None
+    if op == "forget_room":
+        return agent_pool.forget_room(room_name)
+    raise ValueError(f"Unknown agent pool operation: {op}")
+
+async def _agent_pool_op(op: str, transfer_id: str = "", skills: List[str] = (), room_name: str = "",
+                         timeout: float = 0.0) -> Optional[Dict]:
+    """Run an agent pool operation on this worker's pool; returns the agent's view, if any"""
+    if op == "acquire":
+        agent = await agent_pool.acquire(transfer_id, skills, timeout)
+    elif op == "claim":
+        agent = agent_pool.claim(room_name, transfer_id)
+    else:
+        agent = _update_agent_pool(op, transfer_id, room_name)
+    return agent.view() if agent is not None else None
+
+async def _call_agent_pool(op: str, **fields) -> Optional[Dict]:
+    """Run an agent pool operation on the worker holding the pool (raises PeerUnavailable)"""
+    if not AGENT_POOL_REMOTE:
+        return await _agent_pool_op(op, **fields)
+    answer = await cluster_member.call(
+        cluster_member.owner(AGENT_POOL_KEY),
+        "/api/cluster/agent-pool",
+        {"op": op, **fields},
+        fields.get("timeout", 0.0) + cluster_member.timeout_seconds,
+    )
+    return answer["agent"]
+
+async def _relay_agent_pool_update(op: str, transfer_id: str, room_name: str):
+    try:
+        await _call_agent_pool(op, transfer_id=transfer_id, room_name=room_name)
+    except PeerUnavailable as e:
+        # A lost release or confirm is undone when the reservation expires
+        logger.warning("Agent pool update failed", extra={"op": op, "transfer_id": transfer_id, "error": str(e)})
+
+def _notify_agent_pool(op: str, transfer_id: str = "", room_name: str = ""):
+    """Pool update from synchronous hooks: applied here, or sent to the pool's worker in the background"""
+    if not AGENT_POOL_REMOTE:
+        _update_agent_pool(op, transfer_id, room_name)
+        return
+    task = asyncio.create_task(_relay_agent_pool_update(op, transfer_id, room_name))
+    _agent_pool_updates.add(task)
+    task.add_done_callback(_agent_pool_updates.discard)
 
-# Initialize LiveKit client (will be created in async context)
-livekit_client = None
+# Evicts idle rooms, orphaned call contexts and old transfers; 0 disables a TTL
+lifecycle = LifecycleManager(
+    state_store,
+    room_inactive_ttl=float(os.getenv("ROOM_INACTIVE_TTL_SECONDS", "900")),
+    room_max_age=float(os.getenv("ROOM_MAX_AGE_SECONDS", "86400")),
+    transfer_ttl=float(os.getenv("TRANSFER_TTL_SECONDS", "3600")),
+    context_ttl=float(os.getenv("CONTEXT_TTL_SECONDS", "3600")),
+    reap_interval_seconds=float(os.getenv("STATE_REAP_INTERVAL_SECONDS", "60")),
+    on_room_evicted=[_forget_room, livekit_rooms.forget, token_service.forget, identity_allocator.forget,
+                     lambda room_name: _notify_agent_pool("forget_room", room_name=room_name)],
+    on_reap=[summary_cache.purge_expired],
+)
+
+# Room event bus: state changes are pushed to /ws/{room_name} subscribers
+room_events = RoomEventBus(max_queue=int(os.getenv("WS_MAX_QUEUED_EVENTS", "100")), relay=cluster_member)
+WS_HEARTBEAT_SECONDS = float(os.getenv("WS_HEARTBEAT_SECONDS", "15"))
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+
+def _transcript_flushed(room_name: str, lines: List[str]):
+    """New transcript lines were written: refresh the summary and push them to subscribers"""
+    summary_prewarmer.notify_changed(room_name)
+    room_events.publish(room_name, {"type": "transcript", "lines": lines})
+
+# Speech-to-text ingestion: segments are buffered per room and written in batches
+transcript_ingestor = TranscriptIngestor(
+    state_store,
+    on_flushed=[_transcript_flushed],
+    linger_seconds=float(os.getenv("TRANSCRIPT_LINGER_SECONDS", "0.05")),
+    max_pending=int(os.getenv("TRANSCRIPT_MAX_PENDING_LINES", "50000")),
+)
+TRANSCRIPT_MAX_LINE_CHARS = int(os.getenv("TRANSCRIPT_MAX_LINE_CHARS", "2000"))
+TRANSCRIPT_PUT_TIMEOUT_SECONDS = float(os.getenv("TRANSCRIPT_PUT_TIMEOUT_SECONDS", "5"))
+
+# Transfers: each one is driven through its states by a background task. Moving the caller into
+# Agent B's room is opt-in and then waits for Agent B to acknowledge the briefing by default, so the
+# caller never arrives before Agent A has handed over
+TRANSFER_MOVE_CALLER = os.getenv("TRANSFER_MOVE_CALLER", "0") == "1"
+TRANSFER_REQUIRE_BRIEF_ACK = os.getenv("TRANSFER_REQUIRE_BRIEF_ACK", "1" if TRANSFER_MOVE_CALLER else "0") == "1"
+
+async def _transfer_summary(record: Dict) -> Dict:
+    """Serve the precomputed summary; only wait on the LLM if there is none yet"""
+    caller_room = record["caller_room"]
+    precomputed = summary_prewarmer.get(caller_room)
+    if precomputed is not None:
+        return {
+            "summary": precomputed["summary"],
+            "stale": precomputed["stale"],
+            "age_seconds": precomputed["age_seconds"],
+            "degraded": False
+        }
+    try:
+        admission.check_tenant(_tenant(caller_room, record.get("tenant", "")))
+        async with admission.admit("transfer"):
+            summary = await generate_call_summary(caller_room)
+    except AdmissionRejected as e:
+        # An extractive summary now beats keeping the caller on hold past the budget
+        return {"summary": await _degraded_summary("transfer", caller_room, e), "stale": False, "age_seconds": 0.0, "degraded": True}
+    return {"summary": summary, "stale": False, "age_seconds": 0.0, "degraded": False}
+
+async def _brief_agent_b(record: Dict):
+    """Push the call summary to Agent B's room"""
+    room_events.publish(record["to_room"], {
+        "type": "transfer_briefing",
+        "transfer_id": record["transfer_id"],
+        "from_room": record["from_room"],
+        "caller_room": record["caller_room"],
+        "call_summary": record["call_summary"]
+    })
+
+async def _move_caller(record: Dict) -> List[str]:
+    """Move the caller's connection into Agent B's room and mirror it in the store"""
+    caller_room, to_room = record["caller_room"], record["to_room"]
+    if not TRANSFER_MOVE_CALLER or caller_room == to_room:
+        return []
+    room = await state_store.get_room(caller_room)
+    callers = [p for p in room["participants"] if p == "caller" or p.startswith("caller_")] if room else []
+    for identity in callers:
+        await livekit_rooms.move_participant(caller_room, identity, to_room)
+        left, removed = await state_store.remove_participant(caller_room, identity)
+        if removed:
+            identity_allocator.release(caller_room, identity)
+            room_events.publish(caller_room, {
+                "type": "participant_left",
+                "participant": identity,
+                "participants_count": len(left["participants"]),
+                "status": left["status"]
+            })
+        joined = await state_store.add_participant(to_room, identity)
+        if joined is not None:
+            if identity_allocator.knows(to_room):
+                identity_allocator.seed(to_room, [identity])
+            room_events.publish(to_room, {
+                "type": "participant_joined",
+                "participant": identity,
+                "participants_count": len(joined["participants"]),
+                "status": joined["status"]
+            })
+    return callers
+
+def _publish_transfer_state(record: Dict):
+    event = {
+        "type": "transfer_state",
+        "transfer_id": record["transfer_id"],
+        "status": record["status"],
+        "at": record["transitions"][-1]["at"],
+        "error": record.get("error")
+    }
+    for notified_room in {record["from_room"], record["to_room"], record["caller_room"]}:
+        if record["status"] == INITIATED:
+            room_events.publish(notified_room, {
+                "type": "transfer_initiated",
+                "transfer_id": record["transfer_id"],
+                "from_room": record["from_room"],
+                "to_room": record["to_room"],
+                "caller_room": record["caller_room"]
+            })
+        room_events.publish(notified_room, event)
+
+def _settle_agent_reservation(record: Dict):
+    """A finished transfer's agent reservation becomes an active call, or goes back into rotation"""
+    if record["status"] == COMPLETED:
+        _notify_agent_pool("confirm", record["transfer_id"])
+    elif record["status"] == FAILED:
+        _notify_agent_pool("release", record["transfer_id"])
 
-# Initialize OpenAI client
-if OPENAI_API_KEY:
-    openai_client.api_key = OPENAI_API_KEY
+transfer_engine = TransferEngine(
+    state_store,
+    summarize=_transfer_summary,
+    brief=_brief_agent_b,
+    move=_move_caller,
+    on_transition=[_publish_transfer_state, _settle_agent_reservation],
+    stage_timeout_seconds=float(os.getenv("TRANSFER_STAGE_TIMEOUT_SECONDS", "20")),
+    require_brief_ack=TRANSFER_REQUIRE_BRIEF_ACK,
+    brief_ack_timeout_seconds=float(os.getenv("TRANSFER_BRIEF_ACK_TIMEOUT_SECONDS", "120")),
+)
 
-# Initialize Gemini client
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+def room_snapshot(room_name: str, room: Optional[Dict]) -> Dict:
+    """Compact view of a room pushed to WebSocket subscribers"""
+    if room is None:
+        return {"room_name": room_name, "exists": False}
+    return {
+        "room_name": room_name,
+        "exists": True,
+        "participants": list(room["participants"]),
+        "status": room["status"],
+        "created_at": room["created_at"],
+    }
 
-# In-memory storage for demo (replace with database in production)
-active_rooms: Dict[str, Dict] = {}
-call_contexts: Dict[str, List[str]] = {}
-transfer_requests: Dict[str, Dict] = {}
+def room_info_view(room_info) -> Dict:
+    """JSON-ready view of a LiveKit Room protobuf"""
+    return {
+        "name": room_info.name,
+        "num_participants": room_info.num_participants,
+        "max_participants": room_info.max_participants,
+        "creation_time": room_info.creation_time,
+        "turn_password": room_info.turn_password,
+        "enabled_codecs": [getattr(codec, 'mime_type', str(codec)) for codec in room_info.enabled_codecs] if room_info.enabled_codecs else [],
+        "metadata": room_info.metadata
+    }
 
 # Pydantic models
 class RoomCreateRequest(BaseModel):
@@ -89,14 +616,56 @@ class RoomCreateRequest(BaseModel):
 
 class TransferRequest(BaseModel):
     from_room: str
-    to_room: str
+    to_room: Optional[str] = None  # defaults to the best available agent's room
     caller_room: str
+    skills: List[str] = []  # required of the agent chosen when to_room is omitted
+
+class AgentRegisterRequest(BaseModel):
+    agent_id: str
+    room_name: str  # where transfers to this agent are sent
+    skills: List[str] = []
+    capacity: int = 1  # calls the agent can take at once
+
+class AgentStatusRequest(BaseModel):
+    status: str  # "available" or "offline"
 
 class SummaryRequest(BaseModel):
     room_name: str
     conversation_history: List[str]
 
+class BatchSummaryItem(BaseModel):
+    room_name: str
+    conversation_history: Optional[List[str]] = None  # defaults to the room's stored conversation
+
+class BatchSummaryRequest(BaseModel):
+    items: List[BatchSummaryItem]
+
+class TokenBatchRequest(BaseModel):
+    room_name: str
+    participant_types: List[str]  # one token per entry, e.g. ["caller", "caller", "agent_a"]
+
+class TranscriptSegment(BaseModel):
+    speaker: str  # e.g. "Caller", "Agent A"
+    text: str
+    is_final: bool = True  # interim speech-to-text hypotheses are not stored
+
+class TranscriptBatchRequest(BaseModel):
+    segments: List[TranscriptSegment]
+
+class AgentPoolCallRequest(BaseModel):
+    op: str
+    transfer_id: str = ""
+    skills: List[str] = []
+    room_name: str = ""
+    timeout: float = 0.0
+
+class ClusterEventsRequest(BaseModel):
+    events: List[List[str]]  # [room_name, serialized event]
+
 # API Routes
+# Phone transfers (/api/twilio/*); the routes answer 400 unless TWILIO_* credentials are set
+twilio_integration = add_twilio_routes(app)
+
 @app.get("/")
 async def root():
     return {"message": "LiveKit Warm Transfer API", "status": "running"}
@@ -105,95 +674,99 @@ async def root():
 async def create_room(request: RoomCreateRequest):
     """Create a new LiveKit room with token"""
     try:
-        # Initialize LiveKit client
-        global livekit_client
-        if livekit_client is None:
-            livekit_client = api.LiveKitAPI(
-                url=LIVEKIT_URL,
-                api_key=LIVEKIT_API_KEY,
-                api_secret=LIVEKIT_API_SECRET,
-            )
-        
         room_name = request.room_name
         participant_type = request.participant_type
         
-        # Check if room already exists, if not create it
-        try:
-            # Try to get existing room first
-            room_info = await livekit_client.room.get_room(room_name)
-            print(f"Room {room_name} already exists, using existing room")
-        except:
-            # Room doesn't exist, create new one
-            print(f"Creating new room: {room_name}")
-            room_info = await livekit_client.room.create_room(
-                api.CreateRoomRequest(
-                    name=room_name,
-                    max_participants=10,
-                    metadata=json.dumps({
-                        "participant_type": participant_type,
-                        "created_at": datetime.now().isoformat()
-                    })
-                )
-            )
+        # CreateRoom returns the existing room if there is one; rooms already
+        # known to this process are served from cache without a round trip
+        room_info = await livekit_rooms.ensure_room(
+            room_name,
+            max_participants=10,
+            metadata=json.dumps({
+                "participant_type": participant_type,
+                "created_at": datetime.now().isoformat()
+            })
+        )
         
-        # Generate unique participant identity with random number
-        import random
-        import time
+        # Generate unique participant identity
+        await _ensure_identities_seeded(room_name)
+        participant_identity, display_name = identity_allocator.allocate(room_name, participant_type)
         
-        # Check existing participants in room to avoid duplicates
-        existing_ids = set()
-        if room_name in active_rooms:
-            for participant in active_rooms[room_name].get("participants", []):
-                if "_" in participant:
-                    existing_ids.add(participant.split("_")[1])
+        # Generate token for participant
+        jwt_token = token_service.mint(room_name, participant_identity, display_name)
         
-        # Generate unique ID that doesn't exist
-        while True:
-            unique_id = random.randint(1000, 9999)
-            if str(unique_id) not in existing_ids:
-                break
+        # Store room info (creates the room record on first join)
+        info = room_info_view(room_info)
+        await _register_participant(room_name, participant_identity, info)
         
-        participant_identity = f"{participant_type}_{unique_id}"
+        return {
+            "room_name": room_name,
+            "token": jwt_token,
+            "url": LIVEKIT_URL,
+            "room_info": info
+        }
         
-        # Generate token for participant
-        token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-        token.with_identity(participant_identity)
-        token.with_name(f"{participant_type} ({unique_id})")
-        token.with_grants(api.VideoGrants(
-            room_join=True,
-            room=room_name,
-            can_publish=True,
-            can_subscribe=True
-        ))
-        
-        jwt_token = token.to_jwt()
-        
-        # Store room info
-        if room_name in active_rooms:
-            # Add new participant to existing room
-            active_rooms[room_name]["participants"].append(participant_identity)
-        else:
-            # Create new room
-            active_rooms[room_name] = {
-                "room_info": room_info,
-                "participants": [participant_identity],
-                "created_at": datetime.now().isoformat(),
-                "status": "active"
-            }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _ensure_identities_seeded(room_name: str):
+    """Load a room's participant IDs into the allocator the first time this worker sees it"""
+    if not identity_allocator.knows(room_name):
+        existing_room = await state_store.get_room(room_name)
+        identity_allocator.seed(room_name, existing_room["participants"] if existing_room else [])
+
+async def _register_participant(room_name: str, participant_identity: str, info: Dict):
+    """Record a participant (creating the room record on first join) and publish the change"""
+    room, created = await state_store.join_or_create_room(room_name, participant_identity, {
+        "room_info": info,
+        "created_at": datetime.now().isoformat(),
+        "status": "active"
+    })
+    if created:
+        room_events.publish(room_name, {"type": "room_created", "room": room_snapshot(room_name, room)})
+    else:
+        room_events.publish(room_name, {
+            "type": "participant_joined",
+            "participant": participant_identity,
+            "participants_count": len(room["participants"]),
+            "status": room["status"]
+        })
+
+@app.post("/api/tokens/batch")
+async def mint_token_batch(request: TokenBatchRequest):
+    """Create the room if needed and mint tokens for many participants in one request"""
+    if not request.participant_types:
+        raise HTTPException(status_code=400, detail="participant_types must not be empty")
+    if len(request.participant_types) > TOKEN_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {TOKEN_BATCH_MAX} tokens per batch")
+    
+    try:
+        room_name = request.room_name
+        room_info = await livekit_rooms.ensure_room(
+            room_name,
+            max_participants=10,
+            metadata=json.dumps({
+                "participant_type": request.participant_types[0],
+                "created_at": datetime.now().isoformat()
+            })
+        )
+        
+        await _ensure_identities_seeded(room_name)
+        participants = [identity_allocator.allocate(room_name, participant_type) for participant_type in request.participant_types]
+        tokens = await token_service.mint_batch(room_name, participants)
+        
+        info = room_info_view(room_info)
+        for identity, _ in participants:
+            await _register_participant(room_name, identity, info)
         
         return {
             "room_name": room_name,
-            "token": jwt_token,
             "url": LIVEKIT_URL,
-            "room_info": {
-                "name": room_info.name,
-                "num_participants": room_info.num_participants,
-                "max_participants": room_info.max_participants,
-                "creation_time": room_info.creation_time,
-                "turn_password": room_info.turn_password,
-                "enabled_codecs": [getattr(codec, 'mime_type', str(codec)) for codec in room_info.enabled_codecs] if room_info.enabled_codecs else [],
-                "metadata": room_info.metadata
-            }
+            "room_info": info,
+            "tokens": [
+                {"identity": identity, "name": name, "token": token}
+                for (identity, name), token in zip(participants, tokens)
+            ]
         }
         
     except Exception as e:
@@ -203,24 +776,23 @@ async def create_room(request: RoomCreateRequest):
 async def join_room(room_name: str, participant_type: str):
     """Generate token for joining existing room"""
     try:
-        if room_name not in active_rooms:
+        if not await state_store.room_exists(room_name):
             raise HTTPException(status_code=404, detail="Room not found")
         
-        # Generate token
-        token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-        token.with_identity(participant_type)
-        token.with_name(f"{participant_type}_{room_name}")
-        token.with_grants(api.VideoGrants(
-            room_join=True,
-            room=room_name,
-            can_publish=True,
-            can_subscribe=True
-        ))
-        
-        jwt_token = token.to_jwt()
+        # Generate token (the LiveKit SDK is loaded off the event loop if nothing needed it yet)
+        await livekit_api.load()
+        jwt_token = token_service.mint(room_name, participant_type, f"{participant_type}_{room_name}")
         
         # Add participant to room
-        active_rooms[room_name]["participants"].append(participant_type)
+        room = await state_store.add_participant(room_name, participant_type)
+        if room is None:
+            raise HTTPException(status_code=404, detail="Room not found")
+        room_events.publish(room_name, {
+            "type": "participant_joined",
+            "participant": participant_type,
+            "participants_count": len(room["participants"]),
+            "status": room["status"]
+        })
         
         return {
             "room_name": room_name,
@@ -233,165 +805,520 @@ async def join_room(room_name: str, participant_type: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/transfer/initiate")
-async def initiate_transfer(request: TransferRequest):
-    """Initiate warm transfer between agents"""
+async def initiate_transfer(request: TransferRequest, x_tenant_id: str = Header("")):
+    """
+    Start a warm transfer and return once its call summary is ready
+    
+    The transfer then continues on its own: the summary is pushed to Agent B's
+    room, the caller is moved there and the transfer completes. Progress is
+    published to the rooms as "transfer_state" events and can be polled at
+    /api/transfer/{transfer_id}.
+    
+    Without to_room the best available agent with the requested skills is
+    reserved for the transfer (waiting up to AGENT_WAIT_SECONDS for one to
+    free up, else 503); the reservation becomes an active call when the
+    transfer completes and is released if it fails.
+    
+    The summary counts against the X-Tenant-ID tenant's rate limit; over it,
+    the transfer goes ahead with an extractive summary.
+    """
     try:
         from_room = request.from_room
-        to_room = request.to_room
         caller_room = request.caller_room
         
         # Validate rooms exist
-        if from_room not in active_rooms:
+        if not await state_store.room_exists(from_room):
             raise HTTPException(status_code=404, detail="Source room not found")
-        if to_room not in active_rooms:
-            raise HTTPException(status_code=404, detail="Target room not found")
         
-        # Store transfer request
-        transfer_id = f"transfer_{from_room}_{to_room}_{datetime.now().timestamp()}"
-        transfer_requests[transfer_id] = {
-            "from_room": from_room,
-            "to_room": to_room,
-            "caller_room": caller_room,
-            "status": "initiated",
-            "created_at": datetime.now().isoformat()
-        }
+        transfer_id = f"transfer_{from_room}_{request.to_room or 'pool'}_{datetime.now().timestamp()}"
+        if cluster_member is not None:
+            # Lets the gateway send status polls and acknowledgements to this worker
+            transfer_id = cluster_member.tag(transfer_id)
+        
+        try:
+            if request.to_room is None:
+                agent = await _call_agent_pool("acquire", transfer_id=transfer_id, skills=request.skills,
+                                               timeout=AGENT_WAIT_SECONDS)
+                if agent is None:
+                    raise HTTPException(status_code=503, detail="No agent available", headers={"Retry-After": "5"})
+            else:
+                # An explicitly chosen agent's room still counts against that agent
+                agent = await _call_agent_pool("claim", transfer_id=transfer_id, room_name=request.to_room)
+        except PeerUnavailable as e:
+            # The pool's worker may have reserved an agent before the call failed
+            _notify_agent_pool("release", transfer_id)
+            logger.warning("Agent pool unavailable", extra={"transfer_id": transfer_id, "error": str(e)})
+            if request.to_room is None:
+                raise HTTPException(status_code=503, detail="Agent pool unavailable", headers={"Retry-After": "5"})
+            agent = None
+        to_room = agent["room_name"] if agent is not None else request.to_room
         
-        # Generate call summary
-        summary = await generate_call_summary(caller_room)
+        try:
+            if not await state_store.room_exists(to_room):
+                raise HTTPException(status_code=404, detail="Target room not found")
+            record = await transfer_engine.start(transfer_id, from_room, to_room, caller_room, tenant=x_tenant_id)
+        except Exception:
+            # Never started, so the engine won't settle the reservation
+            _notify_agent_pool("release", transfer_id)
+            raise
+        summary = await transfer_engine.wait_for_summary(transfer_id)
         
         return {
             "transfer_id": transfer_id,
-            "status": "initiated",
-            "call_summary": summary,
-            "next_steps": [
-                "Agent A should explain summary to Agent B",
-                "Agent A should exit original room",
-                "Caller will be connected to Agent B"
-            ]
+            "to_room": to_room,
+            "agent_id": agent["agent_id"] if agent is not None else None,
+            "status": record["status"],
+            "call_summary": summary["summary"],
+            "summary_stale": summary["stale"],
+            "summary_age_seconds": summary["age_seconds"],
+            "summary_degraded": summary["degraded"],
+            "transitions": record["transitions"],
+            "status_url": f"/api/transfer/{transfer_id}"
         }
         
+    except HTTPException:
+        raise
+    except TransferStageError as e:
+        raise HTTPException(status_code=504 if "timed out" in str(e) else 502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/transfer/stats")
+async def transfer_stats():
+    """Running and finished transfers plus per-stage latency"""
+    return transfer_engine.stats()
+
+@app.get("/api/transfer/{transfer_id}")
+async def get_transfer(transfer_id: str):
+    """Current state of a transfer, with a timestamp for every transition and per-stage timings"""
+    record = await state_store.get_transfer(transfer_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Transfer not found")
+    return {"transfer": record}
+
+@app.post("/api/transfer/{transfer_id}/briefed")
+async def acknowledge_briefing(transfer_id: str):
+    """Agent B confirms it has read the summary (awaited when TRANSFER_REQUIRE_BRIEF_ACK is on)"""
+    if transfer_engine.acknowledge_briefing(transfer_id):
+        return {"transfer_id": transfer_id, "status": "acknowledged"}
+    if await state_store.get_transfer(transfer_id) is None:
+        raise HTTPException(status_code=404, detail="Transfer not found")
+    raise HTTPException(status_code=409, detail="Transfer is not waiting for a briefing acknowledgement")
+
+@app.post("/api/agents")
+async def register_agent(request: AgentRegisterRequest):
+    """Add a receiving agent to the pool, or update its room, skills and capacity"""
+    try:
+        agent = agent_pool.register(request.agent_id, request.room_name, request.skills, request.capacity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"agent": agent.view()}
+
+@app.get("/api/agents")
+async def list_agents():
+    """Every pooled agent with its status, active calls and reservations"""
+    return {"agents": agent_pool.agents()}
+
+@app.get("/api/agents/best")
+async def best_agent(skills: Optional[str] = None):
+    """The agent a transfer needing these comma-separated skills would get now (nothing is reserved)"""
+    agent = agent_pool.best([skill.strip() for skill in skills.split(",") if skill.strip()] if skills else [])
+    if agent is None:
+        raise HTTPException(status_code=404, detail="No agent available")
+    return {"agent": agent.view()}
+
+@app.get("/api/agents/stats")
+async def agent_stats():
+    """Agents available and reserved, transfers waiting for one, and reservation outcomes"""
+    return agent_pool.stats()
+
+@app.post("/api/agents/{agent_id}/status")
+async def set_agent_status(agent_id: str, request: AgentStatusRequest):
+    """Take an agent out of rotation ("offline") or put it back ("available")"""
+    if request.status not in (AVAILABLE, OFFLINE):
+        raise HTTPException(status_code=400, detail=f"status must be {AVAILABLE} or {OFFLINE}")
+    agent = agent_pool.set_status(agent_id, request.status)
+    if agent is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return {"agent": agent.view()}
+
+@app.post("/api/agents/{agent_id}/call-ended")
+async def agent_call_ended(agent_id: str):
+    """One of the agent's calls ended (also recorded when a caller leaves the agent's room)"""
+    agent = agent_pool.call_ended(agent_id)
+    if agent is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return {"agent": agent.view()}
+
+@app.delete("/api/agents/{agent_id}")
+async def remove_agent(agent_id: str):
+    """Remove an agent from the pool"""
+    if not agent_pool.remove(agent_id):
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return {"agent_id": agent_id, "status": "removed"}
+
+@app.post("/api/summary/stream")
+async def stream_summary(request: SummaryRequest, x_tenant_id: str = Header("")):
+    """Stream an AI-generated call summary token by token as Server-Sent Events (429 when the tenant is over its rate)"""
+    try:
+        admission.check_tenant(_tenant(request.room_name, x_tenant_id))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=e.headers())
+    if request.conversation_history:
+        await set_conversation(request.room_name, request.conversation_history)
+    
+    return StreamingResponse(
+        _summary_event_stream(request.room_name),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _summary_event_stream(room_name: str):
+    """
+    Yield "token" events as the provider produces them, then one "done" event
+
+    A cached summary for the same window is sent as a single token. The
+    stream always summarizes the last SUMMARY_WINDOW messages; the finished
+    text is stored in the summary cache so later transfers reuse it. With
+    SUMMARY_DRAFTS a "draft" event carrying an extractive summary of the
+    whole conversation comes first, for clients to show until tokens arrive;
+    if no provider can stream, or the request is shed by admission control
+    ("done" then carries degraded), that extractive summary is the result.
+    """
+    conversation_history = await state_store.get_conversation(room_name) or SAMPLE_CONVERSATION
+    context_version = summary_prewarmer.version(room_name)
+    fingerprint = summary_fingerprint(room_name, conversation_history[-SUMMARY_WINDOW:])
+    
+    cached = summary_cache.get(fingerprint)
+    if cached is not None:
+        yield _sse_event("token", {"text": cached})
+        yield _sse_event("done", {"summary": cached, "provider": "cache"})
+        return
+    
+    if SUMMARY_DRAFTS:
+        await numpy_module.load()
+        draft = _fallback_summary(conversation_history)
+        yield _sse_event("draft", {"summary": draft})
+    
+    prompt = _build_summary_prompt(conversation_history)
+    async with AsyncExitStack() as stack:
+        try:
+            # The slot is held until the last token has been sent
+            await stack.enter_async_context(admission.admit("summary"))
+        except AdmissionRejected as e:
+            summary = await _degraded_summary("summary", room_name, e, draft if SUMMARY_DRAFTS else None)
+            yield _sse_event("token", {"text": summary})
+            yield _sse_event("done", {"summary": summary, "provider": "extractive", "degraded": True})
+            return
+        
+        for provider in llm_router.ordered():
+            quota = llm_quotas.get(provider.name)
+            if quota is not None and not quota.try_acquire():
+                continue
+            parts = []
+            started = time.perf_counter()
+            try:
+                async for text in provider.stream(prompt, system_prompt=SUMMARY_SYSTEM_PROMPT):
+                    if not parts:
+                        # Routing for streams is driven by time to first token
+                        llm_router.record_success(provider.name, time.perf_counter() - started)
+                    parts.append(text)
+                    yield _sse_event("token", {"text": text})
+            except Exception as e:
+                logger.warning("Summary stream failed", extra={"provider": provider.name, "room_name": room_name, "error": str(e)})
+                llm_router.record_failure(provider.name)
+                if parts:
+                    # Tokens already reached the client; don't splice in another provider's text
+                    yield _sse_event("error", {"message": f"{provider.name} stream interrupted"})
+                    return
+                continue
+            
+            summary = "".join(parts).strip()
+            summary_cache.put(fingerprint, summary)
+            await state_store.set_summary(room_name, summary)
+            summary_prewarmer.record(room_name, summary, context_version)
+            yield _sse_event("done", {"summary": summary, "provider": provider.name})
+            return
+        
+        # Nothing streamed from any provider: finish with the offline summary rather than an error
+        summary_fallbacks.inc()
+        logger.warning("No LLM provider could stream, using extractive fallback summary", extra={"room_name": room_name})
+        summary = draft if SUMMARY_DRAFTS else _fallback_summary(conversation_history)
+        yield _sse_event("token", {"text": summary})
+        yield _sse_event("done", {"summary": summary, "provider": "extractive"})
+
+@app.post("/api/summary/draft")
+async def draft_summary(request: SummaryRequest):
+    """Extractive call summary computed locally in milliseconds, without the LLM"""
+    if request.conversation_history:
+        await set_conversation(request.room_name, request.conversation_history)
+    conversation_history = await state_store.get_conversation(request.room_name) or SAMPLE_CONVERSATION
+    await numpy_module.load()
+    return {"summary": _fallback_summary(conversation_history), "provider": "extractive"}
+
 @app.post("/api/summary/generate")
-async def generate_summary(request: SummaryRequest):
-    """Generate AI-powered call summary"""
+async def generate_summary(request: SummaryRequest, x_tenant_id: str = Header("")):
+    """
+    Generate AI-powered call summary
+    
+    Answers 429 when the tenant is over its rate limit. When the LLM queue
+    is over its latency budget the answer is an extractive summary, with
+    degraded set, instead of a wait.
+    """
+    try:
+        admission.check_tenant(_tenant(request.room_name, x_tenant_id))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=e.headers())
     try:
-        summary = await generate_call_summary(request.room_name, request.conversation_history)
-        return {"summary": summary}
+        # Keep the room's context in sync with what the browser sent so transfers summarize it too
+        if request.conversation_history:
+            await set_conversation(request.room_name, request.conversation_history)
+        async with admission.admit("summary"):
+            summary = await generate_call_summary(request.room_name)
+        return {"summary": summary, "degraded": False}
+    except AdmissionRejected as e:
+        return {"summary": await _degraded_summary("summary", request.room_name, e), "degraded": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def generate_call_summary(room_name: str, conversation_history: Optional[List[str]] = None):
-    """Generate call summary using OpenAI"""
+@app.post("/api/summary/batch")
+async def generate_summary_batch(request: BatchSummaryRequest, x_tenant_id: str = Header("")):
+    """
+    Summarize many rooms or histories, streaming one NDJSON line per summary as it completes
+    
+    Batch summaries always cover the last SUMMARY_WINDOW messages and never
+    touch a room's live conversation or rolling checkpoint. Each line carries
+    the item's index in the request; the last line has type "done". Provider
+    requests run under the lowest-priority "batch" admission route, and the
+    batch answers 429 when a tenant it covers is over its rate limit.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="items must not be empty")
+    if len(request.items) > SUMMARY_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {SUMMARY_BATCH_MAX} items per batch")
     try:
-        # Get conversation history
-        if conversation_history is None:
-            conversation_history = call_contexts.get(room_name, [])
-        
-        # If no conversation history, create a sample one
-        if not conversation_history:
-            conversation_history = [
-                "Caller: Hello, I need help with my account",
-                "Agent A: Hi! I'd be happy to help you with your account. What specific issue are you experiencing?",
-                "Caller: I can't log into my account and I'm getting an error message",
-                "Agent A: I understand you're having trouble logging in. Let me help you troubleshoot this issue.",
-                "Caller: The error says 'Invalid credentials' but I'm sure my password is correct",
-                "Agent A: That's frustrating. Let me check your account status and help you reset your password if needed."
-            ]
-        
-        # Prepare prompt for OpenAI
-        prompt = f"""
-        Generate a concise call summary for a warm transfer. 
-        Include key points, customer needs, and current status.
-        
-        Conversation History:
-        {chr(10).join(conversation_history[-10:])}  # Last 10 messages
-        
-        Summary should be:
-        - 2-3 sentences maximum
-        - Focus on customer needs and current situation
-        - Include any important details for the receiving agent
-        """
-        
-        print(f"Generating summary for room {room_name} with {len(conversation_history)} messages")
-        
-        # Use Gemini as primary API (if API key is available)
-        if GEMINI_API_KEY:
-            try:
-                # Use Gemini API (Primary)
-                model = genai.GenerativeModel('gemini-1.5-flash')
-                response = model.generate_content(prompt)
-                summary = response.text.strip()
-                print(f"Generated summary with Gemini (Primary): {summary}")
-                
-            except Exception as gemini_error:
-                print(f"Gemini failed: {str(gemini_error)}, trying OpenAI fallback...")
-                
-                # Fallback to OpenAI only if Gemini fails
-                if OPENAI_API_KEY:
-                    try:
-                        response = await openai_client.chat.completions.create(
-                            model="gpt-3.5-turbo",
-                            messages=[
-                                {"role": "system", "content": "You are an AI assistant that creates concise call summaries for warm transfers between customer service agents."},
-                                {"role": "user", "content": prompt}
-                            ],
-                            max_tokens=150,
-                            temperature=0.7
-                        )
-                        
-                        summary = response.choices[0].message.content.strip()
-                        print(f"Generated summary with OpenAI (Fallback): {summary}")
-                        
-                    except Exception as openai_error:
-                        print(f"Both APIs failed. Gemini: {str(gemini_error)}, OpenAI: {str(openai_error)}")
-                        # Use hardcoded fallback
-                        summary = f"Call Summary: Customer inquiry about {participant_type} services. Duration: {len(conversation_history)} messages. Status: Active call in progress. Next steps: Complete warm transfer to Agent B."
-                        print(f"Using hardcoded fallback summary: {summary}")
-                else:
-                    print("No OpenAI API key available, using hardcoded fallback")
-                    summary = f"Call Summary: Customer inquiry about {participant_type} services. Duration: {len(conversation_history)} messages. Status: Active call in progress. Next steps: Complete warm transfer to Agent B."
-                    print(f"Using hardcoded fallback summary: {summary}")
+        for tenant in {_tenant(item.room_name, x_tenant_id) for item in request.items}:
+            admission.check_tenant(tenant)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=e.headers())
+    
+    return StreamingResponse(
+        _summary_batch_lines(request.items),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _summary_batch_lines(items: List[BatchSummaryItem]):
+    conversations = []
+    indexes = []
+    for index, item in enumerate(items):
+        history = item.conversation_history or await state_store.get_conversation(item.room_name)
+        if not history:
+            yield json.dumps({"type": "error", "index": index, "room_name": item.room_name, "error": "No conversation"}) + "\n"
+            continue
+        conversations.append((item.room_name, history))
+        indexes.append(index)
+    
+    if not conversations:
+        yield json.dumps({"type": "done", "count": 0, "provider_requests": 0, "elapsed_seconds": 0.0}) + "\n"
+        return
+    
+    async for result in summary_batcher.run(conversations):
+        if "index" in result:
+            # Report positions in the request, not in the filtered list
+            result["index"] = indexes[result["index"]]
         else:
-            print("No Gemini API key available, trying OpenAI...")
-            if OPENAI_API_KEY:
-                try:
-                    response = await openai_client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You are an AI assistant that creates concise call summaries for warm transfers between customer service agents."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        max_tokens=150,
-                        temperature=0.7
-                    )
-                    
-                    summary = response.choices[0].message.content.strip()
-                    print(f"Generated summary with OpenAI: {summary}")
-                    
-                except Exception as openai_error:
-                    print(f"OpenAI failed: {str(openai_error)}, using hardcoded fallback")
-                    summary = f"Call Summary: Customer inquiry about {participant_type} services. Duration: {len(conversation_history)} messages. Status: Active call in progress. Next steps: Complete warm transfer to Agent B."
-                    print(f"Using hardcoded fallback summary: {summary}")
-            else:
-                print("No API keys available, using hardcoded fallback")
-                summary = f"Call Summary: Customer inquiry about {participant_type} services. Duration: {len(conversation_history)} messages. Status: Active call in progress. Next steps: Complete warm transfer to Agent B."
-                print(f"Using hardcoded fallback summary: {summary}")
+            result["count"] = len(items)
+        yield json.dumps(result) + "\n"
+
+async def generate_call_summary(room_name: str, conversation_history: Optional[List[str]] = None):
+    """
+    Generate call summary, reusing the cached one while the conversation window is unchanged
+
+    In "incremental" SUMMARY_MODE the room keeps a running summary checkpoint
+    in the state store and only newly added messages are sent to the LLM;
+    "window" mode re-summarizes the last SUMMARY_WINDOW messages each time.
+    """
+    # Get conversation history
+    from_context = conversation_history is None
+    if from_context:
+        conversation_history = await state_store.get_conversation(room_name)
+        context_version = summary_prewarmer.version(room_name)
+    
+    # If no conversation history, create a sample one
+    use_sample = not conversation_history
+    if use_sample:
+        conversation_history = SAMPLE_CONVERSATION
+    
+    if SUMMARY_MODE == "incremental" and not use_sample:
+        summarize = _summarize_incrementally
+    else:
+        summarize = _summarize_conversation
+    
+    fingerprint = summary_fingerprint(room_name, conversation_history[-SUMMARY_WINDOW:])
+    summary = await summary_cache.get_or_compute(
+        fingerprint,
+        lambda: summarize(room_name, conversation_history)
+    )
+    
+    # Store latest summary (kept out of the conversation so it doesn't change the fingerprint)
+    await state_store.set_summary(room_name, summary)
+    if from_context:
+        summary_prewarmer.record(room_name, summary, context_version)
+    
+    return summary
+
+async def _summarize_conversation(room_name: str, conversation_history: List[str]):
+    """Summarize the last SUMMARY_WINDOW messages from scratch; returns (summary, cacheable)"""
+    prompt = _build_summary_prompt(conversation_history)
+    return await _run_summary_providers(room_name, prompt, conversation_history)
+
+def _build_summary_prompt(conversation_history: List[str]) -> str:
+    return f"""
+    Generate a concise call summary for a warm transfer. 
+    Include key points, customer needs, and current status.
+    
+    Conversation History:
+    {chr(10).join(conversation_history[-SUMMARY_WINDOW:])}  # Last 10 messages
+    
+    Summary should be:
+    - 2-3 sentences maximum
+    - Focus on customer needs and current situation
+    - Include any important details for the receiving agent
+    """
+
+def _summary_lock(room_name: str) -> asyncio.Lock:
+    lock = summary_locks.get(room_name)
+    if lock is None:
+        lock = summary_locks[room_name] = asyncio.Lock()
+    return lock
+
+def _checkpoint_position(checkpoint: Dict, conversation_history: List[str]) -> Optional[int]:
+    """
+    Number of leading history lines already folded into the checkpoint, or None
+
+    The history may have been trimmed at the front by the store's
+    CONVERSATION_MAX_MESSAGES cap since the checkpoint was written, so when
+    the recorded position no longer lines up the last consumed line is
+    looked up again. None means the history was replaced rather than extended.
+    """
+    consumed = checkpoint["message_count"]
+    if consumed == 0:
+        return 0
+    if consumed <= len(conversation_history) and conversation_history[consumed - 1] == checkpoint["last_message"]:
+        return consumed
+    for index in range(min(consumed, len(conversation_history)) - 1, -1, -1):
+        if conversation_history[index] == checkpoint["last_message"]:
+            return index + 1
+    return None
+
+async def _summarize_incrementally(room_name: str, conversation_history: List[str]):
+    """
+    Fold messages added since the room's last checkpoint into its running summary
+
+    Each provider call sees only the previous summary plus at most
+    SUMMARY_DELTA_MAX_MESSAGES new lines, so prompt size stays bounded no
+    matter how long the call runs. Catching up is bounded too, since it
+    runs on the transfer path under the room's lock: a room without a
+    checkpoint (cold, or its history replaced) starts from its last
+    SUMMARY_DELTA_MAX_MESSAGES lines in one call, and a backlog longer than
+    SUMMARY_MAX_FOLDS_PER_REQUEST deltas skips its oldest unfolded lines.
+    The prewarmer keeps backlogs short, so skipping is rare.
+    Returns (summary, cacheable).
+    """
+    async with _summary_lock(room_name):
+        checkpoint = await state_store.get_checkpoint(room_name)
+        consumed = _checkpoint_position(checkpoint, conversation_history) if checkpoint else 0
+        if consumed is None:
+            # History was replaced rather than extended; start over
+            checkpoint, consumed = None, 0
         
-        # Store summary
-        if room_name not in call_contexts:
-            call_contexts[room_name] = []
-        call_contexts[room_name].append(f"[SUMMARY] {summary}")
+        summary = checkpoint["summary"] if checkpoint else None
         
-        return summary
+        folds = 1 if checkpoint is None else SUMMARY_MAX_FOLDS_PER_REQUEST
+        catch_up_from = len(conversation_history) - folds * SUMMARY_DELTA_MAX_MESSAGES
+        if consumed < catch_up_from:
+            summary_skipped_messages.inc(catch_up_from - consumed)
+            logger.debug("Skipping summary backlog", extra={"room_name": room_name, "skipped": catch_up_from - consumed})
+            consumed = catch_up_from
         
+        while consumed < len(conversation_history):
+            delta = conversation_history[consumed:consumed + SUMMARY_DELTA_MAX_MESSAGES]
+            prompt = f"""
+            Update the running call summary for a warm transfer with the new messages below.
+            Include key points, customer needs, and current status.
+            
+            Current Summary:
+            {summary or "(none yet - summarize the messages below)"}
+            
+            New Messages:
+            {chr(10).join(delta)}
+            
+            Updated summary should be:
+            - 2-3 sentences maximum
+            - Focus on customer needs and current situation
+            - Include any important details for the receiving agent
+            """
+            
+            new_summary, llm_succeeded = await _run_summary_providers(room_name, prompt, conversation_history)
+            if not llm_succeeded:
+                # Leave the checkpoint in place so the next call retries this delta
+                return summary or new_summary, False
+            
+            summary = new_summary
+            consumed += len(delta)
+            await state_store.set_checkpoint(room_name, {
+                "summary": summary,
+                "message_count": consumed,
+                "last_message": conversation_history[consumed - 1],
+                "updated_at": datetime.now().isoformat()
+            })
+        
+        return summary, True
+
+async def _run_summary_providers(room_name: str, prompt: str, conversation_history: List[str]):
+    """Run a prepared prompt through the provider router; returns (summary, cacheable)"""
+    logger.debug("Generating summary", extra={"room_name": room_name, "messages": len(conversation_history)})
+    try:
+        summary, provider_name = await llm_router.complete(prompt, system_prompt=SUMMARY_SYSTEM_PROMPT, quotas=llm_quotas)
+        logger.debug("Generated summary", extra={"room_name": room_name, "provider": provider_name, "summary": summary})
+        return summary, True
+    except AllProvidersFailed as e:
+        summary_fallbacks.inc()
+        logger.warning("All LLM providers failed, using extractive fallback summary", extra={"room_name": room_name, "error": str(e)})
+        await numpy_module.load()
+        return _fallback_summary(conversation_history), False
+
+summary_fallbacks = registry.counter("llm_summary_fallbacks_total", "Summaries answered by the offline fallback")
+
+async def _degraded_summary(route: str, room_name: str, rejected: AdmissionRejected, draft: Optional[str] = None) -> str:
+    """Extractive summary of the room (or the draft already sent) for a request admission control shed"""
+    registry.counter(
+        "admission_degraded_total", "Requests shed by admission control and answered with an extractive summary", {"route": route}
+    ).inc()
+    logger.warning("LLM request shed, using extractive summary", extra={"room_name": room_name, "route": route, "reason": rejected.reason})
+    if draft is not None:
+        return draft
+    conversation_history = await state_store.get_conversation(room_name) or SAMPLE_CONVERSATION
+    await numpy_module.load()
+    return _fallback_summary(conversation_history)
+
+async def _prewarm_summary(room_name: str):
+    """Background refresh; queues behind transfers and ad-hoc summaries for an LLM slot"""
+    async with admission.admit("prewarm"):
+        return await generate_call_summary(room_name)
+
+def _fallback_summary(conversation_history: List[str]) -> str:
+    """Extractive summary of the conversation; fixed text if there is nothing to extract"""
+    try:
+        summary = extractive_summarizer.summarize(conversation_history)
     except Exception as e:
-        print(f"Error generating summary: {str(e)}")
-        # Return a fallback summary if both APIs fail
-        fallback_summary = f"Call Summary: Customer inquiry about {participant_type} services. Duration: {len(conversation_history)} messages. Status: Active call in progress. Next steps: Complete warm transfer to Agent B."
-        print(f"Using fallback summary: {fallback_summary}")
-        return fallback_summary
+        logger.warning("Extractive summary failed", extra={"messages": len(conversation_history), "error": str(e)})
+        summary = ""
+    return summary or f"Call Summary: Customer inquiry. Duration: {len(conversation_history)} messages. Status: Active call in progress. Next steps: Complete warm transfer to Agent B."
 
 @app.get("/api/test-gemini")
 async def test_gemini():
@@ -402,95 +1329,267 @@ async def test_gemini():
                 "status": "error",
                 "message": "GEMINI_API_KEY environment variable not found",
                 "error": "API key not configured",
-                "model": "gemini-1.5-flash"
+                "model": GEMINI_MODEL
             }
         
-        print("Testing Gemini API...")
-        
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content("Say 'Hello, Gemini is working!' in one sentence.")
+        logger.info("Testing Gemini API")
         
-        result = response.text.strip()
-        print(f"Gemini test successful: {result}")
+        async with admission.admit("test"):
+            result = await gemini_provider.complete("Say 'Hello, Gemini is working!' in one sentence.")
+        logger.info("Gemini test successful", extra={"response": result})
         
         return {
             "status": "success",
             "message": "Gemini API is working",
             "response": result,
-            "model": "gemini-1.5-flash"
+            "model": GEMINI_MODEL
         }
         
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=e.headers())
     except Exception as e:
         error_msg = str(e)
-        print(f"Gemini test failed: {error_msg}")
+        logger.warning("Gemini test failed", extra={"error": error_msg})
         
         return {
             "status": "error",
             "message": "Gemini API failed",
             "error": error_msg,
-            "model": "gemini-1.5-flash"
+            "model": GEMINI_MODEL
         }
 
 @app.get("/api/test-openai")
 async def test_openai():
     """Test OpenAI API connection"""
     try:
-        print("Testing OpenAI API...")
-        
-        response = await openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": "Say 'Hello, OpenAI is working!' in one sentence."}
-            ],
-            max_tokens=50,
-            temperature=0.7
-        )
+        logger.info("Testing OpenAI API")
+        
+        if not OPENAI_API_KEY:
+            raise RuntimeError("OpenAI client not configured")
         
-        result = response.choices[0].message.content.strip()
-        print(f"OpenAI test successful: {result}")
+        async with admission.admit("test"):
+            result = await openai_provider.complete(
+                "Say 'Hello, OpenAI is working!' in one sentence.",
+                system_prompt="You are a helpful assistant.",
+                max_tokens=50
+            )
+        logger.info("OpenAI test successful", extra={"response": result})
         
         return {
             "status": "success",
             "message": "OpenAI API is working",
             "response": result,
-            "model": "gpt-3.5-turbo"
+            "model": OPENAI_MODEL
         }
         
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=e.headers())
     except Exception as e:
         error_msg = str(e)
-        print(f"OpenAI test failed: {error_msg}")
+        logger.warning("OpenAI test failed", extra={"error": error_msg})
         
         return {
             "status": "error",
             "message": "OpenAI API failed",
             "error": error_msg,
-            "model": "gpt-3.5-turbo"
+            "model": OPENAI_MODEL
         }
 
+@app.get("/api/llm/stats")
+async def llm_stats():
+    """LLM execution layer concurrency, queue depth and timeout settings"""
+    return {
+        **llm_executor.stats(),
+        "router": llm_router.stats(),
+        "summary_cache": summary_cache.stats(),
+        "summary_prewarm": summary_prewarmer.stats(),
+        "summary_batch": summary_batcher.stats(),
+    }
+
+@app.get("/api/admission/stats")
+async def admission_stats():
+    """LLM slots in use, per-route queues, queue wait and shed counts, tenant and provider rate limits"""
+    return {
+        **admission.stats(),
+        "provider_quotas": {name: quota.stats() for name, quota in llm_quotas.items()},
+    }
+
+@app.get("/api/startup/stats")
+async def startup_stats():
+    """Cold-start milestones since process start and which lazily imported modules are loaded"""
+    return {
+        "sdk_warmup": SDK_WARMUP,
+        "milestones": startup_timer.stats(),
+        "modules": [module.stats() for module in (livekit_api, numpy_module, gemini_sdk, openai_sdk)],
+    }
+
+@app.get("/api/livekit/stats")
+async def livekit_stats():
+    """LiveKit client connection pool settings and known-rooms cache counters"""
+    return livekit_rooms.stats()
+
+@app.get("/api/tokens/stats")
+async def token_stats():
+    """Token minting counts, grant-template cache hits and identity allocation"""
+    return {**token_service.stats(), "identities": identity_allocator.stats()}
+
+@app.get("/api/state/stats")
+async def state_stats():
+    """Live rooms, contexts and transfers held by the state store, plus reaper settings"""
+    await lifecycle.refresh_usage()
+    return lifecycle.stats()
+
+@app.get("/api/events/stats")
+async def event_stats():
+    """Room event bus subscriber and delivery counts"""
+    if cluster_member is not None:
+        return {**room_events.stats(), "cluster": cluster_member.stats()}
+    return room_events.stats()
+
+@app.post("/api/cluster/events")
+async def relay_cluster_events(request: ClusterEventsRequest, x_cluster_secret: str = Header("")):
+    """Events another worker published for rooms this worker owns (worker-to-worker only)"""
+    if cluster_member is None or not cluster_member.authorized(x_cluster_secret):
+        raise HTTPException(status_code=404, detail="Not Found")
+    delivered = 0
+    for room_name, payload in request.events:
+        delivered += room_events.deliver(room_name, payload)
+    return {"delivered": delivered}
+
+@app.post("/api/cluster/agent-pool")
+async def agent_pool_call(request: AgentPoolCallRequest, x_cluster_secret: str = Header("")):
+    """Agent pool operations for transfers and rooms on other workers (worker-to-worker only)"""
+    if cluster_member is None or not cluster_member.authorized(x_cluster_secret) or AGENT_POOL_REMOTE:
+        raise HTTPException(status_code=404, detail="Not Found")
+    try:
+        agent = await _agent_pool_op(request.op, request.transfer_id, request.skills, request.room_name, request.timeout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"agent": agent}
+
+@app.get("/api/metrics")
+async def metrics_snapshot():
+    """JSON snapshot of backend metrics"""
+    return registry.snapshot()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """All backend metrics in the Prometheus text format"""
+    try:
+        await lifecycle.refresh_counts()
+    except Exception as e:
+        # Serve the last known state counts rather than failing the scrape
+        logger.warning("State count refresh failed", extra={"error": str(e)})
+    return PlainTextResponse(registry.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+ROOM_VIEW_FIELDS = ("room_name", "status", "created_at", "updated_at", "participants", "participants_count", "room_info")
+ROOMS_PAGE_MAX = int(os.getenv("ROOMS_PAGE_MAX", "200"))
+
+def _encode_cursor(room_name: str) -> str:
+    return base64.urlsafe_b64encode(room_name.encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _has_participant_type(view: Dict, participant_type: str) -> bool:
+    prefix = participant_type + "_"
+    return any(p == participant_type or p.startswith(prefix) for p in view["participants"])
+
 @app.get("/api/rooms")
-async def list_rooms():
-    """List all active rooms"""
-    return {"rooms": active_rooms}
+async def list_rooms(status: Optional[str] = None,
+                     participant_type: Optional[str] = None,
+                     fields: Optional[str] = None,
+                     limit: int = Query(50, ge=1),
+                     cursor: Optional[str] = None):
+    """
+    List rooms a page at a time, ordered by name
+    
+    status reads only rooms with that status (via the store's status index),
+    participant_type keeps rooms with at least one such participant, fields is
+    a comma-separated projection of ROOM_VIEW_FIELDS, and next_cursor (null on
+    the last page) is passed back as cursor to fetch the following page.
+    """
+    limit = min(limit, ROOMS_PAGE_MAX)
+    projection = None
+    if fields:
+        projection = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in projection if field not in ROOM_VIEW_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    after = _decode_cursor(cursor) if cursor else None
+    views: List[Dict] = []
+    next_after = None
+    while True:
+        page, last = await state_store.list_rooms_page(status=status, after=after, limit=limit)
+        for view in page:
+            if participant_type and not _has_participant_type(view, participant_type):
+                continue
+            views.append(view)
+            if len(views) == limit:
+                break
+        if len(views) == limit:
+            # Resume after the last room returned, which may be mid-page when filtering
+            next_after = views[-1]["room_name"] if (last is not None or view is not page[-1]) else None
+            break
+        if last is None:
+            break
+        after = last
+    
+    if projection is not None:
+        views = [{field: view[field] for field in projection} for view in views]
+    return {
+        "rooms": views,
+        "count": len(views),
+        "next_cursor": _encode_cursor(next_after) if next_after is not None else None
+    }
+
+@app.post("/api/rooms/{room_name}/transcript")
+async def ingest_transcript(room_name: str, request: TranscriptBatchRequest):
+    """
+    Append a batch of speech-to-text segments to the room's conversation
+
+    Lines are queued and written within TRANSCRIPT_LINGER_SECONDS together
+    with every other room's; subscribers then get one "transcript" event per
+    flush. Answers 429 when the write backlog is full.
+    """
+    lines, ignored = transcript_lines((segment.model_dump() for segment in request.segments), TRANSCRIPT_MAX_LINE_CHARS)
+    if not transcript_ingestor.offer(room_name, lines):
+        raise HTTPException(status_code=429, detail="Transcript backlog full", headers={"Retry-After": "1"})
+    return {"room_name": room_name, "accepted": len(lines), "ignored": ignored}
+
+@app.get("/api/transcripts/stats")
+async def transcript_stats():
+    """Transcript lines queued, written and rejected, plus flush settings"""
+    return transcript_ingestor.stats()
 
 @app.get("/api/rooms/{room_name}")
 async def get_room(room_name: str):
     """Get specific room information"""
-    if room_name not in active_rooms:
+    room = await state_store.get_room(room_name)
+    if room is None:
         raise HTTPException(status_code=404, detail="Room not found")
-    return {"room": active_rooms[room_name]}
+    return {"room": room}
 
 @app.post("/api/rooms/{room_name}/leave")
 async def leave_room(room_name: str, participant_type: str):
     """Handle participant leaving room"""
     try:
-        if room_name in active_rooms:
-            if participant_type in active_rooms[room_name]["participants"]:
-                active_rooms[room_name]["participants"].remove(participant_type)
-            
-            # If no participants left, mark room as inactive
-            if not active_rooms[room_name]["participants"]:
-                active_rooms[room_name]["status"] = "inactive"
+        # The store marks the room inactive when its last participant leaves
+        room, removed = await state_store.remove_participant(room_name, participant_type)
+        if removed:
+            identity_allocator.release(room_name, participant_type)
+            if participant_type == "caller" or participant_type.startswith("caller_"):
+                _notify_agent_pool("caller_left", room_name=room_name)
+            room_events.publish(room_name, {
+                "type": "participant_left",
+                "participant": participant_type,
+                "participants_count": len(room["participants"]),
+                "status": room["status"]
+            })
         
         return {"status": "success", "message": f"{participant_type} left {room_name}"}
     except Exception as e:
@@ -498,20 +1597,110 @@ async def leave_room(room_name: str, participant_type: str):
 
 # WebSocket endpoint for real-time updates (optional)
 @app.websocket("/ws/{room_name}")
-async def websocket_endpoint(websocket, room_name: str):
-    """WebSocket for real-time room updates"""
+async def websocket_endpoint(websocket: WebSocket, room_name: str):
+    """
+    WebSocket for real-time room updates
+
+    Sends a full snapshot on connect, then only the events published when the
+    room changes, plus a heartbeat after WS_HEARTBEAT_SECONDS of silence. A
+    subscriber that falls behind gets a fresh snapshot instead of the backlog.
+    """
     await websocket.accept()
+    subscription = room_events.subscribe(room_name)
+    
+    async def _send(payload: str):
+        # A client that can't take a frame within the timeout is dropped
+        await asyncio.wait_for(websocket.send_text(payload), WS_SEND_TIMEOUT_SECONDS)
+    
+    async def _drain_client():
+        # Consume (and ignore) client frames so disconnects are noticed promptly
+        while True:
+            await websocket.receive_text()
+    
+    reader = asyncio.create_task(_drain_client())
+    getter = None
     try:
+        await _send(json.dumps({"type": "snapshot", **room_snapshot(room_name, await state_store.get_room(room_name))}))
         while True:
-            # Send room updates
-            room_data = active_rooms.get(room_name, {})
-            await websocket.send_text(json.dumps(room_data))
-            await asyncio.sleep(1)
+            if getter is None:
+                getter = asyncio.create_task(subscription.get())
+            # Wake on the client going away too, not just on the next event or heartbeat
+            done, _ = await asyncio.wait({reader, getter}, timeout=WS_HEARTBEAT_SECONDS,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if reader in done:
+                # Re-raises the client's disconnect, handled below like a failed send
+                reader.result()
+                break
+            if getter not in done:
+                await _send(json.dumps({"type": "heartbeat", "room_name": room_name}))
+                continue
+            event, getter = getter.result(), None
+            if event is RESYNC:
+                await _send(json.dumps({"type": "snapshot", **room_snapshot(room_name, await state_store.get_room(room_name))}))
+            else:
+                await _send(event)
+    except (WebSocketDisconnect, asyncio.TimeoutError):
+        pass
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.warning("WebSocket error", extra={"room_name": room_name, "error": str(e)})
     finally:
-        await websocket.close()
+        reader.cancel()
+        if getter is not None:
+            getter.cancel()
+        room_events.unsubscribe(subscription)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+@app.websocket("/ws/{room_name}/transcript")
+async def transcript_websocket(websocket: WebSocket, room_name: str):
+    """
+    Stream speech-to-text segments for one room
+
+    Each text frame is a segment object, a list of them, or {"segments": [...]}.
+    When the write backlog is full the server stops reading until there is
+    room (up to TRANSCRIPT_PUT_TIMEOUT_SECONDS, then the frame is answered
+    with "rejected"). {"type": "flush"} writes everything queued so far and
+    is answered with "flushed".
+    """
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+                if isinstance(frame, dict) and frame.get("type") == "flush":
+                    await transcript_ingestor.flush()
+                    await websocket.send_text(json.dumps({"type": "flushed"}))
+                    continue
+                segments = frame.get("segments") if isinstance(frame, dict) and "segments" in frame else frame
+                lines, _ = transcript_lines(segments if isinstance(segments, list) else [segments], TRANSCRIPT_MAX_LINE_CHARS)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                await websocket.send_text(json.dumps({"type": "error", "error": "Invalid transcript frame"}))
+                continue
+            if not await transcript_ingestor.put(room_name, lines, TRANSCRIPT_PUT_TIMEOUT_SECONDS):
+                await websocket.send_text(json.dumps({"type": "rejected", "segments": len(lines), "error": "Transcript backlog full"}))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.warning("Transcript WebSocket error", extra={"room_name": room_name, "error": str(e)})
+
+startup_timer.mark("imported")
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    HOST = os.getenv("HOST", "0.0.0.0")
+    PORT = int(os.getenv("PORT", "8000"))
+    WORKERS = int(os.getenv("WORKERS", "1"))
+    if WORKERS > 1:
+        # Worker processes on CLUSTER_BASE_PORT+i behind room-sticky gateway processes on HOST:PORT
+        run_cluster(
+            "main:app",
+            workers=WORKERS,
+            host=HOST,
+            port=PORT,
+            base_port=int(os.getenv("CLUSTER_BASE_PORT", "8100")),
+            gateways=int(os.getenv("CLUSTER_GATEWAYS", str(max(1, WORKERS // 4)))),
+        )
+    else:
+        import uvicorn
+        uvicorn.run(app, host=HOST, port=PORT)
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""
+Lightweight in-process metrics for the warm transfer backend
+Counters, gauges and latency histograms shared by the backend subsystems
+"""
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Default latency buckets in seconds (Prometheus-style upper bounds)
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [(str(k), str(v)) for k, v in sorted(labels.items())]
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonically increasing value"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.description = description
+        self.labels = dict(labels or {})
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> Dict:
+        return {"labels": self.labels, "value": self._value}
+
+    def exposition(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels)} {_format_value(self._value)}"]
+
+
+class Gauge:
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.description = description
+        self.labels = dict(labels or {})
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> Dict:
+        return {"labels": self.labels, "value": self._value}
+
+    def exposition(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels)} {_format_value(self._value)}"]
+
+
+class Histogram:
+    """Bucketed distribution of observed values (latencies in seconds by default)"""
+
+    kind = "histogram"
+
+    def __init__(self,
+                 name: str,
+                 description: str = "",
+                 labels: Optional[Dict[str, str]] = None,
+                 buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = dict(labels or {})
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside the matching bucket"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+        if total == 0:
+            return None
+
+        target = q * total
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= target and bucket_count > 0:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index >= len(self.buckets):
+                    return self.buckets[-1]
+                upper = self.buckets[index]
+                fraction = (target - cumulative) / bucket_count
+                return lower + (upper - lower) * fraction
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            total_sum = self._sum
+
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(list(self.buckets) + [float("inf")], counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+
+        return {
+            "labels": self.labels,
+            "count": total,
+            "sum": total_sum,
+            "buckets": buckets,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+    def exposition(self) -> List[str]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            total_sum = self._sum
+
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(list(self.buckets) + [float("inf")], counts):
+            cumulative += bucket_count
+            le = _format_labels(self.labels, ("le", "+Inf" if bound == float("inf") else repr(float(bound))))
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        labels = _format_labels(self.labels)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+        lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+class MetricsRegistry:
+    """Get-or-create registry of named, labelled metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Dict[LabelKey, object]] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str, labels: Optional[Dict[str, str]], **kwargs):
+        key = _label_key(labels)
+        with self._lock:
+            family = self._metrics.setdefault(name, {})
+            metric = family.get(key)
+            if metric is None:
+                metric = cls(name, description, labels, **kwargs)
+                family[key] = metric
+            return metric
+
+    def counter(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._get_or_create(Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None) -> Gauge:
+        return self._get_or_create(Gauge, name, description, labels)
+
+    def histogram(self,
+                  name: str,
+                  description: str = "",
+                  labels: Optional[Dict[str, str]] = None,
+                  buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, labels, buckets=buckets)
+
+    def families(self) -> Dict[str, List[object]]:
+        with self._lock:
+            return {name: list(family.values()) for name, family in self._metrics.items()}
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        """JSON-ready view of every registered metric"""
+        return {
+            name: [metric.snapshot() for metric in family]
+            for name, family in self.families().items()
+        }
+
+    def render_prometheus(self) -> str:
+        """Every registered metric in the Prometheus text exposition format"""
+        lines = []
+        for name, family in sorted(self.families().items()):
+            if not family:
+                continue
+            first = family[0]
+            if first.description:
+                lines.append(f"# HELP {name} {first.description}")
+            lines.append(f"# TYPE {name} {first.kind}")
+            for metric in family:
+                lines.extend(metric.exposition())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by all backend modules
+registry = MetricsRegistry()
@@ -0,0 +1,139 @@
+"""
+Observability
+Non-blocking structured logging and per-route request metrics
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from metrics import Histogram, registry
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, plus any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with extra= fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = [
+            f"{key}={value}" for key, value in vars(record).items()
+            if key not in _RECORD_FIELDS and not key.startswith("_")
+        ]
+        return f"{line} {' '.join(extras)}" if extras else line
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json") -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue drained by a background thread
+
+    Request handlers only pay for building the record and a queue put; the
+    stdout write happens on the listener thread. Records below level are
+    dropped before they are built. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request
+
+    Observes http_request_duration_seconds{method, route, status}, where route
+    is the matched path template (e.g. /api/rooms/{room_name}) so label
+    cardinality stays bounded. Streaming responses are timed until their last
+    chunk is sent. Requests that match no route are labelled "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._histograms: Dict[Tuple[str, str, int], Histogram] = {}
+        self._in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+    def _histogram(self, method: str, route: str, status: int) -> Histogram:
+        key = (method, route, status)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = registry.histogram(
+                "http_request_duration_seconds",
+                "HTTP request latency by route",
+                {"method": method, "route": route, "status": str(status)},
+            )
+        return histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self._in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._in_flight.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            self._histogram(scope["method"], route_path, status).observe(time.perf_counter() - started)
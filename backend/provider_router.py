@@ -0,0 +1,279 @@
+"""
+LLM Provider Router
+Latency-aware provider selection with hedged requests and circuit breaking
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from llm_providers import LLMProvider
+from metrics import registry
+from rate_limit import TokenBucket
+
+
+class AllProvidersFailed(Exception):
+    """Raised when every available provider failed or none is configured"""
+
+
+class ProviderHealth:
+    """
+    Per-provider latency and error tracking plus a circuit breaker.
+
+    Latency and error rate are exponentially weighted moving averages. After
+    failure_threshold consecutive failures the circuit opens and the provider
+    is skipped for cooldown_seconds; then one probe request is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 name: str,
+                 alpha: float = 0.2,
+                 failure_threshold: int = 5,
+                 cooldown_seconds: float = 30.0,
+                 window: int = 100):
+        self.name = name
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error_rate = 0.0
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._recent_latencies = deque(maxlen=window)
+
+        labels = {"provider": name}
+        self._circuit_gauge = registry.gauge("llm_provider_circuit_open", "1 while the provider's circuit is open", labels)
+        self._latency_gauge = registry.gauge("llm_provider_ewma_latency_seconds", "EWMA provider latency", labels)
+        self._error_gauge = registry.gauge("llm_provider_ewma_error_rate", "EWMA provider error rate", labels)
+        self._latency = registry.histogram("llm_provider_latency_seconds", "Successful provider response latency seen by the router", labels)
+        self._failures = registry.counter("llm_provider_failures_total", "Provider calls that failed or timed out", labels)
+
+    def available(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            return True
+        return False
+
+    def begin(self):
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = True
+
+    def abandon(self):
+        """A request that was cancelled (lost a hedge race) counts as neither outcome"""
+        self._probe_in_flight = False
+
+    def record_success(self, latency: float):
+        self._recent_latencies.append(latency)
+        self._latency.observe(latency)
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        self.ewma_error_rate = (1 - self.alpha) * self.ewma_error_rate
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self._probe_in_flight = False
+        self._circuit_gauge.set(0)
+        self._latency_gauge.set(self.ewma_latency)
+        self._error_gauge.set(self.ewma_error_rate)
+
+    def record_failure(self):
+        self._failures.inc()
+        self.ewma_error_rate = self.alpha + (1 - self.alpha) * self.ewma_error_rate
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._circuit_gauge.set(1)
+        self._error_gauge.set(self.ewma_error_rate)
+
+    def p95_latency(self, min_samples: int = 20) -> Optional[float]:
+        if len(self._recent_latencies) < min_samples:
+            return None
+        ordered = sorted(self._recent_latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def score(self) -> Optional[float]:
+        """Expected cost of calling this provider; lower is better, None if unmeasured"""
+        if self.ewma_latency is None:
+            return None
+        # Penalize error-prone providers: a failure costs roughly a full retry
+        return self.ewma_latency * (1 + 2 * self.ewma_error_rate)
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "ewma_latency_seconds": self.ewma_latency,
+            "ewma_error_rate": round(self.ewma_error_rate, 4),
+            "p95_latency_seconds": self.p95_latency(),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class ProviderRouter:
+    """
+    Chooses and calls LLM providers.
+
+    Providers are ordered by their EWMA score (configured order breaks ties
+    and is used until latencies have been measured). With hedging enabled the
+    secondary provider is started if the primary has not answered within its
+    observed p95 latency, and the first successful answer wins.
+    """
+
+    def __init__(self,
+                 providers: List[LLMProvider],
+                 hedging: bool = True,
+                 default_hedge_delay: float = 2.0,
+                 failure_threshold: int = 5,
+                 cooldown_seconds: float = 30.0):
+        self.providers = list(providers)
+        self.hedging = hedging
+        self.default_hedge_delay = default_hedge_delay
+        self.health: Dict[str, ProviderHealth] = {
+            provider.name: ProviderHealth(
+                provider.name,
+                failure_threshold=failure_threshold,
+                cooldown_seconds=cooldown_seconds,
+            )
+            for provider in self.providers
+        }
+
+    def ordered(self) -> List[LLMProvider]:
+        """Available providers, best first"""
+        candidates = [
+            (index, provider) for index, provider in enumerate(self.providers)
+            if self.health[provider.name].available()
+        ]
+
+        def sort_key(item):
+            index, provider = item
+            score = self.health[provider.name].score()
+            # Measured providers by score; unmeasured ones keep their configured priority
+            return (score is None, score or 0.0, index)
+
+        return [provider for _, provider in sorted(candidates, key=sort_key)]
+
+    def record_success(self, provider_name: str, latency: float):
+        self.health[provider_name].record_success(latency)
+
+    def record_failure(self, provider_name: str):
+        self.health[provider_name].record_failure()
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        p95 = self.health[provider.name].p95_latency()
+        return p95 if p95 is not None else self.default_hedge_delay
+
+    async def _attempt(self,
+                       provider: LLMProvider,
+                       prompt: str,
+                       system_prompt: Optional[str],
+                       max_tokens: int,
+                       limiter: Optional[TokenBucket] = None) -> str:
+        health = self.health[provider.name]
+        if limiter is not None:
+            # Wait before timing so rate limiting doesn't count as provider latency
+            await limiter.acquire()
+        health.begin()
+        started = time.perf_counter()
+        try:
+            text = await provider.complete(prompt, system_prompt=system_prompt, max_tokens=max_tokens)
+        except asyncio.CancelledError:
+            health.abandon()
+            raise
+        except Exception:
+            health.record_failure()
+            raise
+        health.record_success(time.perf_counter() - started)
+        return text
+
+    async def complete(self,
+                       prompt: str,
+                       system_prompt: Optional[str] = None,
+                       max_tokens: int = 150,
+                       limiters: Optional[Dict[str, TokenBucket]] = None,
+                       quotas: Optional[Dict[str, TokenBucket]] = None) -> Tuple[str, str]:
+        """
+        Return (text, provider_name) from the first provider that answers
+
+        limiters optionally maps provider names to token buckets that every
+        attempt on that provider must pass (used by bulk workloads). quotas
+        are token buckets that are never waited on: a provider whose bucket
+        is empty is skipped in favor of the next one (used by interactive
+        requests, which would rather fall back than queue).
+
+        Raises:
+            AllProvidersFailed: no provider is available or all of them failed
+        """
+        queue = self.ordered()
+        if not queue:
+            raise AllProvidersFailed("No LLM provider available")
+
+        primary = queue[0].name
+        running: Dict[asyncio.Task, LLMProvider] = {}
+        errors: List[str] = []
+
+        def launch(hedged: bool = False):
+            while queue:
+                provider = queue.pop(0)
+                quota = quotas.get(provider.name) if quotas else None
+                if quota is None or quota.try_acquire():
+                    break
+                errors.append(f"{provider.name}: over its rate limit")
+            else:
+                return
+            if hedged:
+                registry.counter("llm_router_hedges_total", "Hedged secondary requests", {"provider": provider.name}).inc()
+            elif running or errors:
+                registry.counter("llm_fallbacks_total", "Calls that fell back to this provider", {"provider": provider.name}).inc()
+            limiter = limiters.get(provider.name) if limiters else None
+            task = asyncio.create_task(self._attempt(provider, prompt, system_prompt, max_tokens, limiter))
+            running[task] = provider
+
+        launch()
+        try:
+            while running:
+                wait_for = None
+                if self.hedging and queue and len(running) == 1:
+                    wait_for = self.hedge_delay(next(iter(running.values())))
+
+                done, _ = await asyncio.wait(running.keys(), timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Primary is slower than its p95: race the next provider
+                    launch(hedged=True)
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is None:
+                        if provider.name != primary:
+                            registry.counter("llm_router_wins_total", "Calls answered by a hedge or fallback", {"provider": provider.name}).inc()
+                        return task.result(), provider.name
+                    errors.append(f"{provider.name}: {task.exception()}")
+
+                if not running and queue:
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise AllProvidersFailed("; ".join(errors))
+
+    def stats(self) -> Dict:
+        return {
+            "hedging": self.hedging,
+            "order": [provider.name for provider in self.ordered()],
+            "providers": {name: health.stats() for name, health in self.health.items()},
+        }
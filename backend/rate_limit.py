@@ -0,0 +1,80 @@
+"""
+Rate Limiting
+Async token buckets shared by the batch pipeline and admission control
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+from metrics import registry
+
+
+class TokenBucket:
+    """
+    Classic token bucket: refills at rate tokens/second up to burst.
+
+    try_acquire() never waits; acquire() waits until enough tokens have
+    accumulated. Waiters are served in arrival order, so a large request
+    cannot be starved by a stream of small ones.
+    """
+
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.name = name
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+        labels = {"limiter": name}
+        self._wait = registry.histogram("rate_limit_wait_seconds", "Time spent waiting for a rate-limit token", labels)
+        self._rejected = registry.counter("rate_limit_rejected_total", "Requests rejected by a rate limiter", labels)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        if self._lock.locked():
+            # Someone is already queued; don't jump ahead of them
+            self._rejected.inc()
+            return False
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        self._rejected.inc()
+        return False
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Wait for tokens; returns the seconds spent waiting"""
+        if tokens > self.burst:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of {self.burst}")
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    break
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+        waited = time.monotonic() - started
+        self._wait.observe(waited)
+        return waited
+
+    def stats(self) -> Dict:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "available": round(self.available(), 3),
+            "wait_p95_seconds": self._wait.quantile(0.95),
+            "rejected": int(self._rejected.value),
+        }
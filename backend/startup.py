@@ -0,0 +1,138 @@
+"""
+Startup
+Lazily imported modules (provider SDKs), background warm-up and cold-start timing
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+def process_start_time() -> float:
+    """Wall-clock time this process was started (from /proc on Linux, else now)"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesized command name; starttime is field 22 of the full line
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+class LazyModule:
+    """
+    A heavy module (typically a provider SDK) imported on first use instead of at startup.
+
+    get() imports the module once (thread-safe) and passes it through the
+    optional setup callable, whose result is what get() returns from then
+    on (e.g. a configured client). load() does the same on a worker thread
+    so a slow import doesn't stall the event loop. A failed import or setup
+    is retried on the next call.
+    """
+
+    def __init__(self, module_name: str, setup: Optional[Callable[[Any], Any]] = None):
+        self.module_name = module_name
+        self.setup = setup
+        self.import_seconds: Optional[float] = None
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> Any:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                started = time.perf_counter()
+                module = importlib.import_module(self.module_name)
+                self._value = self.setup(module) if self.setup else module
+                self.import_seconds = time.perf_counter() - started
+                self._loaded = True
+                registry.gauge(
+                    "lazy_import_seconds", "Time to import and set up a lazily loaded module", {"module": self.module_name}
+                ).set(self.import_seconds)
+                logger.info("Loaded module", extra={"module_name": self.module_name, "seconds": round(self.import_seconds, 4)})
+        return self._value
+
+    async def load(self) -> Any:
+        if self._loaded:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def stats(self) -> Dict:
+        return {"module": self.module_name, "loaded": self._loaded, "import_seconds": self.import_seconds}
+
+
+# LiveKit server SDK (protobuf types, API client, token claims), shared by the room and token services
+livekit_api = LazyModule("livekit.api")
+
+
+async def warm_up(modules: List[LazyModule], delay_seconds: float = 0.0):
+    """Load modules one after another off the event loop, e.g. once the server accepts traffic"""
+    if delay_seconds > 0:
+        await asyncio.sleep(delay_seconds)
+    for module in modules:
+        try:
+            await module.load()
+        except Exception as e:
+            logger.warning("Module warm-up failed", extra={"module_name": module.module_name, "error": str(e)})
+
+
+class StartupTimer:
+    """
+    Seconds from process start to each startup milestone.
+
+    Milestones are recorded once ("imported", "ready", "first_request", ...)
+    and exported as the startup_seconds{milestone} gauge.
+    """
+
+    def __init__(self):
+        self.process_started = process_start_time()
+        self.milestones: Dict[str, float] = {}
+
+    def mark(self, milestone: str):
+        if milestone in self.milestones:
+            return
+        seconds = time.time() - self.process_started
+        self.milestones[milestone] = round(seconds, 4)
+        registry.gauge("startup_seconds", "Seconds from process start to a startup milestone", {"milestone": milestone}).set(seconds)
+        logger.info("Startup milestone", extra={"milestone": milestone, "seconds": round(seconds, 4)})
+
+    def stats(self) -> Dict:
+        return dict(self.milestones)
+
+
+class FirstRequestMiddleware:
+    """ASGI middleware marking "first_request" when the first HTTP response has been sent"""
+
+    def __init__(self, app, timer: StartupTimer):
+        self.app = app
+        self.timer = timer
+        self._seen = False
+
+    async def __call__(self, scope, receive, send):
+        if self._seen or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_mark(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                self._seen = True
+                self.timer.mark("first_request")
+
+        await self.app(scope, receive, send_and_mark)
@@ -0,0 +1,646 @@
+"""
+State Store
+Pluggable storage for rooms, conversations, summaries and transfers
+"""
+
+import bisect
+import json
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+def _now_iso() -> str:
+    return datetime.now().isoformat()
+
+
+def room_view(room_name: str, room: Dict) -> Dict:
+    """JSON-ready listing entry for a room record"""
+    participants = list(room["participants"])
+    return {
+        "room_name": room_name,
+        "status": room.get("status", "active"),
+        "created_at": room.get("created_at"),
+        "updated_at": room.get("updated_at"),
+        "participants": participants,
+        "participants_count": len(participants),
+        "room_info": room.get("room_info") or {},
+    }
+
+
+class StateStore:
+    """
+    Interface every route goes through instead of module-level dicts.
+
+    Room records are JSON-ready dicts:
+        {"room_info": {...}, "participants": [...], "created_at": str,
+         "updated_at": str, "status": str}
+    Returned dicts are copies; mutate state only through the store methods.
+    A participant identity appears at most once per room, so adding and
+    removing one is O(1) (O(log n) on Redis) rather than a list scan.
+
+    Conversations are capped at max_conversation_messages (oldest lines are
+    dropped), and every write to a room's conversation, summary or checkpoint
+    refreshes its context timestamp so the lifecycle reaper can find contexts
+    whose room is gone.
+    """
+
+    max_conversation_messages = 0  # 0 means unbounded
+
+    # Rooms
+    async def get_room(self, room_name: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    async def room_exists(self, room_name: str) -> bool:
+        return await self.get_room(room_name) is not None
+
+    async def join_or_create_room(self, room_name: str, participant: str, defaults: Dict) -> Tuple[Dict, bool]:
+        """Add participant, creating the room from defaults if needed; returns (room, created)"""
+        raise NotImplementedError
+
+    async def add_participant(self, room_name: str, participant: str) -> Optional[Dict]:
+        """Add participant to an existing room; returns the updated room or None if missing"""
+        raise NotImplementedError
+
+    async def remove_participant(self, room_name: str, participant: str) -> Tuple[Optional[Dict], bool]:
+        """Remove participant, marking the room inactive when empty; returns (room, removed)"""
+        raise NotImplementedError
+
+    async def list_rooms(self) -> Dict[str, Dict]:
+        raise NotImplementedError
+
+    async def delete_room(self, room_name: str):
+        raise NotImplementedError
+
+    async def list_rooms_page(self,
+                              status: Optional[str] = None,
+                              after: Optional[str] = None,
+                              limit: int = 50) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Room views (see room_view) ordered by name, starting after the given name
+
+        Only rooms with the given status are read, via a per-status index.
+        Returns (views, last_name); last_name is None once the listing is
+        exhausted and otherwise is the cursor for the next page. Views may be
+        shared with the store and must not be mutated.
+        """
+        raise NotImplementedError
+
+    # Conversations and summaries
+    async def get_conversation(self, room_name: str) -> List[str]:
+        raise NotImplementedError
+
+    async def set_conversation(self, room_name: str, lines: List[str]):
+        raise NotImplementedError
+
+    async def append_conversation(self, room_name: str, lines: List[str]):
+        raise NotImplementedError
+
+    async def append_conversations(self, batch: Dict[str, List[str]]):
+        """Append lines to many rooms' conversations in one write"""
+        for room_name, lines in batch.items():
+            await self.append_conversation(room_name, lines)
+
+    async def get_summary(self, room_name: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set_summary(self, room_name: str, summary: str):
+        raise NotImplementedError
+
+    async def get_checkpoint(self, room_name: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    async def set_checkpoint(self, room_name: str, checkpoint: Dict):
+        raise NotImplementedError
+
+    async def stale_contexts(self, older_than: float) -> List[str]:
+        """Room names whose context was last written before the given epoch time"""
+        raise NotImplementedError
+
+    async def delete_context(self, room_name: str):
+        """Drop conversation, summary and checkpoint for a room"""
+        raise NotImplementedError
+
+    # Transfers
+    async def get_transfer(self, transfer_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    async def save_transfer(self, transfer_id: str, record: Dict):
+        raise NotImplementedError
+
+    async def list_transfers(self) -> Dict[str, Dict]:
+        raise NotImplementedError
+
+    async def delete_transfer(self, transfer_id: str):
+        raise NotImplementedError
+
+    async def usage(self) -> Dict:
+        """Live object counts and approximate bytes held"""
+        raise NotImplementedError
+
+    async def counts(self) -> Dict:
+        """Cheap live object counts (rooms, conversations, transfers) for frequent scrapes"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemoryStateStore(StateStore):
+    """
+    Single-process store backed by dicts (the original demo behaviour)
+
+    Each conversation is a ring buffer (a deque bounded by
+    max_conversation_messages), so appending drops the oldest lines in O(1)
+    instead of shifting the whole list.
+    """
+
+    def __init__(self, max_conversation_messages: int = 0):
+        self.max_conversation_messages = max_conversation_messages
+        self.rooms: Dict[str, Dict] = {}
+        self.conversations: Dict[str, deque] = {}
+        self.summaries: Dict[str, str] = {}
+        self.checkpoints: Dict[str, Dict] = {}
+        self.context_written_at: Dict[str, float] = {}
+        self.transfers: Dict[str, Dict] = {}
+        # Sorted room names, overall and per status, plus prebuilt listing views
+        self._names: List[str] = []
+        self._names_by_status: Dict[str, List[str]] = {}
+        self._views: Dict[str, Dict] = {}
+
+    def _index(self, room_name: str, status: str):
+        bisect.insort(self._names_by_status.setdefault(status, []), room_name)
+
+    def _unindex(self, room_name: str, status: str):
+        names = self._names_by_status.get(status, [])
+        index = bisect.bisect_left(names, room_name)
+        if index < len(names) and names[index] == room_name:
+            del names[index]
+
+    def _refresh_view(self, room_name: str):
+        self._views[room_name] = room_view(room_name, self.rooms[room_name])
+
+    @staticmethod
+    def _copy_room(room: Dict) -> Dict:
+        # Participants are held as an insertion-ordered dict used as a set
+        return {**room, "participants": list(room["participants"])}
+
+    async def get_room(self, room_name: str) -> Optional[Dict]:
+        room = self.rooms.get(room_name)
+        return self._copy_room(room) if room is not None else None
+
+    async def room_exists(self, room_name: str) -> bool:
+        return room_name in self.rooms
+
+    async def join_or_create_room(self, room_name: str, participant: str, defaults: Dict) -> Tuple[Dict, bool]:
+        room = self.rooms.get(room_name)
+        created = room is None
+        if created:
+            room = self.rooms[room_name] = {**defaults, "participants": {}}
+            bisect.insort(self._names, room_name)
+            self._index(room_name, room["status"])
+        room["participants"][participant] = None
+        room["updated_at"] = _now_iso()
+        self._refresh_view(room_name)
+        return self._copy_room(room), created
+
+    async def add_participant(self, room_name: str, participant: str) -> Optional[Dict]:
+        room = self.rooms.get(room_name)
+        if room is None:
+            return None
+        room["participants"][participant] = None
+        room["updated_at"] = _now_iso()
+        self._refresh_view(room_name)
+        return self._copy_room(room)
+
+    async def remove_participant(self, room_name: str, participant: str) -> Tuple[Optional[Dict], bool]:
+        room = self.rooms.get(room_name)
+        if room is None:
+            return None, False
+        removed = participant in room["participants"]
+        if removed:
+            del room["participants"][participant]
+            room["updated_at"] = _now_iso()
+            if not room["participants"] and room["status"] != "inactive":
+                self._unindex(room_name, room["status"])
+                room["status"] = "inactive"
+                self._index(room_name, "inactive")
+            self._refresh_view(room_name)
+        return self._copy_room(room), removed
+
+    async def list_rooms(self) -> Dict[str, Dict]:
+        return {name: self._copy_room(room) for name, room in self.rooms.items()}
+
+    async def delete_room(self, room_name: str):
+        room = self.rooms.pop(room_name, None)
+        if room is not None:
+            del self._names[bisect.bisect_left(self._names, room_name)]
+            self._unindex(room_name, room["status"])
+            del self._views[room_name]
+        await self.delete_context(room_name)
+
+    async def list_rooms_page(self,
+                              status: Optional[str] = None,
+                              after: Optional[str] = None,
+                              limit: int = 50) -> Tuple[List[Dict], Optional[str]]:
+        names = self._names if status is None else self._names_by_status.get(status, [])
+        start = bisect.bisect_right(names, after) if after is not None else 0
+        page = names[start:start + limit]
+        last = page[-1] if page and start + limit < len(names) else None
+        return [self._views[name] for name in page], last
+
+    def _ring(self, lines: List[str] = ()) -> deque:
+        return deque(lines, maxlen=self.max_conversation_messages or None)
+
+    async def get_conversation(self, room_name: str) -> List[str]:
+        return list(self.conversations.get(room_name, ()))
+
+    async def set_conversation(self, room_name: str, lines: List[str]):
+        self.conversations[room_name] = self._ring(lines)
+        self.context_written_at[room_name] = time.time()
+
+    async def append_conversation(self, room_name: str, lines: List[str]):
+        ring = self.conversations.get(room_name)
+        if ring is None:
+            ring = self.conversations[room_name] = self._ring()
+        ring.extend(lines)
+        self.context_written_at[room_name] = time.time()
+
+    async def get_summary(self, room_name: str) -> Optional[str]:
+        return self.summaries.get(room_name)
+
+    async def set_summary(self, room_name: str, summary: str):
+        self.summaries[room_name] = summary
+        self.context_written_at[room_name] = time.time()
+
+    async def get_checkpoint(self, room_name: str) -> Optional[Dict]:
+        checkpoint = self.checkpoints.get(room_name)
+        return dict(checkpoint) if checkpoint is not None else None
+
+    async def set_checkpoint(self, room_name: str, checkpoint: Dict):
+        self.checkpoints[room_name] = dict(checkpoint)
+        self.context_written_at[room_name] = time.time()
+
+    async def stale_contexts(self, older_than: float) -> List[str]:
+        return [name for name, written_at in self.context_written_at.items() if written_at < older_than]
+
+    async def delete_context(self, room_name: str):
+        self.conversations.pop(room_name, None)
+        self.summaries.pop(room_name, None)
+        self.checkpoints.pop(room_name, None)
+        self.context_written_at.pop(room_name, None)
+
+    async def get_transfer(self, transfer_id: str) -> Optional[Dict]:
+        transfer = self.transfers.get(transfer_id)
+        return dict(transfer) if transfer is not None else None
+
+    async def save_transfer(self, transfer_id: str, record: Dict):
+        self.transfers[transfer_id] = dict(record)
+
+    async def list_transfers(self) -> Dict[str, Dict]:
+        return {transfer_id: dict(record) for transfer_id, record in self.transfers.items()}
+
+    async def delete_transfer(self, transfer_id: str):
+        self.transfers.pop(transfer_id, None)
+
+    async def counts(self) -> Dict:
+        return {
+            "rooms": len(self.rooms),
+            "conversations": len(self.conversations),
+            "transfers": len(self.transfers),
+        }
+
+    async def usage(self) -> Dict:
+        # Rough estimate: string payloads plus container overhead, not a deep getsizeof walk
+        conversation_bytes = sum(
+            sys.getsizeof(lines) + sum(sys.getsizeof(line) for line in lines)
+            for lines in self.conversations.values()
+        )
+        room_bytes = sum(len(json.dumps(room)) for room in self.rooms.values())
+        transfer_bytes = sum(len(json.dumps(record)) for record in self.transfers.values())
+        summary_bytes = sum(sys.getsizeof(summary) for summary in self.summaries.values())
+        checkpoint_bytes = sum(len(json.dumps(checkpoint)) for checkpoint in self.checkpoints.values())
+        return {
+            "rooms": len(self.rooms),
+            "conversations": len(self.conversations),
+            "conversation_messages": sum(len(lines) for lines in self.conversations.values()),
+            "summaries": len(self.summaries),
+            "checkpoints": len(self.checkpoints),
+            "transfers": len(self.transfers),
+            "approx_bytes": conversation_bytes + room_bytes + transfer_bytes + summary_bytes + checkpoint_bytes,
+        }
+
+
+class RedisStateStore(StateStore):
+    """
+    Redis-protocol store shared by every worker and node.
+
+    Layout (all keys under key_prefix):
+        room_index                 sorted set of all room names (lexicographic)
+        rooms:status:{status}      sorted set of room names with that status
+        room:{name}                hash: room_info (JSON), created_at, status
+        room:{name}:members        sorted set of identities scored by join time
+        conversation:{name}        list of lines (LTRIM-capped)
+        summary:{name}             string
+        checkpoint:{name}          JSON
+        contexts                   sorted set: room name -> last context write (epoch)
+        transfers                  set of transfer ids
+        transfer:{id}              JSON
+
+    Multi-key reads and writes are sent as one non-transactional pipeline,
+    so each store call costs a single round trip. Leaving a room is the
+    exception: it reads the member count before deciding the room's status,
+    so it runs as an optimistic WATCH/MULTI transaction and retries on
+    conflict.
+    """
+
+    def __init__(self,
+                 url: str = "redis://localhost:6379/0",
+                 key_prefix: str = "warm_transfer:",
+                 client=None,
+                 max_conversation_messages: int = 0):
+        if client is None:
+            try:
+                from redis import asyncio as aioredis
+            except ImportError as e:
+                raise RuntimeError("STATE_STORE=redis requires the 'redis' package") from e
+            client = aioredis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = key_prefix
+        self.max_conversation_messages = max_conversation_messages
+
+    def _key(self, *parts: str) -> str:
+        return self.prefix + ":".join(parts)
+
+    @staticmethod
+    def _decode_room(fields: Dict, participants: List[str]) -> Optional[Dict]:
+        if not fields:
+            return None
+        return {
+            "room_info": json.loads(fields.get("room_info") or "{}"),
+            "participants": list(participants),
+            "created_at": fields.get("created_at"),
+            "updated_at": fields.get("updated_at") or fields.get("created_at"),
+            "status": fields.get("status", "active"),
+        }
+
+    async def get_room(self, room_name: str) -> Optional[Dict]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(self._key("room", room_name))
+        pipe.zrange(self._key("room", room_name, "members"), 0, -1)
+        fields, participants = await pipe.execute()
+        return self._decode_room(fields, participants)
+
+    async def room_exists(self, room_name: str) -> bool:
+        return bool(await self.client.exists(self._key("room", room_name)))
+
+    async def join_or_create_room(self, room_name: str, participant: str, defaults: Dict) -> Tuple[Dict, bool]:
+        room_key = self._key("room", room_name)
+        participants_key = self._key("room", room_name, "members")
+        pipe = self.client.pipeline(transaction=True)
+        # HSETNX on created_at decides which concurrent caller created the room
+        pipe.hsetnx(room_key, "created_at", defaults["created_at"])
+        pipe.hsetnx(room_key, "room_info", json.dumps(defaults.get("room_info") or {}))
+        pipe.hsetnx(room_key, "status", defaults.get("status", "active"))
+        pipe.hset(room_key, "updated_at", _now_iso())
+        pipe.zadd(self._key("room_index"), {room_name: 0})
+        pipe.zadd(participants_key, {participant: time.time()}, nx=True)
+        pipe.hgetall(room_key)
+        pipe.zrange(participants_key, 0, -1)
+        results = await pipe.execute()
+        room, created = self._decode_room(results[6], results[7]), bool(results[0])
+        if created:
+            await self.client.zadd(self._key("rooms", "status", room["status"]), {room_name: 0})
+        return room, created
+
+    async def add_participant(self, room_name: str, participant: str) -> Optional[Dict]:
+        if not await self.room_exists(room_name):
+            return None
+        participants_key = self._key("room", room_name, "members")
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zadd(participants_key, {participant: time.time()}, nx=True)
+        pipe.hset(self._key("room", room_name), "updated_at", _now_iso())
+        pipe.hgetall(self._key("room", room_name))
+        pipe.zrange(participants_key, 0, -1)
+        _, _, fields, participants = await pipe.execute()
+        return self._decode_room(fields, participants)
+
+    async def remove_participant(self, room_name: str, participant: str) -> Tuple[Optional[Dict], bool]:
+        from redis.exceptions import WatchError
+
+        room_key = self._key("room", room_name)
+        participants_key = self._key("room", room_name, "members")
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # WATCH/MULTI: a join or leave landing between the reads and
+                    # the writes aborts the transaction, so the member count the
+                    # status is decided from is the one the removal applies to
+                    await pipe.watch(room_key, participants_key)
+                    if not await pipe.exists(room_key):
+                        await pipe.reset()
+                        return None, False
+                    if await pipe.zscore(participants_key, participant) is None:
+                        await pipe.reset()
+                        return await self.get_room(room_name), False
+                    remaining = await pipe.zcard(participants_key) - 1
+                    status = await pipe.hget(room_key, "status") or "active"
+
+                    pipe.multi()
+                    pipe.zrem(participants_key, participant)
+                    fields = {"updated_at": _now_iso()}
+                    if remaining == 0 and status != "inactive":
+                        fields["status"] = "inactive"
+                        pipe.zrem(self._key("rooms", "status", status), room_name)
+                        pipe.zadd(self._key("rooms", "status", "inactive"), {room_name: 0})
+                    pipe.hset(room_key, mapping=fields)
+                    pipe.hgetall(room_key)
+                    pipe.zrange(participants_key, 0, -1)
+                    results = await pipe.execute()
+                    return self._decode_room(results[-2], results[-1]), True
+                except WatchError:
+                    continue
+
+    async def _load_rooms(self, names: List[str]) -> Dict[str, Dict]:
+        if not names:
+            return {}
+        pipe = self.client.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(self._key("room", name))
+            pipe.zrange(self._key("room", name, "members"), 0, -1)
+        results = await pipe.execute()
+        rooms = {}
+        for index, name in enumerate(names):
+            room = self._decode_room(results[2 * index], results[2 * index + 1])
+            if room is not None:
+                rooms[name] = room
+        return rooms
+
+    async def list_rooms(self) -> Dict[str, Dict]:
+        return await self._load_rooms(await self.client.zrange(self._key("room_index"), 0, -1))
+
+    async def list_rooms_page(self,
+                              status: Optional[str] = None,
+                              after: Optional[str] = None,
+                              limit: int = 50) -> Tuple[List[Dict], Optional[str]]:
+        index_key = self._key("room_index") if status is None else self._key("rooms", "status", status)
+        start = f"({after}" if after is not None else "-"
+        # One extra name tells whether another page follows
+        names = await self.client.zrangebylex(index_key, start, "+", start=0, num=limit + 1)
+        page = names[:limit]
+        rooms = await self._load_rooms(page)
+        views = [room_view(name, rooms[name]) for name in page if name in rooms]
+        return views, page[-1] if len(names) > limit else None
+
+    async def delete_room(self, room_name: str):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrem(self._key("room_index"), room_name)
+        pipe.zrem(self._key("rooms", "status", "active"), room_name)
+        pipe.zrem(self._key("rooms", "status", "inactive"), room_name)
+        pipe.zrem(self._key("contexts"), room_name)
+        pipe.delete(
+            self._key("room", room_name),
+            self._key("room", room_name, "members"),
+            self._key("conversation", room_name),
+            self._key("summary", room_name),
+            self._key("checkpoint", room_name),
+        )
+        await pipe.execute()
+
+    def _touch_context(self, pipe, room_name: str):
+        pipe.zadd(self._key("contexts"), {room_name: time.time()})
+
+    def _trim_conversation(self, pipe, key: str):
+        if self.max_conversation_messages:
+            pipe.ltrim(key, -self.max_conversation_messages, -1)
+
+    async def get_conversation(self, room_name: str) -> List[str]:
+        return await self.client.lrange(self._key("conversation", room_name), 0, -1)
+
+    async def set_conversation(self, room_name: str, lines: List[str]):
+        key = self._key("conversation", room_name)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(key)
+        if lines:
+            pipe.rpush(key, *lines)
+            self._trim_conversation(pipe, key)
+        self._touch_context(pipe, room_name)
+        await pipe.execute()
+
+    async def append_conversation(self, room_name: str, lines: List[str]):
+        if not lines:
+            return
+        key = self._key("conversation", room_name)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(key, *lines)
+        self._trim_conversation(pipe, key)
+        self._touch_context(pipe, room_name)
+        await pipe.execute()
+
+    async def append_conversations(self, batch: Dict[str, List[str]]):
+        pipe = self.client.pipeline(transaction=False)
+        for room_name, lines in batch.items():
+            if not lines:
+                continue
+            key = self._key("conversation", room_name)
+            pipe.rpush(key, *lines)
+            self._trim_conversation(pipe, key)
+        if batch:
+            pipe.zadd(self._key("contexts"), {room_name: time.time() for room_name in batch})
+        await pipe.execute()
+
+    async def get_summary(self, room_name: str) -> Optional[str]:
+        return await self.client.get(self._key("summary", room_name))
+
+    async def set_summary(self, room_name: str, summary: str):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._key("summary", room_name), summary)
+        self._touch_context(pipe, room_name)
+        await pipe.execute()
+
+    async def get_checkpoint(self, room_name: str) -> Optional[Dict]:
+        raw = await self.client.get(self._key("checkpoint", room_name))
+        return json.loads(raw) if raw else None
+
+    async def set_checkpoint(self, room_name: str, checkpoint: Dict):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._key("checkpoint", room_name), json.dumps(checkpoint))
+        self._touch_context(pipe, room_name)
+        await pipe.execute()
+
+    async def stale_contexts(self, older_than: float) -> List[str]:
+        return await self.client.zrangebyscore(self._key("contexts"), "-inf", older_than)
+
+    async def delete_context(self, room_name: str):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrem(self._key("contexts"), room_name)
+        pipe.delete(
+            self._key("conversation", room_name),
+            self._key("summary", room_name),
+            self._key("checkpoint", room_name),
+        )
+        await pipe.execute()
+
+    async def get_transfer(self, transfer_id: str) -> Optional[Dict]:
+        raw = await self.client.get(self._key("transfer", transfer_id))
+        return json.loads(raw) if raw else None
+
+    async def save_transfer(self, transfer_id: str, record: Dict):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._key("transfer", transfer_id), json.dumps(record))
+        pipe.sadd(self._key("transfers"), transfer_id)
+        await pipe.execute()
+
+    async def list_transfers(self) -> Dict[str, Dict]:
+        transfer_ids = sorted(await self.client.smembers(self._key("transfers")))
+        if not transfer_ids:
+            return {}
+        values = await self.client.mget([self._key("transfer", transfer_id) for transfer_id in transfer_ids])
+        return {
+            transfer_id: json.loads(raw)
+            for transfer_id, raw in zip(transfer_ids, values)
+            if raw
+        }
+
+    async def delete_transfer(self, transfer_id: str):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(self._key("transfer", transfer_id))
+        pipe.srem(self._key("transfers"), transfer_id)
+        await pipe.execute()
+
+    async def counts(self) -> Dict:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zcard(self._key("room_index"))
+        pipe.zcard(self._key("contexts"))
+        pipe.scard(self._key("transfers"))
+        rooms, contexts, transfers = await pipe.execute()
+        return {"rooms": rooms, "conversations": contexts, "transfers": transfers}
+
+    async def usage(self) -> Dict:
+        counts = await self.counts()
+        try:
+            # Whole-database figure: other tenants of the same Redis are included
+            approx_bytes = (await self.client.info("memory")).get("used_memory")
+        except Exception:
+            approx_bytes = None
+        return {**counts, "approx_bytes": approx_bytes}
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_state_store(max_conversation_messages: int = 0) -> StateStore:
+    """Build the store selected by STATE_STORE ("memory" or "redis")"""
+    backend = os.getenv("STATE_STORE", "memory")
+    if backend == "redis":
+        return RedisStateStore(
+            url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            key_prefix=os.getenv("REDIS_KEY_PREFIX", "warm_transfer:"),
+            max_conversation_messages=max_conversation_messages,
+        )
+    if backend != "memory":
+        raise ValueError(f"Unknown STATE_STORE backend: {backend}")
+    return InMemoryStateStore(max_conversation_messages=max_conversation_messages)
@@ -0,0 +1,242 @@
+"""
+Batch Summaries
+Bounded, rate-limited bulk summarization that packs short conversations into one prompt
+"""
+
+import asyncio
+import contextlib
+import json
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from admission import AdmissionController
+from metrics import registry
+from provider_router import AllProvidersFailed, ProviderRouter
+from rate_limit import TokenBucket
+from summary_cache import SummaryCache, summary_fingerprint
+
+
+class BatchItem:
+    def __init__(self, index: int, room_name: str, history: List[str], window: int):
+        self.index = index
+        self.room_name = room_name
+        self.window = history[-window:]
+        self.fingerprint = summary_fingerprint(room_name, self.window)
+        self.size = sum(len(line) for line in self.window)
+
+
+class BatchSummarizer:
+    """
+    Summarizes many conversations with bounded concurrency.
+
+    Conversations whose window is at most pack_max_chars are packed up to
+    pack_size per provider request and answered as one JSON object keyed by
+    call number; anything missing or unparsable in that answer is retried
+    as a single-conversation request. Every provider attempt passes the
+    provider's token bucket, so a nightly job can't exhaust the quota that
+    live transfers depend on. With an AdmissionController each provider
+    request (a pack and its retries, or a single) also holds one of the
+    shared LLM slots under admission_route, so live work is granted slots
+    first. Results are yielded as each one completes.
+    """
+
+    def __init__(self,
+                 router: ProviderRouter,
+                 cache: SummaryCache,
+                 system_prompt: str,
+                 build_prompt: Callable[[List[str]], str],
+                 fallback: Callable[[List[str]], str],
+                 window: int = 10,
+                 concurrency: int = 4,
+                 pack_size: int = 5,
+                 pack_max_chars: int = 1500,
+                 limiters: Optional[Dict[str, TokenBucket]] = None,
+                 admission: Optional[AdmissionController] = None,
+                 admission_route: str = "batch"):
+        self.router = router
+        self.cache = cache
+        self.system_prompt = system_prompt
+        self.build_prompt = build_prompt
+        self.fallback = fallback
+        self.window = window
+        self.concurrency = concurrency
+        self.pack_size = pack_size
+        self.pack_max_chars = pack_max_chars
+        self.limiters = limiters or {}
+        self.admission = admission
+        self.admission_route = admission_route
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+        self._items = registry.counter("summary_batch_items_total", "Conversations submitted to batch summarization")
+        self._requests = registry.counter("summary_batch_provider_requests_total", "Provider requests made by batch summarization")
+        self._packed = registry.counter("summary_batch_packed_items_total", "Conversations answered by a packed request")
+        self._unpacked = registry.counter("summary_batch_pack_misses_total", "Packed conversations retried individually")
+
+    def _packed_prompt(self, items: List[BatchItem]) -> str:
+        calls = "\n\n".join(
+            f"Call {number}:\n" + "\n".join(item.window) for number, item in enumerate(items, 1)
+        )
+        return f"""
+    Generate a concise call summary for a warm transfer for each of the {len(items)} calls below.
+    Include key points, customer needs, and current status.
+
+    {calls}
+
+    Each summary should be:
+    - 2-3 sentences maximum
+    - Focus on customer needs and current situation
+    - Include any important details for the receiving agent
+
+    Respond with only a JSON object mapping each call number to its summary, for example
+    {{"1": "...", "2": "..."}}
+    """
+
+    @staticmethod
+    def _parse_packed(text: str, count: int) -> Dict[int, str]:
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end <= start:
+            return {}
+        try:
+            parsed = json.loads(text[start:end + 1])
+        except ValueError:
+            return {}
+        if not isinstance(parsed, dict):
+            return {}
+        summaries = {}
+        for number in range(1, count + 1):
+            value = parsed.get(str(number))
+            if isinstance(value, str) and value.strip():
+                summaries[number] = value.strip()
+        return summaries
+
+    def _result(self, item: BatchItem, summary: str, provider: str, **extra) -> Dict:
+        return {
+            "type": "result",
+            "index": item.index,
+            "room_name": item.room_name,
+            "summary": summary,
+            "provider": provider,
+            **extra,
+        }
+
+    async def _summarize_one(self, item: BatchItem, counts: Dict) -> Dict:
+        self._requests.inc()
+        counts["provider_requests"] += 1
+        try:
+            summary, provider = await self.router.complete(
+                self.build_prompt(item.window),
+                system_prompt=self.system_prompt,
+                limiters=self.limiters,
+            )
+        except AllProvidersFailed as e:
+            return self._result(item, self.fallback(item.window), "fallback", error=str(e))
+        self.cache.put(item.fingerprint, summary)
+        return self._result(item, summary, provider)
+
+    async def _summarize_pack(self, items: List[BatchItem], emit: Callable[[Dict], None], counts: Dict):
+        self._requests.inc()
+        counts["provider_requests"] += 1
+        try:
+            text, provider = await self.router.complete(
+                self._packed_prompt(items),
+                system_prompt=self.system_prompt,
+                max_tokens=150 * len(items),
+                limiters=self.limiters,
+            )
+            summaries = self._parse_packed(text, len(items))
+        except AllProvidersFailed:
+            summaries, provider = {}, None
+
+        leftovers = []
+        for number, item in enumerate(items, 1):
+            if number in summaries:
+                self._packed.inc()
+                self.cache.put(item.fingerprint, summaries[number])
+                emit(self._result(item, summaries[number], provider, packed=len(items)))
+            else:
+                leftovers.append(item)
+        self._unpacked.inc(len(leftovers))
+        for item in leftovers:
+            emit(await self._summarize_one(item, counts))
+
+    def _admit(self):
+        if self.admission is None:
+            return contextlib.nullcontext()
+        return self.admission.admit(self.admission_route)
+
+    def _plan(self, items: List[BatchItem]) -> List[List[BatchItem]]:
+        """Split items into provider requests: packs of short windows, singles for long ones"""
+        units, pack = [], []
+        for item in items:
+            if self.pack_size <= 1 or item.size > self.pack_max_chars:
+                units.append([item])
+                continue
+            pack.append(item)
+            if len(pack) == self.pack_size:
+                units.append(pack)
+                pack = []
+        if pack:
+            units.append(pack)
+        return units
+
+    async def run(self, conversations: List[Tuple[str, List[str]]]) -> AsyncIterator[Dict]:
+        """Yield one result per (room_name, history) in completion order, then a "done" record"""
+        started = time.perf_counter()
+        self._items.inc(len(conversations))
+        results: asyncio.Queue = asyncio.Queue()
+        emitted = set()
+        counts = {"provider_requests": 0}
+        pending = []
+
+        def emit(result: Dict):
+            emitted.add(result["index"])
+            results.put_nowait(result)
+
+        for index, (room_name, history) in enumerate(conversations):
+            item = BatchItem(index, room_name, history, self.window)
+            cached = self.cache.get(item.fingerprint)
+            if cached is not None:
+                emit(self._result(item, cached, "cache"))
+            else:
+                pending.append(item)
+
+        async def run_unit(unit: List[BatchItem]):
+            try:
+                async with self._semaphore, self._admit():
+                    if len(unit) == 1:
+                        emit(await self._summarize_one(unit[0], counts))
+                    else:
+                        await self._summarize_pack(unit, emit, counts)
+            except Exception as e:
+                # Every item must produce a line, or the stream would never finish
+                for item in unit:
+                    if item.index not in emitted:
+                        emit({"type": "error", "index": item.index, "room_name": item.room_name, "error": str(e)})
+
+        units = self._plan(pending)
+        tasks = [asyncio.create_task(run_unit(unit)) for unit in units]
+        try:
+            for _ in range(len(conversations)):
+                yield await results.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield {
+            "type": "done",
+            "count": len(conversations),
+            "provider_requests": counts["provider_requests"],
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "pack_size": self.pack_size,
+            "pack_max_chars": self.pack_max_chars,
+            "items": int(self._items.value),
+            "provider_requests": int(self._requests.value),
+            "packed_items": int(self._packed.value),
+            "pack_misses": int(self._unpacked.value),
+            "rate_limits": {name: limiter.stats() for name, limiter in self.limiters.items()},
+        }
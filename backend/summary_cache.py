@@ -0,0 +1,136 @@
+"""
+Call Summary Cache
+LRU/TTL cache for generated summaries with single-flight request coalescing
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import registry
+
+
+def summary_fingerprint(room_name: str, window: List[str]) -> str:
+    """Hash of the room name and the exact message window the prompt is built from"""
+    digest = hashlib.sha256(room_name.encode("utf-8"))
+    for line in window:
+        digest.update(b"\x00")
+        digest.update(line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """
+    Bounded LRU cache with per-entry TTL.
+
+    get_or_compute() also deduplicates concurrent misses: while a summary is
+    being generated for a fingerprint, every caller asking for the same
+    fingerprint awaits that one generation instead of starting another
+    upstream LLM call. The generation runs in its own task, so a caller that
+    is cancelled (a client disconnecting) only stops waiting; the others
+    still get the result, and it is cached for the next request.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self._hits = registry.counter("summary_cache_hits_total", "Summary cache hits")
+        self._misses = registry.counter("summary_cache_misses_total", "Summary cache misses")
+        self._coalesced = registry.counter(
+            "summary_cache_coalesced_total", "Requests that joined an in-flight summary generation"
+        )
+        self._evictions = registry.counter("summary_cache_evictions_total", "Summary cache evictions")
+        self._size = registry.gauge("summary_cache_entries", "Entries held by the summary cache")
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._size.set(len(self._entries))
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions.inc()
+        self._size.set(len(self._entries))
+
+    def invalidate(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self._size.set(len(self._entries))
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry; returns how many were removed"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at < now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._size.set(len(self._entries))
+        return len(expired)
+
+    async def get_or_compute(self,
+                             key: str,
+                             factory: Callable[[], Awaitable[Tuple[str, bool]]]) -> str:
+        """
+        Return the cached value for key, computing it at most once concurrently
+
+        Args:
+            key: Conversation fingerprint
+            factory: Coroutine factory returning (value, cacheable). Values marked
+                not cacheable (e.g. hardcoded fallbacks) are shared with waiting
+                callers but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            self._hits.inc()
+            return value
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self._coalesced.inc()
+            return await asyncio.shield(pending)
+
+        self._misses.inc()
+        task = asyncio.create_task(self._compute(key, factory))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._computed(key, done))
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, factory: Callable[[], Awaitable[Tuple[str, bool]]]) -> str:
+        value, cacheable = await factory()
+        if cacheable:
+            self.put(key, value)
+        return value
+
+    def _computed(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody waited for doesn't log a warning
+            task.exception()
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "in_flight": len(self._in_flight),
+            "hits": int(self._hits.value),
+            "misses": int(self._misses.value),
+            "coalesced": int(self._coalesced.value),
+        }
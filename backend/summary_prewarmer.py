@@ -0,0 +1,165 @@
+"""
+Summary Pre-warming
+Debounced background refresh of room summaries so transfers never wait on the LLM
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryPrewarmer:
+    """
+    Keeps a precomputed summary per room.
+
+    notify_changed() is called whenever a room's conversation changes. After
+    debounce_seconds without further changes a background task regenerates
+    the summary, so a burst of new lines costs one refresh. A room that keeps
+    changing is still refreshed max_delay_seconds after its first unsummarized
+    change. Every change bumps the room's version; a served summary whose
+    version is older than the room's current version is reported as stale.
+    """
+
+    def __init__(self,
+                 refresh: Callable[[str], Awaitable[str]],
+                 debounce_seconds: float = 2.0,
+                 max_delay_seconds: float = 10.0):
+        self._refresh = refresh
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max(debounce_seconds, max_delay_seconds)
+        self._versions: Dict[str, int] = {}
+        # Monotonic times of the first and the latest change not yet being summarized
+        self._first_change: Dict[str, float] = {}
+        self._last_change: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        self._hits = registry.counter("summary_prewarm_hits_total", "Transfers served a precomputed summary")
+        self._misses = registry.counter("summary_prewarm_misses_total", "Transfers that had to wait for a summary")
+        self._stale = registry.counter("summary_prewarm_stale_total", "Precomputed summaries served while stale")
+        self._refreshes = registry.counter("summary_prewarm_refreshes_total", "Background summary refreshes")
+        self._failures = registry.counter("summary_prewarm_failures_total", "Background summary refreshes that failed")
+        self._served_age = registry.histogram(
+            "summary_prewarm_served_age_seconds", "Age of precomputed summaries when served",
+            buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+        )
+
+    def notify_changed(self, room_name: str):
+        """Record a conversation change and arm the debounced refresh"""
+        self._versions[room_name] = self._versions.get(room_name, 0) + 1
+        now = time.monotonic()
+        self._first_change.setdefault(room_name, now)
+        self._last_change[room_name] = now
+
+        # A waiting task picks up the later deadline and a running refresh
+        # notices the newer version when it finishes, so neither is restarted
+        task = self._tasks.get(room_name)
+        if task is None or task.done():
+            self._tasks[room_name] = asyncio.create_task(self._refresh_when_due(room_name))
+
+    def record(self, room_name: str, summary: str, version: Optional[int] = None):
+        """Store a summary computed elsewhere (e.g. on a pre-warm miss)"""
+        if version is None:
+            version = self._versions.get(room_name, 0)
+        current = self._summaries.get(room_name)
+        if current is not None and current["version"] > version:
+            return
+        self._summaries[room_name] = {
+            "summary": summary,
+            "version": version,
+            "generated_at": time.monotonic(),
+        }
+
+    def version(self, room_name: str) -> int:
+        return self._versions.get(room_name, 0)
+
+    def get(self, room_name: str) -> Optional[Dict]:
+        """
+        Return the freshest precomputed summary for a room
+
+        Returns:
+            {"summary", "stale", "age_seconds"} or None on a miss
+        """
+        entry = self._summaries.get(room_name)
+        if entry is None:
+            self._misses.inc()
+            return None
+
+        age = time.monotonic() - entry["generated_at"]
+        stale = entry["version"] < self._versions.get(room_name, 0)
+        self._hits.inc()
+        self._served_age.observe(age)
+        if stale:
+            self._stale.inc()
+
+        return {"summary": entry["summary"], "stale": stale, "age_seconds": round(age, 3)}
+
+    def forget(self, room_name: str):
+        """Drop all state for a room"""
+        task = self._tasks.pop(room_name, None)
+        if task is not None and not task.done():
+            task.cancel()
+        self._versions.pop(room_name, None)
+        self._summaries.pop(room_name, None)
+        self._first_change.pop(room_name, None)
+        self._last_change.pop(room_name, None)
+
+    def _due(self, room_name: str) -> float:
+        """A quiet debounce after the latest change, but no later than max_delay after the first"""
+        return min(self._last_change[room_name] + self.debounce_seconds,
+                   self._first_change[room_name] + self.max_delay_seconds)
+
+    async def _refresh_when_due(self, room_name: str):
+        try:
+            while True:
+                delay = self._due(room_name) - time.monotonic()
+                while delay > 0:
+                    await asyncio.sleep(delay)
+                    delay = self._due(room_name) - time.monotonic()
+
+                version = self._versions.get(room_name, 0)
+                # Changes from here on wait for the next refresh
+                del self._first_change[room_name]
+                try:
+                    summary = await self._refresh(room_name)
+                except Exception as e:
+                    self._failures.inc()
+                    logger.warning("Summary pre-warm failed", extra={"room_name": room_name, "error": str(e)})
+                    return
+
+                self._refreshes.inc()
+                self.record(room_name, summary, version)
+                if room_name not in self._first_change:
+                    return
+                # More lines arrived while the LLM was running
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if self._tasks.get(room_name) is asyncio.current_task():
+                del self._tasks[room_name]
+
+    async def shutdown(self):
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> Dict:
+        hits = self._hits.value
+        misses = self._misses.value
+        return {
+            "rooms": len(self._summaries),
+            "pending_refreshes": sum(1 for task in self._tasks.values() if not task.done()),
+            "hits": int(hits),
+            "misses": int(misses),
+            "stale_served": int(self._stale.value),
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+            "served_age_p50_seconds": self._served_age.quantile(0.50),
+            "served_age_p95_seconds": self._served_age.quantile(0.95),
+        }
@@ -0,0 +1,29 @@
+"""
+Shared test setup: backend modules import each other as siblings, so backend/ goes on sys.path
+
+There is no pytest-asyncio here; async code is driven with asyncio.run() inside plain tests.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def backend_main():
+    """backend/main.py imported offline: dummy LiveKit credentials and the fake LLM provider"""
+    os.environ.setdefault("LIVEKIT_URL", "http://127.0.0.1:7880")
+    os.environ.setdefault("LIVEKIT_API_KEY", "test-api-key")
+    os.environ.setdefault("LIVEKIT_API_SECRET", "test-api-secret-test-api-secret-0000")
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    os.environ["LLM_FAKE_PROVIDER"] = "1"
+    os.environ["LLM_FAKE_FIRST_TOKEN_SECONDS"] = "0"
+    os.environ["LLM_FAKE_TOKEN_SECONDS"] = "0"
+    import main
+    return main
@@ -0,0 +1,208 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from admission import AdmissionController, AdmissionRejected, RoutePolicy, tenant_key
+
+
+def controller(slots: int = 1, summary_budget=5.0, transfer_budget=5.0, test_concurrency: int = 1, **kwargs):
+    return AdmissionController(slots, [
+        RoutePolicy("transfer", 0, max_concurrency=slots, latency_budget=transfer_budget),
+        RoutePolicy("summary", 1, max_concurrency=slots, latency_budget=summary_budget),
+        RoutePolicy("test", 2, max_concurrency=test_concurrency, latency_budget=5.0),
+        RoutePolicy("prewarm", 3, max_concurrency=slots, latency_budget=None),
+    ], **kwargs)
+
+
+async def hold(admission: AdmissionController, route: str, release: asyncio.Event, granted: list):
+    async with admission.admit(route):
+        granted.append(route)
+        await release.wait()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_transfer_is_granted_before_ad_hoc_summaries_queued_earlier():
+    async def scenario():
+        admission = controller(slots=1)
+        granted = []
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "prewarm", release, granted))
+        await settle()
+
+        done = asyncio.Event()
+        waiters = [asyncio.create_task(hold(admission, route, done, granted))
+                   for route in ("prewarm", "summary", "summary", "transfer")]
+        await settle()
+        assert admission.routes["transfer"].queued == 1
+        release.set()
+        done.set()
+        await asyncio.gather(holder, *waiters)
+        return granted
+
+    assert asyncio.run(scenario()) == ["prewarm", "transfer", "summary", "summary", "prewarm"]
+
+
+def test_overload_sheds_ad_hoc_on_arrival_but_queues_the_transfer():
+    async def scenario():
+        admission = controller(slots=1, summary_budget=0.05, transfer_budget=1.0)
+        async with admission.admit("summary"):
+            await asyncio.sleep(0.1)
+        assert admission.ewma_hold >= 0.1
+
+        granted = []
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "summary", release, granted))
+        await settle()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.admit("summary"):
+                pass
+        transfer = asyncio.create_task(hold(admission, "transfer", asyncio.Event(), granted))
+        await settle()
+        release.set()
+        await holder
+        await settle()
+        transfer.cancel()
+        await asyncio.gather(transfer, return_exceptions=True)
+        return rejected.value, granted, admission.stats()
+
+    rejected, granted, stats = asyncio.run(scenario())
+    assert (rejected.route, rejected.reason) == ("summary", "predicted_wait")
+    assert rejected.headers() == {"Retry-After": "1"}
+    assert granted == ["summary", "transfer"]
+    assert stats["slots_in_use"] == 0
+
+
+def test_request_is_shed_once_it_waited_its_whole_budget():
+    async def scenario():
+        admission = controller(slots=1, summary_budget=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "prewarm", release, []))
+        await settle()
+        try:
+            async with admission.admit("summary"):
+                pass
+        finally:
+            release.set()
+            await holder
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        asyncio.run(scenario())
+    assert rejected.value.reason == "timeout"
+
+
+def test_route_at_its_limit_does_not_block_routes_behind_it():
+    async def scenario():
+        admission = controller(slots=2, test_concurrency=1)
+        granted = []
+        release, done = asyncio.Event(), asyncio.Event()
+        first_test = asyncio.create_task(hold(admission, "test", release, granted))
+        await settle()
+        waiters = [asyncio.create_task(hold(admission, route, done, granted)) for route in ("test", "prewarm")]
+        await settle()
+        # The second test request waits for its route; prewarm takes the free slot
+        assert granted == ["test", "prewarm"]
+        release.set()
+        done.set()
+        await asyncio.gather(first_test, *waiters)
+        return granted
+
+    assert asyncio.run(scenario()) == ["test", "prewarm", "test"]
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        admission = controller(slots=1)
+        granted = []
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "prewarm", release, granted))
+        await settle()
+        cancelled = asyncio.create_task(hold(admission, "transfer", asyncio.Event(), granted))
+        after = asyncio.create_task(hold(admission, "summary", asyncio.Event(), granted))
+        await settle()
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert admission.routes["transfer"].queued == 0
+
+        release.set()
+        await holder
+        await settle()
+        after.cancel()
+        await asyncio.gather(after, return_exceptions=True)
+        return granted, admission.in_flight
+
+    assert asyncio.run(scenario()) == (["prewarm", "summary"], 0)
+
+
+def test_tenant_bucket_rejects_past_its_burst():
+    admission = controller(tenant_rate=0.001, tenant_burst=2)
+    admission.check_tenant("acme")
+    admission.check_tenant("acme")
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.check_tenant("acme")
+    assert rejected.value.reason == "tenant_rate"
+    admission.check_tenant("globex")
+    # No tenant means no limit
+    for _ in range(5):
+        admission.check_tenant("")
+
+
+def test_tenant_limit_disabled_by_default_and_tracking_bounded():
+    unlimited = controller()
+    for _ in range(100):
+        unlimited.check_tenant("acme")
+
+    bounded = controller(tenant_rate=1, tenant_burst=1, max_tenants=3)
+    for tenant in ("a", "b", "c", "d"):
+        bounded.check_tenant(tenant)
+    assert bounded.stats()["tenants"]["tracked"] == 3
+
+
+def test_tenant_key():
+    assert tenant_key("acme-call-42") == "acme"
+    assert tenant_key("acme_call", "_") == "acme"
+    assert tenant_key("acme-call-42", "") == "acme-call-42"
+
+
+def test_backend_only_rate_limits_tenants_named_by_header(backend_main):
+    assert backend_main.admission.tenant_rate == 0
+    assert backend_main._tenant("acme-call-42") == ""
+    assert backend_main._tenant("acme-call-42", "acme") == "acme"
+
+
+@pytest.fixture
+def tenant_limited(backend_main):
+    """One request per tenant, no refill, for the duration of a test"""
+    admission = backend_main.admission
+    saved = admission.tenant_rate, admission.tenant_burst
+    admission.tenant_rate, admission.tenant_burst = 1e-9, 1
+    admission._tenants.clear()
+    yield backend_main
+    admission.tenant_rate, admission.tenant_burst = saved
+    admission._tenants.clear()
+
+
+def test_batch_summaries_are_rate_limited_per_tenant(tenant_limited):
+    request = tenant_limited.BatchSummaryRequest(items=[
+        {"room_name": "batch-tenant-room", "conversation_history": ["Caller: hi"]},
+    ])
+    asyncio.run(tenant_limited.generate_summary_batch(request, x_tenant_id="acme"))
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(tenant_limited.generate_summary_batch(request, x_tenant_id="acme"))
+    assert rejected.value.status_code == 429
+    assert "Retry-After" in rejected.value.headers
+
+
+def test_transfer_summaries_count_against_the_header_tenant(tenant_limited):
+    def summarize(caller_room, tenant):
+        return asyncio.run(tenant_limited._transfer_summary({"caller_room": caller_room, "tenant": tenant}))
+
+    assert not summarize("tenant-transfer-1", "acme")["degraded"]
+    # Over the limit the transfer still gets a summary, just an extractive one
+    assert summarize("tenant-transfer-2", "acme")["degraded"]
+    assert not summarize("tenant-transfer-3", "")["degraded"]
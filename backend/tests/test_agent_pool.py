@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import pytest
+
+from agent_pool import OFFLINE, AgentPool
+
+
+def pool_of(*agents, **kwargs) -> AgentPool:
+    pool = AgentPool(**kwargs)
+    for agent_id, skills, capacity in agents:
+        pool.register(agent_id, f"{agent_id}-room", skills, capacity)
+    return pool
+
+
+def test_best_agent_needs_every_required_skill():
+    pool = pool_of(("billing", ["billing"], 1), ("bilingual", ["billing", "spanish"], 1))
+
+    assert pool.best(["spanish"]).agent_id == "bilingual"
+    assert pool.best(["billing", "spanish"]).agent_id == "bilingual"
+    assert pool.best(["french"]) is None
+
+
+def test_least_loaded_prefers_spare_capacity_then_idle_time():
+    pool = pool_of(("a", [], 2), ("b", [], 2), ("c", [], 2))
+    assert pool.reserve("t1").agent_id == "a"
+    # a is half busy now; b and c are idle, b the longer
+    assert pool.reserve("t2").agent_id == "b"
+    assert pool.reserve("t3").agent_id == "c"
+    pool.release("t2")
+    assert pool.best().agent_id == "b"
+
+
+def test_longest_idle_ignores_load():
+    pool = pool_of(("a", [], 3), ("b", [], 1), strategy="longest_idle")
+    pool.reserve("t1")
+    assert pool.best().agent_id == "b"
+
+
+def test_reservation_lifecycle_counts_against_capacity():
+    pool = pool_of(("a", [], 1))
+    agent = pool.reserve("t1")
+    assert pool.reserve("t2") is None
+
+    pool.confirm("t1")
+    assert agent.load == 1 and not agent.reservations
+    assert pool.best() is None
+
+    pool.call_ended("a")
+    assert pool.reserve("t3").agent_id == "a"
+    pool.release("t3")
+    stats = pool.stats()
+    assert stats["available"] == 1 and stats["reservations"] == 0
+
+
+def test_offline_agents_and_forgotten_rooms_are_skipped():
+    pool = pool_of(("a", [], 1), ("b", [], 1))
+    pool.set_status("a", OFFLINE)
+    pool.forget_room("b-room")
+    assert pool.best() is None
+    pool.set_status("a", "available")
+    assert pool.best().agent_id == "a"
+    with pytest.raises(ValueError):
+        pool.set_status("a", "busy")
+
+
+def test_claim_counts_explicit_transfers_even_past_capacity():
+    pool = pool_of(("a", [], 1))
+    pool.reserve("t1")
+    agent = pool.claim("a-room", "t2")
+    assert agent.agent_id == "a" and agent.busy == 2
+    assert pool.claim("unknown-room", "t3") is None
+
+
+def test_remove_drops_agent_and_its_reservations():
+    pool = pool_of(("a", [], 1), ("b", [], 1))
+    pool.reserve("t1")
+    assert pool.remove("a")
+    assert pool.confirm("t1") is None
+    assert pool.best().agent_id == "b"
+    assert not pool.remove("a")
+
+
+def test_expired_reservation_goes_back_into_rotation():
+    pool = pool_of(("a", [], 1), reservation_ttl_seconds=0.01)
+    pool.reserve("t1")
+    time.sleep(0.02)
+    assert pool.reserve("t2").agent_id == "a"
+    assert pool.confirm("t1") is None
+    assert pool.stats()["settled"]["expired"] >= 1
+
+
+def test_acquire_waits_in_arrival_order():
+    async def scenario():
+        pool = pool_of(("a", [], 1))
+        pool.reserve("t0")
+        first = asyncio.create_task(pool.acquire("t1", timeout=5))
+        second = asyncio.create_task(pool.acquire("t2", timeout=5))
+        await asyncio.sleep(0.01)
+        assert pool.stats()["waiting"] == 2
+
+        pool.release("t0")
+        agent = await first
+        assert not second.done()
+        pool.release("t1")
+        return agent, await second
+
+    first, second = asyncio.run(scenario())
+    assert first.agent_id == second.agent_id == "a"
+
+
+def test_acquire_is_served_when_a_reservation_expires():
+    async def scenario():
+        pool = pool_of(("a", [], 1), reservation_ttl_seconds=0.05)
+        pool.reserve("stuck")
+        started = time.monotonic()
+        agent = await pool.acquire("t1", timeout=2)
+        return agent, time.monotonic() - started, pool
+
+    agent, waited, pool = asyncio.run(scenario())
+    assert agent is not None and agent.agent_id == "a"
+    assert waited < 1
+    assert pool.stats()["waiting"] == 0
+
+
+def test_acquire_times_out_and_cancels_cleanly():
+    async def scenario():
+        pool = pool_of(("a", [], 1))
+        pool.reserve("t0")
+        assert await pool.acquire("t1", timeout=0.02) is None
+
+        waiter = asyncio.create_task(pool.acquire("t2", timeout=5))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        pool.release("t0")
+        return pool.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["waiting"] == 0
+    assert stats["reservations"] == 0
+    assert stats["available"] == 1
+
+
+def test_many_agents_agree_with_a_scan():
+    pool = AgentPool()
+    for i in range(300):
+        pool.register(f"agent{i}", f"room{i}", [f"skill{i % 7}", f"skill{i % 5}"], capacity=1 + i % 3)
+    for i in range(400):
+        required = [f"skill{i % 7}"]
+        expected = min((agent for agent in pool._agents.values()
+                        if agent.selectable() and frozenset(required) <= agent.skills),
+                       key=pool._key, default=None)
+        actual = pool.reserve(f"t{i}", required)
+        if expected is None:
+            assert actual is None
+        else:
+            assert pool._key(actual) == pool._key(expected)
+        if actual is not None and i % 2:
+            pool.confirm(f"t{i}")
+            pool.call_ended(actual.agent_id)
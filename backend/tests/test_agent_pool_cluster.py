@@ -0,0 +1,148 @@
+"""Agent pool behind the gateway with two real worker processes"""
+
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+import pytest
+
+from cluster import AGENT_POOL_KEY, HashRing
+from conftest import BACKEND_DIR
+
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+from stubs import StubLiveKitServer, serve_in_thread  # noqa: E402
+
+WORKERS = 2
+
+
+def free_ports(count: int) -> int:
+    """First of `count` consecutive free ports"""
+    while True:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            base = sock.getsockname()[1]
+        try:
+            for port in range(base, base + count):
+                with socket.socket() as sock:
+                    sock.bind(("127.0.0.1", port))
+            return base
+        except OSError:
+            continue
+
+
+def rooms_off_the_pool_worker(count: int):
+    """Room names owned by the worker that does not hold the agent pool"""
+    ring = HashRing(WORKERS)
+    pool_worker = ring.owner(AGENT_POOL_KEY)
+    names = (f"pool-test-{i}" for i in range(1000))
+    return [name for name in names if ring.owner(name) != pool_worker][:count]
+
+
+@pytest.fixture(scope="module")
+def cluster_url():
+    livekit = StubLiveKitServer(latency=0)
+    loop = serve_in_thread(livekit)
+    port = free_ports(1 + WORKERS)
+    env = {
+        **os.environ,
+        "LIVEKIT_URL": livekit.url,
+        "LIVEKIT_API_KEY": "test-api-key",
+        "LIVEKIT_API_SECRET": "test-api-secret-test-api-secret-0000",
+        "LLM_FAKE_PROVIDER": "1",
+        "LLM_FAKE_FIRST_TOKEN_SECONDS": "0",
+        "LLM_FAKE_TOKEN_SECONDS": "0",
+        "LOG_LEVEL": "ERROR",
+        "STATE_STORE": "memory",
+        "CLUSTER_ALLOW_MEMORY_STORE": "1",
+        # The caller is moved into the agent's room straight away, so leaving it ends the agent's call
+        "TRANSFER_MOVE_CALLER": "1",
+        "TRANSFER_REQUIRE_BRIEF_ACK": "0",
+        "WORKERS": str(WORKERS),
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "CLUSTER_BASE_PORT": str(port + 1),
+    }
+    # Own process group, so the workers go down with the gateway even if it is stopped mid-startup
+    server = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "main.py")], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(wait_ready(url))
+        yield url
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+        asyncio.run_coroutine_threadsafe(livekit.stop(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+async def wait_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{url}/api/agents/stats") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Cluster at {url} did not become ready")
+
+
+async def active_calls(session: aiohttp.ClientSession, url: str, expected: int, timeout: float = 10) -> int:
+    """Poll the pool until the agent has `expected` active calls (pool updates between workers are async)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        async with session.get(f"{url}/api/agents") as response:
+            calls = (await response.json())["agents"][0]["active_calls"]
+        if calls == expected or time.monotonic() > deadline:
+            return calls
+        await asyncio.sleep(0.05)
+
+
+def test_transfer_on_another_worker_reserves_and_frees_the_shared_pool(cluster_url):
+    call_room, agent_room = rooms_off_the_pool_worker(2)
+
+    async def scenario():
+        async with aiohttp.ClientSession() as session:
+            async def post(path, **kwargs):
+                async with session.post(f"{cluster_url}{path}", **kwargs) as response:
+                    return response.status, await response.json()
+
+            status, _ = await post("/api/agents", json={"agent_id": "bob", "room_name": agent_room, "capacity": 1})
+            assert status == 200
+            # Round-robin would have sent some of these to the worker without the agent
+            for _ in range(4):
+                async with session.get(f"{cluster_url}/api/agents/best") as response:
+                    assert response.status == 200
+
+            for room_name, participant in ((call_room, "caller"), (call_room, "agent_a"), (agent_room, "agent_b")):
+                status, _ = await post("/api/rooms/create", json={"room_name": room_name, "participant_type": participant})
+                assert status == 200
+
+            status, transfer = await post("/api/transfer/initiate", json={"from_room": call_room, "caller_room": call_room})
+            assert status == 200, transfer
+            assert (transfer["agent_id"], transfer["to_room"]) == ("bob", agent_room)
+            assert await active_calls(session, cluster_url, 1) == 1
+
+            # The only agent is busy, so a second transfer finds nobody
+            status, _ = await post("/api/transfer/initiate", json={"from_room": call_room, "caller_room": call_room})
+            assert status == 503
+
+            async with session.get(f"{cluster_url}/api/rooms/{agent_room}") as response:
+                participants = (await response.json())["room"]["participants"]
+            caller = next(p for p in participants if p.startswith("caller"))
+            status, _ = await post(f"/api/rooms/{agent_room}/leave", params={"participant_type": caller})
+            assert status == 200
+            assert await active_calls(session, cluster_url, 0) == 0
+
+            async with session.post(f"{cluster_url}/api/cluster/agent-pool", json={"op": "release"}) as response:
+                assert response.status == 404
+
+    asyncio.run(scenario())
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import socket
+
+import aiohttp
+import pytest
+
+import cluster
+from cluster import AGENT_POOL_KEY, ClusterGateway, HashRing, routing_room, run_cluster
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def proxy(gateway: ClusterGateway, path: str, body: bytes = b"", session=None):
+    """Send one request through the gateway; returns the ASGI messages it sent and what it raised"""
+    scope = {"type": "http", "method": "POST", "path": path, "raw_path": path.encode(),
+             "query_string": b"", "headers": [(b"content-type", b"application/json")], "client": ("127.0.0.1", 1)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await gateway.start()
+    if session is not None:
+        await gateway._session.close()
+        gateway._session = session
+    try:
+        await gateway(scope, receive, send)
+        error = None
+    except Exception as e:
+        error = e
+    finally:
+        await gateway.close()
+    return sent, error
+
+
+async def upstream_dying_mid_body():
+    """Worker that starts a chunked response, sends one chunk and drops the connection"""
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\ncontent-type: text/event-stream\r\ntransfer-encoding: chunked\r\n\r\n"
+                     b"7\r\ndata: 1\r\n")
+        await writer.drain()
+        writer.transport.abort()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def test_upstream_failure_after_response_start_aborts_instead_of_a_second_start():
+    async def scenario():
+        server = await upstream_dying_mid_body()
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await proxy(ClusterGateway([f"http://127.0.0.1:{port}"]), "/api/summary/stream")
+
+    sent, error = asyncio.run(scenario())
+    starts = [message for message in sent if message["type"] == "http.response.start"]
+    assert len(starts) == 1 and starts[0]["status"] == 200
+    assert isinstance(error, aiohttp.ClientError)
+    # The body was never ended as if it were complete
+    assert all(message.get("more_body") for message in sent if message["type"] == "http.response.body")
+
+
+class DisconnectingResponse:
+    """Upstream response whose connection drops after the first chunk"""
+
+    status = 200
+    raw_headers = [(b"Content-Type", b"text/event-stream")]
+
+    def __init__(self):
+        self.content = self
+
+    async def iter_any(self):
+        yield b"data: 1\n\n"
+        raise aiohttp.ServerDisconnectedError()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class DisconnectingSession:
+    def request(self, *args, **kwargs):
+        return DisconnectingResponse()
+
+    async def close(self):
+        pass
+
+
+def test_connection_error_after_response_start_is_not_answered_with_502():
+    gateway = ClusterGateway(["http://127.0.0.1:1"])
+    errors = gateway._errors.value
+
+    sent, error = asyncio.run(proxy(gateway, "/api/summary/stream", session=DisconnectingSession()))
+
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.body"]
+    assert sent[1] == {"type": "http.response.body", "body": b"data: 1\n\n", "more_body": True}
+    assert isinstance(error, aiohttp.ServerDisconnectedError)
+    assert gateway._errors.value == errors + 1
+
+
+def test_unreachable_worker_answers_502():
+    sent, error = asyncio.run(proxy(ClusterGateway([f"http://127.0.0.1:{free_port()}"]), "/api/health"))
+
+    assert error is None
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.body"]
+    assert sent[0]["status"] == 502
+
+
+def test_room_routes_are_sticky():
+    gateway = ClusterGateway([f"http://127.0.0.1:{9000 + i}" for i in range(4)])
+    owner = gateway.ring.owner("sales-42")
+    body = json.dumps({"room_name": "sales-42"}).encode()
+
+    assert routing_room("/api/rooms/create", b"", body) == "sales-42"
+    assert routing_room("/api/rooms/join", b"room_name=sales-42", b"") == "sales-42"
+    assert routing_room("/ws/sales-42", b"", b"") == "sales-42"
+    assert {gateway.pick_worker("/api/summary/stream", b"", body) for _ in range(5)} == {owner}
+    assert gateway.pick_worker("/api/transfer/abc@w3", b"", b"") == 3
+    assert gateway.pick_worker("/metrics", b"worker=2", b"") == 2
+    pool_worker = gateway.ring.owner(AGENT_POOL_KEY)
+    assert {gateway.pick_worker(path, b"", b"") for path in ("/api/agents", "/api/agents/stats", "/api/agents/bob")} == {pool_worker}
+
+
+@pytest.mark.parametrize("nodes", [2, 5])
+def test_hash_ring_moves_few_keys_when_growing(nodes):
+    keys = [f"room-{i}" for i in range(2000)]
+    before, after = HashRing(nodes), HashRing(nodes + 1)
+    moved = sum(before.owner(key) != after.owner(key) for key in keys)
+
+    assert moved < len(keys) * 2 / (nodes + 1)
+
+
+def test_cluster_refuses_to_start_on_the_in_memory_store(monkeypatch):
+    def no_processes(*args, **kwargs):
+        raise AssertionError("no process may be started")
+
+    monkeypatch.setattr(cluster.subprocess, "Popen", no_processes)
+    monkeypatch.delenv("STATE_STORE", raising=False)
+    monkeypatch.delenv("CLUSTER_ALLOW_MEMORY_STORE", raising=False)
+    with pytest.raises(ValueError, match="STATE_STORE=redis"):
+        run_cluster("main:app", workers=2, host="127.0.0.1", port=free_port(), base_port=free_port(), gateways=1)
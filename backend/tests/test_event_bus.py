@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+from fastapi import WebSocketDisconnect
+
+from event_bus import RESYNC, RoomEventBus
+
+
+def test_publish_fans_out_to_the_rooms_subscribers_only():
+    async def scenario():
+        bus = RoomEventBus()
+        first, second = bus.subscribe("room"), bus.subscribe("room")
+        other = bus.subscribe("other-room")
+        delivered = bus.publish("room", {"type": "joined"})
+        events = [json.loads(await subscription.get(timeout=1)) for subscription in (first, second)]
+        return delivered, events, await other.get(timeout=0.01)
+
+    delivered, events, other = asyncio.run(scenario())
+    assert delivered == 2
+    assert events == [{"room_name": "room", "type": "joined"}] * 2
+    assert other is None
+
+
+def test_full_queue_is_replaced_by_one_resync():
+    async def scenario():
+        bus = RoomEventBus(max_queue=2)
+        slow = bus.subscribe("room")
+        for i in range(3):
+            bus.publish("room", {"type": "update", "n": i})
+        first = await slow.get(timeout=1)
+        # Diffs published after the resync are still delivered
+        bus.publish("room", {"type": "update", "n": 3})
+        return first, json.loads(await slow.get(timeout=1)), slow, bus.stats()
+
+    first, after, slow, stats = asyncio.run(scenario())
+    assert first is RESYNC
+    assert after["n"] == 3
+    assert slow.resyncs == 1
+    assert stats["resyncs"] >= 1
+
+
+def test_unsubscribe_stops_delivery_and_is_idempotent():
+    bus = RoomEventBus()
+    subscription = bus.subscribe("room")
+    bus.unsubscribe(subscription)
+    bus.unsubscribe(subscription)
+
+    assert bus.publish("room", {"type": "joined"}) == 0
+    assert subscription.queue.empty()
+    assert bus.subscriber_count() == 0
+    assert bus.stats()["rooms_with_subscribers"] == 0
+
+
+class LeavingClient:
+    """WebSocket whose client disconnects once `leave` is set"""
+
+    def __init__(self):
+        self.leave = asyncio.Event()
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        self.sent.append(json.loads(payload))
+
+    async def receive_text(self) -> str:
+        await self.leave.wait()
+        raise WebSocketDisconnect(1000)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_websocket_unsubscribes_as_soon_as_the_client_leaves(backend_main):
+    # Far longer than the test may take: the endpoint must not wait for a heartbeat to notice
+    assert backend_main.WS_HEARTBEAT_SECONDS >= 15
+    room_events = backend_main.room_events
+
+    async def scenario():
+        client = LeavingClient()
+        endpoint = asyncio.create_task(backend_main.websocket_endpoint(client, "ws-leaving-room"))
+        while len(client.sent) < 1:
+            await asyncio.sleep(0.01)
+        room_events.publish("ws-leaving-room", {"type": "participant_joined"})
+        while len(client.sent) < 2:
+            await asyncio.sleep(0.01)
+        assert room_events.subscriber_count("ws-leaving-room") == 1
+
+        client.leave.set()
+        await asyncio.wait_for(endpoint, timeout=2)
+        return client
+
+    client = asyncio.run(scenario())
+    assert [event["type"] for event in client.sent] == ["snapshot", "participant_joined"]
+    assert client.closed
+    assert room_events.subscriber_count("ws-leaving-room") == 0
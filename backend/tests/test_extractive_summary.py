@@ -0,0 +1,58 @@
+from extractive_summary import ExtractiveSummarizer
+
+CONVERSATION = [
+    "Agent A: Hello, thanks for calling, how can I help?",
+    "Caller: I was charged twice for my subscription this month.",
+    "Agent A: I see two subscription payments on the invoice. One of them is a duplicate charge.",
+    "Caller: Ok.",
+    "Agent A: I'll escalate the duplicate charge to billing and open a refund ticket.",
+    "Caller: Thanks, please refund it to my card.",
+]
+
+
+def test_summary_keeps_the_callers_need():
+    summary = ExtractiveSummarizer().summarize(CONVERSATION)
+
+    assert summary.startswith(ExtractiveSummarizer.PREFIX)
+    assert "Caller: I was charged twice for my subscription this month." in summary
+    assert "Ok." not in summary
+
+
+def test_summary_is_in_conversation_order_and_bounded():
+    summarizer = ExtractiveSummarizer(max_sentences=2)
+    summary = summarizer.summarize(CONVERSATION)
+    body = summary[len(ExtractiveSummarizer.PREFIX):]
+
+    picked = [line for line in CONVERSATION if line in body]
+    assert 1 <= len(picked) <= 2
+    assert [body.index(line) for line in picked] == sorted(body.index(line) for line in picked)
+
+
+def test_max_chars_truncates():
+    summary = ExtractiveSummarizer(max_chars=60).summarize(CONVERSATION)
+    assert len(summary) == 60
+    assert summary.endswith("...")
+
+
+def test_redundant_sentences_are_skipped():
+    repeated = ["Caller: My router keeps dropping the wifi connection."] * 3 + [
+        "Agent A: I will send a replacement router by courier.",
+    ]
+    summary = ExtractiveSummarizer(max_sentences=3).summarize(repeated)
+    assert summary.count("dropping the wifi") == 1
+
+
+def test_nothing_to_extract():
+    summarizer = ExtractiveSummarizer()
+    assert summarizer.summarize([]) == ""
+    assert summarizer.summarize(["Caller: ok.", "Agent A: Hello!"]) == ""
+
+
+def test_only_the_last_candidates_are_considered():
+    history = [f"Agent A: Old topic number {i} about shipping labels." for i in range(50)]
+    history.append("Caller: My invoice total is wrong.")
+    summarizer = ExtractiveSummarizer(max_candidates=5)
+
+    pairs = summarizer.sentences(history)
+    assert len(pairs) == 5
+    assert pairs[-1] == ("Caller", "My invoice total is wrong.")
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from identity_allocator import RoomIdentityAllocator, SnowflakeIdentityAllocator
+
+
+@pytest.mark.parametrize("mode", ["random", "sequential"])
+def test_room_ids_are_unique_until_the_range_is_exhausted(mode):
+    allocator = RoomIdentityAllocator(mode, low=1, high=50)
+    identities = {allocator.allocate("room", "caller")[0] for _ in range(50)}
+
+    assert len(identities) == 50
+    with pytest.raises(RuntimeError):
+        allocator.allocate("room", "caller")
+
+
+def test_seed_reserves_existing_identities():
+    allocator = RoomIdentityAllocator("sequential", low=1000, high=1002)
+    assert not allocator.knows("room")
+    allocator.seed("room", ["agent_a_1000", "caller_1001", "observer"])
+    assert allocator.knows("room")
+
+    assert allocator.allocate("room", "agent_b") == ("agent_b_1002", "agent_b (1002)")
+
+
+def test_release_frees_the_id_for_reuse():
+    allocator = RoomIdentityAllocator("sequential", low=1, high=2)
+    first, _ = allocator.allocate("room", "caller")
+    allocator.allocate("room", "caller")
+    allocator.release("room", first)
+
+    assert allocator.allocate("room", "agent")[0] == "agent_" + first.rpartition("_")[2]
+
+
+def test_rooms_are_independent_and_forgettable():
+    allocator = RoomIdentityAllocator("sequential", low=1, high=1)
+    assert allocator.allocate("a", "caller")[0] == "caller_1"
+    assert allocator.allocate("b", "caller")[0] == "caller_1"
+
+    allocator.forget("a")
+    assert not allocator.knows("a")
+    assert allocator.stats()["rooms"] == 1
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        RoomIdentityAllocator("uuid")
+
+
+def test_snowflake_ids_are_unique_and_increasing_across_threads():
+    allocator = SnowflakeIdentityAllocator(worker_id=3)
+    ids = []
+    lock = threading.Lock()
+
+    def worker():
+        batch = [allocator.next_id() for _ in range(2000)]
+        with lock:
+            ids.extend(batch)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == 8000
+    assert all((value >> SnowflakeIdentityAllocator.SEQUENCE_BITS) & 0x3FF == 3 for value in ids)
+
+
+def test_snowflake_ids_differ_per_worker():
+    a, b = SnowflakeIdentityAllocator(worker_id=1), SnowflakeIdentityAllocator(worker_id=2)
+    assert a.allocate("room", "caller")[0] != b.allocate("room", "caller")[0]
+
+
+def test_snowflake_worker_id_range():
+    with pytest.raises(ValueError):
+        SnowflakeIdentityAllocator(worker_id=1 << SnowflakeIdentityAllocator.WORKER_BITS)
@@ -0,0 +1,54 @@
+import asyncio
+
+
+def history(count: int, start: int = 0):
+    return [f"Caller: message number {i}" for i in range(start, start + count)]
+
+
+def summarize(main, room_name: str, lines):
+    calls = main.fake_provider.calls
+    summary, cacheable = asyncio.run(main._summarize_incrementally(room_name, lines))
+    return summary, cacheable, main.fake_provider.calls - calls
+
+
+def checkpoint(main, room_name: str):
+    return asyncio.run(main.state_store.get_checkpoint(room_name))
+
+
+def test_cold_room_catches_up_in_one_call(backend_main):
+    lines = history(10 * backend_main.SUMMARY_DELTA_MAX_MESSAGES)
+
+    summary, cacheable, calls = summarize(backend_main, "cold-room", lines)
+
+    assert cacheable and summary
+    assert calls == 1
+    assert checkpoint(backend_main, "cold-room")["message_count"] == len(lines)
+
+
+def test_replaced_history_catches_up_in_one_call(backend_main):
+    summarize(backend_main, "replaced-room", history(5))
+    summary, cacheable, calls = summarize(backend_main, "replaced-room", history(200, start=1000))
+
+    assert calls == 1
+    assert checkpoint(backend_main, "replaced-room")["last_message"] == "Caller: message number 1199"
+
+
+def test_backlog_folds_are_capped_per_request(backend_main):
+    delta = backend_main.SUMMARY_DELTA_MAX_MESSAGES
+    lines = history(3)
+    summarize(backend_main, "backlog-room", lines)
+
+    lines = lines + history(10 * delta, start=3)
+    _, cacheable, calls = summarize(backend_main, "backlog-room", lines)
+
+    assert cacheable
+    assert calls == backend_main.SUMMARY_MAX_FOLDS_PER_REQUEST
+    assert checkpoint(backend_main, "backlog-room")["message_count"] == len(lines)
+
+
+def test_small_update_folds_only_new_lines(backend_main):
+    lines = history(4)
+    summarize(backend_main, "small-room", lines)
+
+    assert summarize(backend_main, "small-room", lines)[2] == 0
+    assert summarize(backend_main, "small-room", lines + history(2, start=4))[2] == 1
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from conftest import BACKEND_DIR
+from livekit_rooms import LiveKitRooms
+
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+from stubs import StubLiveKitAPI  # noqa: E402
+
+
+class FailingRoomService:
+    def __init__(self):
+        self.round_trips = 0
+
+    async def create_room(self, request):
+        self.round_trips += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("livekit down")
+
+
+def rooms(latency: float = 0.01, **kwargs) -> LiveKitRooms:
+    client = LiveKitRooms("http://livekit.invalid", "key", "secret", **kwargs)
+    client.client = StubLiveKitAPI(latency)
+    return client
+
+
+def test_concurrent_creates_share_one_round_trip():
+    async def scenario():
+        client = rooms()
+        results = await asyncio.gather(*(client.ensure_room("room") for _ in range(5)))
+        return client, results
+
+    client, results = asyncio.run(scenario())
+    assert client.client.room.round_trips == 1
+    assert {room.name for room in results} == {"room"}
+    assert client.stats()["cache_misses"] >= 1 and client.stats()["known_rooms"] == 1
+
+
+def test_known_rooms_expire_after_the_ttl():
+    async def scenario():
+        client = rooms(latency=0, cache_ttl_seconds=0.05)
+        await client.ensure_room("room")
+        await client.ensure_room("room")
+        after_hit = client.client.room.round_trips
+        await asyncio.sleep(0.06)
+        await client.ensure_room("room")
+        return after_hit, client.client.room.round_trips
+
+    assert asyncio.run(scenario()) == (1, 2)
+
+
+def test_cache_is_bounded_and_forgettable():
+    async def scenario():
+        client = rooms(latency=0, cache_size=2)
+        for name in ("a", "b", "c"):
+            await client.ensure_room(name)
+        await client.ensure_room("c")
+        client.forget("b")
+        await client.ensure_room("b")
+        await client.ensure_room("a")
+        return client.client.room.round_trips
+
+    # c was cached; b was forgotten and a evicted, so both go back to the server
+    assert asyncio.run(scenario()) == 5
+
+
+def test_cancelled_first_caller_does_not_cancel_the_others():
+    async def scenario():
+        client = rooms(latency=0.05)
+        leader = asyncio.create_task(client.ensure_room("room"))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(client.ensure_room("room")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return client, results
+
+    client, results = asyncio.run(scenario())
+    assert [room.name for room in results] == ["room"] * 3
+    assert client.client.room.round_trips == 1
+    # The create still finished, so the next caller is served from the cache
+    assert client.stats()["known_rooms"] == 1
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        client = rooms()
+        client.client.room = FailingRoomService()
+        results = await asyncio.gather(*(client.ensure_room("room") for _ in range(3)), return_exceptions=True)
+        return client, results
+
+    client, results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert client.client.room.round_trips == 1
+    assert client.stats()["known_rooms"] == 0 and not client._creating
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_executor import LLMExecutor, LLMTimeoutError
+
+
+def test_run_never_exceeds_max_concurrency():
+    async def scenario():
+        executor = LLMExecutor(max_concurrency=2, timeout=5)
+        running = peak = 0
+
+        async def call():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "ok"
+
+        try:
+            results = await asyncio.gather(*(executor.run(call, provider="test") for _ in range(8)))
+        finally:
+            executor.shutdown()
+        return results, peak
+
+    results, peak = asyncio.run(scenario())
+    assert results == ["ok"] * 8
+    assert peak == 2
+
+
+def test_run_sync_timeout_keeps_slot_until_thread_finishes():
+    async def scenario():
+        executor = LLMExecutor(max_concurrency=1, timeout=5)
+        release = threading.Event()
+        try:
+            with pytest.raises(LLMTimeoutError):
+                await executor.run_sync(release.wait, 5, provider="test", timeout=0.05)
+            # The blocked thread still holds the only slot
+            assert executor.stats()["in_flight"] == 1
+            release.set()
+            return await executor.run_sync(lambda: "next", provider="test")
+        finally:
+            release.set()
+            executor.shutdown()
+
+    assert asyncio.run(scenario()) == "next"
+
+
+def test_run_sync_propagates_errors():
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        executor = LLMExecutor(max_concurrency=1)
+        try:
+            with pytest.raises(ValueError, match="boom"):
+                await executor.run_sync(fail, provider="test")
+            return executor.stats()["in_flight"]
+        finally:
+            executor.shutdown()
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_stream_sync_yields_items_in_order():
+    def chunks():
+        for word in ("a", "b", "c"):
+            time.sleep(0.001)
+            yield word
+
+    async def scenario():
+        executor = LLMExecutor(max_concurrency=1)
+        try:
+            return [item async for item in executor.stream_sync(chunks, provider="test")]
+        finally:
+            executor.shutdown()
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+
+
+def test_stream_times_out_whole_stream():
+    async def slow_stream():
+        async def items():
+            yield "first"
+            await asyncio.sleep(1)
+            yield "late"
+        return items()
+
+    async def scenario():
+        executor = LLMExecutor(max_concurrency=1)
+        received = []
+        try:
+            with pytest.raises(LLMTimeoutError):
+                async for item in executor.stream(slow_stream, provider="test", timeout=0.05):
+                    received.append(item)
+            return received, executor.stats()["in_flight"]
+        finally:
+            executor.shutdown()
+
+    assert asyncio.run(scenario()) == (["first"], 0)
@@ -0,0 +1,102 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from metrics import MetricsRegistry, registry
+from observability import RequestMetricsMiddleware
+
+
+def test_observations_on_a_bound_land_in_that_bucket():
+    histogram = MetricsRegistry().histogram("latency", buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.0, 1.5, 2.0, 8.0):
+        histogram.observe(value)
+
+    assert histogram.snapshot()["buckets"] == {"1.0": 2, "2.0": 4, "4.0": 4, "+Inf": 5}
+    assert histogram.count == 5
+
+
+def test_quantile_interpolates_inside_the_bucket():
+    histogram = MetricsRegistry().histogram("latency", buckets=(1.0, 2.0, 4.0))
+    assert histogram.quantile(0.5) is None
+
+    for value in (0.5, 1.0, 1.5, 3.0):
+        histogram.observe(value)
+    # Two of four in (0, 1]: the median is the top of that bucket
+    assert histogram.quantile(0.5) == pytest.approx(1.0)
+    assert histogram.quantile(0.25) == pytest.approx(0.5)
+    assert histogram.quantile(0.75) == pytest.approx(2.0)
+    assert histogram.quantile(1.0) == pytest.approx(4.0)
+
+    # Past the last bucket the estimate is capped at its bound
+    histogram.observe(100.0)
+    assert histogram.quantile(1.0) == 4.0
+
+
+def test_render_prometheus_exposition_format():
+    metrics = MetricsRegistry()
+    metrics.counter("requests_total", "Requests served", {"route": "/a"}).inc(3)
+    metrics.counter("requests_total", "Requests served", {"route": 'quote"d'}).inc()
+    metrics.gauge("in_flight").set(1.5)
+    metrics.histogram("latency_seconds", "Request latency", buckets=(0.1, 1.0)).observe(0.05)
+
+    assert metrics.render_prometheus() == (
+        "# TYPE in_flight gauge\n"
+        "in_flight 1.5\n"
+        "# HELP latency_seconds Request latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1.0"} 1\n'
+        'latency_seconds_bucket{le="+Inf"} 1\n'
+        "latency_seconds_sum 0.05\n"
+        "latency_seconds_count 1\n"
+        "# HELP requests_total Requests served\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/a"} 3\n'
+        'requests_total{route="quote\\"d"} 1\n'
+    )
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/metrics-test/items/{item_id}")
+    async def item(item_id: str):
+        if item_id == "missing":
+            raise HTTPException(status_code=404)
+        return {"item_id": item_id}
+
+    @app.get("/metrics-test/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def requests(route: str, status: int, method: str = "GET") -> int:
+    return registry.histogram("http_request_duration_seconds",
+                              labels={"method": method, "route": route, "status": str(status)}).count
+
+
+def test_requests_are_labelled_by_route_template(client):
+    for item_id in ("a", "b", "c"):
+        assert client.get(f"/metrics-test/items/{item_id}").status_code == 200
+    assert client.get("/metrics-test/items/missing").status_code == 404
+
+    assert requests("/metrics-test/items/{item_id}", 200) == 3
+    assert requests("/metrics-test/items/{item_id}", 404) == 1
+    assert requests("/metrics-test/items/a", 200) == 0
+
+
+def test_unrouted_requests_share_one_label(client):
+    before = requests("unmatched", 404)
+    for path in ("/metrics-test/nope", "/metrics-test/also/nope"):
+        assert client.get(path).status_code == 404
+    assert requests("unmatched", 404) == before + 2
+
+
+def test_status_is_recorded_when_the_handler_raises(client):
+    assert client.get("/metrics-test/boom").status_code == 500
+    assert requests("/metrics-test/boom", 500) == 1
+    assert registry.gauge("http_requests_in_flight").value == 0
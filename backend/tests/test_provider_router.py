@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from llm_providers import FakeStreamingProvider
+from provider_router import AllProvidersFailed, ProviderHealth, ProviderRouter
+from rate_limit import TokenBucket
+
+
+def provider(name: str, latency: float = 0.0, fail: bool = False, text: str = "") -> FakeStreamingProvider:
+    fake = FakeStreamingProvider(first_token_latency=latency, token_latency=0, text=text or name, fail=fail)
+    fake.name = name
+    return fake
+
+
+def test_falls_back_when_primary_fails():
+    primary, secondary = provider("primary", fail=True), provider("secondary")
+    router = ProviderRouter([primary, secondary], hedging=False)
+
+    text, name = asyncio.run(router.complete("prompt"))
+
+    assert (text, name) == ("secondary", "secondary")
+    assert router.health["primary"].consecutive_failures == 1
+
+
+def test_hedge_wins_when_primary_is_slow():
+    slow, fast = provider("slow", latency=1.0), provider("fast", latency=0.01)
+    router = ProviderRouter([slow, fast], hedging=True, default_hedge_delay=0.02)
+
+    text, name = asyncio.run(router.complete("prompt"))
+
+    assert name == "fast"
+    assert slow.calls == 1 and fast.calls == 1
+    # The losing attempt was cancelled, which counts as neither success nor failure
+    assert router.health["slow"].consecutive_failures == 0
+
+
+def test_all_providers_failed():
+    router = ProviderRouter([provider("a", fail=True), provider("b", fail=True)], hedging=False)
+
+    with pytest.raises(AllProvidersFailed) as error:
+        asyncio.run(router.complete("prompt"))
+    assert "a: fake provider failure" in str(error.value)
+    assert "b: fake provider failure" in str(error.value)
+
+
+def test_empty_quota_skips_provider_without_waiting():
+    first, second = provider("first"), provider("second")
+    router = ProviderRouter([first, second], hedging=False)
+    quota = TokenBucket("test-quota", rate=0.001, burst=1)
+    assert quota.try_acquire()
+
+    text, name = asyncio.run(router.complete("prompt", quotas={"first": quota}))
+
+    assert name == "second"
+    assert first.calls == 0
+
+
+def test_circuit_opens_after_threshold_and_half_opens_after_cooldown():
+    health = ProviderHealth("circuit-test", failure_threshold=2, cooldown_seconds=0.0)
+    health.record_failure()
+    assert health.state == ProviderHealth.CLOSED
+    health.record_failure()
+    assert health.state == ProviderHealth.OPEN
+
+    # Cooldown elapsed: exactly one probe is let through
+    assert health.available()
+    health.begin()
+    assert health.state == ProviderHealth.HALF_OPEN
+    assert not health.available()
+
+    health.record_success(0.1)
+    assert health.state == ProviderHealth.CLOSED
+    assert health.available()
+
+
+def test_open_circuit_is_skipped():
+    broken, healthy = provider("broken"), provider("healthy")
+    router = ProviderRouter([broken, healthy], hedging=False, failure_threshold=1, cooldown_seconds=60)
+    router.record_failure("broken")
+
+    assert [p.name for p in router.ordered()] == ["healthy"]
+    assert asyncio.run(router.complete("prompt"))[1] == "healthy"
+    assert broken.calls == 0
+
+
+def test_measured_providers_are_ordered_by_score():
+    a, b = provider("a"), provider("b")
+    router = ProviderRouter([a, b])
+    router.record_success("a", 2.0)
+    router.record_success("b", 0.5)
+
+    assert [p.name for p in router.ordered()] == ["b", "a"]
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from state_store import InMemoryStateStore
+
+
+@pytest.fixture
+def rooms(backend_main, monkeypatch):
+    """An empty store holding room-00 .. room-09; only the odd rooms have an agent_b"""
+    store = InMemoryStateStore()
+
+    async def fill():
+        for i in range(10):
+            name = f"room-{i:02d}"
+            await store.join_or_create_room(name, f"caller_{i}", {"room_info": {}, "created_at": "", "status": "active"})
+            if i % 2:
+                await store.add_participant(name, f"agent_b_{i}")
+
+    asyncio.run(fill())
+    monkeypatch.setattr(backend_main, "state_store", store)
+    return backend_main
+
+
+def pages(main, **params):
+    """Names on each page, following next_cursor until it is None"""
+    names, cursor = [], None
+    while True:
+        page = asyncio.run(main.list_rooms(**{"status": None, "participant_type": None, "fields": None,
+                                              "limit": 50, "cursor": cursor, **params}))
+        names.append([view["room_name"] for view in page["rooms"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return names
+
+
+def test_cursor_walks_every_room_once(rooms):
+    assert pages(rooms, limit=4) == [
+        ["room-00", "room-01", "room-02", "room-03"],
+        ["room-04", "room-05", "room-06", "room-07"],
+        ["room-08", "room-09"],
+    ]
+
+
+def test_cursor_survives_a_participant_type_filter(rooms):
+    # Filtered pages end mid-store-page; the cursor must resume after the last room returned
+    assert pages(rooms, participant_type="agent_b", limit=2) == [
+        ["room-01", "room-03"],
+        ["room-05", "room-07"],
+        ["room-09"],
+    ]
+
+
+def test_last_page_has_no_cursor(rooms):
+    # An exactly full last page must not hand out a cursor to an empty one
+    assert pages(rooms, limit=5) == [
+        ["room-00", "room-01", "room-02", "room-03", "room-04"],
+        ["room-05", "room-06", "room-07", "room-08", "room-09"],
+    ]
+    assert pages(rooms, participant_type="agent_b", limit=5) == [
+        ["room-01", "room-03", "room-05", "room-07", "room-09"],
+    ]
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "////", "_w=="])
+def test_malformed_cursor_is_rejected(rooms, cursor):
+    with pytest.raises(HTTPException) as rejected:
+        pages(rooms, cursor=cursor)
+    assert rejected.value.status_code == 400
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import threading
+import uuid
+
+import pytest
+
+from conftest import BACKEND_DIR
+from startup import LazyModule, warm_up
+
+HEAVY_MODULE = """
+import time
+time.sleep(0.05)
+CLIENT = "client"
+"""
+
+
+@pytest.fixture
+def heavy_module(tmp_path, monkeypatch):
+    """Name of a fresh module that takes 50ms to import"""
+    name = f"lazy_heavy_{uuid.uuid4().hex}"
+    (tmp_path / f"{name}.py").write_text(HEAVY_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield name
+    sys.modules.pop(name, None)
+
+
+def test_module_is_imported_on_first_use_only(heavy_module):
+    lazy = LazyModule(heavy_module, setup=lambda module: module.CLIENT)
+    assert heavy_module not in sys.modules
+    assert not lazy.loaded and lazy.stats()["import_seconds"] is None
+
+    assert lazy.get() == "client"
+    assert heavy_module in sys.modules
+    assert lazy.loaded and lazy.import_seconds >= 0.05
+    # Later calls reuse the set-up value
+    assert lazy.get() == "client"
+    assert asyncio.run(lazy.load()) == "client"
+
+
+def test_concurrent_first_uses_set_up_once(heavy_module):
+    setups = []
+    lazy = LazyModule(heavy_module, setup=lambda module: setups.append(module) or module)
+    threads = [threading.Thread(target=lazy.get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+
+    async def load():
+        return await asyncio.gather(*(lazy.load() for _ in range(4)))
+
+    loaded = asyncio.run(load())
+    for thread in threads:
+        thread.join()
+    assert len(setups) == 1
+    assert all(module is setups[0] for module in loaded)
+
+
+def test_failed_setup_is_retried(heavy_module):
+    attempts = []
+
+    def setup(module):
+        attempts.append(module)
+        if len(attempts) == 1:
+            raise RuntimeError("no credentials yet")
+        return "client"
+
+    lazy = LazyModule(heavy_module, setup=setup)
+    with pytest.raises(RuntimeError):
+        lazy.get()
+    assert not lazy.loaded
+    assert lazy.get() == "client"
+
+
+def test_warm_up_logs_a_failure_and_loads_the_rest(heavy_module, caplog):
+    caplog.set_level(logging.WARNING, logger="startup")
+    missing = LazyModule("lazy_module_that_does_not_exist")
+    heavy = LazyModule(heavy_module)
+
+    asyncio.run(warm_up([missing, heavy]))
+
+    assert heavy.loaded and not missing.loaded
+    failures = [record for record in caplog.records if record.getMessage() == "Module warm-up failed"]
+    assert [record.module_name for record in failures] == ["lazy_module_that_does_not_exist"]
+
+
+def test_backend_import_leaves_sdks_for_warm_up():
+    env = {
+        **os.environ,
+        "LIVEKIT_URL": "ws://127.0.0.1:7880",
+        "LIVEKIT_API_KEY": "test-api-key",
+        "LIVEKIT_API_SECRET": "test-api-secret-test-api-secret-0000",
+        "OPENAI_API_KEY": "test-openai-key",
+        "GEMINI_API_KEY": "test-gemini-key",
+        "LOG_LEVEL": "ERROR",
+    }
+    heavy = ["livekit.api", "openai", "google.generativeai", "numpy"]
+    script = f"import sys, main; print([m for m in {heavy!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from datetime import datetime
+
+import fakeredis
+import pytest
+
+from lifecycle import LifecycleManager
+from state_store import InMemoryStateStore, RedisStateStore
+
+DEFAULTS = {"created_at": "2024-01-01T00:00:00", "room_info": {"sid": "RM_1"}, "status": "active"}
+
+
+def redis_store(server=None) -> RedisStateStore:
+    client = fakeredis.FakeAsyncRedis(server=server or fakeredis.FakeServer(), decode_responses=True)
+    return RedisStateStore(client=client, key_prefix="test:")
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    return InMemoryStateStore() if request.param == "memory" else redis_store()
+
+
+def test_join_and_leave_marks_the_empty_room_inactive(store):
+    async def scenario():
+        room, created = await store.join_or_create_room("room", "caller_1", DEFAULTS)
+        assert created and room["participants"] == ["caller_1"]
+        room, created = await store.join_or_create_room("room", "agent_a_1", DEFAULTS)
+        assert not created and room["participants"] == ["caller_1", "agent_a_1"]
+
+        room, removed = await store.remove_participant("room", "caller_1")
+        assert removed and room["status"] == "active"
+        room, removed = await store.remove_participant("room", "caller_1")
+        assert not removed and room["participants"] == ["agent_a_1"]
+
+        room, removed = await store.remove_participant("room", "agent_a_1")
+        assert removed and room["status"] == "inactive" and room["participants"] == []
+        views, _ = await store.list_rooms_page(status="inactive")
+        assert [view["room_name"] for view in views] == ["room"]
+        assert (await store.list_rooms_page(status="active"))[0] == []
+
+        assert await store.remove_participant("missing", "caller_1") == (None, False)
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_leaves_mark_inactive_exactly_when_empty(store):
+    members = [f"caller_{i}" for i in range(20)]
+
+    async def scenario():
+        for member in members:
+            await store.join_or_create_room("room", member, DEFAULTS)
+        results = await asyncio.gather(*(store.remove_participant("room", member) for member in members))
+        assert all(removed for _, removed in results)
+        # Only the leave that emptied the room saw it inactive
+        assert sum(room["status"] == "inactive" for room, _ in results) == 1
+        room = await store.get_room("room")
+        assert room["participants"] == [] and room["status"] == "inactive"
+
+    asyncio.run(scenario())
+
+
+def test_join_between_count_and_status_update_keeps_room_active():
+    server = fakeredis.FakeServer()
+    store, other_worker = redis_store(server), redis_store(server)
+    pipeline = store.client.pipeline
+    joined = False
+
+    def pipeline_with_interleaved_join(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        zcard = pipe.zcard
+
+        async def zcard_then_join(*zcard_args):
+            nonlocal joined
+            count = await zcard(*zcard_args)
+            if not joined:
+                # Another worker's join lands after the leave counted the members
+                joined = True
+                await other_worker.join_or_create_room("room", "agent_b_1", DEFAULTS)
+            return count
+
+        pipe.zcard = zcard_then_join
+        return pipe
+
+    async def scenario():
+        await store.join_or_create_room("room", "caller_1", DEFAULTS)
+        store.client.pipeline = pipeline_with_interleaved_join
+        room, removed = await store.remove_participant("room", "caller_1")
+        assert joined and removed
+        assert room["participants"] == ["agent_b_1"]
+        assert room["status"] == "active"
+        assert [view["room_name"] for view in (await store.list_rooms_page(status="active"))[0]] == ["room"]
+
+    asyncio.run(scenario())
+
+
+def test_lifecycle_expires_idle_rooms_contexts_and_transfers(store):
+    async def scenario():
+        lifecycle = LifecycleManager(store, room_inactive_ttl=0.05, room_max_age=0,
+                                     transfer_ttl=0.05, context_ttl=0.05, reap_interval_seconds=0)
+        await store.join_or_create_room("idle", "caller_1", {**DEFAULTS, "created_at": datetime.now().isoformat()})
+        await store.remove_participant("idle", "caller_1")
+        await store.join_or_create_room("busy", "caller_2", {**DEFAULTS, "created_at": datetime.now().isoformat()})
+        await store.set_conversation("orphan", ["Caller: hello"])
+        await store.set_conversation("busy", ["Caller: hi"])
+        await store.save_transfer("t1", {"created_at": "2024-01-01T00:00:00"})
+
+        await asyncio.sleep(0.1)
+        await store.set_conversation("fresh", ["Caller: just posted"])
+        removed = await lifecycle.reap()
+
+        assert removed == {"rooms": 1, "contexts": 1, "transfers": 1}
+        assert await store.get_room("idle") is None
+        assert await store.get_room("busy") is not None
+        assert await store.get_conversation("orphan") == []
+        assert await store.get_conversation("busy") == ["Caller: hi"]
+        assert await store.get_conversation("fresh") == ["Caller: just posted"]
+        assert await store.list_transfers() == {}
+
+    asyncio.run(scenario())
+
+
+def test_stale_contexts_by_last_write(store):
+    async def scenario():
+        await store.set_conversation("a", ["Caller: one"])
+        cutoff = time.time() + 0.001
+        await asyncio.sleep(0.01)
+        await store.set_summary("b", "summary")
+        assert await store.stale_contexts(cutoff) == ["a"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+from admission import AdmissionController, RoutePolicy
+from llm_providers import FakeStreamingProvider
+from provider_router import ProviderRouter
+from summary_batch import BatchSummarizer
+from summary_cache import SummaryCache
+
+
+class RecordingProvider(FakeStreamingProvider):
+    """Fake provider answering with a fixed text (or a function of the prompt), recording each prompt"""
+
+    def __init__(self, text="summary", **kwargs):
+        super().__init__(first_token_latency=0, token_latency=0, **kwargs)
+        self.reply = text
+        self.prompts = []
+
+    async def complete(self, prompt, system_prompt=None, max_tokens=150):
+        self.prompts.append(prompt)
+        self.text = self.reply(prompt) if callable(self.reply) else self.reply
+        return await super().complete(prompt, system_prompt, max_tokens)
+
+
+def batcher(provider: FakeStreamingProvider, **kwargs) -> BatchSummarizer:
+    router = ProviderRouter([provider], hedging=False)
+    return BatchSummarizer(router, SummaryCache(), "system", build_prompt=lambda window: "\n".join(window),
+                           fallback=lambda window: "fallback: " + window[-1], **kwargs)
+
+
+def run(summarizer: BatchSummarizer, conversations):
+    async def collect():
+        return [line async for line in summarizer.run(conversations)]
+
+    return asyncio.run(collect())
+
+
+def conversation(room_name: str, length: int = 2):
+    return room_name, [f"Caller: {room_name} line {i}" for i in range(length)]
+
+
+def test_short_conversations_share_one_prompt():
+    provider = RecordingProvider(json.dumps({"1": "first", "2": "second"}))
+    lines = run(batcher(provider, pack_size=5, pack_max_chars=100),
+                [conversation("a"), conversation("b"), conversation("long", length=50)])
+
+    assert len(provider.prompts) == 2
+    packed = next(prompt for prompt in provider.prompts if "Call 1:" in prompt)
+    assert "Call 2:" in packed and "Call 3:" not in packed
+    assert "Caller: a line 1" in packed and "Caller: b line 0" in packed
+    # The long conversation went on its own, with the plain single-conversation prompt
+    assert "long line 49" not in packed
+
+    results = {line["room_name"]: line for line in lines if line["type"] == "result"}
+    assert (results["a"]["summary"], results["a"]["packed"]) == ("first", 2)
+    assert (results["b"]["summary"], results["b"]["packed"]) == ("second", 2)
+    assert "packed" not in results["long"]
+    assert lines[-1]["provider_requests"] == 2
+
+
+def test_calls_missing_from_a_packed_answer_are_retried_alone():
+    def reply(prompt):
+        # The packed answer only covers call 1 (and wraps it in prose)
+        return 'Here you go: {"1": "first"} done' if "Call 1:" in prompt else "alone"
+
+    provider = RecordingProvider(reply)
+    lines = run(batcher(provider, pack_size=5), [conversation("a"), conversation("b")])
+
+    results = {line["room_name"]: line for line in lines if line["type"] == "result"}
+    assert results["a"]["summary"] == "first"
+    assert results["b"]["summary"] == "alone" and "packed" not in results["b"]
+    assert len(provider.prompts) == 2
+    assert lines[-1]["provider_requests"] == 2
+
+
+def test_unparsable_pack_and_failed_provider_fall_back_per_room():
+    unparsable = RecordingProvider("not json at all")
+    lines = run(batcher(unparsable, pack_size=5), [conversation("a"), conversation("b")])
+    assert sorted(line["summary"] for line in lines if line["type"] == "result") == ["not json at all"] * 2
+    assert len(unparsable.prompts) == 3
+
+    failing = RecordingProvider(fail=True)
+    lines = run(batcher(failing, pack_size=5), [conversation("a"), conversation("b")])
+    results = {line["room_name"]: line for line in lines if line["type"] == "result"}
+    assert results["a"]["summary"] == "fallback: Caller: a line 1"
+    assert results["b"]["summary"] == "fallback: Caller: b line 1"
+    assert {line["provider"] for line in results.values()} == {"fallback"}
+    assert all("error" in line for line in results.values())
+
+
+def test_cached_windows_skip_the_provider():
+    provider = RecordingProvider(json.dumps({"1": "first", "2": "second"}))
+    summarizer = batcher(provider, pack_size=5)
+    run(summarizer, [conversation("a"), conversation("b")])
+
+    lines = run(summarizer, [conversation("a"), conversation("b")])
+    assert {(line["room_name"], line["provider"]) for line in lines[:-1]} == {("a", "cache"), ("b", "cache")}
+    assert lines[-1]["provider_requests"] == 0
+    assert len(provider.prompts) == 1
+
+
+def test_ndjson_lines_keep_request_positions_and_end_with_done(backend_main):
+    items = [
+        backend_main.BatchSummaryItem(room_name="ndjson-room-0", conversation_history=["Caller: hi"]),
+        backend_main.BatchSummaryItem(room_name="ndjson-empty-room"),
+        backend_main.BatchSummaryItem(room_name="ndjson-room-2", conversation_history=["Caller: hello"]),
+    ]
+
+    async def collect():
+        return [line async for line in backend_main._summary_batch_lines(items)]
+
+    raw = asyncio.run(collect())
+    assert all(line.endswith("\n") and line.count("\n") == 1 for line in raw)
+    lines = [json.loads(line) for line in raw]
+
+    # The room without a conversation is reported first, before any provider work
+    assert lines[0] == {"type": "error", "index": 1, "room_name": "ndjson-empty-room", "error": "No conversation"}
+    results = sorted((line["index"], line["room_name"]) for line in lines[1:-1])
+    assert results == [(0, "ndjson-room-0"), (2, "ndjson-room-2")]
+    assert lines[-1]["type"] == "done" and lines[-1]["count"] == 3
+
+
+def test_batch_units_wait_behind_live_transfers_for_admission():
+    async def scenario():
+        admission = AdmissionController(1, [
+            RoutePolicy("transfer", 0, max_concurrency=1, latency_budget=5.0),
+            RoutePolicy("batch", 4, max_concurrency=1, latency_budget=None),
+        ])
+        granted = []
+        release = asyncio.Event()
+
+        async def transfer():
+            async with admission.admit("transfer"):
+                granted.append("transfer")
+
+        async def hold():
+            async with admission.admit("transfer"):
+                granted.append("holder")
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        provider = RecordingProvider(lambda prompt: granted.append("batch") or "summary")
+        summarizer = batcher(provider, pack_size=1, admission=admission)
+        batch = asyncio.create_task(collect(summarizer, [conversation("a")]))
+        await asyncio.sleep(0.01)
+        assert admission.routes["batch"].queued == 1
+        live = asyncio.create_task(transfer())
+        await asyncio.sleep(0.01)
+
+        release.set()
+        lines = await batch
+        await asyncio.gather(holder, live)
+        return granted, lines
+
+    async def collect(summarizer, conversations):
+        return [line async for line in summarizer.run(conversations)]
+
+    granted, lines = asyncio.run(scenario())
+    assert granted == ["holder", "transfer", "batch"]
+    assert [line["type"] for line in lines] == ["result", "done"]
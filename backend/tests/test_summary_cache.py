@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from summary_cache import SummaryCache, summary_fingerprint
+
+
+def test_fingerprint_depends_on_room_and_exact_window():
+    window = ["Caller: hi", "Agent A: hello"]
+    assert summary_fingerprint("room", window) == summary_fingerprint("room", list(window))
+    assert summary_fingerprint("room", window) != summary_fingerprint("other", window)
+    # Line boundaries are part of the hash
+    assert summary_fingerprint("room", ["ab", "c"]) != summary_fingerprint("room", ["a", "bc"])
+
+
+def test_lru_eviction_and_ttl():
+    cache = SummaryCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+
+    expired = SummaryCache(ttl_seconds=-1)
+    expired.put("a", "A")
+    assert expired.get("a") is None
+
+
+def test_concurrent_misses_share_one_computation():
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "summary", True
+
+    async def scenario():
+        cache = SummaryCache()
+        results = await asyncio.gather(*(cache.get_or_compute("key", factory) for _ in range(5)))
+        return cache, results
+
+    cache, results = asyncio.run(scenario())
+    assert results == ["summary"] * 5
+    assert calls == 1
+    assert cache.get("key") == "summary"
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_uncacheable_value_is_shared_but_not_stored():
+    async def scenario():
+        cache = SummaryCache()
+        result = await cache.get_or_compute("key", lambda: asyncio.sleep(0, ("fallback", False)))
+        return cache, result
+
+    cache, result = asyncio.run(scenario())
+    assert result == "fallback"
+    assert cache.get("key") is None
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    async def factory():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def scenario():
+        cache = SummaryCache()
+        results = await asyncio.gather(*(cache.get_or_compute("key", factory) for _ in range(3)),
+                                       return_exceptions=True)
+        return cache, results
+
+    cache, results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_cancelling_the_leader_does_not_cancel_waiters():
+    started = None
+
+    async def factory():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "summary", True
+
+    async def scenario():
+        nonlocal started
+        started = asyncio.Event()
+        cache = SummaryCache()
+        leader = asyncio.create_task(cache.get_or_compute("key", factory))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_compute("key", factory))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return cache, await waiter
+
+    cache, result = asyncio.run(scenario())
+    assert result == "summary"
+    assert cache.get("key") == "summary"
+
+
+def test_cancelled_leader_still_fills_the_cache():
+    async def scenario():
+        cache = SummaryCache()
+        leader = asyncio.create_task(cache.get_or_compute("key", lambda: asyncio.sleep(0.01, ("summary", True))))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0.05)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert cache.get("key") == "summary"
+    assert cache.stats()["in_flight"] == 0
@@ -0,0 +1,131 @@
+import asyncio
+
+from summary_prewarmer import SummaryPrewarmer
+
+
+class Refresher:
+    """Refresh callback that records calls and can be held open"""
+
+    def __init__(self):
+        self.calls = []
+        self.completed = []
+        self.gate = None
+
+    async def __call__(self, room_name: str) -> str:
+        self.calls.append(room_name)
+        if self.gate is not None:
+            await self.gate.wait()
+        summary = f"summary {len(self.calls)}"
+        self.completed.append(summary)
+        return summary
+
+
+def prewarmer(debounce: float = 0.05, max_delay: float = 10.0):
+    refresher = Refresher()
+    return SummaryPrewarmer(refresher, debounce_seconds=debounce, max_delay_seconds=max_delay), refresher
+
+
+def test_burst_of_changes_costs_one_refresh():
+    async def scenario():
+        warm, refresher = prewarmer(debounce=0.05)
+        for _ in range(5):
+            warm.notify_changed("room")
+            await asyncio.sleep(0.01)
+        assert refresher.calls == []
+        await asyncio.sleep(0.1)
+        return refresher.calls, warm.get("room")
+
+    calls, served = asyncio.run(scenario())
+    assert calls == ["room"]
+    assert served["summary"] == "summary 1" and not served["stale"]
+
+
+def test_room_that_keeps_changing_is_refreshed_by_the_max_delay():
+    async def scenario():
+        warm, refresher = prewarmer(debounce=0.05, max_delay=0.15)
+        refreshed_at = []
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        # Transcript flushes every 20ms never leave a quiet debounce window
+        while loop.time() - started < 0.5:
+            warm.notify_changed("room")
+            if len(refresher.calls) > len(refreshed_at):
+                refreshed_at.append(loop.time() - started)
+            await asyncio.sleep(0.02)
+        await warm.shutdown()
+        return refreshed_at
+
+    refreshed_at = asyncio.run(scenario())
+    assert len(refreshed_at) >= 2
+    assert refreshed_at[0] < 0.25
+
+
+def test_versions_mark_served_summaries_stale():
+    async def scenario():
+        warm, _ = prewarmer(debounce=10)
+        assert warm.get("room") is None
+        warm.notify_changed("room")
+        warm.record("room", "first", version=warm.version("room"))
+        fresh = warm.get("room")
+
+        warm.notify_changed("room")
+        stale = warm.get("room")
+        # An older result arriving late never replaces a newer one
+        warm.record("room", "newer", version=2)
+        warm.record("room", "older", version=1)
+        latest = warm.get("room")
+
+        warm.forget("room")
+        return fresh, stale, latest, warm.get("room"), warm.version("room")
+
+    fresh, stale, latest, forgotten, version = asyncio.run(scenario())
+    assert fresh["summary"] == "first" and not fresh["stale"]
+    assert stale["summary"] == "first" and stale["stale"]
+    assert latest["summary"] == "newer" and not latest["stale"]
+    assert forgotten is None and version == 0
+
+
+def test_running_refresh_is_not_cancelled_by_new_changes():
+    async def scenario():
+        warm, refresher = prewarmer(debounce=0.02)
+        refresher.gate = asyncio.Event()
+        warm.notify_changed("room")
+        await asyncio.sleep(0.05)
+        assert refresher.calls == ["room"]
+
+        # Lines arrive while the LLM is still running
+        warm.notify_changed("room")
+        warm.notify_changed("room")
+        await asyncio.sleep(0.05)
+        refresher.gate.set()
+        await asyncio.sleep(0.1)
+        return refresher, warm.get("room"), warm.stats()
+
+    refresher, served, stats = asyncio.run(scenario())
+    # The first refresh finished, then one more caught up with the lines that arrived meanwhile
+    assert refresher.completed == ["summary 1", "summary 2"]
+    assert served["summary"] == "summary 2" and not served["stale"]
+    assert stats["pending_refreshes"] == 0
+
+
+def test_failed_refresh_is_retried_on_the_next_change():
+    async def scenario():
+        attempts = []
+
+        async def refresh(room_name):
+            attempts.append(room_name)
+            if len(attempts) == 1:
+                raise RuntimeError("provider down")
+            return "recovered"
+
+        warm = SummaryPrewarmer(refresh, debounce_seconds=0.01)
+        warm.notify_changed("room")
+        await asyncio.sleep(0.05)
+        assert warm.get("room") is None
+        warm.notify_changed("room")
+        await asyncio.sleep(0.05)
+        return attempts, warm.get("room")
+
+    attempts, served = asyncio.run(scenario())
+    assert len(attempts) == 2
+    assert served["summary"] == "recovered"
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from llm_providers import LLMProvider
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def stream(backend_main, room_name: str):
+    response = TestClient(backend_main.app).post(
+        "/api/summary/stream", json={"room_name": room_name, "conversation_history": []})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return parse_events(response.text)
+
+
+def test_stream_sends_draft_then_tokens_then_done(backend_main):
+    events = stream(backend_main, "sse-order-room")
+
+    names = [name for name, _ in events]
+    assert names[0] == "draft" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"} and len(names) > 3
+    done = events[-1][1]
+    assert done["provider"] == "fake"
+    assert done["summary"] == "".join(data["text"] for name, data in events if name == "token").strip()
+
+
+def test_cached_summary_is_sent_at_once(backend_main):
+    summary = stream(backend_main, "sse-cache-room")[-1][1]["summary"]
+    calls = backend_main.fake_provider.calls
+
+    events = stream(backend_main, "sse-cache-room")
+    assert events == [("token", {"text": summary}), ("done", {"summary": summary, "provider": "cache"})]
+    assert backend_main.fake_provider.calls == calls
+
+
+class BlockingStreamProvider(LLMProvider):
+    """Streams through the LLM executor's thread pool, one word every few milliseconds"""
+
+    # Stands in for the configured provider, whose routing health it reports to
+    name = "fake"
+
+    def __init__(self, executor):
+        self.executor = executor
+
+    async def complete(self, prompt, system_prompt=None, max_tokens=150):
+        raise NotImplementedError
+
+    async def stream(self, prompt, system_prompt=None, max_tokens=150):
+        def _chunks():
+            for _ in range(1000):
+                time.sleep(0.005)
+                yield "word "
+
+        async for text in self.executor.stream_sync(_chunks, provider=self.name):
+            yield text
+
+
+def test_client_disconnect_releases_admission_and_executor_slots(backend_main, monkeypatch):
+    provider = BlockingStreamProvider(backend_main.llm_executor)
+    monkeypatch.setattr(backend_main.llm_router, "ordered", lambda: [provider])
+
+    async def in_flight():
+        return backend_main.admission.in_flight, backend_main.llm_executor.stats()["in_flight"]
+
+    async def scenario():
+        events = backend_main._summary_event_stream("sse-disconnect-room")
+        names = [(await events.__anext__()).split("\n", 1)[0] for _ in range(3)]
+        during = await in_flight()
+        # What the server does with the response body when the client goes away
+        await events.aclose()
+        deadline = time.monotonic() + 2
+        while await in_flight() != (0, 0) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        return names, during, await in_flight()
+
+    names, during, after = asyncio.run(scenario())
+    assert names == ["event: draft", "event: token", "event: token"]
+    assert during == (1, 1)
+    assert after == (0, 0)
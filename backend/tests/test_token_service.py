@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from livekit import api
+
+from token_service import TokenService
+
+API_KEY = "test-api-key"
+API_SECRET = "test-api-secret-test-api-secret-0000"
+
+
+def decode(token: str):
+    return jwt.decode(token, API_SECRET, algorithms=["HS256"], options={"verify_aud": False})
+
+
+def sdk_claims(room_name: str, identity: str, name: str):
+    token = (
+        api.AccessToken(API_KEY, API_SECRET)
+        .with_identity(identity)
+        .with_name(name)
+        .with_grants(api.VideoGrants(room_join=True, room=room_name, can_publish=True, can_subscribe=True))
+        .to_jwt()
+    )
+    return decode(token)
+
+
+def test_minted_token_matches_the_sdk():
+    service = TokenService(API_KEY, API_SECRET)
+    claims = decode(service.mint("room-1", "caller_1234", "caller (1234)"))
+    expected = sdk_claims("room-1", "caller_1234", "caller (1234)")
+
+    assert claims["exp"] - claims["nbf"] == expected["exp"] - expected["nbf"]
+    for key in ("iss", "sub", "name", "video"):
+        assert claims[key] == expected[key]
+    assert claims["nbf"] <= int(time.time())
+
+
+def test_template_is_cached_per_room_and_forgotten():
+    service = TokenService(API_KEY, API_SECRET)
+    assert service.template("room-1") is service.template("room-1")
+    assert service.template("room-1") is not service.template("room-2")
+
+    first = service.template("room-1")
+    service.forget("room-1")
+    assert service.template("room-1") is not first
+
+
+def test_template_cache_is_bounded():
+    service = TokenService(API_KEY, API_SECRET, template_cache_size=2)
+    for room in ("a", "b", "c"):
+        service.template(room)
+    assert service.stats()["templates"] == 2
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        TokenService(API_KEY, API_SECRET).template("room", profile="admin")
+
+
+def test_mint_batch_preserves_order_inline():
+    service = TokenService(API_KEY, API_SECRET, inline_slice=3)
+    participants = [(f"caller_{i}", f"caller ({i})") for i in range(10)]
+
+    tokens = asyncio.run(service.mint_batch("room", participants))
+
+    assert [decode(token)["sub"] for token in tokens] == [identity for identity, _ in participants]
+
+
+def test_mint_batch_preserves_order_in_process_pool():
+    service = TokenService(API_KEY, API_SECRET, workers=2, pool_threshold=4)
+    participants = [(f"caller_{i}", "") for i in range(9)]
+    try:
+        tokens = asyncio.run(service.mint_batch("room", participants))
+    finally:
+        service.shutdown()
+
+    claims = [decode(token) for token in tokens]
+    assert [c["sub"] for c in claims] == [identity for identity, _ in participants]
+    assert all(c["video"]["room"] == "room" for c in claims)
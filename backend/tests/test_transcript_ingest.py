@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+import pytest
+
+from state_store import InMemoryStateStore
+from transcript_ingest import TranscriptIngestor, transcript_lines
+
+
+class CountingStore(InMemoryStateStore):
+    def __init__(self, fail: bool = False):
+        super().__init__()
+        self.fail = fail
+        self.writes = []
+
+    async def append_conversations(self, batch):
+        self.writes.append({room_name: list(lines) for room_name, lines in batch.items()})
+        if self.fail:
+            raise ConnectionError("store down")
+        await super().append_conversations(batch)
+
+
+def test_transcript_lines_skip_interim_and_empty_segments():
+    lines, ignored = transcript_lines([
+        {"speaker": "Caller ", "text": " I can't log in "},
+        {"speaker": "Agent A", "text": "Let me check", "is_final": False},
+        {"speaker": "Agent A", "text": "   "},
+        {"speaker": "Agent A", "text": "x" * 10},
+    ], max_line_chars=4)
+    assert lines == ["Caller: I ca", "Agent A: xxxx"]
+    assert ignored == 2
+    with pytest.raises(KeyError):
+        transcript_lines([{"text": "no speaker"}])
+
+
+def test_lines_linger_then_every_room_is_written_at_once():
+    async def scenario():
+        store = CountingStore()
+        flushed = []
+        ingestor = TranscriptIngestor(store, on_flushed=[lambda room, lines: flushed.append((room, lines))],
+                                      linger_seconds=0.1)
+        for i in range(3):
+            for room_name in ("room-a", "room-b"):
+                assert ingestor.offer(room_name, [f"Caller: {room_name} {i}"])
+        await asyncio.sleep(0.02)
+        early = list(store.writes)
+        await asyncio.sleep(0.2)
+        conversations = [await store.get_conversation(room_name) for room_name in ("room-a", "room-b")]
+        return early, store.writes, flushed, conversations, ingestor.stats()
+
+    early, writes, flushed, conversations, stats = asyncio.run(scenario())
+    assert early == []
+    assert len(writes) == 1
+    assert conversations == [[f"Caller: room-a {i}" for i in range(3)], [f"Caller: room-b {i}" for i in range(3)]]
+    # One callback per room and flush, with that room's lines in arrival order
+    assert flushed == [("room-a", conversations[0]), ("room-b", conversations[1])]
+    assert stats["pending_lines"] == 0 and stats["flushes"] >= 1
+
+
+def test_full_backlog_rejects_offers_and_holds_puts_until_a_flush():
+    async def scenario():
+        store = CountingStore()
+        ingestor = TranscriptIngestor(store, linger_seconds=0.05, max_pending=2)
+        assert ingestor.offer("room", ["a", "b"])
+        assert not ingestor.offer("room", ["c"])
+        # Waits for the linger flush to make room, then queues
+        assert await ingestor.put("room", ["c"], timeout=1)
+        assert len(store.writes) == 1
+        await ingestor.flush()
+        return await store.get_conversation("room")
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+
+
+def test_put_gives_up_after_its_timeout():
+    async def scenario():
+        ingestor = TranscriptIngestor(CountingStore(), linger_seconds=10, max_pending=2)
+        assert ingestor.offer("room", ["a", "b"])
+        accepted = await ingestor.put("room", ["c"], timeout=0.05)
+        await ingestor.shutdown()
+        return accepted, ingestor.stats()
+
+    accepted, stats = asyncio.run(scenario())
+    assert not accepted
+    assert stats["pending_lines"] == 0
+
+
+def test_failed_write_drops_the_batch_without_callbacks():
+    async def scenario():
+        store = CountingStore(fail=True)
+        flushed = []
+        ingestor = TranscriptIngestor(store, on_flushed=[lambda room, lines: flushed.append(room)], linger_seconds=10)
+        ingestor.offer("room", ["a", "b"])
+        written = await ingestor.flush()
+        dropped, notified = ingestor.stats()["dropped"], list(flushed)
+        store.fail = False
+        ingestor.offer("room", ["c"])
+        await ingestor.shutdown()
+        return written, dropped, notified, flushed, await store.get_conversation("room")
+
+    written, dropped, notified, flushed, conversation = asyncio.run(scenario())
+    assert written == 0 and dropped >= 2
+    assert notified == []
+    # The next flush writes only what arrived since
+    assert flushed == ["room"]
+    assert conversation == ["c"]
+
+
+def test_failing_callback_does_not_stop_the_others():
+    def broken(room_name, lines):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        flushed = []
+        ingestor = TranscriptIngestor(CountingStore(), on_flushed=[broken, lambda room, lines: flushed.append(room)],
+                                      linger_seconds=10)
+        ingestor.offer("room-a", ["a"])
+        ingestor.offer("room-b", ["b"])
+        count = await ingestor.flush()
+        await ingestor.shutdown()
+        return count, flushed
+
+    assert asyncio.run(scenario()) == (2, ["room-a", "room-b"])
+
+
+def test_backend_flush_refreshes_the_summary_and_notifies_subscribers(backend_main):
+    room_name = "transcript-flush-room"
+    prewarmer = backend_main.summary_prewarmer
+
+    async def scenario():
+        subscription = backend_main.room_events.subscribe(room_name)
+        version = prewarmer.version(room_name)
+        try:
+            assert backend_main.transcript_ingestor.offer(room_name, ["Caller: hello", "Agent A: hi"])
+            await backend_main.transcript_ingestor.flush()
+            event = json.loads(await subscription.get(timeout=1))
+            return event, prewarmer.version(room_name) - version
+        finally:
+            backend_main.room_events.unsubscribe(subscription)
+            prewarmer.forget(room_name)
+
+    event, changes = asyncio.run(scenario())
+    assert event == {"room_name": room_name, "type": "transcript", "lines": ["Caller: hello", "Agent A: hi"]}
+    assert changes == 1
+    assert asyncio.run(backend_main.state_store.get_conversation(room_name)) == ["Caller: hello", "Agent A: hi"]
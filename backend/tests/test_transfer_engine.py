@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from transfer_engine import (AGENT_B_BRIEFED, CALLER_MOVED, COMPLETED, FAILED, INITIATED, SUMMARIZING,
+                             TransferEngine, TransferStageError)
+from state_store import InMemoryStateStore
+
+
+class Stages:
+    """Transfer stages that record when they ran; any of them can be made to fail or hang"""
+
+    def __init__(self, fail: str = "", hang: str = ""):
+        self.fail = fail
+        self.hang = hang
+        self.ran = []
+
+    async def _run(self, stage: str, result):
+        self.ran.append(stage)
+        if stage == self.hang:
+            await asyncio.sleep(10)
+        if stage == self.fail:
+            raise RuntimeError(f"{stage} broke")
+        return result
+
+    async def summarize(self, record):
+        return await self._run("summarize", {"summary": "caller needs a refund", "stale": False,
+                                             "age_seconds": 0.0, "degraded": False})
+
+    async def brief(self, record):
+        return await self._run("brief", None)
+
+    async def move(self, record):
+        return await self._run("move", ["caller_1"])
+
+
+def engine(stages: Stages, **kwargs):
+    seen = []
+    transfers = TransferEngine(InMemoryStateStore(), stages.summarize, stages.brief, stages.move,
+                               on_transition=[lambda record: seen.append(record["status"])], **kwargs)
+    return transfers, seen
+
+
+async def run_to_end(transfers: TransferEngine, transfer_id: str = "t1"):
+    await transfers.start(transfer_id, "agent-a", "agent-b", "call")
+    try:
+        summary = await transfers.wait_for_summary(transfer_id)
+    except TransferStageError as e:
+        summary = e
+    while transfers.stats()["active"]:
+        await asyncio.sleep(0.005)
+    return summary, await transfers.store.get_transfer(transfer_id)
+
+
+def test_transfer_walks_every_state_in_order():
+    stages = Stages()
+    transfers, seen = engine(stages)
+    summary, record = asyncio.run(run_to_end(transfers))
+
+    assert seen == [INITIATED, SUMMARIZING, AGENT_B_BRIEFED, CALLER_MOVED, COMPLETED]
+    assert [t["state"] for t in record["transitions"]] == seen
+    assert stages.ran == ["summarize", "brief", "move"]
+    assert summary["summary"] == record["call_summary"] == "caller needs a refund"
+    assert record["moved_participants"] == ["caller_1"]
+    assert set(record["stage_seconds"]) == {SUMMARIZING, AGENT_B_BRIEFED, CALLER_MOVED}
+
+
+def test_failed_stage_fails_the_transfer_and_skips_the_rest():
+    stages = Stages(fail="brief")
+    transfers, seen = engine(stages)
+    summary, record = asyncio.run(run_to_end(transfers))
+
+    assert seen == [INITIATED, SUMMARIZING, FAILED]
+    assert stages.ran == ["summarize", "brief"]
+    assert record["failed_stage"] == AGENT_B_BRIEFED and "brief broke" in record["error"]
+    # The summary was ready before the failure
+    assert summary["summary"] == "caller needs a refund"
+
+
+def test_summary_failure_reaches_the_waiting_caller():
+    transfers, _ = engine(Stages(hang="summarize"), stage_timeout_seconds=0.05)
+    error, record = asyncio.run(run_to_end(transfers))
+
+    assert isinstance(error, TransferStageError) and error.stage == SUMMARIZING
+    assert "timed out" in str(error)
+    assert record["status"] == FAILED
+
+
+def test_caller_is_only_moved_after_agent_b_acknowledges():
+    async def scenario():
+        stages = Stages()
+        transfers, seen = engine(stages, require_brief_ack=True, brief_ack_timeout_seconds=5)
+        assert not transfers.acknowledge_briefing("t1")
+        await transfers.start("t1", "agent-a", "agent-b", "call")
+        await transfers.wait_for_summary("t1")
+        await asyncio.sleep(0.02)
+        waiting = (list(stages.ran), list(seen))
+
+        assert transfers.acknowledge_briefing("t1")
+        while transfers.stats()["active"]:
+            await asyncio.sleep(0.005)
+        return waiting, seen
+
+    (ran_before_ack, seen_before_ack), seen = asyncio.run(scenario())
+    assert ran_before_ack == ["summarize", "brief"]
+    assert seen_before_ack == [INITIATED, SUMMARIZING]
+    assert seen[-2:] == [CALLER_MOVED, COMPLETED]
+
+
+def test_missing_acknowledgement_times_out_without_moving_the_caller():
+    stages = Stages()
+    transfers, seen = engine(stages, require_brief_ack=True, brief_ack_timeout_seconds=0.05)
+    _, record = asyncio.run(run_to_end(transfers))
+
+    assert "move" not in stages.ran
+    assert seen == [INITIATED, SUMMARIZING, FAILED]
+    assert record["failed_stage"] == AGENT_B_BRIEFED and "timed out" in record["error"]
+
+
+def test_shutdown_fails_running_transfers():
+    async def scenario():
+        transfers, seen = engine(Stages(hang="move"))
+        await transfers.start("t1", "agent-a", "agent-b", "call")
+        await transfers.wait_for_summary("t1")
+        await asyncio.sleep(0.01)
+        await transfers.shutdown()
+        return seen, await transfers.store.get_transfer("t1"), transfers.stats()
+
+    seen, record, stats = asyncio.run(scenario())
+    assert seen[-1] == FAILED and record["failed_stage"] == CALLER_MOVED
+    assert stats["active"] == 0
+
+
+@pytest.mark.parametrize("fail, settled", [("move", "available"), ("", "busy")])
+def test_agent_reservation_is_released_on_failure_and_kept_on_completion(backend_main, fail, settled):
+    pool = backend_main.agent_pool
+    agent_id = f"engine-test-{fail or 'ok'}"
+    pool.register(agent_id, f"{agent_id}-room", capacity=1)
+    transfer_id = f"transfer-{agent_id}"
+    assert pool.claim(f"{agent_id}-room", transfer_id).agent_id == agent_id
+
+    stages = Stages(fail=fail)
+    transfers = TransferEngine(InMemoryStateStore(), stages.summarize, stages.brief, stages.move,
+                               on_transition=[backend_main._settle_agent_reservation])
+    try:
+        asyncio.run(run_to_end(transfers, transfer_id))
+        agent = pool.get(agent_id)
+        assert not agent.reservations
+        assert ("available" if agent.busy == 0 else "busy") == settled
+    finally:
+        pool.remove(agent_id)
+
+
+def test_caller_is_not_moved_by_default(backend_main):
+    assert not backend_main.TRANSFER_MOVE_CALLER
+    assert not backend_main.transfer_engine.require_brief_ack
+    record = {"caller_room": "call", "to_room": "agent-b"}
+    assert asyncio.run(backend_main._move_caller(record)) == []
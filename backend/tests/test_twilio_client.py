@@ -0,0 +1,145 @@
+import asyncio
+import socket
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from metrics import registry
+from twilio_client import TwilioAPIError, TwilioRestClient
+
+
+class ScriptedTwilio:
+    """Local server answering each request with the next scripted (status, body, headers, delay)"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        self._runner = None
+
+    async def _handle(self, request):
+        self.requests.append((request.path, dict(await request.post())))
+        status, body, headers, delay = self.responses.pop(0)
+        await asyncio.sleep(delay)
+        if isinstance(body, dict):
+            return web.json_response(body, status=status, headers=headers)
+        return web.Response(text=body, status=status, headers=headers)
+
+    async def __aenter__(self) -> str:
+        app = web.Application()
+        app.router.add_post("/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def __aexit__(self, *exc_info):
+        await self._runner.cleanup()
+
+
+def reply(status: int = 201, body=None, headers=None, delay: float = 0.0):
+    return status, {"sid": "CA123", "status": "queued"} if body is None else body, headers or {}, delay
+
+
+def client(url: str, **kwargs) -> TwilioRestClient:
+    return TwilioRestClient("AC123", "token", base_url=url, backoff_base_seconds=0.001, **kwargs)
+
+
+def counter(name: str, method: str) -> float:
+    return registry.counter(name, labels={"method": method}).value
+
+
+def call(twilio: ScriptedTwilio, request, **kwargs):
+    """Run request(client) against the scripted server; returns (result or exception, seconds)"""
+    async def scenario():
+        async with twilio as url:
+            rest = client(url, **kwargs)
+            started = time.perf_counter()
+            try:
+                return await request(rest), time.perf_counter() - started
+            except Exception as e:
+                return e, time.perf_counter() - started
+            finally:
+                await rest.close()
+
+    return asyncio.run(scenario())
+
+
+def create_call(rest: TwilioRestClient):
+    return rest.create_call("+15550001111", "+15550002222", "https://example.com/twiml")
+
+
+def test_unavailable_responses_are_retried_until_one_succeeds():
+    retries = counter("twilio_api_retries_total", "create_call")
+    twilio = ScriptedTwilio(reply(503, {"message": "busy"}), reply(502, "bad gateway"), reply())
+
+    result, _ = call(twilio, create_call)
+    assert result == {"sid": "CA123", "status": "queued"}
+    assert len(twilio.requests) == 3
+    path, form = twilio.requests[0]
+    assert path == "/2010-04-01/Accounts/AC123/Calls.json"
+    assert form == {"To": "+15550001111", "From": "+15550002222", "Url": "https://example.com/twiml", "Method": "POST"}
+    assert counter("twilio_api_retries_total", "create_call") == retries + 2
+
+
+def test_retry_after_is_honoured_up_to_the_backoff_cap():
+    twilio = ScriptedTwilio(reply(429, {"message": "slow down"}, {"Retry-After": "0.3"}), reply())
+    result, elapsed = call(twilio, create_call)
+    assert result["sid"] == "CA123"
+    assert elapsed >= 0.3
+
+    # A huge Retry-After is capped at backoff_max_seconds
+    twilio = ScriptedTwilio(reply(429, {"message": "slow down"}, {"Retry-After": "60"}), reply())
+    result, elapsed = call(twilio, create_call, backoff_max_seconds=0.05)
+    assert result["sid"] == "CA123"
+    assert elapsed < 5
+
+
+def test_client_errors_are_mapped_and_not_retried():
+    errors = counter("twilio_api_errors_total", "create_message")
+    twilio = ScriptedTwilio(reply(400, {"code": 21211, "message": "Invalid 'To' Phone Number"}))
+
+    error, _ = call(twilio, lambda rest: rest.create_message("bad", "+15550002222", "hi"))
+    assert isinstance(error, TwilioAPIError)
+    assert (error.status, error.code) == (400, 21211)
+    assert "Invalid 'To' Phone Number" in str(error)
+    assert len(twilio.requests) == 1
+    assert counter("twilio_api_errors_total", "create_message") == errors + 1
+
+
+def test_last_retryable_failure_is_raised_with_the_reason_when_the_body_is_not_json():
+    twilio = ScriptedTwilio(*[reply(503, "<html>down</html>")] * 3)
+    error, _ = call(twilio, lambda rest: rest.end_call("CA123"))
+    assert isinstance(error, TwilioAPIError)
+    assert (error.status, error.code) == (503, None)
+    assert "Service Unavailable" in str(error)
+    assert [path for path, _ in twilio.requests] == ["/2010-04-01/Accounts/AC123/Calls/CA123.json"] * 3
+
+
+def test_timeouts_are_not_retried():
+    # The call may already have been placed, so sending it again could dial twice
+    twilio = ScriptedTwilio(reply(delay=1.0), reply())
+    error, elapsed = call(twilio, create_call, timeout_seconds=0.2)
+    assert isinstance(error, asyncio.TimeoutError)
+    assert len(twilio.requests) == 1
+    assert elapsed < 1.0
+
+
+def test_refused_connections_are_retried_then_raised():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    retries = counter("twilio_api_retries_total", "create_call")
+
+    async def scenario():
+        rest = client(f"http://127.0.0.1:{port}", max_attempts=3)
+        try:
+            with pytest.raises(aiohttp.ClientConnectorError):
+                await create_call(rest)
+        finally:
+            await rest.close()
+
+    asyncio.run(scenario())
+    assert counter("twilio_api_retries_total", "create_call") == retries + 2
@@ -0,0 +1,71 @@
+import pytest
+from twilio.twiml.voice_response import VoiceResponse
+
+from twiml_templates import TwiMLCache, TwiMLTemplate
+
+
+def conference_builder(conference_name: str, call_summary: str) -> str:
+    response = VoiceResponse()
+    response.say(f"Warm transfer initiated. Call summary: {call_summary}")
+    response.dial().conference(conference_name)
+    return str(response)
+
+
+def caller_builder(conference_name: str) -> str:
+    response = VoiceResponse()
+    response.say("Please hold while we connect you to the next available agent.")
+    response.dial().conference(conference_name)
+    return str(response)
+
+
+def cache(max_entries: int = 16) -> TwiMLCache:
+    return TwiMLCache(
+        TwiMLTemplate.compile(conference_builder, ("conference_name", "call_summary")),
+        TwiMLTemplate.compile(caller_builder, ("conference_name",)),
+        max_entries=max_entries,
+    )
+
+
+@pytest.mark.parametrize("conference_name, call_summary", [
+    ("conf-1", "Caller wants a refund."),
+    ("conf & <2>", "Summary with \"quotes\", 'apostrophes' & <tags>"),
+    ("conf-3", "__twiml_slot_conference_name__ must not be substituted twice"),
+])
+def test_rendering_matches_the_builder(conference_name, call_summary):
+    template = TwiMLTemplate.compile(conference_builder, ("conference_name", "call_summary"))
+    assert template.render(conference_name=conference_name, call_summary=call_summary) == \
+        conference_builder(conference_name, call_summary)
+
+
+def test_compile_rejects_builder_without_slot():
+    with pytest.raises(ValueError, match="call_summary"):
+        TwiMLTemplate.compile(lambda conference_name, call_summary: f"<Response>{conference_name}</Response>",
+                              ("conference_name", "call_summary"))
+
+
+def test_cache_hits_and_keys_on_summary():
+    twiml = cache()
+    first = twiml.conference("conf", "summary one")
+    assert twiml.conference("conf", "summary one") is first
+    assert twiml.conference("conf", "summary two") != first
+    assert twiml.caller("conf") == caller_builder("conf").encode("utf-8")
+
+    stats = twiml.stats()
+    assert stats["entries"] == 3
+    assert stats["hits"] >= 1
+
+
+def test_cache_is_bounded_lru():
+    twiml = cache(max_entries=2)
+    twiml.caller("a")
+    twiml.caller("b")
+    twiml.caller("a")
+    twiml.caller("c")
+
+    assert [key[1] for key in twiml._entries] == ["a", "c"]
+
+
+def test_cache_disabled_still_renders():
+    twiml = cache(max_entries=0)
+    assert twiml.caller("a") == caller_builder("a").encode("utf-8")
+    assert twiml.stats()["entries"] == 0
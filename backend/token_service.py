@@ -0,0 +1,205 @@
+"""
+Access Token Service
+Fast LiveKit access-token minting with cached grant templates and batch signing
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from metrics import registry
+from startup import livekit_api
+
+# Grant sets handed out by the API, keyed by profile name
+GRANT_PROFILES: Dict[str, Dict] = {
+    "participant": {"room_join": True, "can_publish": True, "can_subscribe": True},
+}
+
+DEFAULT_TOKEN_TTL_SECONDS = 6 * 60 * 60  # matches livekit.api.AccessToken
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+# Constant JOSE header for HS256, encoded once
+_HEADER_SEGMENT = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+
+
+class TokenMinter:
+    """
+    HS256 signer producing the same claims as livekit.api.AccessToken.to_jwt
+
+    The keyed HMAC state is built once and copied per token, and the claims
+    that only depend on room and grants come from a prebuilt template, so
+    minting is one dict merge, one json.dumps and one HMAC.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, ttl_seconds: int = DEFAULT_TOKEN_TTL_SECONDS):
+        self.api_key = api_key
+        self.ttl_seconds = ttl_seconds
+        self._mac = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+
+    def build_template(self, room_name: str, profile: str) -> Dict:
+        api = livekit_api.get()
+        grants = api.VideoGrants(room=room_name, **GRANT_PROFILES[profile])
+        # Reuse the SDK's claim serialization so field names stay in sync
+        claims = api.access_token.Claims(video=grants).asdict()
+        claims["iss"] = self.api_key
+        return claims
+
+    def mint(self, template: Dict, identity: str, name: str, now: Optional[int] = None) -> str:
+        now = int(time.time()) if now is None else now
+        claims = dict(template)
+        if name:
+            claims["name"] = name
+        claims["sub"] = identity
+        claims["nbf"] = now
+        claims["exp"] = now + self.ttl_seconds
+        signing_input = _HEADER_SEGMENT + "." + _b64url(json.dumps(claims, separators=(",", ":")).encode())
+        mac = self._mac.copy()
+        mac.update(signing_input.encode("ascii"))
+        return signing_input + "." + _b64url(mac.digest())
+
+    def mint_many(self, template: Dict, participants: List[Tuple[str, str]]) -> List[str]:
+        now = int(time.time())
+        return [self.mint(template, identity, name, now) for identity, name in participants]
+
+
+# Worker-process state for batch signing
+_worker_minter: Optional[TokenMinter] = None
+
+
+def _init_worker(api_key: str, api_secret: str, ttl_seconds: int):
+    global _worker_minter
+    _worker_minter = TokenMinter(api_key, api_secret, ttl_seconds)
+
+
+def _mint_chunk(template: Dict, participants: List[Tuple[str, str]]) -> List[str]:
+    return _worker_minter.mint_many(template, participants)
+
+
+class TokenService:
+    """
+    Mints participant tokens for the room routes.
+
+    Grant templates are cached per (room, profile) for template_ttl_seconds,
+    bounded to template_cache_size rooms. mint_batch() signs inline in slices
+    that yield to the event loop; with workers > 0, batches of at least
+    pool_threshold tokens are split across a process pool instead, since
+    HMAC on small inputs holds the GIL and threads would not help.
+    """
+
+    def __init__(self,
+                 api_key: str,
+                 api_secret: str,
+                 ttl_seconds: int = DEFAULT_TOKEN_TTL_SECONDS,
+                 template_ttl_seconds: float = 60.0,
+                 template_cache_size: int = 1024,
+                 workers: int = 0,
+                 pool_threshold: int = 256,
+                 inline_slice: int = 128):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.ttl_seconds = ttl_seconds
+        self.template_ttl_seconds = template_ttl_seconds
+        self.template_cache_size = template_cache_size
+        self.workers = workers
+        self.pool_threshold = pool_threshold
+        self.inline_slice = inline_slice
+        self.minter = TokenMinter(api_key, api_secret, ttl_seconds)
+        self._templates: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self._minted = registry.counter("tokens_minted_total", "Access tokens minted")
+        self._template_hits = registry.counter("token_template_cache_hits_total", "Grant templates served from cache")
+        self._template_misses = registry.counter("token_template_cache_misses_total", "Grant templates built")
+        self._batch_duration = registry.histogram("token_batch_duration_seconds", "Time to mint one token batch")
+
+    def template(self, room_name: str, profile: str = "participant") -> Dict:
+        if profile not in GRANT_PROFILES:
+            raise ValueError(f"Unknown grant profile: {profile}")
+        key = (room_name, profile)
+        entry = self._templates.get(key)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            self._templates.move_to_end(key)
+            self._template_hits.inc()
+            return entry[1]
+
+        self._template_misses.inc()
+        template = self.minter.build_template(room_name, profile)
+        self._templates[key] = (now + self.template_ttl_seconds, template)
+        self._templates.move_to_end(key)
+        while len(self._templates) > self.template_cache_size:
+            self._templates.popitem(last=False)
+        return template
+
+    def mint(self, room_name: str, identity: str, name: str = "", profile: str = "participant") -> str:
+        token = self.minter.mint(self.template(room_name, profile), identity, name)
+        self._minted.inc()
+        return token
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.api_key, self.api_secret, self.ttl_seconds),
+            )
+        return self._pool
+
+    async def mint_batch(self,
+                         room_name: str,
+                         participants: List[Tuple[str, str]],
+                         profile: str = "participant") -> List[str]:
+        """Mint one token per (identity, name) for a room, preserving order"""
+        started = time.perf_counter()
+        template = self.template(room_name, profile)
+
+        if self.workers > 0 and len(participants) >= self.pool_threshold:
+            loop = asyncio.get_running_loop()
+            chunk_size = math.ceil(len(participants) / self.workers)
+            chunks = [participants[i:i + chunk_size] for i in range(0, len(participants), chunk_size)]
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self._get_pool(), _mint_chunk, template, chunk) for chunk in chunks
+            ))
+            tokens = [token for chunk in results for token in chunk]
+        else:
+            tokens = []
+            for i in range(0, len(participants), self.inline_slice):
+                if i:
+                    # Let other requests run between slices of a large batch
+                    await asyncio.sleep(0)
+                tokens.extend(self.minter.mint_many(template, participants[i:i + self.inline_slice]))
+
+        self._minted.inc(len(tokens))
+        self._batch_duration.observe(time.perf_counter() - started)
+        return tokens
+
+    def forget(self, room_name: str):
+        for key in [key for key in self._templates if key[0] == room_name]:
+            del self._templates[key]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict:
+        return {
+            "minted": int(self._minted.value),
+            "templates": len(self._templates),
+            "template_hits": int(self._template_hits.value),
+            "template_misses": int(self._template_misses.value),
+            "workers": self.workers,
+            "pool_threshold": self.pool_threshold,
+            "batch_p95_seconds": self._batch_duration.quantile(0.95),
+        }
@@ -0,0 +1,166 @@
+"""
+Transcript Ingestion
+Coalesced writes of speech-to-text segments into rooms' conversations
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from metrics import registry
+from state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+def transcript_lines(segments: Iterable[Dict], max_line_chars: int = 2000) -> Tuple[List[str], int]:
+    """
+    Conversation lines ("Speaker: text") for final segments; returns (lines, ignored)
+
+    Interim hypotheses (is_final false) and empty segments are ignored.
+    Raises KeyError/TypeError/AttributeError on malformed segments.
+    """
+    lines = []
+    ignored = 0
+    for segment in segments:
+        text = segment["text"].strip()
+        if not segment.get("is_final", True) or not text:
+            ignored += 1
+            continue
+        lines.append(f"{segment['speaker'].strip()}: {text[:max_line_chars]}")
+    return lines, ignored
+
+
+class TranscriptIngestor:
+    """
+    Buffers transcript lines per room and writes them in batches.
+
+    offer()/put() only append to an in-memory pending map. A single flush
+    task waits linger_seconds after the first pending line, then writes every
+    room's pending lines with one append_conversations() call and runs the
+    on_flushed callbacks once per room (summary refresh, room event), so a
+    burst of segments across many rooms costs one store write per flush
+    instead of one per segment. Lines of a room are written in arrival order.
+
+    At most max_pending lines wait to be written: offer() rejects beyond
+    that (HTTP answers 429) while put() waits up to a timeout for the next
+    flush, which pushes back on WebSocket senders instead of dropping.
+    """
+
+    def __init__(self,
+                 store: StateStore,
+                 on_flushed: Optional[List[Callable[[str, List[str]], None]]] = None,
+                 linger_seconds: float = 0.05,
+                 max_pending: int = 50000):
+        self.store = store
+        self.on_flushed = on_flushed or []
+        self.linger_seconds = linger_seconds
+        self.max_pending = max_pending
+        self._pending: Dict[str, List[str]] = {}
+        self._pending_count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._drained = asyncio.Event()
+
+        self._accepted = registry.counter("transcript_lines_accepted_total", "Transcript lines queued for writing")
+        self._rejected = registry.counter("transcript_lines_rejected_total", "Transcript lines refused because the backlog was full")
+        self._written = registry.counter("transcript_lines_written_total", "Transcript lines written to the state store")
+        self._dropped = registry.counter("transcript_lines_dropped_total", "Transcript lines lost to failed store writes")
+        self._pending_gauge = registry.gauge("transcript_pending_lines", "Transcript lines waiting for the next flush")
+        self._flush_duration = registry.histogram("transcript_flush_duration_seconds", "Time to write one batch of transcript lines")
+        self._flush_rooms = registry.histogram(
+            "transcript_flush_rooms", "Rooms written per transcript flush",
+            buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+        )
+
+    def _queue(self, room_name: str, lines: List[str]):
+        self._pending.setdefault(room_name, []).extend(lines)
+        self._pending_count += len(lines)
+        self._pending_gauge.set(self._pending_count)
+        self._accepted.inc(len(lines))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def offer(self, room_name: str, lines: List[str]) -> bool:
+        """Queue lines without waiting; False (nothing queued) if the backlog is full"""
+        if not lines:
+            return True
+        if self._pending_count + len(lines) > self.max_pending:
+            self._rejected.inc(len(lines))
+            return False
+        self._queue(room_name, lines)
+        return True
+
+    async def put(self, room_name: str, lines: List[str], timeout: float = 5.0) -> bool:
+        """Queue lines, waiting up to timeout for a flush to make room"""
+        if not lines:
+            return True
+        deadline = time.monotonic() + timeout
+        while self._pending_count and self._pending_count + len(lines) > self.max_pending:
+            self._drained.clear()
+            remaining = deadline - time.monotonic()
+            try:
+                await asyncio.wait_for(self._drained.wait(), remaining if remaining > 0 else 0)
+            except asyncio.TimeoutError:
+                self._rejected.inc(len(lines))
+                return False
+        self._queue(room_name, lines)
+        return True
+
+    async def _run(self):
+        while self._pending:
+            await asyncio.sleep(self.linger_seconds)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write everything pending now; returns the number of lines written"""
+        async with self._write_lock:
+            batch, self._pending = self._pending, {}
+            count, self._pending_count = self._pending_count, 0
+            self._pending_gauge.set(0)
+            self._drained.set()
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                await self.store.append_conversations(batch)
+            except Exception as e:
+                self._dropped.inc(count)
+                logger.warning("Transcript flush failed", extra={"rooms": len(batch), "lines": count, "error": str(e)})
+                return 0
+            self._flush_duration.observe(time.perf_counter() - started)
+            self._flush_rooms.observe(len(batch))
+            self._written.inc(count)
+
+            for index, (room_name, lines) in enumerate(batch.items()):
+                if index and index % 256 == 0:
+                    # Let other tasks run between chunks of a very wide flush
+                    await asyncio.sleep(0)
+                for callback in self.on_flushed:
+                    try:
+                        callback(room_name, lines)
+                    except Exception as e:
+                        logger.warning("Transcript flush callback failed", extra={"room_name": room_name, "error": str(e)})
+            return count
+
+    async def shutdown(self):
+        """Write whatever is still pending"""
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "pending_lines": self._pending_count,
+            "pending_rooms": len(self._pending),
+            "max_pending": self.max_pending,
+            "linger_seconds": self.linger_seconds,
+            "accepted": int(self._accepted.value),
+            "rejected": int(self._rejected.value),
+            "written": int(self._written.value),
+            "dropped": int(self._dropped.value),
+            "flushes": self._flush_duration.count,
+        }
@@ -0,0 +1,256 @@
+"""
+Transfer Engine
+Warm-transfer state machine with timed, asynchronous stages
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from metrics import registry
+from state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+INITIATED = "initiated"
+SUMMARIZING = "summarizing"
+AGENT_B_BRIEFED = "agent_b_briefed"
+CALLER_MOVED = "caller_moved"
+COMPLETED = "completed"
+FAILED = "failed"
+
+TERMINAL_STATES = (COMPLETED, FAILED)
+
+# Allowed transitions; any non-terminal state may also go to FAILED
+TRANSITIONS: Dict[str, tuple] = {
+    INITIATED: (SUMMARIZING,),
+    SUMMARIZING: (AGENT_B_BRIEFED,),
+    AGENT_B_BRIEFED: (CALLER_MOVED,),
+    CALLER_MOVED: (COMPLETED,),
+    COMPLETED: (),
+    FAILED: (),
+}
+
+
+class TransferStageError(Exception):
+    """A stage failed or timed out; the transfer is marked failed"""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"{stage}: {message}")
+        self.stage = stage
+
+
+class TransferEngine:
+    """
+    Drives each transfer through
+    initiated -> summarizing -> agent_b_briefed -> caller_moved -> completed,
+    or to failed from any stage.
+
+    The stages themselves are supplied by the app:
+      - summarize(record) returns {"summary", "stale", "age_seconds", "degraded"}
+      - brief(record) hands the summary to Agent B
+      - move(record) moves the caller into Agent B's room and returns the
+        identities moved
+
+    start() persists the initiated record and runs the rest in a background
+    task. Every transition is appended to the record's "transitions" with a
+    timestamp, saved to the state store and passed to on_transition. Each
+    stage is bounded by stage_timeout_seconds; its duration is observed in
+    transfer_stage_duration_seconds{stage}, and the end-to-end time in
+    transfer_duration_seconds{outcome}. When require_brief_ack is set, the
+    briefing stage also waits for acknowledge_briefing() (Agent B confirming
+    it has read the summary), bounded by brief_ack_timeout_seconds.
+    """
+
+    def __init__(self,
+                 store: StateStore,
+                 summarize: Callable[[Dict], Awaitable[Dict]],
+                 brief: Callable[[Dict], Awaitable[None]],
+                 move: Callable[[Dict], Awaitable[List[str]]],
+                 on_transition: Optional[List[Callable[[Dict], None]]] = None,
+                 stage_timeout_seconds: float = 20.0,
+                 require_brief_ack: bool = False,
+                 brief_ack_timeout_seconds: float = 120.0):
+        self.store = store
+        self.summarize = summarize
+        self.brief = brief
+        self.move = move
+        self.on_transition = list(on_transition or [])
+        self.stage_timeout_seconds = stage_timeout_seconds
+        self.require_brief_ack = require_brief_ack
+        self.brief_ack_timeout_seconds = brief_ack_timeout_seconds
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._summaries: Dict[str, asyncio.Future] = {}
+        self._brief_acks: Dict[str, asyncio.Event] = {}
+
+        self._started = registry.counter("transfers_started_total", "Transfers initiated")
+        self._outcomes = {
+            outcome: registry.counter("transfers_finished_total", "Transfers that reached a terminal state", {"outcome": outcome})
+            for outcome in TERMINAL_STATES
+        }
+        self._active = registry.gauge("transfers_active", "Transfers with a running orchestration task")
+        self._stage_duration = {
+            stage: registry.histogram("transfer_stage_duration_seconds", "Time spent reaching each transfer state", {"stage": stage})
+            for stage in (SUMMARIZING, AGENT_B_BRIEFED, CALLER_MOVED)
+        }
+        self._total_duration = {
+            outcome: registry.histogram("transfer_duration_seconds", "End-to-end transfer time", {"outcome": outcome})
+            for outcome in TERMINAL_STATES
+        }
+
+    async def _transition(self, record: Dict, state: str, **fields):
+        current = record["status"]
+        if state != FAILED and state not in TRANSITIONS[current]:
+            raise ValueError(f"Invalid transfer transition {current} -> {state}")
+        record.update(fields)
+        record["status"] = state
+        record["transitions"].append({"state": state, "at": datetime.now().isoformat()})
+        await self.store.save_transfer(record["transfer_id"], record)
+        for callback in self.on_transition:
+            callback(record)
+
+    async def start(self, transfer_id: str, from_room: str, to_room: str, caller_room: str, tenant: str = "") -> Dict:
+        """Persist a new transfer and start orchestrating it in the background"""
+        record = {
+            "transfer_id": transfer_id,
+            "from_room": from_room,
+            "to_room": to_room,
+            "caller_room": caller_room,
+            "tenant": tenant,
+            "status": INITIATED,
+            "created_at": datetime.now().isoformat(),
+            "transitions": [],
+            "stage_seconds": {},
+        }
+        record["transitions"].append({"state": INITIATED, "at": record["created_at"]})
+        await self.store.save_transfer(transfer_id, record)
+        for callback in self.on_transition:
+            callback(record)
+
+        self._started.inc()
+        self._summaries[transfer_id] = asyncio.get_running_loop().create_future()
+        if self.require_brief_ack:
+            self._brief_acks[transfer_id] = asyncio.Event()
+        self._tasks[transfer_id] = asyncio.create_task(self._run(record))
+        self._active.inc()
+        return record
+
+    async def wait_for_summary(self, transfer_id: str) -> Dict:
+        """
+        Wait until the summarizing stage has finished and return its result
+
+        Raises TransferStageError if the transfer failed before a summary was ready.
+        """
+        future = self._summaries.get(transfer_id)
+        if future is None:
+            raise KeyError(transfer_id)
+        return await asyncio.shield(future)
+
+    def acknowledge_briefing(self, transfer_id: str) -> bool:
+        """Agent B confirms the briefing; False if this worker isn't waiting for one"""
+        event = self._brief_acks.get(transfer_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+
+    async def _stage(self, record: Dict, stage: str, work: Awaitable, timeout: Optional[float] = None):
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(work, timeout or self.stage_timeout_seconds)
+        except asyncio.TimeoutError:
+            raise TransferStageError(stage, "timed out")
+        except TransferStageError:
+            raise
+        except Exception as e:
+            raise TransferStageError(stage, str(e))
+        elapsed = time.perf_counter() - started
+        self._stage_duration[stage].observe(elapsed)
+        record["stage_seconds"][stage] = round(elapsed, 4)
+        return result
+
+    async def _brief(self, record: Dict):
+        await self.brief(record)
+        event = self._brief_acks.get(record["transfer_id"])
+        if event is not None:
+            await event.wait()
+
+    async def _run(self, record: Dict):
+        transfer_id = record["transfer_id"]
+        summary_future = self._summaries[transfer_id]
+        started = time.perf_counter()
+        stage = SUMMARIZING
+        try:
+            await self._transition(record, SUMMARIZING)
+            summary = await self._stage(record, SUMMARIZING, self.summarize(record))
+            record["call_summary"] = summary["summary"]
+            summary_future.set_result(summary)
+
+            stage = AGENT_B_BRIEFED
+            brief_timeout = self.brief_ack_timeout_seconds if self.require_brief_ack else None
+            await self._stage(record, AGENT_B_BRIEFED, self._brief(record), brief_timeout)
+            await self._transition(record, AGENT_B_BRIEFED)
+
+            stage = CALLER_MOVED
+            moved = await self._stage(record, CALLER_MOVED, self.move(record))
+            await self._transition(record, CALLER_MOVED, moved_participants=moved)
+
+            outcome = COMPLETED
+            await self._transition(record, COMPLETED)
+        except asyncio.CancelledError:
+            outcome = FAILED
+            await self._fail(record, summary_future, TransferStageError(stage, "interrupted by shutdown"))
+            raise
+        except Exception as e:
+            outcome = FAILED
+            error = e if isinstance(e, TransferStageError) else TransferStageError(stage, str(e))
+            await self._fail(record, summary_future, error)
+        finally:
+            record["total_seconds"] = round(time.perf_counter() - started, 4)
+            self._total_duration[outcome].observe(record["total_seconds"])
+            self._outcomes[outcome].inc()
+            self._active.dec()
+            self._tasks.pop(transfer_id, None)
+            self._summaries.pop(transfer_id, None)
+            self._brief_acks.pop(transfer_id, None)
+            try:
+                await self.store.save_transfer(transfer_id, record)
+            except Exception as e:
+                logger.error("Failed to save transfer", extra={"transfer_id": transfer_id, "error": str(e)})
+
+    async def _fail(self, record: Dict, summary_future: asyncio.Future, error: TransferStageError):
+        logger.warning("Transfer failed", extra={
+            "transfer_id": record["transfer_id"],
+            "stage": error.stage,
+            "error": str(error),
+        })
+        if not summary_future.done():
+            summary_future.set_exception(error)
+            # Nobody may be waiting for the summary; don't log it as unretrieved
+            summary_future.exception()
+        try:
+            await self._transition(record, FAILED, error=str(error), failed_stage=error.stage)
+        except Exception as e:
+            logger.error("Failed to record transfer failure", extra={"transfer_id": record["transfer_id"], "error": str(e)})
+
+    async def shutdown(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "active": len(self._tasks),
+            "started": int(self._started.value),
+            "completed": int(self._outcomes[COMPLETED].value),
+            "failed": int(self._outcomes[FAILED].value),
+            "stage_timeout_seconds": self.stage_timeout_seconds,
+            "require_brief_ack": self.require_brief_ack,
+            "stage_p95_seconds": {
+                stage: histogram.quantile(0.95) for stage, histogram in self._stage_duration.items()
+            },
+            "total_p95_seconds": self._total_duration[COMPLETED].quantile(0.95),
+        }
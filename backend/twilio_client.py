@@ -0,0 +1,148 @@
+"""
+Twilio REST Client
+Async Twilio API transport with a pooled HTTP session, per-call timeouts and jittered retries
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean Twilio did not act on the request, so it is safe to send again
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+
+
+class TwilioAPIError(Exception):
+    def __init__(self, status: int, message: str, code: Optional[int] = None):
+        super().__init__(f"Twilio API error {status}: {message}")
+        self.status = status
+        self.code = code
+
+
+class TwilioRestClient:
+    """
+    Minimal async client for the Twilio endpoints the transfer flow uses.
+
+    One aiohttp session with a keep-alive connection pool is shared by all
+    calls and closed on shutdown, so dialing out never blocks the event loop
+    and never pays a fresh TLS handshake. Each request is bounded by
+    timeout_seconds. Requests that Twilio provably did not act on
+    (failed connects and 429/502/503/504) are retried up to max_attempts
+    with full-jitter exponential backoff, honouring Retry-After; timeouts
+    are not retried, since a call that was already placed would be dialed twice.
+    base_url can point at a local mock server.
+    """
+
+    def __init__(self,
+                 account_sid: str,
+                 auth_token: str,
+                 base_url: str = "https://api.twilio.com",
+                 pool_size: int = 20,
+                 keepalive_seconds: float = 30.0,
+                 timeout_seconds: float = 10.0,
+                 max_attempts: int = 3,
+                 backoff_base_seconds: float = 0.2,
+                 backoff_max_seconds: float = 2.0):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.keepalive_seconds = keepalive_seconds
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _call_metrics(self, method: str):
+        labels = {"method": method}
+        return (
+            registry.histogram("twilio_api_duration_seconds", "Twilio API call latency, including retries", labels),
+            registry.counter("twilio_api_retries_total", "Twilio API requests retried", labels),
+            registry.counter("twilio_api_errors_total", "Twilio API calls that failed", labels),
+        )
+
+    async def start(self):
+        if self._session is not None:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            keepalive_timeout=self.keepalive_seconds,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            auth=aiohttp.BasicAuth(self.account_sid, self.auth_token),
+            timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max_seconds))
+            except ValueError:
+                pass
+        return delay
+
+    async def _post(self, method: str, path: str, data: Dict[str, str]) -> Dict:
+        await self.start()
+        url = f"{self.base_url}/2010-04-01/Accounts/{self.account_sid}/{path}"
+        duration, retries, errors = self._call_metrics(method)
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.max_attempts):
+                last_attempt = attempt == self.max_attempts - 1
+                try:
+                    async with self._session.post(url, data=data) as response:
+                        if response.status < 400:
+                            return await response.json(content_type=None)
+                        if response.status not in RETRYABLE_STATUSES or last_attempt:
+                            try:
+                                body = await response.json(content_type=None)
+                            except ValueError:
+                                body = {}
+                            raise TwilioAPIError(response.status, body.get("message", response.reason), body.get("code"))
+                        retry_after = response.headers.get("Retry-After")
+                except (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError) as e:
+                    # The request never reached Twilio; read timeouts and dropped responses propagate
+                    if last_attempt:
+                        raise
+                    retry_after = None
+                    logger.debug("Twilio connection failed, retrying", extra={"method": method, "error": str(e)})
+                retries.inc()
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started)
+
+    async def create_call(self, to: str, from_: str, url: str, method: str = "POST") -> Dict:
+        return await self._post("create_call", "Calls.json", {"To": to, "From": from_, "Url": url, "Method": method})
+
+    async def end_call(self, call_sid: str) -> Dict:
+        return await self._post("end_call", f"Calls/{call_sid}.json", {"Status": "completed"})
+
+    async def create_message(self, to: str, from_: str, body: str) -> Dict:
+        return await self._post("create_message", "Messages.json", {"To": to, "From": from_, "Body": body})
+
+    def stats(self) -> Dict:
+        return {
+            "connected": self._session is not None,
+            "pool_size": self.pool_size,
+            "timeout_seconds": self.timeout_seconds,
+            "max_attempts": self.max_attempts,
+        }
@@ -2,85 +2,123 @@
 Optional Twilio Integration for Real Phone Number Transfers
 """
 
+import asyncio
+import logging
 import os
-from twilio.rest import Client
-from twilio.twiml import VoiceResponse
-from typing import Optional
+import time
+from typing import Dict, Optional
+from urllib.parse import quote, urlencode
+
+from fastapi import HTTPException, Response
+from twilio.twiml.voice_response import VoiceResponse
+
+from metrics import registry
+from twilio_client import TwilioRestClient
+from twiml_templates import TwiMLCache, TwiMLTemplate
+
+logger = logging.getLogger(__name__)
 
 class TwilioIntegration:
     def __init__(self):
         self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
         self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
         self.phone_number = os.getenv("TWILIO_PHONE_NUMBER")
-        
+        # Public base URL Twilio fetches the conference TwiML from (this backend)
+        self.webhook_base_url = os.getenv("TWILIO_WEBHOOK_BASE_URL", "https://your-webhook-url.com").rstrip("/")
+
         if all([self.account_sid, self.auth_token, self.phone_number]):
-            self.client = Client(self.account_sid, self.auth_token)
+            self.client = TwilioRestClient(
+                self.account_sid,
+                self.auth_token,
+                base_url=os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com"),
+                pool_size=int(os.getenv("TWILIO_POOL_SIZE", "20")),
+                timeout_seconds=float(os.getenv("TWILIO_TIMEOUT_SECONDS", "10")),
+                max_attempts=int(os.getenv("TWILIO_MAX_ATTEMPTS", "3")),
+            )
             self.enabled = True
         else:
             self.client = None
             self.enabled = False
-            print("Twilio credentials not found. Phone integration disabled.")
+            logger.info("Twilio credentials not found. Phone integration disabled.")
+
+        # Webhooks are answered from templates compiled from the builders below
+        self.twiml = TwiMLCache(
+            TwiMLTemplate.compile(self.generate_conference_twiml, ("conference_name", "call_summary")),
+            TwiMLTemplate.compile(self.generate_caller_twiml, ("conference_name",)),
+            max_entries=int(os.getenv("TWIML_CACHE_SIZE", "2048")),
+        )
+
+        self._dial_duration = registry.histogram("twilio_dial_duration_seconds", "Time to place both legs of a phone transfer")
+
+    def conference_url(self, conference_name: str, call_summary: str = "") -> str:
+        url = f"{self.webhook_base_url}/api/twilio/conference/{quote(conference_name, safe='')}"
+        return f"{url}?{urlencode({'call_summary': call_summary})}" if call_summary else url
+
+    def caller_url(self, conference_name: str) -> str:
+        return f"{self.webhook_base_url}/api/twilio/caller/{quote(conference_name, safe='')}"
 
-    async def initiate_phone_transfer(self, 
-                                    caller_phone: str, 
-                                    agent_phone: str, 
-                                    call_summary: str) -> Optional[str]:
+    async def initiate_phone_transfer(self,
+                                    caller_phone: str,
+                                    agent_phone: str,
+                                    call_summary: str) -> Optional[Dict]:
         """
         Initiate a warm transfer to a real phone number
-        
+
+        Both legs are dialed concurrently; if either fails, the other is hung
+        up so nobody is left alone in the conference.
+
         Args:
             caller_phone: Phone number of the caller
             agent_phone: Phone number of the receiving agent
-            call_summary: AI-generated call summary
-            
+            call_summary: AI-generated call summary, read to the agent on answer
+
         Returns:
-            Call SID if successful, None if failed
+            Call SIDs and conference name if successful, None if failed
         """
         if not self.enabled:
             raise Exception("Twilio integration not enabled")
 
-        try:
-            # Create a conference for the warm transfer
-            conference_name = f"warm-transfer-{caller_phone}-{agent_phone}"
-            
-            # Call the receiving agent first
-            agent_call = self.client.calls.create(
-                to=agent_phone,
-                from_=self.phone_number,
-                url=f"https://your-webhook-url.com/conference/{conference_name}",
-                method='POST'
-            )
-            
-            # Call the original caller
-            caller_call = self.client.calls.create(
-                to=caller_phone,
-                from_=self.phone_number,
-                url=f"https://your-webhook-url.com/conference/{conference_name}",
-                method='POST'
-            )
-            
-            return {
-                "agent_call_sid": agent_call.sid,
-                "caller_call_sid": caller_call.sid,
-                "conference_name": conference_name
-            }
-            
-        except Exception as e:
-            print(f"Twilio transfer failed: {e}")
+        # Create a conference for the warm transfer
+        conference_name = f"warm-transfer-{caller_phone}-{agent_phone}"
+        started = time.perf_counter()
+
+        agent_call, caller_call = await asyncio.gather(
+            self.client.create_call(agent_phone, self.phone_number, self.conference_url(conference_name, call_summary)),
+            self.client.create_call(caller_phone, self.phone_number, self.caller_url(conference_name)),
+            return_exceptions=True,
+        )
+        self._dial_duration.observe(time.perf_counter() - started)
+
+        failed = [leg for leg in (agent_call, caller_call) if isinstance(leg, BaseException)]
+        if failed:
+            for leg in (agent_call, caller_call):
+                if not isinstance(leg, BaseException):
+                    try:
+                        await self.client.end_call(leg["sid"])
+                    except Exception as e:
+                        logger.warning("Failed to hang up transfer leg", extra={"call_sid": leg["sid"], "error": str(e)})
+            logger.warning("Twilio transfer failed", extra={"conference_name": conference_name, "error": str(failed[0])})
             return None
 
+        return {
+            "agent_call_sid": agent_call["sid"],
+            "caller_call_sid": caller_call["sid"],
+            "conference_name": conference_name,
+            "dial_seconds": round(time.perf_counter() - started, 4)
+        }
+
     def generate_conference_twiml(self, conference_name: str, call_summary: str) -> str:
         """
         Generate TwiML for conference with call summary announcement
         """
         response = VoiceResponse()
-        
+
         # Play call summary to the receiving agent
         response.say(f"Warm transfer initiated. Call summary: {call_summary}")
-        
+
         # Join the conference
         response.dial().conference(conference_name)
-        
+
         return str(response)
 
     def generate_caller_twiml(self, conference_name: str) -> str:
@@ -88,13 +126,13 @@ class TwilioIntegration:
         Generate TwiML for caller to join conference
         """
         response = VoiceResponse()
-        
+
         # Brief hold music or message
         response.say("Please hold while we connect you to the next available agent.")
-        
+
         # Join the conference
         response.dial().conference(conference_name)
-        
+
         return str(response)
 
     async def send_sms_summary(self, agent_phone: str, call_summary: str) -> bool:
@@ -105,45 +143,53 @@ class TwilioIntegration:
             return False
 
         try:
-            message = self.client.messages.create(
-                body=f"Warm Transfer Summary: {call_summary}",
-                from_=self.phone_number,
-                to=agent_phone
-            )
+            await self.client.create_message(agent_phone, self.phone_number, f"Warm Transfer Summary: {call_summary}")
             return True
         except Exception as e:
-            print(f"SMS sending failed: {e}")
+            logger.warning("SMS sending failed", extra={"error": str(e)})
             return False
 
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+
 # Example usage in FastAPI routes
-def add_twilio_routes(app):
-    """Add Twilio-specific routes to FastAPI app"""
-    
+def add_twilio_routes(app) -> TwilioIntegration:
+    """Add Twilio-specific routes to FastAPI app; the caller closes the returned integration on shutdown"""
+
     twilio_integration = TwilioIntegration()
-    
+
     @app.post("/api/twilio/transfer")
     async def twilio_transfer(caller_phone: str, agent_phone: str, call_summary: str):
         """Initiate warm transfer via Twilio"""
         if not twilio_integration.enabled:
             raise HTTPException(status_code=400, detail="Twilio integration not enabled")
-        
+
         result = await twilio_integration.initiate_phone_transfer(
             caller_phone, agent_phone, call_summary
         )
-        
+
         if result:
             return {"status": "success", "transfer_info": result}
         else:
             raise HTTPException(status_code=500, detail="Transfer failed")
-    
+
     @app.post("/api/twilio/conference/{conference_name}")
     async def conference_webhook(conference_name: str, call_summary: str = ""):
         """Webhook for conference TwiML generation"""
-        twiml = twilio_integration.generate_conference_twiml(conference_name, call_summary)
+        twiml = twilio_integration.twiml.conference(conference_name, call_summary)
         return Response(content=twiml, media_type="application/xml")
-    
+
+    @app.post("/api/twilio/caller/{conference_name}")
+    async def caller_webhook(conference_name: str):
+        """Webhook for the caller leg: hold message, then join the conference"""
+        twiml = twilio_integration.twiml.caller(conference_name)
+        return Response(content=twiml, media_type="application/xml")
+
     @app.post("/api/twilio/sms-summary")
     async def send_sms_summary(agent_phone: str, call_summary: str):
         """Send call summary via SMS"""
         success = await twilio_integration.send_sms_summary(agent_phone, call_summary)
-        return {"status": "success" if success else "failed"}
\ No newline at end of file
+        return {"status": "success" if success else "failed"}
+
+    return twilio_integration
@@ -0,0 +1,107 @@
+"""
+TwiML Templates
+Precompiled TwiML responses with escaped substitution and a per-conference cache
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+from xml.sax.saxutils import escape
+
+from metrics import registry
+
+
+class TwiMLTemplate:
+    """
+    TwiML document split into literal text and named slots
+
+    Built by rendering the real VoiceResponse builder once with marker values
+    and splitting its output on the markers, so the template always matches
+    what the builder would produce. Rendering XML-escapes each value and
+    joins the pieces; substituted values are never scanned for markers.
+    """
+
+    def __init__(self, parts: List[Tuple[bool, str]]):
+        self.parts = parts  # (is_slot, literal text or slot name)
+
+    @classmethod
+    def compile(cls, build: Callable[..., str], slots: Tuple[str, ...]) -> "TwiMLTemplate":
+        markers = {name: f"__twiml_slot_{name}__" for name in slots}
+        rendered = build(**markers)
+        parts: List[Tuple[bool, str]] = []
+        remaining = rendered
+        while remaining:
+            # Next marker in document order
+            found = [(remaining.find(marker), name) for name, marker in markers.items() if marker in remaining]
+            if not found:
+                parts.append((False, remaining))
+                break
+            index, name = min(found)
+            if index:
+                parts.append((False, remaining[:index]))
+            parts.append((True, name))
+            remaining = remaining[index + len(markers[name]):]
+        missing = set(slots) - {value for is_slot, value in parts if is_slot}
+        if missing:
+            raise ValueError(f"Builder output does not contain slots: {', '.join(sorted(missing))}")
+        return cls(parts)
+
+    def render(self, **values: str) -> str:
+        return "".join(escape(values[value]) if is_slot else value for is_slot, value in self.parts)
+
+
+class TwiMLCache:
+    """
+    Serves the conference webhooks from precompiled templates
+
+    Rendered documents are cached as bytes, keyed by conference name (and a
+    hash of the summary for the agent leg) in one LRU of max_entries, so
+    Twilio retries and repeated joins to a conference are a dict lookup.
+    """
+
+    def __init__(self,
+                 conference_template: TwiMLTemplate,
+                 caller_template: TwiMLTemplate,
+                 max_entries: int = 2048):
+        self.conference_template = conference_template
+        self.caller_template = caller_template
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+
+        self._hits = registry.counter("twiml_cache_hits_total", "TwiML webhooks answered from cache")
+        self._misses = registry.counter("twiml_cache_misses_total", "TwiML documents rendered from a template")
+
+    def _get(self, key: Tuple[str, str, str], render: Callable[[], str]) -> bytes:
+        document = self._entries.get(key)
+        if document is not None:
+            self._entries.move_to_end(key)
+            self._hits.inc()
+            return document
+        self._misses.inc()
+        document = render().encode("utf-8")
+        if self.max_entries > 0:
+            self._entries[key] = document
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return document
+
+    def conference(self, conference_name: str, call_summary: str) -> bytes:
+        summary_hash = hashlib.blake2b(call_summary.encode("utf-8"), digest_size=12).hexdigest()
+        return self._get(
+            ("conference", conference_name, summary_hash),
+            lambda: self.conference_template.render(conference_name=conference_name, call_summary=call_summary),
+        )
+
+    def caller(self, conference_name: str) -> bytes:
+        return self._get(
+            ("caller", conference_name, ""),
+            lambda: self.caller_template.render(conference_name=conference_name),
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": int(self._hits.value),
+            "misses": int(self._misses.value),
+        }